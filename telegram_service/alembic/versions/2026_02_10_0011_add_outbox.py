@@ -0,0 +1,73 @@
+"""add telegram outbox table
+
+Revision ID: 2026_02_10_0011
+Revises: 2026_02_08_0010
+Create Date: 2026-02-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "2026_02_10_0011"
+down_revision = "2026_02_08_0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        sa.text(
+            """
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1
+                    FROM pg_type
+                    WHERE typname = 'outbox_status'
+                ) THEN
+                    CREATE TYPE outbox_status AS ENUM ('PENDING', 'SENT', 'DEAD');
+                END IF;
+            END
+            $$;
+            """
+        )
+    )
+
+    outbox_status_enum = postgresql.ENUM(
+        "PENDING",
+        "SENT",
+        "DEAD",
+        name="outbox_status",
+        create_type=False,
+    )
+
+    op.create_table(
+        "outbox",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("kind", sa.String(length=64), nullable=False),
+        sa.Column("method", sa.String(length=32), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("status", outbox_status_enum, nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("available_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_outbox_pending_available_at",
+        "outbox",
+        ["available_at", "id"],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbox_pending_available_at", table_name="outbox")
+    op.drop_table("outbox")
+    op.execute(sa.text("DROP TYPE IF EXISTS outbox_status"))
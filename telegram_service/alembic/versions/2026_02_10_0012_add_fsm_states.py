@@ -0,0 +1,38 @@
+"""add persistent fsm state table
+
+Revision ID: 2026_02_10_0012
+Revises: 2026_02_10_0011
+Create Date: 2026-02-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "2026_02_10_0012"
+down_revision = "2026_02_10_0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "fsm_states",
+        sa.Column("bot_id", sa.BigInteger(), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("thread_id", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column("destiny", sa.String(length=64), nullable=False, server_default="default"),
+        sa.Column("state", sa.String(length=255), nullable=True),
+        sa.Column("data", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("bot_id", "chat_id", "user_id", "thread_id", "destiny"),
+    )
+    op.create_index("ix_fsm_states_expires_at", "fsm_states", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_fsm_states_expires_at", table_name="fsm_states")
+    op.drop_table("fsm_states")
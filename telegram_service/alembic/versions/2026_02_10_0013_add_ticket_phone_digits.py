@@ -0,0 +1,72 @@
+"""add stored client phone digits to tickets
+
+Revision ID: 2026_02_10_0013
+Revises: 2026_02_10_0012
+Create Date: 2026-02-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "2026_02_10_0013"
+down_revision = "2026_02_10_0012"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    op.add_column("tickets", sa.Column("client_phone_digits", sa.String(length=64), nullable=True))
+
+    # Backfill and index builds run outside the migration transaction: every batch commits on its own
+    # and CONCURRENTLY keeps tickets writable while the indexes are built.
+    ctx = op.get_context()
+    with ctx.autocommit_block():
+        bind = op.get_bind()
+        last_id = 0
+        while True:
+            upper_id = bind.execute(
+                sa.text(
+                    """
+                    SELECT max(id) FROM (
+                        SELECT id FROM tickets WHERE id > :last_id ORDER BY id LIMIT :batch_size
+                    ) AS batch
+                    """
+                ),
+                {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE},
+            ).scalar()
+            if upper_id is None:
+                break
+            bind.execute(
+                sa.text(
+                    """
+                    UPDATE tickets
+                    SET client_phone_digits = regexp_replace(client_phone, '\\D', '', 'g')
+                    WHERE id > :last_id AND id <= :upper_id AND client_phone_digits IS NULL
+                    """
+                ),
+                {"last_id": last_id, "upper_id": upper_id},
+            )
+            last_id = upper_id
+
+        op.execute(
+            sa.text(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_client_phone_digits_id "
+                "ON tickets (client_phone_digits, id DESC)"
+            )
+        )
+        op.execute(
+            sa.text(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_client_phone_digits_trgm "
+                "ON tickets USING gin (client_phone_digits gin_trgm_ops)"
+            )
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tickets_client_phone_digits_trgm", table_name="tickets")
+    op.drop_index("ix_tickets_client_phone_digits_id", table_name="tickets")
+    op.drop_column("tickets", "client_phone_digits")
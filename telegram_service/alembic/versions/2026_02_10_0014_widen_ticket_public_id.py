@@ -0,0 +1,36 @@
+"""widen ticket public id for daily sequences above 99
+
+Revision ID: 2026_02_10_0014
+Revises: 2026_02_10_0013
+Create Date: 2026-02-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "2026_02_10_0014"
+down_revision = "2026_02_10_0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Growing a varchar limit is a catalog-only change in Postgres: no table rewrite, no index rebuild.
+    op.alter_column(
+        "tickets",
+        "public_id",
+        existing_type=sa.String(length=8),
+        type_=sa.String(length=12),
+        existing_nullable=False,
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "tickets",
+        "public_id",
+        existing_type=sa.String(length=12),
+        type_=sa.String(length=8),
+        existing_nullable=False,
+    )
@@ -0,0 +1,69 @@
+"""add composite and partial indexes for ticket lists and finance sums
+
+Revision ID: 2026_02_10_0015
+Revises: 2026_02_10_0014
+Create Date: 2026-02-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "2026_02_10_0015"
+down_revision = "2026_02_10_0014"
+branch_labels = None
+depends_on = None
+
+
+# name, table, columns, partial predicate
+INDEXES = (
+    ("ix_tickets_queue_id", "tickets", ["status", sa.text("id DESC")], "assigned_executor_id IS NULL"),
+    ("ix_tickets_executor_status_id", "tickets", ["assigned_executor_id", "status", sa.text("id DESC")], None),
+    (
+        "ix_tickets_executor_closed_keyset",
+        "tickets",
+        [
+            "assigned_executor_id",
+            "status",
+            sa.text("closed_at DESC NULLS LAST"),
+            sa.text("updated_at DESC"),
+            sa.text("id DESC"),
+        ],
+        None,
+    ),
+    ("ix_tickets_transfer_status_id", "tickets", ["transfer_status", sa.text("id DESC")], None),
+    ("ix_tickets_repeat_id", "tickets", [sa.text("id DESC")], "is_repeat IS true"),
+    ("ix_tickets_status_closed_at", "tickets", ["status", "closed_at"], None),
+    ("ix_tickets_status_net_profit_id", "tickets", ["status", "net_profit", sa.text("id DESC")], None),
+    ("ix_tickets_admin_status_closed_at", "tickets", ["created_by_admin_id", "status", "closed_at"], None),
+    (
+        "ix_tickets_junior_status_closed_at",
+        "tickets",
+        ["junior_master_id", "status", "closed_at"],
+        "junior_master_id IS NOT NULL",
+    ),
+    ("ix_project_transactions_type_occurred_at", "project_transactions", ["type", "occurred_at"], None),
+)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction; tickets stay writable while each index is built.
+    ctx = op.get_context()
+    with ctx.autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+            )
+
+
+def downgrade() -> None:
+    ctx = op.get_context()
+    with ctx.autocommit_block():
+        for name, table, _columns, _where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
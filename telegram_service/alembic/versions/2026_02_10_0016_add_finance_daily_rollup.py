@@ -0,0 +1,122 @@
+"""add daily finance rollup table
+
+Revision ID: 2026_02_10_0016
+Revises: 2026_02_10_0015
+Create Date: 2026-02-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "2026_02_10_0016"
+down_revision = "2026_02_10_0015"
+branch_labels = None
+depends_on = None
+
+
+# Same aggregate as app.services.finance_rollup.rollup_source(); kept as SQL so the migration does not
+# depend on application code.
+BACKFILL_SQL = """
+INSERT INTO finance_daily_rollup (
+    user_id, role, day, ticket_count, confirmed_count, repeat_count, earned, net_profit,
+    transfer_confirmed, transfer_pending, manual_income, manual_expense
+)
+SELECT user_id, role, day, sum(ticket_count), sum(confirmed_count), sum(repeat_count), sum(earned),
+       sum(net_profit), sum(transfer_confirmed), sum(transfer_pending), sum(manual_income), sum(manual_expense)
+FROM (
+    SELECT
+        r.user_id,
+        r.role::finance_rollup_role AS role,
+        t.closed_at::date AS day,
+        1 AS ticket_count,
+        CASE WHEN t.transfer_status = 'CONFIRMED' THEN 1 ELSE 0 END AS confirmed_count,
+        CASE WHEN t.is_repeat IS true THEN 1 ELSE 0 END AS repeat_count,
+        coalesce(r.earned, 0) AS earned,
+        coalesce(t.net_profit, 0) AS net_profit,
+        CASE WHEN t.transfer_status = 'CONFIRMED' THEN coalesce(r.transfer, 0) ELSE 0 END AS transfer_confirmed,
+        CASE WHEN t.transfer_status = 'CONFIRMED' THEN 0 ELSE coalesce(r.transfer, 0) END AS transfer_pending,
+        0 AS manual_income,
+        0 AS manual_expense
+    FROM tickets AS t
+    CROSS JOIN LATERAL (
+        VALUES
+            (
+                t.assigned_executor_id,
+                'EXECUTOR',
+                t.executor_earned_amount,
+                coalesce(t.net_profit, 0) - coalesce(t.executor_earned_amount, 0)
+            ),
+            (t.created_by_admin_id, 'ADMIN', t.admin_earned_amount, NULL),
+            (t.junior_master_id, 'JUNIOR_MASTER', t.junior_master_earned_amount, NULL),
+            (0, 'PROJECT', t.project_take_amount, coalesce(t.net_profit, 0))
+    ) AS r (user_id, role, earned, transfer)
+    WHERE t.status = 'CLOSED' AND t.closed_at IS NOT NULL AND r.user_id IS NOT NULL
+    UNION ALL
+    SELECT
+        0,
+        'PROJECT'::finance_rollup_role,
+        occurred_at::date,
+        0, 0, 0, 0, 0, 0, 0,
+        CASE WHEN type = 'INCOME' THEN amount ELSE 0 END,
+        CASE WHEN type = 'EXPENSE' THEN amount ELSE 0 END
+    FROM project_transactions
+) AS parts
+GROUP BY user_id, role, day
+"""
+
+
+def upgrade() -> None:
+    op.execute(
+        sa.text(
+            """
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1
+                    FROM pg_type
+                    WHERE typname = 'finance_rollup_role'
+                ) THEN
+                    CREATE TYPE finance_rollup_role AS ENUM ('EXECUTOR', 'ADMIN', 'JUNIOR_MASTER', 'PROJECT');
+                END IF;
+            END
+            $$;
+            """
+        )
+    )
+
+    rollup_role_enum = postgresql.ENUM(
+        "EXECUTOR",
+        "ADMIN",
+        "JUNIOR_MASTER",
+        "PROJECT",
+        name="finance_rollup_role",
+        create_type=False,
+    )
+
+    counter = {"nullable": False, "server_default": sa.text("0")}
+    op.create_table(
+        "finance_daily_rollup",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("role", rollup_role_enum, nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("ticket_count", sa.Integer(), **counter),
+        sa.Column("confirmed_count", sa.Integer(), **counter),
+        sa.Column("repeat_count", sa.Integer(), **counter),
+        sa.Column("earned", sa.Numeric(14, 2), **counter),
+        sa.Column("net_profit", sa.Numeric(14, 2), **counter),
+        sa.Column("transfer_confirmed", sa.Numeric(14, 2), **counter),
+        sa.Column("transfer_pending", sa.Numeric(14, 2), **counter),
+        sa.Column("manual_income", sa.Numeric(14, 2), **counter),
+        sa.Column("manual_expense", sa.Numeric(14, 2), **counter),
+        sa.PrimaryKeyConstraint("user_id", "role", "day"),
+    )
+    op.create_index("ix_finance_daily_rollup_day", "finance_daily_rollup", ["day"], unique=False)
+    op.execute(sa.text(BACKFILL_SQL))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_finance_daily_rollup_day", table_name="finance_daily_rollup")
+    op.drop_table("finance_daily_rollup")
+    op.execute(sa.text("DROP TYPE IF EXISTS finance_rollup_role"))
@@ -0,0 +1,113 @@
+"""add export jobs and export result cache
+
+Revision ID: 2026_02_10_0017
+Revises: 2026_02_10_0016
+Create Date: 2026-02-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "2026_02_10_0017"
+down_revision = "2026_02_10_0016"
+branch_labels = None
+depends_on = None
+
+
+# name, table
+UPDATED_AT_INDEXES = (
+    ("ix_tickets_updated_at", "tickets"),
+    ("ix_project_transactions_updated_at", "project_transactions"),
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        sa.text(
+            """
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1
+                    FROM pg_type
+                    WHERE typname = 'export_job_status'
+                ) THEN
+                    CREATE TYPE export_job_status AS ENUM ('QUEUED', 'RUNNING', 'DONE', 'FAILED', 'CANCELLED');
+                END IF;
+            END
+            $$;
+            """
+        )
+    )
+
+    export_job_status_enum = postgresql.ENUM(
+        "QUEUED",
+        "RUNNING",
+        "DONE",
+        "FAILED",
+        "CANCELLED",
+        name="export_job_status",
+        create_type=False,
+    )
+
+    op.create_table(
+        "export_jobs",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("report_type", sa.String(length=32), nullable=False),
+        sa.Column("period_start", sa.DateTime(), nullable=True),
+        sa.Column("period_end", sa.DateTime(), nullable=True),
+        sa.Column("period_label", sa.String(length=64), nullable=False),
+        sa.Column("requested_by", sa.BigInteger(), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("progress_chat_id", sa.BigInteger(), nullable=True),
+        sa.Column("progress_message_id", sa.BigInteger(), nullable=True),
+        sa.Column("status", export_job_status_enum, nullable=False),
+        sa.Column("lease_until", sa.DateTime(), nullable=True),
+        sa.Column("watermark", sa.DateTime(), nullable=True),
+        sa.Column("from_cache", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["requested_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_export_jobs_open_id",
+        "export_jobs",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("status IN ('QUEUED', 'RUNNING')"),
+    )
+
+    op.create_table(
+        "export_results",
+        sa.Column("report_type", sa.String(length=32), nullable=False),
+        sa.Column("period_key", sa.String(length=64), nullable=False),
+        sa.Column("watermark", sa.DateTime(), nullable=False),
+        sa.Column("documents", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.PrimaryKeyConstraint("report_type", "period_key", "watermark"),
+    )
+
+    # The data watermark is max(updated_at) over these tables; without an index each export scans them.
+    # CONCURRENTLY cannot run inside a transaction; both tables stay writable while the indexes are built.
+    ctx = op.get_context()
+    with ctx.autocommit_block():
+        for name, table in UPDATED_AT_INDEXES:
+            op.create_index(
+                name, table, ["updated_at"], unique=False, if_not_exists=True, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    ctx = op.get_context()
+    with ctx.autocommit_block():
+        for name, table in reversed(UPDATED_AT_INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    op.drop_table("export_results")
+    op.drop_index("ix_export_jobs_open_id", table_name="export_jobs")
+    op.drop_table("export_jobs")
+    op.execute(sa.text("DROP TYPE IF EXISTS export_job_status"))
@@ -0,0 +1,30 @@
+"""add job checkpoints table
+
+Revision ID: 2026_02_10_0018
+Revises: 2026_02_10_0017
+Create Date: 2026-02-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "2026_02_10_0018"
+down_revision = "2026_02_10_0017"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_checkpoints",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("position_at", sa.DateTime(), nullable=False),
+        sa.Column("position_id", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_checkpoints")
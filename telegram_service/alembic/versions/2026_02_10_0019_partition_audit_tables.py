@@ -0,0 +1,116 @@
+"""partition ticket_events and audit_events by month
+
+Revision ID: 2026_02_10_0019
+Revises: 2026_02_10_0018
+Create Date: 2026-02-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "2026_02_10_0019"
+down_revision = "2026_02_10_0018"
+branch_labels = None
+depends_on = None
+
+
+# Same default as AUDIT_PARTITION_MONTHS_AHEAD; the scheduler job keeps creating months after this.
+PARTITION_MONTHS_AHEAD = 3
+
+# One partition per month from the oldest existing row up to PARTITION_MONTHS_AHEAD months from now, named
+# like app.services.audit_partitions.partition_name(), plus a default partition for anything outside them.
+CREATE_PARTITIONS_SQL = """
+DO $$
+DECLARE
+    part_start date;
+BEGIN
+    SELECT date_trunc('month', coalesce(min(created_at), timezone('utc', now())))::date
+    INTO part_start
+    FROM {source};
+    WHILE part_start <= (date_trunc('month', timezone('utc', now())) + interval '{ahead} months')::date LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+            '{table}_' || to_char(part_start, 'YYYY_MM'),
+            part_start,
+            (part_start + interval '1 month')::date
+        );
+        part_start := (part_start + interval '1 month')::date;
+    END LOOP;
+    CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;
+END $$;
+"""
+
+TICKET_EVENT_COLUMNS = "id, ticket_id, actor_id, action, payload, created_at"
+AUDIT_EVENT_COLUMNS = "id, actor_id, action, entity_type, entity_id, payload, created_at"
+
+
+def _ticket_events_columns(*, partitioned: bool) -> list:
+    return [
+        sa.Column(
+            "id",
+            sa.BigInteger(),
+            autoincrement=False,
+            nullable=False,
+            server_default=sa.text("nextval('ticket_events_id_seq'::regclass)"),
+        ),
+        sa.Column("ticket_id", sa.BigInteger(), nullable=False),
+        sa.Column("actor_id", sa.BigInteger(), nullable=True),
+        sa.Column("action", sa.String(length=100), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("timezone('utc', now())")),
+        sa.PrimaryKeyConstraint("id", "created_at") if partitioned else sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(["ticket_id"], ["tickets.id"]),
+        sa.ForeignKeyConstraint(["actor_id"], ["users.id"]),
+    ]
+
+
+def _audit_events_columns(*, partitioned: bool) -> list:
+    return [
+        sa.Column(
+            "id",
+            sa.BigInteger(),
+            autoincrement=False,
+            nullable=False,
+            server_default=sa.text("nextval('audit_events_id_seq'::regclass)"),
+        ),
+        sa.Column("actor_id", sa.BigInteger(), nullable=True),
+        sa.Column("action", sa.String(length=100), nullable=False),
+        sa.Column("entity_type", sa.String(length=100), nullable=False),
+        sa.Column("entity_id", sa.String(length=64), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("timezone('utc', now())")),
+        sa.PrimaryKeyConstraint("id", "created_at") if partitioned else sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(["actor_id"], ["users.id"]),
+    ]
+
+
+def _swap(table: str, columns: list, copy_columns: str, *, partitioned: bool) -> None:
+    """Rebuild ``table`` from ``columns``, keeping its rows and its id sequence."""
+    old = f"{table}_legacy" if partitioned else f"{table}_partitioned"
+    op.rename_table(table, old)
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+    if partitioned:
+        op.create_table(table, *columns, postgresql_partition_by="RANGE (created_at)")
+        op.execute(CREATE_PARTITIONS_SQL.format(table=table, source=old, ahead=PARTITION_MONTHS_AHEAD))
+    else:
+        op.create_table(table, *columns)
+    op.execute(f"INSERT INTO {table} ({copy_columns}) SELECT {copy_columns} FROM {old}")
+    # Dropping the old table would drop the sequence it owns.
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.drop_table(old)
+
+
+def upgrade() -> None:
+    _swap("ticket_events", _ticket_events_columns(partitioned=True), TICKET_EVENT_COLUMNS, partitioned=True)
+    _swap("audit_events", _audit_events_columns(partitioned=True), AUDIT_EVENT_COLUMNS, partitioned=True)
+    # Created on the parent after the copy; every partition gets its own copy of each index.
+    op.create_index("ix_ticket_events_ticket_id_created_at", "ticket_events", ["ticket_id", "created_at"])
+    op.create_index("ix_ticket_events_created_at", "ticket_events", ["created_at"])
+    op.create_index("ix_audit_events_created_at", "audit_events", ["created_at"])
+
+
+def downgrade() -> None:
+    # Rows of partitions already archived and dropped by the retention job are not restored.
+    _swap("audit_events", _audit_events_columns(partitioned=False), AUDIT_EVENT_COLUMNS, partitioned=False)
+    _swap("ticket_events", _ticket_events_columns(partitioned=False), TICKET_EVENT_COLUMNS, partitioned=False)
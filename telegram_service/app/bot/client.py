@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+
+from app.bot.middlewares.unit_of_work import ReleaseConnectionMiddleware
+from app.bot.send_scheduler import SendScheduler
+from app.core.config import Settings, get_settings
+
+
+class PooledAiohttpSession(AiohttpSession):
+    """aiohttp session with a bounded, keep-alive connection pool to the Bot API."""
+
+    def __init__(self, *, limit: int, keepalive_timeout: float, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._connector_init.update(
+            limit=limit,
+            limit_per_host=limit,
+            keepalive_timeout=keepalive_timeout,
+        )
+
+
+def create_bot(settings: Settings | None = None, *, send_scheduler: SendScheduler | None = None) -> Bot:
+    settings = settings or get_settings()
+    api = TelegramAPIServer.from_base(settings.telegram_api_base_url) if settings.telegram_api_base_url else PRODUCTION
+    session = PooledAiohttpSession(
+        api=api,
+        limit=settings.telegram_connection_limit,
+        keepalive_timeout=settings.telegram_keepalive_timeout,
+    )
+    # Outermost: a handler's DB connection goes back to the pool before the call waits in the scheduler.
+    session.middleware(ReleaseConnectionMiddleware())
+    # Every Bot API call goes through the scheduler, so handler replies are paced as well.
+    session.middleware(send_scheduler or SendScheduler(settings))
+    return Bot(settings.bot_token, session=session)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from aiogram import Dispatcher
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.bot.fsm_storage import PostgresStorage
+from app.bot.handlers import backup, finance, help as help_handler
+from app.bot.handlers import issues, junior_links, junior_tickets, project_settings, request_chat, start, ticket_create, ticket_execution, ticket_list, users
+from app.bot.middlewares.identity import IdentityMiddleware
+from app.bot.middlewares.unit_of_work import UnitOfWorkMiddleware
+from app.core.config import Settings, get_settings
+
+
+def create_fsm_storage(settings: Settings) -> BaseStorage:
+    if settings.fsm_storage == "memory":
+        return MemoryStorage()
+    return PostgresStorage(
+        state_ttl=timedelta(hours=settings.fsm_state_ttl_hours),
+        cache_ttl=settings.fsm_read_cache_ttl(),
+        cache_size=settings.fsm_cache_size,
+        flush_interval=settings.fsm_flush_interval,
+    )
+
+
+def create_dispatcher(settings: Settings | None = None) -> Dispatcher:
+    dispatcher = Dispatcher(storage=create_fsm_storage(settings or get_settings()))
+    dispatcher.update.outer_middleware(UnitOfWorkMiddleware())
+    dispatcher.update.outer_middleware(IdentityMiddleware())
+    dispatcher.include_router(start.router)
+    dispatcher.include_router(ticket_create.router)
+    dispatcher.include_router(ticket_execution.router)
+    dispatcher.include_router(ticket_list.router)
+    dispatcher.include_router(request_chat.router)
+    dispatcher.include_router(users.router)
+    dispatcher.include_router(backup.router)
+    dispatcher.include_router(junior_links.router)
+    dispatcher.include_router(junior_tickets.router)
+    dispatcher.include_router(finance.router)
+    dispatcher.include_router(issues.router)
+    dispatcher.include_router(project_settings.router)
+    dispatcher.include_router(help_handler.router)
+    return dispatcher
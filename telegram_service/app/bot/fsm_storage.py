@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.models import FsmState
+from app.db.session import async_session_factory
+
+
+logger = logging.getLogger(__name__)
+
+TYPE_TAG = "__fsm__"
+CLEANUP_INTERVAL_SECONDS = 600
+
+_KeyTuple = tuple[int, int, int, int, str]
+
+
+def encode_fsm_value(value: Any) -> Any:
+    """Turn FSM data into JSON while keeping Decimal/date/enum values distinguishable on the way back."""
+    if isinstance(value, Enum):
+        enum_type = type(value)
+        return {TYPE_TAG: "enum", "type": f"{enum_type.__module__}:{enum_type.__qualname__}", "value": value.value}
+    if isinstance(value, Decimal):
+        return {TYPE_TAG: "decimal", "value": str(value)}
+    if isinstance(value, datetime):
+        return {TYPE_TAG: "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {TYPE_TAG: "date", "value": value.isoformat()}
+    if isinstance(value, UUID):
+        return {TYPE_TAG: "uuid", "value": str(value)}
+    if isinstance(value, tuple):
+        return {TYPE_TAG: "tuple", "value": [encode_fsm_value(item) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {TYPE_TAG: "set", "value": [encode_fsm_value(item) for item in value]}
+    if isinstance(value, dict):
+        return {str(key): encode_fsm_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [encode_fsm_value(item) for item in value]
+    return value
+
+
+def decode_fsm_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [decode_fsm_value(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    tag = value.get(TYPE_TAG)
+    if tag is None:
+        return {key: decode_fsm_value(item) for key, item in value.items()}
+    raw = value.get("value")
+    if tag == "enum":
+        return _resolve_enum(value["type"])(raw)
+    if tag == "decimal":
+        return Decimal(raw)
+    if tag == "datetime":
+        return datetime.fromisoformat(raw)
+    if tag == "date":
+        return date.fromisoformat(raw)
+    if tag == "uuid":
+        return UUID(raw)
+    if tag == "tuple":
+        return tuple(decode_fsm_value(item) for item in raw)
+    if tag == "set":
+        return {decode_fsm_value(item) for item in raw}
+    raise ValueError(f"Unknown FSM value tag {tag!r}")
+
+
+def _resolve_enum(path: str) -> type[Enum]:
+    module_name, _, qualname = path.partition(":")
+    if not module_name.startswith("app."):
+        raise ValueError(f"Refusing to load enum outside the app package: {path}")
+    target: Any = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    if not isinstance(target, type) or not issubclass(target, Enum):
+        raise ValueError(f"{path} is not an Enum")
+    return target
+
+
+@dataclass
+class _Entry:
+    state: str | None
+    data: dict[str, Any]
+    expires_at: datetime
+    loaded_at: float
+
+
+@dataclass
+class _PendingWrite:
+    state: str | None
+    data: dict[str, Any]
+    expires_at: datetime
+
+
+class PostgresStorage(BaseStorage):
+    """FSM storage in the fsm_states table with a read cache and batched write-behind flushes."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_factory,
+        *,
+        state_ttl: timedelta,
+        cache_ttl: float,
+        cache_size: int,
+        flush_interval: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self._state_ttl = state_ttl
+        self._cache_ttl = cache_ttl
+        self._cache_size = cache_size
+        self._flush_interval = flush_interval
+        self._cache: OrderedDict[_KeyTuple, _Entry] = OrderedDict()
+        self._pending: dict[_KeyTuple, _PendingWrite] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+        self._last_cleanup = 0.0
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        entry = await self._entry(key)
+        entry.state = state.state if isinstance(state, State) else state
+        self._write(key, entry)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return (await self._entry(key)).state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        entry = await self._entry(key)
+        entry.data = data.copy()
+        self._write(key, entry)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return (await self._entry(key)).data.copy()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            try:
+                await self._write_batch(pending)
+            except Exception:
+                # Keep newer writes that arrived meanwhile; re-queue the rest for the next flush.
+                for key, write in pending.items():
+                    self._pending.setdefault(key, write)
+                raise
+
+    async def end_update(self) -> None:
+        """Write this update's changes before it finishes when reads are strict (cache TTL 0).
+
+        Strict reads mean several processes share chats; the next update of the chat may land on another
+        process, which must not read the row from before this one.
+        """
+        if self._cache_ttl <= 0:
+            await self.flush()
+
+    async def delete_expired(self) -> int:
+        async with self._session_factory() as session:
+            result = await session.execute(delete(FsmState).where(FsmState.expires_at < datetime.utcnow()))
+            await session.commit()
+        return result.rowcount or 0
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+
+    async def _entry(self, key: StorageKey) -> _Entry:
+        cache_key = self._cache_key(key)
+        now = datetime.utcnow()
+        entry = self._cache.get(cache_key)
+        fresh = entry is not None and (
+            cache_key in self._pending or time.monotonic() - entry.loaded_at <= self._cache_ttl
+        )
+        if not fresh:
+            entry = await self._load(cache_key)
+            self._remember(cache_key, entry)
+        else:
+            self._cache.move_to_end(cache_key)
+        if entry.expires_at <= now and (entry.state is not None or entry.data):
+            entry.state = None
+            entry.data = {}
+        return entry
+
+    async def _load(self, cache_key: _KeyTuple) -> _Entry:
+        async with self._session_factory() as session:
+            result = await session.execute(
+                select(FsmState.state, FsmState.data, FsmState.expires_at).where(
+                    tuple_(
+                        FsmState.bot_id,
+                        FsmState.chat_id,
+                        FsmState.user_id,
+                        FsmState.thread_id,
+                        FsmState.destiny,
+                    )
+                    == cache_key
+                )
+            )
+            row = result.one_or_none()
+        loaded_at = time.monotonic()
+        if row is None or row.expires_at <= datetime.utcnow():
+            return _Entry(state=None, data={}, expires_at=datetime.max, loaded_at=loaded_at)
+        return _Entry(
+            state=row.state,
+            data=decode_fsm_value(row.data or {}),
+            expires_at=row.expires_at,
+            loaded_at=loaded_at,
+        )
+
+    def _write(self, key: StorageKey, entry: _Entry) -> None:
+        cache_key = self._cache_key(key)
+        entry.expires_at = datetime.utcnow() + self._state_ttl
+        self._remember(cache_key, entry)
+        # Encode now so later in-place mutations by handlers do not leak into the flushed row.
+        self._pending[cache_key] = _PendingWrite(
+            state=entry.state,
+            data=encode_fsm_value(entry.data),
+            expires_at=entry.expires_at,
+        )
+        self._ensure_flusher()
+
+    def _remember(self, cache_key: _KeyTuple, entry: _Entry) -> None:
+        self._cache[cache_key] = entry
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self._cache_size:
+            oldest_key = next(iter(self._cache))
+            if oldest_key in self._pending:
+                break
+            self._cache.popitem(last=False)
+
+    def _ensure_flusher(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_cleanup >= CLEANUP_INTERVAL_SECONDS:
+                    self._last_cleanup = time.monotonic()
+                    removed = await self.delete_expired()
+                    if removed:
+                        logger.info("[fsm] removed %s expired states", removed)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001 - retry on the next tick
+                logger.exception("[fsm] flush failed, pending=%s", len(self._pending))
+
+    async def _write_batch(self, pending: dict[_KeyTuple, _PendingWrite]) -> None:
+        now = datetime.utcnow()
+        upserts = []
+        deletes = []
+        for cache_key, write in pending.items():
+            if write.state is None and not write.data:
+                deletes.append(cache_key)
+                continue
+            bot_id, chat_id, user_id, thread_id, destiny = cache_key
+            upserts.append(
+                {
+                    "bot_id": bot_id,
+                    "chat_id": chat_id,
+                    "user_id": user_id,
+                    "thread_id": thread_id,
+                    "destiny": destiny,
+                    "state": write.state,
+                    "data": write.data,
+                    "updated_at": now,
+                    "expires_at": write.expires_at,
+                }
+            )
+        async with self._session_factory() as session:
+            if upserts:
+                statement = insert(FsmState).values(upserts)
+                await session.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=["bot_id", "chat_id", "user_id", "thread_id", "destiny"],
+                        set_={
+                            "state": statement.excluded.state,
+                            "data": statement.excluded.data,
+                            "updated_at": statement.excluded.updated_at,
+                            "expires_at": statement.excluded.expires_at,
+                        },
+                    )
+                )
+            if deletes:
+                await session.execute(
+                    delete(FsmState).where(
+                        tuple_(
+                            FsmState.bot_id,
+                            FsmState.chat_id,
+                            FsmState.user_id,
+                            FsmState.thread_id,
+                            FsmState.destiny,
+                        ).in_(deletes)
+                    )
+                )
+            await session.commit()
+
+    @staticmethod
+    def _cache_key(key: StorageKey) -> _KeyTuple:
+        return key.bot_id, key.chat_id, key.user_id, key.thread_id or 0, key.destiny
@@ -15,6 +15,7 @@ from app.bot.keyboards.backup import (
 )
 from app.bot.states.backup import BackupRestoreStates
 from app.core.config import get_settings
+from app.db.models import User
 from app.db.session import async_session_factory
 from app.services.audit_service import AuditService
 from app.services.backup_service import (
@@ -24,10 +25,8 @@ from app.services.backup_service import (
     BackupOperationInProgress,
     BackupService,
 )
-from app.services.user_service import UserService
 
 router = Router()
-user_service = UserService()
 audit_service = AuditService()
 backup_service = BackupService(get_settings())
 logger = logging.getLogger(__name__)
@@ -45,18 +44,11 @@ def _format_bytes(value: int) -> str:
     return f"{size:.2f} PB"
 
 
-async def _ensure_admin(message: Message) -> tuple[bool, int | None]:
+async def _ensure_admin(message: Message, user: User) -> tuple[bool, int | None]:
     if message.chat.type != "private":
         await message.answer("Операции бэкапа доступны только в личном чате.")
         return False, None
     async with async_session_factory() as session:
-        user = await user_service.ensure_user(
-            session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None,
-        )
-        await session.commit()
         if not user.is_active or user.role not in BACKUP_ADMIN_ROLES:
             await audit_service.log_audit_event(
                 session,
@@ -72,19 +64,12 @@ async def _ensure_admin(message: Message) -> tuple[bool, int | None]:
     return True, user.id
 
 
-async def _ensure_admin_callback(callback: CallbackQuery) -> tuple[bool, int | None]:
+async def _ensure_admin_callback(callback: CallbackQuery, user: User) -> tuple[bool, int | None]:
     message = callback.message
     if message is None or message.chat.type != "private":
         await callback.answer("Доступно только в личном чате.", show_alert=True)
         return False, None
     async with async_session_factory() as session:
-        user = await user_service.ensure_user(
-            session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None,
-        )
-        await session.commit()
         if not user.is_active or user.role not in BACKUP_ADMIN_ROLES:
             await audit_service.log_audit_event(
                 session,
@@ -101,16 +86,16 @@ async def _ensure_admin_callback(callback: CallbackQuery) -> tuple[bool, int | N
 
 
 @router.message(F.text == "🛡 Резервные копии")
-async def backup_menu(message: Message) -> None:
-    allowed, _ = await _ensure_admin(message)
+async def backup_menu(message: Message, user: User) -> None:
+    allowed, _ = await _ensure_admin(message, user)
     if not allowed:
         return
     await message.answer("🛡 Резервные копии", reply_markup=backup_menu_keyboard())
 
 
 @router.callback_query(F.data == "backup:status")
-async def backup_status(callback: CallbackQuery) -> None:
-    allowed, actor_id = await _ensure_admin_callback(callback)
+async def backup_status(callback: CallbackQuery, user: User) -> None:
+    allowed, actor_id = await _ensure_admin_callback(callback, user)
     if not allowed:
         return
     await callback.answer()
@@ -143,8 +128,8 @@ async def backup_status(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "backup:run")
-async def backup_run(callback: CallbackQuery) -> None:
-    allowed, actor_id = await _ensure_admin_callback(callback)
+async def backup_run(callback: CallbackQuery, user: User) -> None:
+    allowed, actor_id = await _ensure_admin_callback(callback, user)
     if not allowed:
         return
     await callback.answer()
@@ -184,8 +169,8 @@ async def backup_run(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "backup:send")
-async def backup_send(callback: CallbackQuery, bot: Bot) -> None:
-    allowed, actor_id = await _ensure_admin_callback(callback)
+async def backup_send(callback: CallbackQuery, bot: Bot, user: User) -> None:
+    allowed, actor_id = await _ensure_admin_callback(callback, user)
     if not allowed:
         return
     await callback.answer()
@@ -229,8 +214,8 @@ async def backup_send(callback: CallbackQuery, bot: Bot) -> None:
 
 
 @router.callback_query(F.data == "backup:restore_prompt")
-async def backup_restore_prompt(callback: CallbackQuery) -> None:
-    allowed, actor_id = await _ensure_admin_callback(callback)
+async def backup_restore_prompt(callback: CallbackQuery, user: User) -> None:
+    allowed, actor_id = await _ensure_admin_callback(callback, user)
     if not allowed:
         return
     await callback.answer()
@@ -243,8 +228,8 @@ async def backup_restore_prompt(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("backup:restore_confirm:"))
-async def backup_restore_confirm(callback: CallbackQuery) -> None:
-    allowed, actor_id = await _ensure_admin_callback(callback)
+async def backup_restore_confirm(callback: CallbackQuery, user: User) -> None:
+    allowed, actor_id = await _ensure_admin_callback(callback, user)
     if not allowed:
         return
     callback_actor = int(callback.data.split(":", 2)[2])
@@ -310,8 +295,8 @@ async def backup_restore_cancel(callback: CallbackQuery, state: FSMContext) -> N
 
 
 @router.callback_query(F.data == "backup:restore_file_prompt")
-async def backup_restore_file_prompt(callback: CallbackQuery, state: FSMContext) -> None:
-    allowed, _ = await _ensure_admin_callback(callback)
+async def backup_restore_file_prompt(callback: CallbackQuery, state: FSMContext, user: User) -> None:
+    allowed, _ = await _ensure_admin_callback(callback, user)
     if not allowed:
         return
     await callback.answer()
@@ -321,8 +306,8 @@ async def backup_restore_file_prompt(callback: CallbackQuery, state: FSMContext)
 
 
 @router.message(BackupRestoreStates.waiting_for_document, F.document)
-async def backup_restore_file_receive(message: Message, state: FSMContext, bot: Bot) -> None:
-    allowed, actor_id = await _ensure_admin(message)
+async def backup_restore_file_receive(message: Message, state: FSMContext, bot: Bot, user: User) -> None:
+    allowed, actor_id = await _ensure_admin(message, user)
     if not allowed:
         return
     document = message.document
@@ -357,8 +342,8 @@ async def backup_restore_file_invalid(message: Message) -> None:
 
 
 @router.callback_query(F.data.startswith("backup:restore_file_confirm:"))
-async def backup_restore_file_confirm(callback: CallbackQuery, state: FSMContext) -> None:
-    allowed, actor_id = await _ensure_admin_callback(callback)
+async def backup_restore_file_confirm(callback: CallbackQuery, state: FSMContext, user: User) -> None:
+    allowed, actor_id = await _ensure_admin_callback(callback, user)
     if not allowed:
         return
     callback_actor = int(callback.data.split(":", 2)[2])
@@ -2,25 +2,22 @@ from __future__ import annotations
 
 from datetime import date, datetime, timedelta
 from decimal import Decimal, InvalidOperation
-from io import BytesIO
 import logging
 
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
-from aiogram.types import BufferedInputFile, CallbackQuery, Message
-from openpyxl import Workbook
-from sqlalchemy import select
+from aiogram.types import CallbackQuery, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.bot.handlers.permissions import FINANCE_EXPORT_ROLES, FINANCE_SUMMARY_ROLES, MANUAL_TX_ROLES, MASTER_ROLES
 from app.bot.keyboards.confirmations import confirm_action_keyboard
-from app.bot.keyboards.finance import period_keyboard, share_list_keyboard
+from app.bot.keyboards.finance import export_cancel_keyboard, period_keyboard, share_list_keyboard
 from app.bot.states.finance import FinanceStates
 from app.core.config import get_settings
-from app.db.enums import ProjectTransactionType, UserRole, ticket_category_label
-from app.domain.enums_mapping import ad_source_label
-from app.db.models import ProjectTransaction, User
-from app.db.session import async_session_factory
+from app.db.enums import ProjectTransactionType, UserRole
+from app.db.models import User
 from app.services.audit_service import AuditService
+from app.services.export_job_service import EXPORT_REPORT_FINANCE, ExportJobService
 from app.services.finance_service import FinanceService
 from app.services.project_settings_service import ProjectSettingsService
 from app.services.project_share_service import ProjectShareService
@@ -35,8 +32,12 @@ user_service = UserService()
 settings = get_settings()
 audit_service = AuditService()
 project_settings_service = ProjectSettingsService()
+export_jobs = ExportJobService()
 log = logging.getLogger(__name__)
 
+# Lines in the per-master block under the project summary; the rest is only counted.
+MASTERS_MONEY_LINES = 30
+
 
 def _parse_amount(value: str) -> Decimal | None:
     cleaned = value.replace(" ", "").replace(",", ".")
@@ -75,114 +76,84 @@ def _period_from_key(key: str) -> tuple[date | None, date | None, str]:
 
 
 @router.message(F.text == "💰 Мои деньги")
-async def master_money_start(message: Message, state: FSMContext) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+async def master_money_start(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
+    if not user.is_active or user.role not in MASTER_ROLES:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="finance",
+            entity_id=None,
+            payload={"reason": "MASTER_MONEY"},
         )
         await session.commit()
-        if not user.is_active or user.role not in MASTER_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="finance",
-                entity_id=None,
-                payload={"reason": "MASTER_MONEY"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа к финансам мастера.")
-            return
+        await message.answer("У вас нет доступа к финансам мастера.")
+        return
     await state.clear()
     await message.answer("Выберите период:", reply_markup=period_keyboard("finance_master"))
 
 
 @router.message(F.text == "💵 Моя зарплата")
-async def salary_start(message: Message, state: FSMContext) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+async def salary_start(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
+    if not user.is_active:
+        await message.answer("У вас нет доступа.")
+        return
+    if user.role not in {UserRole.ADMIN, UserRole.JUNIOR_MASTER, UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN}:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="finance",
+            entity_id=None,
+            payload={"reason": "SALARY_VIEW"},
         )
         await session.commit()
-        if not user.is_active:
-            await message.answer("У вас нет доступа.")
-            return
-        if user.role not in {UserRole.ADMIN, UserRole.JUNIOR_MASTER, UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN}:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="finance",
-                entity_id=None,
-                payload={"reason": "SALARY_VIEW"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа.")
-            return
+        await message.answer("У вас нет доступа.")
+        return
     await state.clear()
     await message.answer("Выберите период:", reply_markup=period_keyboard("finance_salary"))
 
 
 @router.message(F.text == "📊 Сводка проекта")
-async def project_summary_start(message: Message, state: FSMContext) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+async def project_summary_start(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
+    if not user.is_active or user.role not in FINANCE_SUMMARY_ROLES:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="finance",
+            entity_id=None,
+            payload={"reason": "FINANCE_SUMMARY"},
         )
         await session.commit()
-        if not user.is_active or user.role not in FINANCE_SUMMARY_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="finance",
-                entity_id=None,
-                payload={"reason": "FINANCE_SUMMARY"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа к сводке.")
-            return
+        await message.answer("У вас нет доступа к сводке.")
+        return
     await state.clear()
     await message.answer("Выберите период:", reply_markup=period_keyboard("finance_summary"))
 
 
 @router.message(F.text == "⬇️ Экспорт Excel")
-async def export_start(message: Message, state: FSMContext) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+async def export_start(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
+    if not user.is_active or user.role not in FINANCE_EXPORT_ROLES:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="finance",
+            entity_id=None,
+            payload={"reason": "FINANCE_EXPORT"},
         )
         await session.commit()
-        if not user.is_active or user.role not in FINANCE_EXPORT_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="finance",
-                entity_id=None,
-                payload={"reason": "FINANCE_EXPORT"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа к экспорту.")
-            return
+        await message.answer("У вас нет доступа к экспорту.")
+        return
     await state.clear()
     await message.answer("Выберите период:", reply_markup=period_keyboard("finance_export"))
 
 
 @router.callback_query(F.data.startswith("finance_"))
-async def finance_period_select(callback: CallbackQuery, state: FSMContext) -> None:
+async def finance_period_select(
+    callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession
+) -> None:
     prefix, period_key = callback.data.split(":", 1)
     flow = prefix.replace("finance_", "")
 
@@ -196,10 +167,9 @@ async def finance_period_select(callback: CallbackQuery, state: FSMContext) -> N
 
     start_date, end_date, label = _period_from_key(period_key)
     await _handle_flow(
+        session,
         callback.message,
-        callback.from_user.id,
-        callback.from_user.full_name if callback.from_user else None,
-        callback.from_user.username if callback.from_user else None,
+        user,
         flow,
         start_date,
         end_date,
@@ -220,7 +190,7 @@ async def finance_period_from(message: Message, state: FSMContext) -> None:
 
 
 @router.message(FinanceStates.period_to)
-async def finance_period_to(message: Message, state: FSMContext) -> None:
+async def finance_period_to(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
     date_value = _parse_date(message.text or "")
     if not date_value:
         await message.answer("Введите дату в формате YYYY-MM-DD.")
@@ -238,10 +208,9 @@ async def finance_period_to(message: Message, state: FSMContext) -> None:
         return
     await state.clear()
     await _handle_flow(
+        session,
         message,
-        message.from_user.id,
-        message.from_user.full_name if message.from_user else None,
-        message.from_user.username if message.from_user else None,
+        user,
         flow,
         start_date,
         date_value,
@@ -250,36 +219,34 @@ async def finance_period_to(message: Message, state: FSMContext) -> None:
 
 
 @router.message(F.text == "➕ Добавить доход")
-async def add_income_start(message: Message, state: FSMContext) -> None:
-    await _start_transaction_flow(message, state, ProjectTransactionType.INCOME)
+async def add_income_start(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
+    await _start_transaction_flow(session, message, state, user, ProjectTransactionType.INCOME)
 
 
 @router.message(F.text == "➖ Добавить расход")
-async def add_expense_start(message: Message, state: FSMContext) -> None:
-    await _start_transaction_flow(message, state, ProjectTransactionType.EXPENSE)
+async def add_expense_start(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
+    await _start_transaction_flow(session, message, state, user, ProjectTransactionType.EXPENSE)
 
 
-async def _start_transaction_flow(message: Message, state: FSMContext, transaction_type: ProjectTransactionType) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+async def _start_transaction_flow(
+    session: AsyncSession,
+    message: Message,
+    state: FSMContext,
+    user: User,
+    transaction_type: ProjectTransactionType,
+) -> None:
+    if not user.is_active or user.role not in MANUAL_TX_ROLES:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="finance",
+            entity_id=None,
+            payload={"reason": f"TX_{transaction_type.value}"},
         )
         await session.commit()
-        if not user.is_active or user.role not in MANUAL_TX_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="finance",
-                entity_id=None,
-                payload={"reason": f"TX_{transaction_type.value}"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа к операциям.")
-            return
+        await message.answer("У вас нет доступа к операциям.")
+        return
     await state.clear()
     await state.update_data(transaction_type=transaction_type.value)
     await state.set_state(FinanceStates.transaction_amount)
@@ -319,7 +286,7 @@ async def transaction_comment(message: Message, state: FSMContext) -> None:
 
 
 @router.message(FinanceStates.transaction_date)
-async def transaction_date(message: Message, state: FSMContext) -> None:
+async def transaction_date(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
     raw = (message.text or "").strip().lower()
     if raw in {"сейчас", "now", "today", ""}:
         occurred_at = datetime.utcnow()
@@ -342,44 +309,37 @@ async def transaction_date(message: Message, state: FSMContext) -> None:
 
     transaction_type = ProjectTransactionType(transaction_type_raw)
 
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
-            session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
-        )
-        if not user.is_active or user.role not in MANUAL_TX_ROLES:
-            await message.answer(f"Нет доступа. Ваша роль: {user.role.value}")
-            await session.commit()
-            await state.clear()
-            return
-
-        threshold = await project_settings_service.get_threshold(
-            session,
-            "large_expense",
-            default=10000,
-        )
-        if transaction_type == ProjectTransactionType.EXPENSE and amount >= Decimal(threshold):
-            await state.update_data(occurred_at=occurred_at)
-            await state.set_state(FinanceStates.transaction_confirm)
-            await message.answer(
-                "Вы уверены? Это действие нельзя отменить.",
-                reply_markup=confirm_action_keyboard("tx_confirm", "tx_cancel"),
-            )
-            await session.commit()
-            return
+    if not user.is_active or user.role not in MANUAL_TX_ROLES:
+        await message.answer(f"Нет доступа. Ваша роль: {user.role.value}")
+        await session.commit()
+        await state.clear()
+        return
 
-        await project_transaction_service.add_transaction(
-            session,
-            transaction_type=transaction_type,
-            amount=amount,
-            category=category,
-            comment=comment,
-            occurred_at=occurred_at,
-            created_by=user.id,
+    threshold = await project_settings_service.get_threshold(
+        session,
+        "large_expense",
+        default=10000,
+    )
+    if transaction_type == ProjectTransactionType.EXPENSE and amount >= Decimal(threshold):
+        await state.update_data(occurred_at=occurred_at)
+        await state.set_state(FinanceStates.transaction_confirm)
+        await message.answer(
+            "Вы уверены? Это действие нельзя отменить.",
+            reply_markup=confirm_action_keyboard("tx_confirm", "tx_cancel"),
         )
         await session.commit()
+        return
+
+    await project_transaction_service.add_transaction(
+        session,
+        transaction_type=transaction_type,
+        amount=amount,
+        category=category,
+        comment=comment,
+        occurred_at=occurred_at,
+        created_by=user.id,
+    )
+    await session.commit()
 
     await state.clear()
     await message.answer("Операция добавлена.")
@@ -392,7 +352,7 @@ async def transaction_cancel(callback: CallbackQuery, state: FSMContext) -> None
 
 
 @router.callback_query(F.data == "tx_confirm")
-async def transaction_confirm(callback: CallbackQuery, state: FSMContext) -> None:
+async def transaction_confirm(callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession) -> None:
     data = await state.get_data()
     transaction_type_raw = data.get("transaction_type")
     amount = data.get("amount")
@@ -411,68 +371,72 @@ async def transaction_confirm(callback: CallbackQuery, state: FSMContext) -> Non
 
     transaction_type = ProjectTransactionType(transaction_type_raw)
 
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+    if not user.is_active or user.role not in MANUAL_TX_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
-        )
-        if not user.is_active or user.role not in MANUAL_TX_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="finance",
-                entity_id=None,
-                payload={"reason": f"TX_{transaction_type.value}"},
-            )
-            await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
-            await session.commit()
-            await state.clear()
-            return
-
-        await project_transaction_service.add_transaction(
-            session,
-            transaction_type=transaction_type,
-            amount=amount,
-            category=category,
-            comment=comment,
-            occurred_at=occurred_at,
-            created_by=user.id,
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="finance",
+            entity_id=None,
+            payload={"reason": f"TX_{transaction_type.value}"},
         )
+        await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
         await session.commit()
+        await state.clear()
+        return
+
+    await project_transaction_service.add_transaction(
+        session,
+        transaction_type=transaction_type,
+        amount=amount,
+        category=category,
+        comment=comment,
+        occurred_at=occurred_at,
+        created_by=user.id,
+    )
+    await session.commit()
 
     await state.clear()
     await callback.message.answer("Операция добавлена.")
     await callback.answer()
 
 
+@router.callback_query(F.data.startswith("export_cancel:"))
+async def export_cancel(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
+    job_id = int(callback.data.split(":", 1)[1])
+    requester = await export_jobs.get_requester(session, job_id)
+    if requester is None:
+        await callback.answer("Экспорт не найден", show_alert=True)
+        return
+    if requester != user.id and (not user.is_active or user.role not in FINANCE_EXPORT_ROLES):
+        await callback.answer("Нет доступа", show_alert=True)
+        return
+    cancelled = await export_jobs.cancel(session, job_id)
+    await session.commit()
+    if not cancelled:
+        await callback.answer("Экспорт уже завершён")
+        return
+    await callback.message.edit_text("Экспорт отменён.")
+    await callback.answer()
+
+
 @router.message(F.text == "📌 Доли от кассы")
-async def shares_list(message: Message, state: FSMContext) -> None:
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
+async def shares_list(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
+    if not user.is_active or user.role not in FINANCE_SUMMARY_ROLES:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="project_share",
+            entity_id=None,
+            payload={"reason": "PROJECT_SHARE_LIST"},
         )
         await session.commit()
-        if not actor.is_active or actor.role not in FINANCE_SUMMARY_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=actor.id,
-                action="PERMISSION_DENIED",
-                entity_type="project_share",
-                entity_id=None,
-                payload={"reason": "PROJECT_SHARE_LIST"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа к долям.")
-            return
+        await message.answer("У вас нет доступа к долям.")
+        return
 
-        users = await user_service.list_users(session, limit=200)
-        shares = await finance_service.list_active_shares(session)
+    users = await user_service.list_users(session, limit=200)
+    shares = await finance_service.list_active_shares(session)
     share_map = {share.user_id: share.percent for share in shares}
     entries = []
     lines = ["Доли от кассы:"]
@@ -528,7 +492,7 @@ async def share_cancel(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data == "share_confirm")
-async def share_confirm(callback: CallbackQuery, state: FSMContext) -> None:
+async def share_confirm(callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession) -> None:
     data = await state.get_data()
     user_id = data.get("share_user_id")
     percent = data.get("share_percent")
@@ -537,38 +501,32 @@ async def share_confirm(callback: CallbackQuery, state: FSMContext) -> None:
         await state.clear()
         return
 
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
+    if not user.is_active or user.role not in FINANCE_SUMMARY_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="project_share",
+            entity_id=None,
+            payload={"reason": "PROJECT_SHARE_SET"},
         )
-        if not actor.is_active or actor.role not in FINANCE_SUMMARY_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=actor.id,
-                action="PERMISSION_DENIED",
-                entity_type="project_share",
-                entity_id=None,
-                payload={"reason": "PROJECT_SHARE_SET"},
-            )
-            await callback.answer(f"Нет доступа. Ваша роль: {actor.role.value}", show_alert=True)
-            await session.commit()
-            await state.clear()
-            return
-
-        try:
-            await project_share_service.set_share(
-                session,
-                user_id=user_id,
-                percent=percent,
-                actor_id=actor.id,
-            )
-        except ValueError as exc:
-            await callback.answer(str(exc), show_alert=True)
-            return
+        await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
         await session.commit()
+        await state.clear()
+        return
+
+    try:
+        await project_share_service.set_share(
+            session,
+            user_id=user_id,
+            percent=percent,
+            actor_id=user.id,
+        )
+    except ValueError as exc:
+        await session.rollback()
+        await callback.answer(str(exc), show_alert=True)
+        return
+    await session.commit()
 
     await state.clear()
     await callback.message.answer("Доля обновлена.")
@@ -576,10 +534,9 @@ async def share_confirm(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 async def _handle_flow(
+    session: AsyncSession,
     message: Message | None,
-    tg_user_id: int,
-    display_name: str | None,
-    username: str | None,
+    actor: User,
     flow: str,
     start_date: date | None,
     end_date: date | None,
@@ -587,409 +544,147 @@ async def _handle_flow(
 ) -> None:
     if message is None:
         return
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(session, tg_user_id, display_name, username)
-        await session.commit()
-        date_range = finance_service.build_range(start_date, end_date)
-
-        if flow == "master":
-            if not actor.is_active or actor.role not in MASTER_ROLES:
-                await audit_service.log_audit_event(
-                    session,
-                    actor_id=actor.id,
-                    action="PERMISSION_DENIED",
-                    entity_type="finance",
-                    entity_id=None,
-                    payload={"reason": "MASTER_MONEY"},
-                )
-                await session.commit()
-                await message.answer(f"Нет доступа. Ваша роль: {actor.role.value}")
-                return
-            summary = await finance_service.master_money(session, actor.id, date_range=date_range)
-            await message.answer(
-                "💰 Мои деньги\n"
-                f"Период: {label}\n"
-                f"Начислено: {summary['earned']}\n"
-                f"Доля от кассы: {summary['cash_share_amount']}\n"
-                f"Должен перевести: {summary['net_profit']}\n"
-                f"Подтверждено: {summary['confirmed']}\n"
-                f"Ожидает: {summary['pending']}"
+    date_range = finance_service.build_range(start_date, end_date)
+
+    if flow == "master":
+        if not actor.is_active or actor.role not in MASTER_ROLES:
+            await audit_service.log_audit_event(
+                session,
+                actor_id=actor.id,
+                action="PERMISSION_DENIED",
+                entity_type="finance",
+                entity_id=None,
+                payload={"reason": "MASTER_MONEY"},
             )
+            await session.commit()
+            await message.answer(f"Нет доступа. Ваша роль: {actor.role.value}")
             return
+        summary = await finance_service.master_money(session, actor.id, date_range=date_range)
+        await message.answer(
+            "💰 Мои деньги\n"
+            f"Период: {label}\n"
+            f"Начислено: {summary['earned']}\n"
+            f"Доля от кассы: {summary['cash_share_amount']}\n"
+            f"Должен перевести: {summary['net_profit']}\n"
+            f"Подтверждено: {summary['confirmed']}\n"
+            f"Ожидает: {summary['pending']}"
+        )
+        return
 
-        if flow == "salary":
-            if not actor.is_active:
-                await audit_service.log_audit_event(
-                    session,
-                    actor_id=actor.id,
-                    action="PERMISSION_DENIED",
-                    entity_type="finance",
-                    entity_id=None,
-                    payload={"reason": "SALARY_VIEW"},
-                )
-                await session.commit()
-                await message.answer(f"Нет доступа. Ваша роль: {actor.role.value}")
-                return
-            if actor.role == UserRole.ADMIN or actor.role in FINANCE_SUMMARY_ROLES:
-                amount = await finance_service.admin_salary(session, actor.id, date_range=date_range)
-            elif actor.role == UserRole.JUNIOR_MASTER:
-                amount = await finance_service.junior_salary(session, actor.id, date_range=date_range)
-            else:
-                await audit_service.log_audit_event(
-                    session,
-                    actor_id=actor.id,
-                    action="PERMISSION_DENIED",
-                    entity_type="finance",
-                    entity_id=None,
-                    payload={"reason": "SALARY_VIEW"},
-                )
-                await session.commit()
-                await message.answer(f"Нет доступа. Ваша роль: {actor.role.value}")
-                return
-            await message.answer(f"💵 Моя зарплата\nПериод: {label}\nСумма: {amount}")
+    if flow == "salary":
+        if not actor.is_active:
+            await audit_service.log_audit_event(
+                session,
+                actor_id=actor.id,
+                action="PERMISSION_DENIED",
+                entity_type="finance",
+                entity_id=None,
+                payload={"reason": "SALARY_VIEW"},
+            )
+            await session.commit()
+            await message.answer(f"Нет доступа. Ваша роль: {actor.role.value}")
             return
-
-        if flow == "summary":
-            if not actor.is_active or actor.role not in FINANCE_SUMMARY_ROLES:
-                await audit_service.log_audit_event(
-                    session,
-                    actor_id=actor.id,
-                    action="PERMISSION_DENIED",
-                    entity_type="finance",
-                    entity_id=None,
-                    payload={"reason": "FINANCE_SUMMARY"},
-                )
-                await session.commit()
-                await message.answer(f"Нет доступа. Ваша роль: {actor.role.value}")
-                return
-            summary = await finance_service.project_summary(session, date_range=date_range)
-            await message.answer(
-                "📊 Сводка проекта\n"
-                f"Период: {label}\n"
-                f"Прибыль по заказам (должно быть): {summary['tickets_net_profit_should']}\n"
-                f"Прибыль по заказам (получено): {summary['tickets_net_profit_received']}\n"
-                f"Ручные доходы: {summary['manual_income_sum']}\n"
-                f"Ручные расходы: {summary['manual_expense_sum']}\n"
-                f"Общая касса (должно быть): {summary['project_net_cash_should']}\n"
-                f"Общая касса (получено): {summary['project_net_cash_received']}\n"
-                f"Начислено мастерам: {summary['earned_executor']}\n"
-                f"Начислено админам: {summary['earned_admin']}\n"
-                f"Начислено младшим мастерам: {summary['earned_junior']}\n"
-                f"Остаток проекта: {summary['project_take_sum']}\n"
-                f"Закрыто заказов: {summary['closed_count']}\n"
-                f"Подтверждено заказов: {summary['confirmed_count']}\n"
-                f"Повторов: {summary['repeats_count']}"
+        if actor.role == UserRole.ADMIN or actor.role in FINANCE_SUMMARY_ROLES:
+            amount = await finance_service.admin_salary(session, actor.id, date_range=date_range)
+        elif actor.role == UserRole.JUNIOR_MASTER:
+            amount = await finance_service.junior_salary(session, actor.id, date_range=date_range)
+        else:
+            await audit_service.log_audit_event(
+                session,
+                actor_id=actor.id,
+                action="PERMISSION_DENIED",
+                entity_type="finance",
+                entity_id=None,
+                payload={"reason": "SALARY_VIEW"},
             )
+            await session.commit()
+            await message.answer(f"Нет доступа. Ваша роль: {actor.role.value}")
             return
+        await message.answer(f"💵 Моя зарплата\nПериод: {label}\nСумма: {amount}")
+        return
 
-        if flow == "export":
-            log.info("FINANCE_ACCESS tg=%s actor_id=%s role=%s", tg_user_id, actor.id, actor.role)
-            if not actor.is_active or actor.role not in FINANCE_EXPORT_ROLES:
-                await audit_service.log_audit_event(
-                    session,
-                    actor_id=actor.id,
-                    action="PERMISSION_DENIED",
-                    entity_type="finance",
-                    entity_id=None,
-                    payload={"reason": "FINANCE_EXPORT"},
-                )
-                await session.commit()
-                await message.answer(f"Нет доступа. Ваша роль: {actor.role.value}")
-                return
-            progress_message = await message.answer("Готовлю отчёты…")
-            tickets = await finance_service.list_tickets_for_export(session, date_range=date_range)
-            transactions = await finance_service.list_manual_transactions(session, date_range=date_range)
-            summary = await finance_service.project_summary(session, date_range=date_range)
-            shares = await finance_service.list_active_shares(session)
-            user_map = await _build_user_map(session, tickets, transactions)
-            content = _build_excel_report(
-                tickets=tickets,
-                transactions=transactions,
-                summary=summary,
-                shares=shares,
-                date_range=date_range,
-                user_map=user_map,
-            )
-            ops_content = _build_money_operations_xlsx(transactions=transactions)
-            stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            filename = f"project_report_{stamp}.xlsx"
-            ops_filename = f"money_ops_{stamp}.xlsx"
-            target_chat = settings.finance_export_chat_id or actor.id
-            await message.bot.send_document(
-                chat_id=target_chat,
-                document=BufferedInputFile(content.getvalue(), filename=filename),
-            )
-            await message.bot.send_document(
-                chat_id=target_chat,
-                document=BufferedInputFile(ops_content.getvalue(), filename=ops_filename),
+    if flow == "summary":
+        if not actor.is_active or actor.role not in FINANCE_SUMMARY_ROLES:
+            await audit_service.log_audit_event(
+                session,
+                actor_id=actor.id,
+                action="PERMISSION_DENIED",
+                entity_type="finance",
+                entity_id=None,
+                payload={"reason": "FINANCE_SUMMARY"},
             )
-            await progress_message.edit_text("Экспорт отправлен.")
+            await session.commit()
+            await message.answer(f"Нет доступа. Ваша роль: {actor.role.value}")
             return
-
-
-async def _build_user_map(session, tickets, transactions) -> dict[int, str]:
-    user_ids = set()
-    for ticket in tickets:
-        if ticket.created_by_admin_id:
-            user_ids.add(ticket.created_by_admin_id)
-        if ticket.assigned_executor_id:
-            user_ids.add(ticket.assigned_executor_id)
-        if ticket.junior_master_id:
-            user_ids.add(ticket.junior_master_id)
-        if ticket.transfer_confirmed_by:
-            user_ids.add(ticket.transfer_confirmed_by)
-    for tx in transactions:
-        user_ids.add(tx.created_by)
-
-    if not user_ids:
-        return {}
-
-    result = await session.execute(select(User).where(User.id.in_(user_ids)))
-    users = result.scalars().all()
-    return {user.id: user.display_name or f"ID {user.id}" for user in users}
-
-
-def _build_excel_report(*, tickets, transactions, summary, shares, date_range, user_map) -> BytesIO:
-    workbook = Workbook()
-    workbook.remove(workbook.active)
-
-    tickets_ws = workbook.create_sheet("Tickets")
-    tickets_headers = [
-        "ticket_id",
-        "status",
-        "category",
-        "client_phone",
-        "scheduled_at",
-        "ad_source",
-        "created_by_admin",
-        "executor",
-        "junior_master",
-        "revenue",
-        "expense",
-        "net_profit",
-        "transfer_status",
-        "transfer_sent_at",
-        "transfer_confirmed_at",
-        "confirmed_by",
-        "is_repeat",
-        "repeat_ticket_ids",
-    ]
-    tickets_ws.append(tickets_headers)
-
-    for ticket in tickets:
-        created_by = ticket.created_by.display_name if ticket.created_by else None
-        executor = ticket.assigned_executor.display_name if ticket.assigned_executor else None
-        junior = ticket.junior_master.display_name if ticket.junior_master else None
-        confirmed_by = (
-            user_map.get(ticket.transfer_confirmed_by)
-            if ticket.transfer_confirmed_by
-            else None
-        )
-        tickets_ws.append(
-            [
-                ticket.id,
-                ticket.status.value if ticket.status else None,
-                ticket_category_label(ticket.category) if ticket.category else None,
-                ticket.client_phone,
-                ticket.scheduled_at,
-                ad_source_label(ticket.ad_source) if ticket.ad_source else None,
-                created_by or ticket.created_by_admin_id,
-                executor or ticket.assigned_executor_id,
-                junior or ticket.junior_master_id,
-                ticket.revenue,
-                ticket.expense,
-                ticket.net_profit,
-                ticket.transfer_status.value if ticket.transfer_status else None,
-                ticket.transfer_sent_at,
-                ticket.transfer_confirmed_at,
-                confirmed_by or ticket.transfer_confirmed_by,
-                ticket.is_repeat,
-                ",".join(map(str, ticket.repeat_ticket_ids or [])),
-            ]
-        )
-
-    report_ws = workbook.create_sheet("OrderReport")
-    report_headers = [
-        "Номер заказа",
-        "Кто выполнил",
-        "Тип рекламы",
-        "Скок отдал клиент",
-        "Расходы",
-        "Чистый профит",
-    ]
-    report_ws.append(report_headers)
-    for ticket in tickets:
-        executor = ticket.assigned_executor.display_name if ticket.assigned_executor else None
-        report_ws.append(
-            [
-                ticket.id,
-                executor or ticket.assigned_executor_id,
-                ad_source_label(ticket.ad_source) if ticket.ad_source else None,
-                ticket.revenue,
-                ticket.expense,
-                ticket.net_profit,
-            ]
+        summary = await finance_service.project_summary(session, date_range=date_range)
+        await message.answer(
+            "📊 Сводка проекта\n"
+            f"Период: {label}\n"
+            f"Прибыль по заказам (должно быть): {summary['tickets_net_profit_should']}\n"
+            f"Прибыль по заказам (получено): {summary['tickets_net_profit_received']}\n"
+            f"Ручные доходы: {summary['manual_income_sum']}\n"
+            f"Ручные расходы: {summary['manual_expense_sum']}\n"
+            f"Общая касса (должно быть): {summary['project_net_cash_should']}\n"
+            f"Общая касса (получено): {summary['project_net_cash_received']}\n"
+            f"Начислено мастерам: {summary['earned_executor']}\n"
+            f"Начислено админам: {summary['earned_admin']}\n"
+            f"Начислено младшим мастерам: {summary['earned_junior']}\n"
+            f"Остаток проекта: {summary['project_take_sum']}\n"
+            f"Закрыто заказов: {summary['closed_count']}\n"
+            f"Подтверждено заказов: {summary['confirmed_count']}\n"
+            f"Повторов: {summary['repeats_count']}"
         )
+        masters = await finance_service.masters_money(session, date_range=date_range)
+        masters_text = _render_masters_money(masters, label=label)
+        if masters_text:
+            await message.answer(masters_text)
+        return
 
-    earnings_ws = workbook.create_sheet("EarningsByTicket")
-    earnings_ws.append(
-        ["ticket_id", "role", "user_id", "user_name", "percent_at_close", "earned_amount"]
-    )
-    for ticket in tickets:
-        if ticket.assigned_executor_id and ticket.executor_earned_amount is not None:
-            name = ticket.assigned_executor.display_name if ticket.assigned_executor else None
-            earnings_ws.append(
-                [
-                    ticket.id,
-                    "EXECUTOR",
-                    ticket.assigned_executor_id,
-                    name,
-                    ticket.executor_percent_at_close,
-                    ticket.executor_earned_amount,
-                ]
-            )
-        if ticket.created_by_admin_id and ticket.admin_earned_amount is not None:
-            name = ticket.created_by.display_name if ticket.created_by else None
-            earnings_ws.append(
-                [
-                    ticket.id,
-                    "ADMIN",
-                    ticket.created_by_admin_id,
-                    name,
-                    ticket.admin_percent_at_close,
-                    ticket.admin_earned_amount,
-                ]
-            )
-        if ticket.junior_master_id and ticket.junior_master_earned_amount is not None:
-            name = ticket.junior_master.display_name if ticket.junior_master else None
-            earnings_ws.append(
-                [
-                    ticket.id,
-                    "JUNIOR_MASTER",
-                    ticket.junior_master_id,
-                    name,
-                    ticket.junior_master_percent_at_close,
-                    ticket.junior_master_earned_amount,
-                ]
+    if flow == "export":
+        log.info("FINANCE_ACCESS tg=%s actor_id=%s role=%s", actor.id, actor.id, actor.role)
+        if not actor.is_active or actor.role not in FINANCE_EXPORT_ROLES:
+            await audit_service.log_audit_event(
+                session,
+                actor_id=actor.id,
+                action="PERMISSION_DENIED",
+                entity_type="finance",
+                entity_id=None,
+                payload={"reason": "FINANCE_EXPORT"},
             )
-
-    tx_ws = workbook.create_sheet("ManualTransactions")
-    tx_ws.append(["id", "type", "amount", "category", "comment", "occurred_at", "created_by"])
-    for tx in transactions:
-        creator = tx.creator.display_name if tx.creator else None
-        tx_ws.append(
-            [
-                tx.id,
-                tx.type.value,
-                tx.amount,
-                tx.category,
-                tx.comment,
-                tx.occurred_at,
-                creator or tx.created_by,
-            ]
-        )
-
-    summary_ws = workbook.create_sheet("ProjectSummary")
-    summary_ws.append(
-        [
-            "period_from",
-            "period_to",
-            "tickets_net_profit_should",
-            "tickets_net_profit_received",
-            "manual_income_sum",
-            "manual_expense_sum",
-            "project_net_cash_should",
-            "project_net_cash_received",
-            "earned_executor",
-            "earned_admin",
-            "earned_junior",
-            "project_take_sum",
-            "closed_count",
-            "confirmed_count",
-            "repeats_count",
-        ]
-    )
-    summary_ws.append(
-        [
-            date_range.start.date() if date_range.start else None,
-            date_range.end.date() if date_range.end else None,
-            summary["tickets_net_profit_should"],
-            summary["tickets_net_profit_received"],
-            summary["manual_income_sum"],
-            summary["manual_expense_sum"],
-            summary["project_net_cash_should"],
-            summary["project_net_cash_received"],
-            summary["earned_executor"],
-            summary["earned_admin"],
-            summary["earned_junior"],
-            summary["project_take_sum"],
-            summary["closed_count"],
-            summary["confirmed_count"],
-            summary["repeats_count"],
-        ]
-    )
-
-    shares_ws = workbook.create_sheet("ProjectShares")
-    shares_ws.append(
-        [
-            "user_id",
-            "user_name",
-            "percent",
-            "project_net_cash_should",
-            "share_amount_should",
-            "project_net_cash_received",
-            "share_amount_received",
-        ]
-    )
-    for share in shares:
-        name = share.user.display_name if share.user else None
-        share_amount_should = finance_service.round_money(
-            summary["project_net_cash_should"] * share.percent / Decimal("100")
-        )
-        share_amount_received = finance_service.round_money(
-            summary["project_net_cash_received"] * share.percent / Decimal("100")
-        )
-        shares_ws.append(
-            [
-                share.user_id,
-                name,
-                share.percent,
-                summary["project_net_cash_should"],
-                share_amount_should,
-                summary["project_net_cash_received"],
-                share_amount_received,
-            ]
+            await session.commit()
+            await message.answer(f"Нет доступа. Ваша роль: {actor.role.value}")
+            return
+        # The progress message goes out first: every Bot API call commits the update's transaction, so a job
+        # enqueued before it would reach the worker without the message to edit.
+        job_id = await export_jobs.reserve_id(session)
+        progress_message = await message.answer(
+            f"Экспорт поставлен в очередь ({label}).", reply_markup=export_cancel_keyboard(job_id)
         )
-
-    output = BytesIO()
-    workbook.save(output)
-    output.seek(0)
-    return output
-
-
-def _build_money_operations_xlsx(*, transactions: list[ProjectTransaction]) -> BytesIO:
-    workbook = Workbook()
-    ws = workbook.active
-    ws.title = "Операции"
-    ws.append(["Дата добавления", "Категория", "Комментарий", "Сумма", "Тип"])
-
-    for tx in transactions:
-        comment = tx.comment if tx.comment else "-"
-        ws.append(
-            [
-                tx.created_at,
-                tx.category,
-                comment,
-                tx.amount,
-                tx.type.value,
-            ]
+        await export_jobs.enqueue(
+            session,
+            job_id=job_id,
+            report_type=EXPORT_REPORT_FINANCE,
+            date_range=date_range,
+            period_label=label,
+            requested_by=actor.id,
+            chat_id=settings.finance_export_chat_id or actor.id,
+            progress_chat_id=progress_message.chat.id,
+            progress_message_id=progress_message.message_id,
         )
+        await session.commit()
+        return
 
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-        row[0].number_format = "dd.mm.yyyy hh:mm"
-        row[3].number_format = "0.00"
 
-    output = BytesIO()
-    workbook.save(output)
-    output.seek(0)
-    return output
+def _render_masters_money(masters: list[tuple[User, dict[str, Decimal]]], *, label: str) -> str:
+    rows = [(master, money) for master, money in masters if money["earned"] or money["net_profit"]]
+    if not rows:
+        return ""
+    lines = ["👷 Мастера", f"Период: {label}"]
+    for master, money in rows[:MASTERS_MONEY_LINES]:
+        name = master.display_name or f"ID {master.id}"
+        lines.append(
+            f"{name}: начислено {money['earned']}, подтверждено {money['confirmed']}, ожидает {money['pending']}"
+        )
+    if len(rows) > MASTERS_MONEY_LINES:
+        lines.append(f"…и ещё {len(rows) - MASTERS_MONEY_LINES}")
+    return "\n".join(lines)
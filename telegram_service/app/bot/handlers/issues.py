@@ -2,50 +2,41 @@ from __future__ import annotations
 
 from aiogram import F, Router
 from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.bot.handlers.utils import ticket_display_id
 from app.db.enums import TransferStatus, UserRole
-from app.db.session import async_session_factory
+from app.db.models import User
 from app.services.audit_service import AuditService
 from app.services.issue_service import IssueService
 from app.services.project_settings_service import ProjectSettingsService
-from app.services.user_service import UserService
 
 router = Router()
 issue_service = IssueService()
-user_service = UserService()
 audit_service = AuditService()
 project_settings_service = ProjectSettingsService()
 
 
 @router.message(F.text == "📍 Проблемы")
-async def issues_dashboard(message: Message) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+async def issues_dashboard(message: Message, user: User, session: AsyncSession) -> None:
+    if not user.is_active or user.role not in {UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN}:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None,
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="issues",
+            entity_id=None,
+            payload={"reason": "ISSUES_DASHBOARD"},
         )
         await session.commit()
-        if not user.is_active or user.role not in {UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN}:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="issues",
-                entity_id=None,
-                payload={"reason": "ISSUES_DASHBOARD"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа к проблемам.")
-            return
+        await message.answer("У вас нет доступа к проблемам.")
+        return
 
-        pending_days = await project_settings_service.get_threshold(session, "transfer_pending_days", default=3)
-        overdue = await issue_service.list_transfer_overdue(session, days=pending_days)
-        zero_profit = await issue_service.list_zero_profit(session)
-        repeat_phones = await issue_service.list_repeat_phones(session)
-        pending_transfers = await issue_service.list_master_pending_transfers(session)
+    pending_days = await project_settings_service.get_threshold(session, "transfer_pending_days", default=3)
+    overdue = await issue_service.list_transfer_overdue(session, days=pending_days)
+    zero_profit = await issue_service.list_zero_profit(session)
+    repeat_phones = await issue_service.list_repeat_phones(session)
+    pending_transfers = await issue_service.list_master_pending_transfers(session)
 
     lines = ["📍 Проблемы"]
 
@@ -5,6 +5,7 @@ from decimal import Decimal, InvalidOperation
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.bot.handlers.permissions import JUNIOR_LINK_ADMIN_ROLES
 from app.bot.keyboards.confirmations import confirm_action_keyboard
@@ -16,8 +17,7 @@ from app.bot.keyboards.junior_links import (
 )
 from app.bot.states.junior_links import JuniorLinkStates
 from app.db.enums import UserRole
-from app.db.models import MasterJuniorLink
-from app.db.session import async_session_factory
+from app.db.models import MasterJuniorLink, User
 from app.services.audit_service import AuditService
 from app.services.junior_link_service import JuniorLinkService
 from app.services.user_service import UserService
@@ -38,74 +38,58 @@ def parse_percent(value: str) -> Decimal | None:
 
 
 @router.message(F.text == "👥 Привязки младших мастеров")
-async def junior_links_menu(message: Message, state: FSMContext) -> None:
+async def junior_links_menu(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
     await state.clear()
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+    if not user.is_active:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="master_junior_link",
+            entity_id=None,
+            payload={"reason": "JUNIOR_LINK_MENU"},
         )
         await session.commit()
+        await message.answer("У вас нет доступа.")
+        return
 
-        if not user.is_active:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="master_junior_link",
-                entity_id=None,
-                payload={"reason": "JUNIOR_LINK_MENU"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа.")
-            return
-
-        if user.role in JUNIOR_LINK_ADMIN_ROLES:
-            masters = await user_service.list_users_by_roles(session, {UserRole.MASTER, UserRole.SUPER_ADMIN})
-            if not masters:
-                await message.answer("Нет мастеров для привязки.")
-                return
-            await message.answer("Выберите мастера:", reply_markup=master_select_keyboard(masters))
+    if user.role in JUNIOR_LINK_ADMIN_ROLES:
+        masters = await user_service.list_users_by_roles(session, {UserRole.MASTER, UserRole.SUPER_ADMIN})
+        if not masters:
+            await message.answer("Нет мастеров для привязки.")
             return
+        await message.answer("Выберите мастера:", reply_markup=master_select_keyboard(masters))
+        return
 
-        if user.role == UserRole.MASTER:
-            links = await junior_link_service.get_active_juniors_for_master(session, user.id)
-            allow_percent = len(links) >= 2
-            if not links:
-                await message.answer("Нет активных привязок.")
-                return
-            await message.answer(
-                "Ваши младшие мастера:",
-                reply_markup=master_links_keyboard(user.id, links, allow_manage=False, allow_percent=allow_percent),
-            )
+    if user.role == UserRole.MASTER:
+        links = await junior_link_service.get_active_juniors_for_master(session, user.id)
+        allow_percent = len(links) >= 2
+        if not links:
+            await message.answer("Нет активных привязок.")
             return
+        await message.answer(
+            "Ваши младшие мастера:",
+            reply_markup=master_links_keyboard(user.id, links, allow_manage=False, allow_percent=allow_percent),
+        )
+        return
 
     await message.answer("У вас нет прав для управления привязками.")
 
 
 @router.callback_query(F.data.startswith("link_master:"))
-async def link_master_card(callback: CallbackQuery) -> None:
+async def link_master_card(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     master_id = int(callback.data.split(":", 1)[1])
 
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
-            session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
-        )
-        if not actor.is_active:
-            await callback.answer("Нет прав", show_alert=True)
-            return
-        if action in {"add", "relink", "disable"} and actor.role not in JUNIOR_LINK_ADMIN_ROLES:
-            await callback.answer("Нет прав", show_alert=True)
-            return
+    if not user.is_active:
+        await callback.answer("Нет прав", show_alert=True)
+        return
+    if action in {"add", "relink", "disable"} and user.role not in JUNIOR_LINK_ADMIN_ROLES:
+        await callback.answer("Нет прав", show_alert=True)
+        return
 
-        links = await junior_link_service.get_active_juniors_for_master(session, master_id)
-        active_count = len(links)
-        allow_percent = actor.role in {UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN} or active_count <= 1
+    links = await junior_link_service.get_active_juniors_for_master(session, master_id)
+    active_count = len(links)
+    allow_percent = user.role in {UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN} or active_count <= 1
 
     text_lines = ["Привязки младших мастеров:"]
     if links:
@@ -124,60 +108,46 @@ async def link_master_card(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "link_back")
-async def link_back(callback: CallbackQuery) -> None:
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
+async def link_back(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
+    if not user.is_active or user.role not in JUNIOR_LINK_ADMIN_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="master_junior_link",
+            entity_id=master_id,
+            payload={"reason": "JUNIOR_LINK_VIEW"},
         )
-        if not actor.is_active or actor.role not in JUNIOR_LINK_ADMIN_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=actor.id,
-                action="PERMISSION_DENIED",
-                entity_type="master_junior_link",
-                entity_id=master_id,
-                payload={"reason": "JUNIOR_LINK_VIEW"},
-            )
-            await session.commit()
-            await callback.answer("Нет прав", show_alert=True)
-            return
+        await session.commit()
+        await callback.answer("Нет прав", show_alert=True)
+        return
 
-        masters = await user_service.list_users_by_roles(session, {UserRole.MASTER, UserRole.SUPER_ADMIN})
+    masters = await user_service.list_users_by_roles(session, {UserRole.MASTER, UserRole.SUPER_ADMIN})
     await callback.message.answer("Выберите мастера:", reply_markup=master_select_keyboard(masters))
     await callback.answer()
 
 
 @router.callback_query(F.data.startswith("link_add:"))
-async def link_add(callback: CallbackQuery, state: FSMContext) -> None:
+async def link_add(callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession) -> None:
     master_id = int(callback.data.split(":", 1)[1])
 
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
+    if not user.is_active or user.role not in JUNIOR_LINK_ADMIN_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="master_junior_link",
+            entity_id=None,
+            payload={"reason": "JUNIOR_LINK_BACK"},
         )
-        if not actor.is_active or actor.role not in JUNIOR_LINK_ADMIN_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=actor.id,
-                action="PERMISSION_DENIED",
-                entity_type="master_junior_link",
-                entity_id=None,
-                payload={"reason": "JUNIOR_LINK_BACK"},
-            )
-            await session.commit()
-            await callback.answer("Нет прав", show_alert=True)
-            return
+        await session.commit()
+        await callback.answer("Нет прав", show_alert=True)
+        return
 
-        juniors = await user_service.list_users_by_roles(session, {UserRole.JUNIOR_MASTER})
-        if not juniors:
-            await callback.answer("Нет младших мастеров", show_alert=True)
-            return
+    juniors = await user_service.list_users_by_roles(session, {UserRole.JUNIOR_MASTER})
+    if not juniors:
+        await callback.answer("Нет младших мастеров", show_alert=True)
+        return
     await state.update_data(action="add", master_id=master_id)
     await callback.message.answer("Выберите младшего мастера:", reply_markup=junior_select_keyboard(juniors, prefix="link_pick"))
     await callback.answer()
@@ -210,37 +180,29 @@ async def link_change_percent(callback: CallbackQuery, state: FSMContext) -> Non
 
 
 @router.callback_query(F.data.startswith("link_relink:"))
-async def link_relink(callback: CallbackQuery, state: FSMContext) -> None:
+async def link_relink(callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession) -> None:
     link_id = int(callback.data.split(":", 1)[1])
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
+    if not user.is_active or user.role not in JUNIOR_LINK_ADMIN_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="master_junior_link",
+            entity_id=link_id,
+            payload={"reason": "JUNIOR_LINK_RELINK"},
         )
-        if not actor.is_active or actor.role not in JUNIOR_LINK_ADMIN_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=actor.id,
-                action="PERMISSION_DENIED",
-                entity_type="master_junior_link",
-                entity_id=link_id,
-                payload={"reason": "JUNIOR_LINK_RELINK"},
-            )
-            await session.commit()
-            await callback.answer("Нет прав", show_alert=True)
-            return
-        link = await session.get(MasterJuniorLink, link_id)
+        await session.commit()
+        await callback.answer("Нет прав", show_alert=True)
+        return
+    link = await session.get(MasterJuniorLink, link_id)
     if not link:
         await callback.answer("Привязка не найдена", show_alert=True)
         return
 
-    async with async_session_factory() as session:
-        masters = await user_service.list_users_by_roles(session, {UserRole.MASTER, UserRole.SUPER_ADMIN})
-        if not masters:
-            await callback.answer("Нет доступных мастеров", show_alert=True)
-            return
+    masters = await user_service.list_users_by_roles(session, {UserRole.MASTER, UserRole.SUPER_ADMIN})
+    if not masters:
+        await callback.answer("Нет доступных мастеров", show_alert=True)
+        return
     await state.update_data(action="relink", junior_id=link.junior_master_id)
     await callback.message.answer("Выберите нового мастера:", reply_markup=relink_master_keyboard(masters))
     await callback.answer()
@@ -280,7 +242,7 @@ async def link_cancel(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data == "link_confirm")
-async def link_confirm(callback: CallbackQuery, state: FSMContext) -> None:
+async def link_confirm(callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession) -> None:
     data = await state.get_data()
     action = data.get("action")
     link_id = data.get("link_id")
@@ -292,71 +254,65 @@ async def link_confirm(callback: CallbackQuery, state: FSMContext) -> None:
         await state.clear()
         return
 
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
+    if not user.is_active:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="master_junior_link",
+            entity_id=link_id if isinstance(link_id, int) else None,
+            payload={"reason": "JUNIOR_LINK_CONFIRM"},
         )
-        if not actor.is_active:
-            await audit_service.log_audit_event(
+        await session.commit()
+        await callback.answer("Нет прав", show_alert=True)
+        return
+    if action in {"add", "relink", "disable"} and user.role not in JUNIOR_LINK_ADMIN_ROLES:
+        await audit_service.log_audit_event(
+            session,
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="master_junior_link",
+            entity_id=link_id if isinstance(link_id, int) else None,
+            payload={"reason": "JUNIOR_LINK_CONFIRM"},
+        )
+        await session.commit()
+        await callback.answer("Нет прав", show_alert=True)
+        return
+    try:
+        if action == "disable" and isinstance(link_id, int):
+            await junior_link_service.disable_link(session, link_id=link_id, actor_id=user.id)
+        elif action == "add" and isinstance(master_id, int) and isinstance(junior_id, int) and isinstance(percent, Decimal):
+            await junior_link_service.link_junior_to_master(
                 session,
-                actor_id=actor.id,
-                action="PERMISSION_DENIED",
-                entity_type="master_junior_link",
-                entity_id=link_id if isinstance(link_id, int) else None,
-                payload={"reason": "JUNIOR_LINK_CONFIRM"},
+                master_id=master_id,
+                junior_id=junior_id,
+                percent=percent,
+                actor_id=user.id,
             )
-            await session.commit()
-            await callback.answer("Нет прав", show_alert=True)
-            return
-        if action in {"add", "relink", "disable"} and actor.role not in JUNIOR_LINK_ADMIN_ROLES:
-            await audit_service.log_audit_event(
+        elif action == "percent" and isinstance(link_id, int) and isinstance(percent, Decimal):
+            await junior_link_service.set_link_percent(
                 session,
-                actor_id=actor.id,
-                action="PERMISSION_DENIED",
-                entity_type="master_junior_link",
-                entity_id=link_id if isinstance(link_id, int) else None,
-                payload={"reason": "JUNIOR_LINK_CONFIRM"},
+                link_id=link_id,
+                percent=percent,
+                actor_id=user.id,
             )
-            await session.commit()
-            await callback.answer("Нет прав", show_alert=True)
-            return
-        try:
-            async with session.begin():
-                if action == "disable" and isinstance(link_id, int):
-                    await junior_link_service.disable_link(session, link_id=link_id, actor_id=actor.id)
-                elif action == "add" and isinstance(master_id, int) and isinstance(junior_id, int) and isinstance(percent, Decimal):
-                    await junior_link_service.link_junior_to_master(
-                        session,
-                        master_id=master_id,
-                        junior_id=junior_id,
-                        percent=percent,
-                        actor_id=actor.id,
-                    )
-                elif action == "percent" and isinstance(link_id, int) and isinstance(percent, Decimal):
-                    await junior_link_service.set_link_percent(
-                        session,
-                        link_id=link_id,
-                        percent=percent,
-                        actor_id=actor.id,
-                    )
-                elif action == "relink" and isinstance(master_id, int) and isinstance(junior_id, int) and isinstance(percent, Decimal):
-                    await junior_link_service.relink_junior(
-                        session,
-                        junior_id=junior_id,
-                        new_master_id=master_id,
-                        percent=percent,
-                        actor_id=actor.id,
-                    )
-                else:
-                    await callback.answer("Сессия устарела", show_alert=True)
-                    await state.clear()
-                    return
-        except ValueError as exc:
-            await callback.answer(str(exc), show_alert=True)
+        elif action == "relink" and isinstance(master_id, int) and isinstance(junior_id, int) and isinstance(percent, Decimal):
+            await junior_link_service.relink_junior(
+                session,
+                junior_id=junior_id,
+                new_master_id=master_id,
+                percent=percent,
+                actor_id=user.id,
+            )
+        else:
+            await callback.answer("Сессия устарела", show_alert=True)
+            await state.clear()
             return
+    except ValueError as exc:
+        await session.rollback()
+        await callback.answer(str(exc), show_alert=True)
+        return
+    await session.commit()
 
     await state.clear()
     await callback.message.answer("Данные сохранены.")
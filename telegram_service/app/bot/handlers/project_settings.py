@@ -3,17 +3,16 @@ from __future__ import annotations
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.bot.keyboards.project_settings import project_settings_keyboard
 from app.bot.states.project_settings import ProjectSettingsStates
 from app.db.enums import UserRole
-from app.db.session import async_session_factory
+from app.db.models import User
 from app.services.audit_service import AuditService
 from app.services.project_settings_service import ProjectSettingsService
-from app.services.user_service import UserService
 
 router = Router()
-user_service = UserService()
 project_settings_service = ProjectSettingsService()
 audit_service = AuditService()
 
@@ -46,30 +45,22 @@ def _parse_thresholds(raw: str) -> dict[str, int] | None:
 
 
 @router.message(F.text == "⚙️ Настройки проекта")
-async def project_settings_menu(message: Message, state: FSMContext) -> None:
+async def project_settings_menu(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
     await state.clear()
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+    if not user.is_active or user.role not in {UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN}:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None,
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="project_settings",
+            entity_id=None,
+            payload={"reason": "VIEW_SETTINGS"},
         )
         await session.commit()
-        if not user.is_active or user.role not in {UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN}:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="project_settings",
-                entity_id=None,
-                payload={"reason": "VIEW_SETTINGS"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа к настройкам проекта.")
-            return
+        await message.answer("У вас нет доступа к настройкам проекта.")
+        return
 
-        settings = await project_settings_service.get_settings(session)
+    settings = await project_settings_service.get_settings(session)
 
     text = (
         "⚙️ Настройки проекта\n"
@@ -101,7 +92,7 @@ async def project_settings_field(callback: CallbackQuery, state: FSMContext) ->
 
 
 @router.message(ProjectSettingsStates.value)
-async def project_settings_value(message: Message, state: FSMContext) -> None:
+async def project_settings_value(message: Message, state: FSMContext, user: User, session: AsyncSession) -> None:
     data = await state.get_data()
     field = data.get("field")
     if field not in {"requests_chat_id", "currency", "rounding_mode", "thresholds"}:
@@ -137,39 +128,32 @@ async def project_settings_value(message: Message, state: FSMContext) -> None:
             return
         updates["thresholds"] = parsed
 
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
-            session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None,
-        )
-        if not actor.is_active or actor.role not in {UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN}:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=actor.id,
-                action="PERMISSION_DENIED",
-                entity_type="project_settings",
-                entity_id=None,
-                payload={"reason": "UPDATE_SETTINGS"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа.")
-            await state.clear()
-            return
-
-        settings = await project_settings_service.get_settings(session)
-        before = {field: getattr(settings, field)}
-        await project_settings_service.update_settings(session, settings, updates=updates)
+    if not user.is_active or user.role not in {UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN}:
         await audit_service.log_audit_event(
             session,
-            actor_id=actor.id,
-            action="PROJECT_SETTINGS_UPDATED",
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
             entity_type="project_settings",
-            entity_id=settings.id,
-            payload={"before": before, "after": updates},
+            entity_id=None,
+            payload={"reason": "UPDATE_SETTINGS"},
         )
         await session.commit()
+        await message.answer("У вас нет доступа.")
+        await state.clear()
+        return
+
+    settings = await project_settings_service.get_settings(session)
+    before = {field: getattr(settings, field)}
+    await project_settings_service.update_settings(session, settings, updates=updates)
+    await audit_service.log_audit_event(
+        session,
+        actor_id=user.id,
+        action="PROJECT_SETTINGS_UPDATED",
+        entity_type="project_settings",
+        entity_id=settings.id,
+        payload={"before": before, "after": updates},
+    )
+    await session.commit()
 
     await state.clear()
     await message.answer("Настройки обновлены.")
@@ -1,44 +1,37 @@
 from __future__ import annotations
 
+import logging
+
 from aiogram import Bot, Router
 from aiogram.filters import CommandObject, CommandStart
 from aiogram.types import Message, ReplyKeyboardRemove
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.bot.keyboards.main_menu import build_main_menu
 from app.bot.handlers.utils import format_ticket_card
-from app.db.session import async_session_factory
+from app.db.models import User
 from app.db.enums import UserRole
 from app.services.ticket_service import TicketService
-from app.services.user_service import UserService
+
+logger = logging.getLogger(__name__)
 
 router = Router()
-user_service = UserService()
 ticket_service = TicketService()
 
 
 @router.message(CommandStart())
-async def start_handler(message: Message, command: CommandObject, bot: Bot) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
-            session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None,
-            log_diagnostics=True,
-        )
-        await session.commit()
-
+async def start_handler(message: Message, command: CommandObject, bot: Bot, user: User, session: AsyncSession) -> None:
+    logger.info(
+        "Start diagnostics: tg_user_id=%s role=%s is_active=%s display_name=%s",
+        user.id,
+        user.role.value,
+        user.is_active,
+        user.display_name,
+    )
     args = (command.args or "").strip()
     if args and args.startswith("ticket_"):
         ticket_id = int(args.replace("ticket_", ""))
-        async with async_session_factory() as session:
-            user = await user_service.ensure_user(
-                session,
-                message.from_user.id,
-                message.from_user.full_name if message.from_user else None,
-                message.from_user.username if message.from_user else None,
-            )
-            ticket = await ticket_service.get_ticket_for_actor(session, ticket_id, user)
+        ticket = await ticket_service.get_ticket_for_actor(session, ticket_id, user)
         if ticket:
             await message.answer(format_ticket_card(ticket))
             return
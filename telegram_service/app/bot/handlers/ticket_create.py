@@ -7,6 +7,7 @@ from uuid import UUID
 from aiogram import Bot, F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.bot.handlers.permissions import CREATE_ROLES
 from app.bot.handlers.utils import (
@@ -35,21 +36,21 @@ from app.bot.keyboards.ticket_wizard import (
 from app.bot.states.ticket_create import TicketCreateStates
 from app.core.config import get_settings
 from app.db.enums import AdSource, LeadStatus
-from app.db.session import async_session_factory
+from app.db.models import User
 from app.services.audit_service import AuditService
 from app.domain.enums_mapping import parse_ad_source, parse_ticket_category
 from app.services.lead_service import LeadService
+from app.services.outbox_service import OutboxService
 from app.services.project_settings_service import ProjectSettingsService
 from app.services.ticket_service import TicketService
-from app.services.user_service import UserService
 
 router = Router()
 settings = get_settings()
-user_service = UserService()
 ticket_service = TicketService()
 audit_service = AuditService()
 project_settings_service = ProjectSettingsService()
 lead_service = LeadService()
+outbox_service = OutboxService()
 
 
 def _is_value_set(data: dict, key: str) -> bool:
@@ -108,16 +109,7 @@ async def _advance_after_phone(message: Message, state: FSMContext) -> None:
 
 
 @router.message(F.text == "➕ Создать заказ")
-async def start_ticket_creation(message: Message, state: FSMContext) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
-            session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
-        )
-        await session.commit()
-
+async def start_ticket_creation(message: Message, state: FSMContext, user: User) -> None:
     if not user.is_active or user.role not in CREATE_ROLES:
         await message.answer("Нет доступа. Обратитесь к администратору.")
         return
@@ -128,13 +120,12 @@ async def start_ticket_creation(message: Message, state: FSMContext) -> None:
 
 
 @router.message(TicketCreateStates.category)
-async def ticket_category(message: Message, state: FSMContext) -> None:
+async def ticket_category(message: Message, state: FSMContext, session: AsyncSession) -> None:
     category = parse_ticket_category(message.text or "")
     await state.update_data(category=category)
     data = await state.get_data()
     if data.get("client_phone"):
-        async with async_session_factory() as session:
-            repeats = await ticket_service.search_by_phone(session, data["client_phone"])
+        repeats = await ticket_service.search_by_phone(session, data["client_phone"])
         repeat_ids = [ticket.id for ticket in repeats]
         is_repeat = len(repeat_ids) > 0
         await state.update_data(client_phone=data["client_phone"], is_repeat=is_repeat, repeat_ticket_ids=repeat_ids)
@@ -153,15 +144,14 @@ async def ticket_category(message: Message, state: FSMContext) -> None:
 
 
 @router.message(TicketCreateStates.phone)
-async def ticket_phone(message: Message, state: FSMContext) -> None:
+async def ticket_phone(message: Message, state: FSMContext, session: AsyncSession) -> None:
     raw_phone = message.text or ""
     phone = normalize_phone(raw_phone)
     if not is_valid_phone(phone):
         await message.answer("Введите корректный телефон.")
         return
 
-    async with async_session_factory() as session:
-        repeats = await ticket_service.search_by_phone(session, phone)
+    repeats = await ticket_service.search_by_phone(session, phone)
 
     repeat_ids = [ticket.id for ticket in repeats]
     is_repeat = len(repeat_ids) > 0
@@ -334,7 +324,7 @@ async def ticket_ad_source(message: Message, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data == "ticket_confirm")
-async def ticket_confirm(callback: CallbackQuery, state: FSMContext, bot: Bot) -> None:
+async def ticket_confirm(callback: CallbackQuery, state: FSMContext, bot: Bot, user: User, session: AsyncSession) -> None:
     data = await state.get_data()
     preferred_date_dm = data.get("preferred_date_dm")
     scheduled_at = data.get("scheduled_at")
@@ -350,87 +340,80 @@ async def ticket_confirm(callback: CallbackQuery, state: FSMContext, bot: Bot) -
     lead_id = data.get("lead_id")
     lead_message_chat_id = data.get("lead_message_chat_id")
     lead_message_id = data.get("lead_message_id")
+    bot_info = await bot.me()
 
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+    if not user.is_active or user.role not in CREATE_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=None,
+            payload={"reason": "CREATE_TICKET"},
         )
-        if not user.is_active or user.role not in CREATE_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=None,
-                payload={"reason": "CREATE_TICKET"},
-            )
-            await session.commit()
-            await callback.answer("Нет прав", show_alert=True)
-            return
+        await session.commit()
+        await callback.answer("Нет прав", show_alert=True)
+        return
 
-        lead = None
-        if lead_id:
-            lead = await lead_service.get_lead_for_update(session, UUID(str(lead_id)))
-            if not lead:
-                await callback.answer("Сырая заявка не найдена", show_alert=True)
-                await state.clear()
-                return
-            if lead.status in {LeadStatus.CONVERTED, LeadStatus.SPAM}:
-                await callback.answer("Заявка уже обработана", show_alert=True)
-                await state.clear()
-                return
-
-        ticket = await ticket_service.create_ticket(
-            session,
-            category=data["category"],
-            scheduled_at=scheduled_at,
-            preferred_date_dm=preferred_date_dm,
-            client_name=data.get("client_name"),
-            client_age_estimate=data.get("client_age_estimate"),
-            client_phone=data["client_phone"],
-            client_address=client_address,
-            address_details=data.get("address_details"),
-            problem_text=data["problem_text"],
-            special_note=data.get("special_note"),
-            ad_source=data.get("ad_source", AdSource.UNKNOWN),
-            created_by_admin_id=user.id,
-            is_repeat=data.get("is_repeat", False),
-            repeat_ticket_ids=data.get("repeat_ticket_ids"),
-        )
-        if not ticket:
-            await callback.answer("Не удалось создать заказ", show_alert=True)
-            await session.commit()
+    lead = None
+    if lead_id:
+        lead = await lead_service.get_lead_for_update(session, UUID(str(lead_id)))
+        if not lead:
+            await callback.answer("Сырая заявка не найдена", show_alert=True)
+            await state.clear()
+            return
+        if lead.status in {LeadStatus.CONVERTED, LeadStatus.SPAM}:
+            await callback.answer("Заявка уже обработана", show_alert=True)
+            await state.clear()
             return
-        await audit_service.log_event(
-            session,
-            ticket_id=ticket.id,
-            action="TICKET_CREATED",
-            actor_id=user.id,
-            payload={
-                "before": None,
-                "after": {
-                    "status": ticket.status.value,
-                    "category": ticket.category.value,
-                    "client_phone": ticket.client_phone,
-                },
-            },
-        )
 
-        if lead:
-            await lead_service.convert_to_ticket(session, lead=lead, ticket_id=ticket.id, actor_id=user.id)
+    ticket = await ticket_service.create_ticket(
+        session,
+        category=data["category"],
+        scheduled_at=scheduled_at,
+        preferred_date_dm=preferred_date_dm,
+        client_name=data.get("client_name"),
+        client_age_estimate=data.get("client_age_estimate"),
+        client_phone=data["client_phone"],
+        client_address=client_address,
+        address_details=data.get("address_details"),
+        problem_text=data["problem_text"],
+        special_note=data.get("special_note"),
+        ad_source=data.get("ad_source", AdSource.UNKNOWN),
+        created_by_admin_id=user.id,
+        is_repeat=data.get("is_repeat", False),
+        repeat_ticket_ids=data.get("repeat_ticket_ids"),
+    )
+    if not ticket:
+        await callback.answer("Не удалось создать заказ", show_alert=True)
         await session.commit()
+        return
+    await audit_service.log_event(
+        session,
+        ticket_id=ticket.id,
+        action="TICKET_CREATED",
+        actor_id=user.id,
+        payload={
+            "before": None,
+            "after": {
+                "status": ticket.status.value,
+                "category": ticket.category.value,
+                "client_phone": ticket.client_phone,
+            },
+        },
+    )
 
-    bot_info = await bot.get_me()
-    async with async_session_factory() as session:
-        requests_chat_id = await project_settings_service.get_requests_chat_id(session, settings.requests_chat_id)
-    await bot.send_message(
-        requests_chat_id,
-        format_ticket_public(ticket),
+    if lead:
+        await lead_service.convert_to_ticket(session, lead=lead, ticket_id=ticket.id, actor_id=user.id)
+    requests_chat_id = await project_settings_service.get_requests_chat_id(session, settings.requests_chat_id)
+    await outbox_service.enqueue_message(
+        session,
+        kind="ticket_published",
+        chat_id=requests_chat_id,
+        text=format_ticket_public(ticket),
         reply_markup=request_chat_keyboard(ticket, bot_info.username),
     )
+    await session.commit()
 
     if lead and lead_message_chat_id and lead_message_id:
         await bot.edit_message_text(
@@ -7,7 +7,8 @@ import logging
 from aiogram import Bot, F, Router
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InputMediaPhoto, Message
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.bot.handlers.permissions import MASTER_ROLES, TRANSFER_CONFIRM_ROLES
 from app.bot.handlers.utils import (
@@ -36,18 +37,19 @@ from app.bot.keyboards.ticket_list import worker_closed_keyboard
 from app.bot.states.ticket_close import TicketCloseStates
 from app.core.config import get_settings
 from app.db.enums import TicketStatus, TransferStatus, UserRole, ticket_category_label
-from app.db.session import async_session_factory
+from app.db.models import User
 from app.services.audit_service import AuditService
-from app.services.ticket_service import TicketService
+from app.services.outbox_service import OutboxService
+from app.services.pagination import KeysetPage, cursor_from_params
+from app.services.ticket_service import CLOSED_LIST_CURSOR, TicketService
 from app.services.junior_link_service import JuniorLinkService
-from app.services.user_service import UserService
 
 router = Router()
 settings = get_settings()
-user_service = UserService()
 ticket_service = TicketService()
 junior_link_service = JuniorLinkService()
 audit_service = AuditService()
+outbox_service = OutboxService()
 logger = logging.getLogger(__name__)
 
 
@@ -63,29 +65,21 @@ def parse_amount(value: str) -> Decimal | None:
 
 
 @router.message(F.text == "🧾 Очередь")
-async def queue_list(message: Message) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+async def queue_list(message: Message, user: User, session: AsyncSession) -> None:
+    if not user.is_active or user.role not in MASTER_ROLES:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=None,
+            payload={"reason": "QUEUE_LIST"},
         )
         await session.commit()
-        if not user.is_active or user.role not in MASTER_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=None,
-                payload={"reason": "QUEUE_LIST"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа к очереди.")
-            return
+        await message.answer("У вас нет доступа к очереди.")
+        return
 
-        tickets = await ticket_service.list_queue(session)
+    tickets = await ticket_service.list_queue(session)
 
     if not tickets:
         await message.answer("Очередь пуста.")
@@ -96,69 +90,56 @@ async def queue_list(message: Message) -> None:
 
 
 @router.callback_query(F.data.startswith("queue_take:"))
-async def queue_take(callback: CallbackQuery, bot: Bot) -> None:
+async def queue_take(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     ticket_id = int(callback.data.split(":", 1)[1])
     events_chat_id = settings.events_chat_id
 
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+    if not user.is_active or user.role not in MASTER_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=ticket_id,
+            payload={"reason": "TAKE_TICKET"},
+            ticket_id=ticket_id,
         )
-        if not user.is_active or user.role not in MASTER_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=ticket_id,
-                payload={"reason": "TAKE_TICKET"},
-                ticket_id=ticket_id,
-            )
-            await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
-            await session.commit()
-            return
+        await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
+        await session.commit()
+        return
 
-        ticket = await ticket_service.take_ticket(session, ticket_id, user.id)
+    ticket = await ticket_service.take_ticket(session, ticket_id, user)
 
-        if not ticket:
-            await session.rollback()
-            await callback.answer("Заказ уже принят или недоступен.", show_alert=True)
-            return
+    if not ticket:
+        await session.rollback()
+        await callback.answer("Заказ уже принят или недоступен.", show_alert=True)
+        return
 
-        await session.commit()
+    await outbox_service.enqueue_message(
+        session, kind="ticket_event", chat_id=events_chat_id, text=format_ticket_event_taken(ticket)
+    )
+    await session.commit()
 
     await callback.message.edit_text(format_ticket_card(ticket))
-    await bot.send_message(events_chat_id, format_ticket_event_taken(ticket))
     await callback.answer("Заказ принят")
 
 
 @router.message(F.text == "🔥 Мои активные")
-async def my_active(message: Message) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+async def my_active(message: Message, user: User, session: AsyncSession) -> None:
+    if not user.is_active or user.role not in MASTER_ROLES:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=None,
+            payload={"reason": "LIST_ACTIVE"},
         )
         await session.commit()
-        if not user.is_active or user.role not in MASTER_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=None,
-                payload={"reason": "LIST_ACTIVE"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа к активным заказам.")
-            return
+        await message.answer("У вас нет доступа к активным заказам.")
+        return
 
-        tickets = await ticket_service.list_my_active(session, user.id)
+    tickets = await ticket_service.list_my_active(session, user.id)
 
     if not tickets:
         await message.answer("У вас нет активных заказов.")
@@ -178,48 +159,33 @@ async def my_active(message: Message) -> None:
 
 
 @router.message(F.text == "📦 Мои закрытые")
-async def my_closed(message: Message) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+async def my_closed(message: Message, user: User, session: AsyncSession) -> None:
+    if not user.is_active or user.role not in MASTER_ROLES:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=None,
+            payload={"reason": "LIST_CLOSED"},
         )
         await session.commit()
-        if not user.is_active or user.role not in MASTER_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=None,
-                payload={"reason": "LIST_CLOSED"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа к закрытым заказам.")
-            return
+        await message.answer("У вас нет доступа к закрытым заказам.")
+        return
 
-        tickets, total = await ticket_service.list_my_closed_page(session, user.id, page=0, page_size=12)
+    result = await ticket_service.list_my_closed_page(session, user.id, page_size=12, with_total=True)
 
     await message.answer(
-        _render_worker_closed_list(tickets, total=total, page=0, page_size=12),
-        reply_markup=_worker_closed_keyboard(tickets, total=total, page=0),
+        _render_worker_closed_list(result, page=0, page_size=12),
+        reply_markup=_worker_closed_keyboard(result, page=0),
     )
 
 
 @router.callback_query(F.data.startswith("closed_open:"))
-async def worker_closed_open(callback: CallbackQuery) -> None:
+async def worker_closed_open(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     try:
         ticket_id = int(callback.data.split(":", 1)[1])
-        async with async_session_factory() as session:
-            user = await user_service.ensure_user(
-                session,
-                callback.from_user.id,
-                callback.from_user.full_name if callback.from_user else None,
-                callback.from_user.username if callback.from_user else None,
-            )
-            ticket = await ticket_service.get_ticket_for_actor(session, ticket_id, user)
+        ticket = await ticket_service.get_ticket_for_actor(session, ticket_id, user)
 
         if not ticket or (user.role in MASTER_ROLES and ticket.status != TicketStatus.CLOSED):
             await callback.answer("Нет доступа к заказу", show_alert=True)
@@ -238,133 +204,117 @@ async def worker_closed_open(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("wrk:closed:"))
-async def worker_closed_pagination(callback: CallbackQuery) -> None:
+async def worker_closed_pagination(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     payload = _parse_kv_payload(callback.data, prefix="wrk:closed:")
-    if "close" in callback.data:
+    if callback.data == "wrk:closed:close":
         if callback.message:
             await callback.message.delete()
         await callback.answer()
         return
 
     page = int(payload.get("page", 0))
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
-            session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None,
-        )
-        if not user.is_active or user.role not in MASTER_ROLES:
-            await callback.answer("Нет доступа", show_alert=True)
-            return
-        tickets, total = await ticket_service.list_my_closed_page(session, user.id, page=page, page_size=12)
-    text = _render_worker_closed_list(tickets, total=total, page=page, page_size=12)
+    cursor = cursor_from_params(payload, CLOSED_LIST_CURSOR)
+    if not user.is_active or user.role not in MASTER_ROLES:
+        await callback.answer("Нет доступа", show_alert=True)
+        return
+    result = await ticket_service.list_my_closed_page(
+        session, user.id, cursor=cursor, page_size=12, with_total=True
+    )
+    page = page if result.has_prev else 0
+    text = _render_worker_closed_list(result, page=page, page_size=12)
     await callback.message.edit_text(
         text,
-        reply_markup=_worker_closed_keyboard(tickets, total=total, page=page),
+        reply_markup=_worker_closed_keyboard(result, page=page),
     )
     await callback.answer()
 
 
 @router.callback_query(F.data.startswith("status_progress:"))
-async def status_in_progress(callback: CallbackQuery, bot: Bot) -> None:
+async def status_in_progress(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     ticket_id = int(callback.data.split(":", 1)[1])
     events_chat_id = settings.events_chat_id
 
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+    if not user.is_active or user.role not in MASTER_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=ticket_id,
+            payload={"reason": "SET_IN_PROGRESS"},
+            ticket_id=ticket_id,
         )
-        if not user.is_active or user.role not in MASTER_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=ticket_id,
-                payload={"reason": "SET_IN_PROGRESS"},
-                ticket_id=ticket_id,
-            )
-            await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
-            await session.commit()
-            return
+        await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
+        await session.commit()
+        return
 
-        ticket = await ticket_service.set_in_progress(session, ticket_id, user.id)
+    ticket = await ticket_service.set_in_progress(session, ticket_id, user)
 
-        if not ticket:
-            await session.rollback()
-            await callback.answer("Нельзя сменить статус: заказ должен быть принят.", show_alert=True)
-            return
+    if not ticket:
+        await session.rollback()
+        await callback.answer("Нельзя сменить статус: заказ должен быть принят.", show_alert=True)
+        return
 
-        await session.commit()
+    await outbox_service.enqueue_message(
+        session, kind="ticket_event", chat_id=events_chat_id, text=format_ticket_event_status(ticket)
+    )
+    await session.commit()
 
     await callback.message.edit_text(format_ticket_card(ticket))
-    await bot.send_message(events_chat_id, format_ticket_event_status(ticket))
     await callback.answer("Статус обновлен")
 
 
 @router.callback_query(F.data.startswith("close_start:"))
-async def close_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def close_start(callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession) -> None:
     ticket_id = int(callback.data.split(":", 1)[1])
 
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+    if not user.is_active or user.role not in MASTER_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=ticket_id,
+            payload={"reason": "CLOSE_TICKET"},
+            ticket_id=ticket_id,
         )
         await session.commit()
-        if not user.is_active or user.role not in MASTER_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=ticket_id,
-                payload={"reason": "CLOSE_TICKET"},
-                ticket_id=ticket_id,
-            )
-            await session.commit()
-            await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
-            return
+        await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
+        return
 
-        ticket = await ticket_service.get_ticket(session, ticket_id)
-        if not ticket:
-            await callback.answer("Заказ не найден", show_alert=True)
-            return
-        if not ticket.assigned_executor_id:
-            await callback.answer("Нет исполнителя для закрытия", show_alert=True)
-            return
-        if user.role not in {UserRole.SYS_ADMIN, UserRole.SUPER_ADMIN} and ticket.assigned_executor_id != user.id:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=ticket_id,
-                payload={"reason": "CLOSE_TICKET_NOT_EXECUTOR"},
-                ticket_id=ticket_id,
-            )
-            await session.commit()
-            await callback.answer("Нет прав на закрытие", show_alert=True)
-            return
-        if ticket.status != TicketStatus.IN_PROGRESS:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="INVALID_STATE_TRANSITION",
-                entity_type="ticket",
-                entity_id=ticket_id,
-                payload={"before": {"status": ticket.status.value}, "after": {"status": TicketStatus.CLOSED.value}},
-                ticket_id=ticket_id,
-            )
-            await session.commit()
-            await callback.answer("Нельзя закрыть заказ не из статуса 'В работе'.", show_alert=True)
-            return
+    ticket = await ticket_service.get_ticket(session, ticket_id)
+    if not ticket:
+        await callback.answer("Заказ не найден", show_alert=True)
+        return
+    if not ticket.assigned_executor_id:
+        await callback.answer("Нет исполнителя для закрытия", show_alert=True)
+        return
+    if user.role not in {UserRole.SYS_ADMIN, UserRole.SUPER_ADMIN} and ticket.assigned_executor_id != user.id:
+        await audit_service.log_audit_event(
+            session,
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=ticket_id,
+            payload={"reason": "CLOSE_TICKET_NOT_EXECUTOR"},
+            ticket_id=ticket_id,
+        )
+        await session.commit()
+        await callback.answer("Нет прав на закрытие", show_alert=True)
+        return
+    if ticket.status != TicketStatus.IN_PROGRESS:
+        await audit_service.log_audit_event(
+            session,
+            actor_id=user.id,
+            action="INVALID_STATE_TRANSITION",
+            entity_type="ticket",
+            entity_id=ticket_id,
+            payload={"before": {"status": ticket.status.value}, "after": {"status": TicketStatus.CLOSED.value}},
+            ticket_id=ticket_id,
+        )
+        await session.commit()
+        await callback.answer("Нельзя закрыть заказ не из статуса 'В работе'.", show_alert=True)
+        return
 
     await state.clear()
     await state.update_data(
@@ -391,7 +341,7 @@ async def close_revenue(message: Message, state: FSMContext) -> None:
 
 
 @router.message(TicketCloseStates.expense)
-async def close_expense(message: Message, state: FSMContext) -> None:
+async def close_expense(message: Message, state: FSMContext, session: AsyncSession) -> None:
     amount = parse_amount(message.text or "")
     if amount is None:
         await message.answer("Введите корректное число (>= 0).")
@@ -416,8 +366,7 @@ async def close_expense(message: Message, state: FSMContext) -> None:
         await state.clear()
         return
 
-    async with async_session_factory() as session:
-        links = await junior_link_service.get_active_juniors_for_master(session, executor_id)
+    links = await junior_link_service.get_active_juniors_for_master(session, executor_id)
 
     options = []
     for link in links:
@@ -441,7 +390,7 @@ async def close_edit(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("close_junior:"))
-async def close_select_junior(callback: CallbackQuery, state: FSMContext) -> None:
+async def close_select_junior(callback: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
     choice = callback.data.split(":", 1)[1]
     data = await state.get_data()
     executor_id = data.get("executor_id")
@@ -458,8 +407,7 @@ async def close_select_junior(callback: CallbackQuery, state: FSMContext) -> Non
     junior_label = "Без младшего мастера"
     if choice != "none":
         junior_id = int(choice)
-        async with async_session_factory() as session:
-            link = await junior_link_service.get_active_link(session, executor_id, junior_id)
+        link = await junior_link_service.get_active_link(session, executor_id, junior_id)
         if not link:
             await callback.answer("Младший мастер недоступен", show_alert=True)
             return
@@ -659,7 +607,7 @@ async def _send_close_confirmation(message: Message, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data == "close_confirm")
-async def close_confirm(callback: CallbackQuery, state: FSMContext, bot: Bot) -> None:
+async def close_confirm(callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession) -> None:
     data = await state.get_data()
     ticket_id = data.get("ticket_id")
     revenue = data.get("revenue")
@@ -682,143 +630,127 @@ async def close_confirm(callback: CallbackQuery, state: FSMContext, bot: Bot) ->
     events_chat_id = settings.events_chat_id
     closed_report_chat_id = settings.closed_report_chat_id
 
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+    if not user.is_active or user.role not in MASTER_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
-        )
-        if not user.is_active or user.role not in MASTER_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=ticket_id,
-                payload={"reason": "CLOSE_TICKET"},
-                ticket_id=ticket_id,
-            )
-            await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
-            await session.commit()
-            await state.clear()
-            return
-
-        ticket = await ticket_service.close_ticket(
-            session,
-            ticket_id,
-            user.id,
-            revenue=revenue,
-            expense=expense,
-            junior_master_id=junior_master_id,
-            junior_master_percent=junior_master_percent,
-            closed_comment=closed_comment,
-            close_photos=close_photos,
-            allow_override=user.role in {UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN},
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=ticket_id,
+            payload={"reason": "CLOSE_TICKET"},
+            ticket_id=ticket_id,
         )
+        await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
+        await session.commit()
+        await state.clear()
+        return
 
-        if not ticket:
-            await session.rollback()
-            await callback.answer("Нельзя закрыть заказ в текущем статусе.", show_alert=True)
-            await state.clear()
-            return
+    ticket = await ticket_service.close_ticket(
+        session,
+        ticket_id,
+        user,
+        revenue=revenue,
+        expense=expense,
+        junior_master_id=junior_master_id,
+        junior_master_percent=junior_master_percent,
+        closed_comment=closed_comment,
+        close_photos=close_photos,
+        allow_override=user.role in {UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN},
+    )
 
-        await session.commit()
+    if not ticket:
+        await session.rollback()
+        await callback.answer("Нельзя закрыть заказ в текущем статусе.", show_alert=True)
+        await state.clear()
+        return
 
-    await state.clear()
-    await callback.message.answer("Заказ закрыт.")
-    await callback.message.answer(format_ticket_card(ticket), reply_markup=await build_main_menu(user.role))
-    await bot.send_message(events_chat_id, format_ticket_event_closed(ticket))
+    await outbox_service.enqueue_message(
+        session, kind="ticket_event", chat_id=events_chat_id, text=format_ticket_event_closed(ticket)
+    )
     report_text = format_closed_report(ticket)
-    async with async_session_factory() as session:
-        stored_photos = await ticket_service.get_close_photos(session, ticket.id)
-    photo_file_ids = [item.file_id for item in stored_photos]
+    # close_ticket stores exactly these photos, in this order; no need to read them back.
+    photo_file_ids = [item["file_id"] for item in close_photos if item.get("file_id")]
     if not photo_file_ids and ticket.closed_photo_file_id:
         photo_file_ids = [ticket.closed_photo_file_id]
 
     if photo_file_ids:
-        media = [InputMediaPhoto(media=file_id) for file_id in photo_file_ids]
-        media[0].caption = report_text
-        await bot.send_media_group(closed_report_chat_id, media)
-        if len(report_text) > 1024:
-            await bot.send_message(closed_report_chat_id, report_text)
-    else:
-        await bot.send_message(closed_report_chat_id, report_text)
+        await outbox_service.enqueue_media_group(
+            session,
+            kind="closed_report",
+            chat_id=closed_report_chat_id,
+            photo_file_ids=photo_file_ids,
+            caption=report_text if len(report_text) <= 1024 else None,
+        )
+    if not photo_file_ids or len(report_text) > 1024:
+        await outbox_service.enqueue_message(
+            session, kind="closed_report", chat_id=closed_report_chat_id, text=report_text
+        )
+    await session.commit()
+
+    await state.clear()
+    await callback.message.answer("Заказ закрыт.")
+    await callback.message.answer(format_ticket_card(ticket), reply_markup=await build_main_menu(user.role))
     await callback.answer()
 
 
 @router.callback_query(F.data.startswith("transfer_sent:"))
-async def transfer_sent(callback: CallbackQuery, bot: Bot) -> None:
+async def transfer_sent(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     ticket_id = int(callback.data.split(":", 1)[1])
     events_chat_id = settings.events_chat_id
 
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+    if not user.is_active or user.role not in MASTER_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=ticket_id,
+            payload={"reason": "TRANSFER_SENT"},
+            ticket_id=ticket_id,
         )
-        if not user.is_active or user.role not in MASTER_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=ticket_id,
-                payload={"reason": "TRANSFER_SENT"},
-                ticket_id=ticket_id,
-            )
-            await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
-            await session.commit()
-            return
+        await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
+        await session.commit()
+        return
 
-        ticket = await ticket_service.mark_transfer_sent(session, ticket_id, user.id)
+    ticket = await ticket_service.mark_transfer_sent(session, ticket_id, user)
 
-        if not ticket:
-            await session.rollback()
-            await callback.answer("Нельзя отметить перевод: заказ не закрыт или перевод уже отмечен.", show_alert=True)
-            return
+    if not ticket:
+        await session.rollback()
+        await callback.answer("Нельзя отметить перевод: заказ не закрыт или перевод уже отмечен.", show_alert=True)
+        return
 
-        await session.commit()
+    await outbox_service.enqueue_message(
+        session, kind="ticket_event", chat_id=events_chat_id, text=format_ticket_event_transfer(ticket)
+    )
+    await session.commit()
 
     await callback.message.edit_text(format_ticket_card(ticket))
-    await bot.send_message(events_chat_id, format_ticket_event_transfer(ticket))
     await callback.answer("Отметили перевод")
 
 
 @router.message(F.text == "✅ Подтверждения")
-async def transfer_confirmations(message: Message) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+async def transfer_confirmations(message: Message, user: User, session: AsyncSession) -> None:
+    if not user.is_active or user.role not in TRANSFER_CONFIRM_ROLES:
+        await audit_service.log_audit_event(
             session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=None,
+            payload={"reason": "TRANSFER_CONFIRM_LIST"},
         )
         await session.commit()
-        if not user.is_active or user.role not in TRANSFER_CONFIRM_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=None,
-                payload={"reason": "TRANSFER_CONFIRM_LIST"},
-            )
-            await session.commit()
-            await message.answer("У вас нет доступа к подтверждениям.")
-            return
+        await message.answer("У вас нет доступа к подтверждениям.")
+        return
 
-        tickets = await ticket_service.list_transfer_pending(session)
+    tickets = await ticket_service.list_transfer_pending(session)
 
     if not tickets:
         await message.answer("Нет переводов на подтверждение.")
         return
 
     for ticket in tickets:
-        executor = ticket.assigned_executor.display_name if ticket.assigned_executor else None
-        executor_label = executor or f"ID {ticket.assigned_executor_id}"
+        executor_label = ticket.executor_name or f"ID {ticket.assigned_executor_id}"
         net_profit = ticket.net_profit if ticket.net_profit is not None else "-"
         sent_at = ticket.transfer_sent_at.strftime("%Y-%m-%d %H:%M") if ticket.transfer_sent_at else "-"
         text = (
@@ -841,42 +773,37 @@ async def transfer_confirm_prompt(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("transfer_confirm_yes:"))
-async def transfer_confirm(callback: CallbackQuery, bot: Bot) -> None:
+async def transfer_confirm(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     ticket_id = int(callback.data.split(":", 1)[1])
     events_chat_id = settings.events_chat_id
 
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+    if not user.is_active or user.role not in TRANSFER_CONFIRM_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=ticket_id,
+            payload={"reason": "TRANSFER_CONFIRM"},
+            ticket_id=ticket_id,
         )
-        if not user.is_active or user.role not in TRANSFER_CONFIRM_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=ticket_id,
-                payload={"reason": "TRANSFER_CONFIRM"},
-                ticket_id=ticket_id,
-            )
-            await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
-            await session.commit()
-            return
+        await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
+        await session.commit()
+        return
 
-        ticket = await ticket_service.confirm_transfer(session, ticket_id, user.id, approved=True)
+    ticket = await ticket_service.confirm_transfer(session, ticket_id, user, approved=True)
 
-        if not ticket:
-            await session.rollback()
-            await callback.answer("Нельзя подтвердить перевод", show_alert=True)
-            return
+    if not ticket:
+        await session.rollback()
+        await callback.answer("Нельзя подтвердить перевод", show_alert=True)
+        return
 
-        await session.commit()
+    await outbox_service.enqueue_message(
+        session, kind="ticket_event", chat_id=events_chat_id, text=format_ticket_event_transfer(ticket)
+    )
+    await session.commit()
 
     await callback.message.edit_text(format_ticket_card(ticket))
-    await bot.send_message(events_chat_id, format_ticket_event_transfer(ticket))
     await callback.answer("Перевод подтвержден")
 
 
@@ -886,52 +813,47 @@ async def transfer_confirm_cancel(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("transfer_reject:"))
-async def transfer_reject(callback: CallbackQuery, bot: Bot) -> None:
+async def transfer_reject(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     ticket_id = int(callback.data.split(":", 1)[1])
     events_chat_id = settings.events_chat_id
 
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
+    if not user.is_active or user.role not in TRANSFER_CONFIRM_ROLES:
+        await audit_service.log_audit_event(
             session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
+            entity_type="ticket",
+            entity_id=ticket_id,
+            payload={"reason": "TRANSFER_REJECT"},
+            ticket_id=ticket_id,
         )
-        if not user.is_active or user.role not in TRANSFER_CONFIRM_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=user.id,
-                action="PERMISSION_DENIED",
-                entity_type="ticket",
-                entity_id=ticket_id,
-                payload={"reason": "TRANSFER_REJECT"},
-                ticket_id=ticket_id,
-            )
-            await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
-            await session.commit()
-            return
+        await callback.answer(f"Нет доступа. Ваша роль: {user.role.value}", show_alert=True)
+        await session.commit()
+        return
 
-        ticket = await ticket_service.confirm_transfer(session, ticket_id, user.id, approved=False)
+    ticket = await ticket_service.confirm_transfer(session, ticket_id, user, approved=False)
 
-        if not ticket:
-            await session.rollback()
-            await callback.answer("Нельзя отклонить перевод", show_alert=True)
-            return
+    if not ticket:
+        await session.rollback()
+        await callback.answer("Нельзя отклонить перевод", show_alert=True)
+        return
 
-        await session.commit()
+    await outbox_service.enqueue_message(
+        session, kind="ticket_event", chat_id=events_chat_id, text=format_ticket_event_transfer(ticket)
+    )
+    await session.commit()
 
     await callback.message.edit_text(format_ticket_card(ticket))
-    await bot.send_message(events_chat_id, format_ticket_event_transfer(ticket))
     await callback.answer("Перевод отклонен")
 
 
-def _render_worker_closed_list(tickets, *, total: int, page: int, page_size: int) -> str:
-    total_pages = max(1, ceil(total / page_size)) if total else 1
-    header = f"Закрытые заявки (страница {page + 1}/{total_pages})"
-    if not tickets:
+def _render_worker_closed_list(result: KeysetPage, *, page: int, page_size: int) -> str:
+    pages_hint = f"/~{max(1, ceil(result.total / page_size))}" if result.total is not None else ""
+    header = f"Закрытые заявки (страница {page + 1}{pages_hint})"
+    if not result.items:
         return f"{header}\nУ вас нет закрытых заказов."
     lines = [header]
-    for ticket in tickets:
+    for ticket in result.items:
         closed_at = ticket.closed_at or ticket.updated_at
         date_value = closed_at.strftime("%d.%m.%Y") if closed_at else "-"
         client_label = ticket.client_name or "-"
@@ -940,12 +862,13 @@ def _render_worker_closed_list(tickets, *, total: int, page: int, page_size: int
     return "\n".join(lines)
 
 
-def _worker_closed_keyboard(tickets, *, total: int, page: int) -> InlineKeyboardMarkup:
-    total_pages = max(1, ceil(total / 12)) if total else 1
+def _worker_closed_keyboard(result: KeysetPage, *, page: int) -> InlineKeyboardMarkup:
     return worker_closed_keyboard(
-        ticket_buttons=[(ticket.id, ticket_display_id(ticket)) for ticket in tickets],
+        ticket_buttons=[(ticket.id, ticket_display_id(ticket)) for ticket in result.items],
         page=page,
-        total_pages=total_pages,
+        has_next=result.has_next,
+        first_key=result.first_key,
+        last_key=result.last_key,
     )
 
 
@@ -6,13 +6,14 @@ from decimal import Decimal, InvalidOperation
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.bot.handlers.permissions import USER_ADMIN_ROLES
 from app.bot.keyboards.confirmations import confirm_action_keyboard
 from app.bot.keyboards.users import user_list_keyboard, user_role_keyboard
 from app.bot.states.user_percent import UserPercentStates
 from app.db.enums import UserRole
-from app.db.session import async_session_factory
+from app.db.models import User
 from app.services.audit_service import AuditService
 from app.services.user_service import UserService
 
@@ -23,40 +24,26 @@ logger = logging.getLogger(__name__)
 
 
 @router.message(F.text == "👥 Пользователи")
-async def users_list(message: Message) -> None:
-    async with async_session_factory() as session:
-        user = await user_service.ensure_user(
-            session,
-            message.from_user.id,
-            message.from_user.full_name if message.from_user else None,
-            message.from_user.username if message.from_user else None,
-        )
-        if not user.is_active or user.role not in USER_ADMIN_ROLES:
-            await message.answer("У вас нет прав для управления пользователями.")
-            return
+async def users_list(message: Message, user: User, session: AsyncSession) -> None:
+    if not user.is_active or user.role not in USER_ADMIN_ROLES:
+        await message.answer("У вас нет прав для управления пользователями.")
+        return
 
-        users = await user_service.list_users(session)
+    users = await user_service.list_users(session)
 
     user_entries = [(item.id, item.username) for item in users]
     await message.answer("Пользователи:", reply_markup=user_list_keyboard(user_entries))
 
 
 @router.callback_query(F.data.startswith("user:"))
-async def user_card(callback: CallbackQuery) -> None:
+async def user_card(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     user_id = int(callback.data.split(":", 1)[1])
 
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
-            session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None,
-        )
-        if not actor.is_active or actor.role not in USER_ADMIN_ROLES:
-            await callback.answer("Нет прав", show_alert=True)
-            return
+    if not user.is_active or user.role not in USER_ADMIN_ROLES:
+        await callback.answer("Нет прав", show_alert=True)
+        return
 
-        target = await user_service.get_user(session, user_id)
+    target = await user_service.get_user(session, user_id)
 
     if not target:
         await callback.answer("Пользователь не найден", show_alert=True)
@@ -77,138 +64,110 @@ async def user_card(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("role:"))
-async def user_set_role(callback: CallbackQuery) -> None:
+async def user_set_role(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     _, user_id, role_value = callback.data.split(":", 2)
     user_id_int = int(user_id)
 
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
-            session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None,
-        )
-        if not actor.is_active or actor.role not in USER_ADMIN_ROLES:
-            await callback.answer("Нет прав", show_alert=True)
-            return
-
-        target = await user_service.get_user(session, user_id_int)
-        if not target:
-            await callback.answer("Пользователь не найден", show_alert=True)
-            return
-
-        old_role = target.role
-        role = UserRole(role_value)
-        await user_service.set_role(session, target, role)
-        logger.info(
-            "User role change requested: target_user_id=%s target_tg_user_id=%s old_role=%s new_role=%s",
-            target.id,
-            target.id,
-            old_role.value,
-            role.value,
-        )
-        await audit_service.log_audit_event(
-            session,
-            actor_id=actor.id,
-            action="USER_ROLE_CHANGED",
-            entity_type="user",
-            entity_id=target.id,
-            payload={"role": role.value},
-        )
-        await session.commit()
-        logger.info(
-            "User role change committed: target_user_id=%s target_tg_user_id=%s new_role=%s",
-            target.id,
-            target.id,
-            role.value,
-        )
+    if not user.is_active or user.role not in USER_ADMIN_ROLES:
+        await callback.answer("Нет прав", show_alert=True)
+        return
+
+    target = await user_service.get_user(session, user_id_int)
+    if not target:
+        await callback.answer("Пользователь не найден", show_alert=True)
+        return
+
+    old_role = target.role
+    role = UserRole(role_value)
+    await user_service.set_role(session, target, role)
+    logger.info(
+        "User role change requested: target_user_id=%s target_tg_user_id=%s old_role=%s new_role=%s",
+        target.id,
+        target.id,
+        old_role.value,
+        role.value,
+    )
+    await audit_service.log_audit_event(
+        session,
+        actor_id=user.id,
+        action="USER_ROLE_CHANGED",
+        entity_type="user",
+        entity_id=target.id,
+        payload={"role": role.value},
+    )
+    await session.commit()
+    logger.info(
+        "User role change committed: target_user_id=%s target_tg_user_id=%s new_role=%s",
+        target.id,
+        target.id,
+        role.value,
+    )
 
     await callback.answer("Роль обновлена")
 
 
 @router.callback_query(F.data.startswith("user_disable:"))
-async def user_disable(callback: CallbackQuery) -> None:
+async def user_disable(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     user_id = int(callback.data.split(":", 1)[1])
 
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
-            session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None,
-        )
-        if not actor.is_active or actor.role not in USER_ADMIN_ROLES:
-            await callback.answer("Нет прав", show_alert=True)
-            return
+    if not user.is_active or user.role not in USER_ADMIN_ROLES:
+        await callback.answer("Нет прав", show_alert=True)
+        return
 
-        target = await user_service.get_user(session, user_id)
-        if not target:
-            await callback.answer("Пользователь не найден", show_alert=True)
-            return
+    target = await user_service.get_user(session, user_id)
+    if not target:
+        await callback.answer("Пользователь не найден", show_alert=True)
+        return
 
-        await user_service.set_active(session, target, False)
-        await audit_service.log_audit_event(
-            session,
-            actor_id=actor.id,
-            action="USER_DISABLED",
-            entity_type="user",
-            entity_id=target.id,
-            payload=None,
-        )
-        await session.commit()
+    await user_service.set_active(session, target, False)
+    await audit_service.log_audit_event(
+        session,
+        actor_id=user.id,
+        action="USER_DISABLED",
+        entity_type="user",
+        entity_id=target.id,
+        payload=None,
+    )
+    await session.commit()
 
     await callback.answer("Пользователь выключен")
 
 
 @router.callback_query(F.data.startswith("user_enable:"))
-async def user_enable(callback: CallbackQuery) -> None:
+async def user_enable(callback: CallbackQuery, user: User, session: AsyncSession) -> None:
     user_id = int(callback.data.split(":", 1)[1])
 
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
-            session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None,
-        )
-        if not actor.is_active or actor.role not in USER_ADMIN_ROLES:
-            await callback.answer("Нет прав", show_alert=True)
-            return
+    if not user.is_active or user.role not in USER_ADMIN_ROLES:
+        await callback.answer("Нет прав", show_alert=True)
+        return
 
-        target = await user_service.get_user(session, user_id)
-        if not target:
-            await callback.answer("Пользователь не найден", show_alert=True)
-            return
+    target = await user_service.get_user(session, user_id)
+    if not target:
+        await callback.answer("Пользователь не найден", show_alert=True)
+        return
 
-        await user_service.set_active(session, target, True)
-        await audit_service.log_audit_event(
-            session,
-            actor_id=actor.id,
-            action="USER_ENABLED",
-            entity_type="user",
-            entity_id=target.id,
-            payload=None,
-        )
-        await session.commit()
+    await user_service.set_active(session, target, True)
+    await audit_service.log_audit_event(
+        session,
+        actor_id=user.id,
+        action="USER_ENABLED",
+        entity_type="user",
+        entity_id=target.id,
+        payload=None,
+    )
+    await session.commit()
 
     await callback.answer("Пользователь включен")
 
 
 @router.callback_query(F.data.startswith("user_percent:"))
-async def user_percent_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def user_percent_start(callback: CallbackQuery, state: FSMContext, user: User) -> None:
     _, percent_type, user_id = callback.data.split(":", 2)
     user_id_int = int(user_id)
 
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
-            session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None,
-        )
-        if not actor.is_active or actor.role not in USER_ADMIN_ROLES:
-            await callback.answer("Нет прав", show_alert=True)
-            return
+    if not user.is_active or user.role not in USER_ADMIN_ROLES:
+        await callback.answer("Нет прав", show_alert=True)
+        return
     await state.clear()
     await state.update_data(user_id=user_id_int, percent_type=percent_type)
     await state.set_state(UserPercentStates.percent)
@@ -248,7 +207,7 @@ async def user_percent_cancel(callback: CallbackQuery, state: FSMContext) -> Non
 
 
 @router.callback_query(F.data == "user_percent_confirm")
-async def user_percent_confirm(callback: CallbackQuery, state: FSMContext) -> None:
+async def user_percent_confirm(callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession) -> None:
     data = await state.get_data()
     user_id = data.get("user_id")
     percent_type = data.get("percent_type")
@@ -258,58 +217,52 @@ async def user_percent_confirm(callback: CallbackQuery, state: FSMContext) -> No
         await state.clear()
         return
 
-    async with async_session_factory() as session:
-        actor = await user_service.ensure_user(
-            session,
-            callback.from_user.id,
-            callback.from_user.full_name if callback.from_user else None,
-            callback.from_user.username if callback.from_user else None,
-        )
-        if not actor.is_active or actor.role not in USER_ADMIN_ROLES:
-            await audit_service.log_audit_event(
-                session,
-                actor_id=actor.id,
-                action="PERMISSION_DENIED",
-                entity_type="user",
-                entity_id=user_id,
-                payload={"reason": "SET_PERCENT"},
-            )
-            await callback.answer("Нет прав", show_alert=True)
-            await session.commit()
-            await state.clear()
-            return
-
-        target = await user_service.get_user(session, user_id)
-        if not target:
-            await callback.answer("Пользователь не найден.", show_alert=True)
-            await state.clear()
-            return
-
-        try:
-            if percent_type == "master":
-                before_value = target.master_percent
-                await user_service.set_master_percent(session, target, percent)
-                action = "USER_MASTER_PERCENT_SET"
-            else:
-                before_value = target.admin_percent
-                await user_service.set_admin_percent(session, target, percent)
-                action = "USER_ADMIN_PERCENT_SET"
-        except ValueError as exc:
-            await callback.answer(str(exc), show_alert=True)
-            return
-
+    if not user.is_active or user.role not in USER_ADMIN_ROLES:
         await audit_service.log_audit_event(
             session,
-            actor_id=actor.id,
-            action=action,
+            actor_id=user.id,
+            action="PERMISSION_DENIED",
             entity_type="user",
-            entity_id=target.id,
-            payload={
-                "before": {"percent": float(before_value)} if before_value is not None else None,
-                "after": {"percent": float(percent)},
-            },
+            entity_id=user_id,
+            payload={"reason": "SET_PERCENT"},
         )
+        await callback.answer("Нет прав", show_alert=True)
         await session.commit()
+        await state.clear()
+        return
+
+    target = await user_service.get_user(session, user_id)
+    if not target:
+        await callback.answer("Пользователь не найден.", show_alert=True)
+        await state.clear()
+        return
+
+    try:
+        if percent_type == "master":
+            before_value = target.master_percent
+            await user_service.set_master_percent(session, target, percent)
+            action = "USER_MASTER_PERCENT_SET"
+        else:
+            before_value = target.admin_percent
+            await user_service.set_admin_percent(session, target, percent)
+            action = "USER_ADMIN_PERCENT_SET"
+    except ValueError as exc:
+        await session.rollback()
+        await callback.answer(str(exc), show_alert=True)
+        return
+
+    await audit_service.log_audit_event(
+        session,
+        actor_id=user.id,
+        action=action,
+        entity_type="user",
+        entity_id=target.id,
+        payload={
+            "before": {"percent": float(before_value)} if before_value is not None else None,
+            "after": {"percent": float(percent)},
+        },
+    )
+    await session.commit()
 
     await state.clear()
     await callback.message.answer("Процент обновлен.")
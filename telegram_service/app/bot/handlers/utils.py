@@ -6,6 +6,7 @@ from typing import Iterable
 from app.db.enums import LeadAdSource, LeadStatus, TicketStatus, ticket_category_label
 from app.domain.enums_mapping import ad_source_label
 from app.db.models import Lead, Ticket, User
+from app.services.ticket_rows import TicketCardRow, TicketListRow
 
 
 LEAD_STATUS_LABELS = {
@@ -158,7 +159,7 @@ def format_ticket_preview(data: dict) -> str:
     )
 
 
-def format_ticket_list(tickets: Iterable[Ticket]) -> str:
+def format_ticket_list(tickets: Iterable[TicketListRow]) -> str:
     lines = []
     for ticket in tickets:
         marker = "⚠️" if ticket.is_repeat else ""
@@ -247,6 +248,10 @@ def format_ticket_event_cancelled(ticket: Ticket) -> str:
     return f"❌ Заявка #{ticket_display_id(ticket)} отменена"
 
 
+def format_ticket_events_digest(lines: list[str]) -> str:
+    return "\n".join([f"🗂 Сводка событий ({len(lines)})", *lines])
+
+
 def format_executor_label(ticket: Ticket) -> str:
     if not ticket.assigned_executor_id:
         return ""
@@ -280,7 +285,7 @@ def format_finance_block(ticket: Ticket) -> str:
     return f"\nДоход: {revenue}\nРасход: {expense}\nЧистая прибыль: {profit}"
 
 
-def format_ticket_queue_card(ticket: Ticket) -> str:
+def format_ticket_queue_card(ticket: Ticket | TicketCardRow) -> str:
     repeat_label = "⚠️ ПОВТОР\n" if ticket.is_repeat else ""
     scheduled = format_ticket_schedule(ticket.preferred_date_dm, ticket.scheduled_at)
     problem = ticket.problem_text.replace("\n", " ").strip()
@@ -296,7 +301,7 @@ def format_ticket_queue_card(ticket: Ticket) -> str:
     )
 
 
-def format_active_ticket_card(ticket: Ticket) -> str:
+def format_active_ticket_card(ticket: Ticket | TicketCardRow) -> str:
     base = format_ticket_queue_card(ticket)
     return f"{base}\nСтатус: {ticket.status.value}"
 
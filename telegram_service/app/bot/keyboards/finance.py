@@ -23,3 +23,9 @@ def share_list_keyboard(entries: list[tuple[int, str]]) -> InlineKeyboardMarkup:
             for user_id, label in entries
         ]
     )
+
+
+def export_cancel_keyboard(job_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text="✖️ Отменить экспорт", callback_data=f"export_cancel:{job_id}")]]
+    )
@@ -1,5 +1,7 @@
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from app.services.pagination import encode_cursor_key
+
 
 def ticket_list_filters(*, show_search: bool = False) -> InlineKeyboardMarkup:
     rows = [
@@ -25,19 +27,15 @@ def ticket_list_keyboard(
     *,
     ticket_ids: list[int],
     page: int,
-    total_pages: int,
+    has_next: bool,
+    first_key: tuple | None,
+    last_key: tuple | None,
     filter_key: str,
     search_mode: bool,
 ) -> InlineKeyboardMarkup:
     rows = ticket_list_items(ticket_ids)
-    nav: list[InlineKeyboardButton] = []
-    if page > 0:
-        nav.append(InlineKeyboardButton(text="⬅️", callback_data=_list_callback(filter_key, page - 1, search_mode)))
-    nav.append(InlineKeyboardButton(text="🔄", callback_data=_list_callback(filter_key, page, search_mode)))
-    if page + 1 < total_pages:
-        nav.append(InlineKeyboardButton(text="➡️", callback_data=_list_callback(filter_key, page + 1, search_mode)))
-    if nav:
-        rows.append(nav)
+    prefix = "adm:search:" if search_mode else f"adm:list:filter={filter_key}:"
+    rows.append(_page_nav(prefix, page=page, has_next=has_next, first_key=first_key, last_key=last_key))
     if search_mode:
         rows.append([InlineKeyboardButton(text="🗂 К списку", callback_data="adm:search:back")])
     rows.append([InlineKeyboardButton(text="❌ Закрыть", callback_data="adm:list:close")])
@@ -48,28 +46,42 @@ def worker_closed_keyboard(
     *,
     ticket_buttons: list[tuple[int, str]],
     page: int,
-    total_pages: int,
+    has_next: bool,
+    first_key: tuple | None,
+    last_key: tuple | None,
 ) -> InlineKeyboardMarkup:
     rows = [
         [InlineKeyboardButton(text=f"Открыть #{ticket_label}", callback_data=f"closed_open:{ticket_id}")]
         for ticket_id, ticket_label in ticket_buttons
     ]
-    nav: list[InlineKeyboardButton] = []
-    if page > 0:
-        nav.append(InlineKeyboardButton(text="⬅️", callback_data=f"wrk:closed:page={page - 1}"))
-    nav.append(InlineKeyboardButton(text="🔄", callback_data=f"wrk:closed:page={page}"))
-    if page + 1 < total_pages:
-        nav.append(InlineKeyboardButton(text="➡️", callback_data=f"wrk:closed:page={page + 1}"))
-    if nav:
-        rows.append(nav)
+    rows.append(_page_nav("wrk:closed:", page=page, has_next=has_next, first_key=first_key, last_key=last_key))
     rows.append([InlineKeyboardButton(text="❌ Закрыть", callback_data="wrk:closed:close")])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def _list_callback(filter_key: str, page: int, search_mode: bool) -> str:
-    if search_mode:
-        return f"adm:search:page={page}"
-    return f"adm:list:filter={filter_key}:page={page}"
+def _page_nav(
+    prefix: str,
+    *,
+    page: int,
+    has_next: bool,
+    first_key: tuple | None,
+    last_key: tuple | None,
+) -> list[InlineKeyboardButton]:
+    # Callback data carries the keyset cursor (<= 64 bytes); page is only the number shown in the header.
+    nav: list[InlineKeyboardButton] = []
+    if page > 0 and first_key is not None:
+        nav.append(
+            InlineKeyboardButton(text="⬅️", callback_data=f"{prefix}page={page - 1}:before={encode_cursor_key(first_key)}")
+        )
+    refresh = f"{prefix}page=0"
+    if page > 0 and first_key is not None:
+        refresh = f"{prefix}page={page}:from={encode_cursor_key(first_key)}"
+    nav.append(InlineKeyboardButton(text="🔄", callback_data=refresh))
+    if has_next and last_key is not None:
+        nav.append(
+            InlineKeyboardButton(text="➡️", callback_data=f"{prefix}page={page + 1}:after={encode_cursor_key(last_key)}")
+        )
+    return nav
 
 
 def ticket_actions(ticket_id: int, can_cancel: bool) -> InlineKeyboardMarkup:
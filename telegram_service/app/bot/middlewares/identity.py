@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User as TelegramUser
+
+from app.services.user_service import UserService
+
+
+class IdentityMiddleware(BaseMiddleware):
+    """Resolves the acting User once per update and injects it into handlers as ``user``."""
+
+    def __init__(self, user_service: UserService | None = None) -> None:
+        self._user_service = user_service or UserService()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        tg_user: TelegramUser | None = data.get("event_from_user")
+        if tg_user is not None and not tg_user.is_bot:
+            data["user"] = await self._user_service.resolve_user(
+                data["session"], tg_user.id, tg_user.full_name, tg_user.username
+            )
+        return await handler(event, data)
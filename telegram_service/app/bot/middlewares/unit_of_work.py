@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.bot.fsm_storage import PostgresStorage
+from app.db.session import async_session_factory
+from app.services.audit_service import PENDING_AUDIT_KEY
+
+
+_current_session: ContextVar[AsyncSession | None] = ContextVar("update_session", default=None)
+
+
+def _has_pending_work(session: AsyncSession) -> bool:
+    # Buffered audit events are written on commit but do not start a transaction by themselves.
+    return session.in_transaction() or bool(session.sync_session.info.get(PENDING_AUDIT_KEY))
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """Gives every update one AsyncSession as ``session``; commits once on success and rolls back on error."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = async_session_factory) -> None:
+        self._session_factory = session_factory
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        # The session only checks out a connection on its first query, so updates that never touch
+        # the database cost nothing here.
+        session = self._session_factory()
+        token = _current_session.set(session)
+        data["session"] = session
+        try:
+            result = await handler(event, data)
+            if _has_pending_work(session):
+                await session.commit()
+            storage = data.get("fsm_storage")
+            if isinstance(storage, PostgresStorage):
+                await storage.end_update()
+            return result
+        except BaseException:
+            await session.rollback()
+            raise
+        finally:
+            _current_session.reset(token)
+            await session.close()
+
+
+class ReleaseConnectionMiddleware(BaseRequestMiddleware):
+    """Commits the current update's transaction before a Bot API call so no connection idles on Telegram."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        session = _current_session.get()
+        if session is not None and _has_pending_work(session) and not session.in_nested_transaction():
+            await session.commit()
+        return await make_request(bot, method)
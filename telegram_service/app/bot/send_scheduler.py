@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    Response,
+    TelegramMethod,
+)
+from aiogram.methods.base import TelegramType
+
+from app.core.config import Settings, get_settings
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+
+logger = logging.getLogger(__name__)
+
+LANE_INTERACTIVE = 0
+LANE_BACKGROUND = 1
+LANE_NAMES = {LANE_INTERACTIVE: "interactive", LANE_BACKGROUND: "background"}
+
+EDIT_METHODS = (EditMessageText, EditMessageReplyMarkup, EditMessageCaption, EditMessageMedia)
+CHAT_BUCKET_BURST = 3
+MAX_IDLE_CHAT_BUCKETS = 10_000
+
+
+def is_private_chat(chat_id: int | str) -> bool:
+    return isinstance(chat_id, int) and chat_id > 0
+
+
+def chat_rate(settings: Settings, *, private: bool) -> float:
+    """Messages per second Telegram accepts into one private chat or one group."""
+    if private:
+        return settings.telegram_private_chat_rate
+    return settings.telegram_group_chat_rate_per_minute / 60
+
+
+class TokenBucket:
+    """Reservation-style token bucket: callers take a token now and wait out the returned delay."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, now: float) -> float:
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def delay(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def penalize(self, now: float, seconds: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+@dataclass
+class _EditSlot:
+    result: asyncio.Future
+    superseded: bool = False
+    # Futures of older, dropped edits that resolve with this edit's outcome.
+    followers: list[asyncio.Future] = field(default_factory=list)
+
+
+@dataclass(order=True)
+class _Waiter:
+    lane: int
+    seq: int
+    future: asyncio.Future = field(compare=False)
+    slot: _EditSlot | None = field(default=None, compare=False)
+
+
+@dataclass
+class _LaneStats:
+    sent: int = 0
+    coalesced: int = 0
+    waiting: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Bot session middleware that paces outgoing sends by global and per-chat token buckets."""
+
+    def __init__(self, settings: Settings | None = None) -> None:
+        self._settings = settings or get_settings()
+        self._global = TokenBucket(self._settings.telegram_global_rate, self._settings.telegram_global_rate)
+        self._chats: dict[int | str, TokenBucket] = {}
+        self._background_chat_ids = {
+            self._settings.events_chat_id,
+            self._settings.closed_report_chat_id,
+            self._settings.requests_chat_id,
+        }
+        self._heap: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._pump_task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self._pending_edits: dict[tuple[Any, ...], _EditSlot] = {}
+        self._stats = {lane: _LaneStats() for lane in LANE_NAMES}
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            # getUpdates, answerCallbackQuery, getMe, inline edits: not subject to chat limits.
+            return await make_request(bot, method)
+
+        lane = self._lane_for(chat_id)
+        stats = self._stats[lane]
+        slot = self._register_edit(method, chat_id)
+        started_at = time.monotonic()
+        stats.waiting += 1
+        try:
+            granted = await self._acquire(lane, chat_id, slot)
+        except asyncio.CancelledError:
+            if slot is not None:
+                self._release_edit(method, chat_id, slot)
+                self._resolve_edit(slot, cancelled=True)
+            raise
+        finally:
+            stats.waiting -= 1
+
+        if not granted:
+            stats.coalesced += 1
+            assert slot is not None
+            return await slot.result
+
+        waited = time.monotonic() - started_at
+        stats.sent += 1
+        stats.wait_total += waited
+        stats.wait_max = max(stats.wait_max, waited)
+        if slot is not None:
+            self._release_edit(method, chat_id, slot)
+
+        try:
+            response = await make_request(bot, method)
+        except TelegramRetryAfter as exc:
+            self._chat_bucket(chat_id).penalize(time.monotonic(), exc.retry_after)
+            self._resolve_edit(slot, exc=exc)
+            raise
+        except asyncio.CancelledError:
+            self._resolve_edit(slot, cancelled=True)
+            raise
+        except Exception as exc:
+            self._resolve_edit(slot, exc=exc)
+            raise
+        self._resolve_edit(slot, response=response)
+        return response
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Return queue depth and wait-time metrics per lane and reset the max wait counters."""
+        result: dict[str, dict[str, float]] = {}
+        for lane, stats in self._stats.items():
+            result[LANE_NAMES[lane]] = {
+                "queue_depth": stats.waiting,
+                "sent": stats.sent,
+                "coalesced": stats.coalesced,
+                "wait_avg_ms": round(stats.wait_total / stats.sent * 1000, 1) if stats.sent else 0.0,
+                "wait_max_ms": round(stats.wait_max * 1000, 1),
+            }
+            stats.wait_max = 0.0
+        return result
+
+    def log_metrics(self) -> None:
+        logger.info("[send_scheduler] %s", self.snapshot())
+
+    def _lane_for(self, chat_id: int | str) -> int:
+        if is_private_chat(chat_id) and chat_id not in self._background_chat_ids:
+            return LANE_INTERACTIVE
+        return LANE_BACKGROUND
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is not None:
+            return bucket
+        if len(self._chats) >= MAX_IDLE_CHAT_BUCKETS:
+            now = time.monotonic()
+            for key in [key for key, item in self._chats.items() if item.is_idle(now)]:
+                del self._chats[key]
+        bucket = TokenBucket(chat_rate(self._settings, private=is_private_chat(chat_id)), CHAT_BUCKET_BURST)
+        self._chats[chat_id] = bucket
+        return bucket
+
+    async def _acquire(self, lane: int, chat_id: int | str, slot: _EditSlot | None) -> bool:
+        # Per-chat reservations are taken in call order, so one chat's messages stay ordered.
+        delay = self._chat_bucket(chat_id).reserve(time.monotonic())
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if slot is not None and slot.superseded:
+            return False
+
+        waiter = _Waiter(lane, next(self._seq), asyncio.get_running_loop().create_future(), slot)
+        heapq.heappush(self._heap, waiter)
+        self._ensure_pump()
+        self._wakeup.set()
+        return await waiter.future
+
+    def _ensure_pump(self) -> None:
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+
+    async def _pump(self) -> None:
+        while self._heap:
+            waiter = self._heap[0]
+            if waiter.future.done() or (waiter.slot is not None and waiter.slot.superseded):
+                heapq.heappop(self._heap)
+                if not waiter.future.done():
+                    waiter.future.set_result(False)
+                continue
+            delay = self._global.delay(time.monotonic())
+            if delay > 0:
+                # A higher-priority waiter may arrive while we sleep; re-check the heap afterwards.
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._heap)
+            self._global.reserve(time.monotonic())
+            waiter.future.set_result(True)
+
+    def _edit_key(self, method: TelegramMethod[Any], chat_id: int | str) -> tuple[Any, ...] | None:
+        if not isinstance(method, EDIT_METHODS) or method.message_id is None:
+            return None
+        return type(method).__name__, chat_id, method.message_id
+
+    def _register_edit(self, method: TelegramMethod[Any], chat_id: int | str) -> _EditSlot | None:
+        key = self._edit_key(method, chat_id)
+        if key is None:
+            return None
+        slot = _EditSlot(result=asyncio.get_running_loop().create_future())
+        previous = self._pending_edits.get(key)
+        if previous is not None:
+            # The older edit has not been sent yet: drop it and hand its caller our result.
+            previous.superseded = True
+            slot.followers = [*previous.followers, previous.result]
+            self._chat_bucket(chat_id).refund()
+        self._pending_edits[key] = slot
+        return slot
+
+    def _release_edit(self, method: TelegramMethod[Any], chat_id: int | str, slot: _EditSlot) -> None:
+        key = self._edit_key(method, chat_id)
+        if key is not None and self._pending_edits.get(key) is slot:
+            del self._pending_edits[key]
+
+    def _resolve_edit(
+        self,
+        slot: _EditSlot | None,
+        *,
+        response: Response[Any] | None = None,
+        exc: BaseException | None = None,
+        cancelled: bool = False,
+    ) -> None:
+        if slot is None:
+            return
+        for future in slot.followers:
+            if future.done():
+                continue
+            if cancelled:
+                future.cancel()
+            elif exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(response)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from functools import lru_cache
-from typing import Set
+from functools import cached_property, lru_cache
+from typing import Literal
 
 from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -41,10 +41,144 @@ class Settings(BaseSettings):
     webhook_port: int = Field(default=8000, validation_alias=AliasChoices("WEBHOOK_PORT", "webhook_port"))
     public_base_url: str | None = None
 
-    def sys_admin_id_set(self) -> Set[int]:
+    bot_update_mode: Literal["polling", "webhook"] = Field(
+        default="polling", validation_alias=AliasChoices("BOT_UPDATE_MODE", "bot_update_mode")
+    )
+    telegram_webhook_path: str = Field(
+        default="/webhook/telegram", validation_alias=AliasChoices("TELEGRAM_WEBHOOK_PATH", "telegram_webhook_path")
+    )
+    telegram_webhook_secret: str | None = Field(
+        default=None, validation_alias=AliasChoices("TELEGRAM_WEBHOOK_SECRET", "telegram_webhook_secret")
+    )
+    telegram_api_base_url: str | None = Field(
+        default=None, validation_alias=AliasChoices("TELEGRAM_API_BASE_URL", "telegram_api_base_url")
+    )
+    update_workers: int = Field(default=8, validation_alias=AliasChoices("UPDATE_WORKERS", "update_workers"))
+    update_queue_size: int = Field(
+        default=100, validation_alias=AliasChoices("UPDATE_QUEUE_SIZE", "update_queue_size")
+    )
+
+    telegram_connection_limit: int = Field(
+        default=20, validation_alias=AliasChoices("TELEGRAM_CONNECTION_LIMIT", "telegram_connection_limit")
+    )
+    telegram_keepalive_timeout: float = Field(
+        default=60.0, validation_alias=AliasChoices("TELEGRAM_KEEPALIVE_TIMEOUT", "telegram_keepalive_timeout")
+    )
+
+    telegram_global_rate: float = Field(
+        default=30.0, validation_alias=AliasChoices("TELEGRAM_GLOBAL_RATE", "telegram_global_rate")
+    )
+    telegram_private_chat_rate: float = Field(
+        default=1.0, validation_alias=AliasChoices("TELEGRAM_PRIVATE_CHAT_RATE", "telegram_private_chat_rate")
+    )
+    telegram_group_chat_rate_per_minute: float = Field(
+        default=20.0,
+        validation_alias=AliasChoices("TELEGRAM_GROUP_CHAT_RATE_PER_MINUTE", "telegram_group_chat_rate_per_minute"),
+    )
+
+    outbox_concurrency: int = Field(default=8, validation_alias=AliasChoices("OUTBOX_CONCURRENCY", "outbox_concurrency"))
+    outbox_poll_interval: float = Field(
+        default=1.0, validation_alias=AliasChoices("OUTBOX_POLL_INTERVAL", "outbox_poll_interval")
+    )
+    outbox_batch_size: int = Field(default=50, validation_alias=AliasChoices("OUTBOX_BATCH_SIZE", "outbox_batch_size"))
+    outbox_max_attempts: int = Field(
+        default=8, validation_alias=AliasChoices("OUTBOX_MAX_ATTEMPTS", "outbox_max_attempts")
+    )
+    outbox_lease_seconds: int = Field(
+        default=120, validation_alias=AliasChoices("OUTBOX_LEASE_SECONDS", "outbox_lease_seconds")
+    )
+
+    user_cache_ttl: float = Field(default=60.0, validation_alias=AliasChoices("USER_CACHE_TTL", "user_cache_ttl"))
+    user_cache_size: int = Field(default=5000, validation_alias=AliasChoices("USER_CACHE_SIZE", "user_cache_size"))
+    ticket_count_cache_ttl: float = Field(
+        default=60.0, validation_alias=AliasChoices("TICKET_COUNT_CACHE_TTL", "ticket_count_cache_ttl")
+    )
+    public_id_block_size: int = Field(
+        default=10, validation_alias=AliasChoices("PUBLIC_ID_BLOCK_SIZE", "public_id_block_size")
+    )
+    ticket_list_cache_ttl: float = Field(
+        default=300.0, validation_alias=AliasChoices("TICKET_LIST_CACHE_TTL", "ticket_list_cache_ttl")
+    )
+    ticket_list_cache_size: int = Field(
+        default=2000, validation_alias=AliasChoices("TICKET_LIST_CACHE_SIZE", "ticket_list_cache_size")
+    )
+    ticket_list_cache_channel: Literal["local", "postgres"] = Field(
+        default="local", validation_alias=AliasChoices("TICKET_LIST_CACHE_CHANNEL", "ticket_list_cache_channel")
+    )
+    finance_export_batch_size: int = Field(
+        default=2000, validation_alias=AliasChoices("FINANCE_EXPORT_BATCH_SIZE", "finance_export_batch_size")
+    )
+    report_workers: int = Field(default=1, validation_alias=AliasChoices("REPORT_WORKERS", "report_workers"))
+    report_timeout_seconds: float = Field(
+        default=600.0, validation_alias=AliasChoices("REPORT_TIMEOUT_SECONDS", "report_timeout_seconds")
+    )
+    export_poll_interval: float = Field(
+        default=2.0, validation_alias=AliasChoices("EXPORT_POLL_INTERVAL", "export_poll_interval")
+    )
+    export_progress_interval: float = Field(
+        default=3.0, validation_alias=AliasChoices("EXPORT_PROGRESS_INTERVAL", "export_progress_interval")
+    )
+    ledger_reconciliation_batch_size: int = Field(
+        default=5000,
+        validation_alias=AliasChoices("LEDGER_RECONCILIATION_BATCH_SIZE", "ledger_reconciliation_batch_size"),
+    )
+    audit_async_actions: str = Field(
+        default="", validation_alias=AliasChoices("AUDIT_ASYNC_ACTIONS", "audit_async_actions")
+    )
+    audit_async_interval: float = Field(
+        default=0.3, validation_alias=AliasChoices("AUDIT_ASYNC_INTERVAL", "audit_async_interval")
+    )
+    audit_async_max_queue: int = Field(
+        default=10000, validation_alias=AliasChoices("AUDIT_ASYNC_MAX_QUEUE", "audit_async_max_queue")
+    )
+    audit_partition_months_ahead: int = Field(
+        default=3, validation_alias=AliasChoices("AUDIT_PARTITION_MONTHS_AHEAD", "audit_partition_months_ahead")
+    )
+    audit_retention_months: int = Field(
+        default=0, validation_alias=AliasChoices("AUDIT_RETENTION_MONTHS", "audit_retention_months")
+    )
+
+    fsm_storage: Literal["postgres", "memory"] = Field(
+        default="postgres", validation_alias=AliasChoices("FSM_STORAGE", "fsm_storage")
+    )
+    fsm_state_ttl_hours: int = Field(
+        default=48, validation_alias=AliasChoices("FSM_STATE_TTL_HOURS", "fsm_state_ttl_hours")
+    )
+    fsm_cache_ttl: float | None = Field(
+        default=None, validation_alias=AliasChoices("FSM_CACHE_TTL", "fsm_cache_ttl")
+    )
+    fsm_cache_size: int = Field(default=10000, validation_alias=AliasChoices("FSM_CACHE_SIZE", "fsm_cache_size"))
+    fsm_flush_interval: float = Field(
+        default=0.2, validation_alias=AliasChoices("FSM_FLUSH_INTERVAL", "fsm_flush_interval")
+    )
+
+    events_digest_enabled: bool = Field(
+        default=False, validation_alias=AliasChoices("EVENTS_DIGEST_ENABLED", "events_digest_enabled")
+    )
+    events_digest_interval: float = Field(
+        default=30.0, validation_alias=AliasChoices("EVENTS_DIGEST_INTERVAL", "events_digest_interval")
+    )
+    events_digest_max_events: int = Field(
+        default=20, validation_alias=AliasChoices("EVENTS_DIGEST_MAX_EVENTS", "events_digest_max_events")
+    )
+
+    def audit_async_action_set(self) -> frozenset[str]:
+        return frozenset(item.strip() for item in self.audit_async_actions.split(",") if item.strip())
+
+    def fsm_read_cache_ttl(self) -> float:
+        """FSM_CACHE_TTL, by default 0 (always re-read) in webhook mode, where several workers share chats."""
+        if self.fsm_cache_ttl is not None:
+            return self.fsm_cache_ttl
+        return 0.0 if self.bot_update_mode == "webhook" else 30.0
+
+    def sys_admin_id_set(self) -> frozenset[int]:
+        return self._sys_admin_id_set
+
+    @cached_property
+    def _sys_admin_id_set(self) -> frozenset[int]:
         if not self.sys_admin_ids:
-            return set()
-        return {int(item.strip()) for item in self.sys_admin_ids.split(",") if item.strip()}
+            return frozenset()
+        return frozenset(int(item.strip()) for item in self.sys_admin_ids.split(",") if item.strip())
 
 
 @lru_cache
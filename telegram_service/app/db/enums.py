@@ -79,3 +79,24 @@ class TransferStatus(str, Enum):
 class ProjectTransactionType(str, Enum):
     INCOME = "INCOME"
     EXPENSE = "EXPENSE"
+
+
+class RollupRole(str, Enum):
+    EXECUTOR = "EXECUTOR"
+    ADMIN = "ADMIN"
+    JUNIOR_MASTER = "JUNIOR_MASTER"
+    PROJECT = "PROJECT"
+
+
+class OutboxStatus(str, Enum):
+    PENDING = "PENDING"
+    SENT = "SENT"
+    DEAD = "DEAD"
+
+
+class ExportJobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
@@ -4,12 +4,24 @@ from datetime import date, datetime
 from uuid import UUID as UUIDType
 from decimal import Decimal
 
-from sqlalchemy import BigInteger, Boolean, Date, DateTime, Enum, ForeignKey, Index, JSON, Numeric, String, Text, text
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Enum, ForeignKey, Index, Integer, JSON, Numeric, String, Text, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship, synonym
 
 from app.db.base import Base
-from app.db.enums import AdSource, LeadAdSource, LeadStatus, ProjectTransactionType, TicketCategory, TicketStatus, TransferStatus, UserRole
+from app.db.enums import (
+    AdSource,
+    ExportJobStatus,
+    LeadAdSource,
+    LeadStatus,
+    OutboxStatus,
+    ProjectTransactionType,
+    RollupRole,
+    TicketCategory,
+    TicketStatus,
+    TransferStatus,
+    UserRole,
+)
 
 
 class User(Base):
@@ -34,9 +46,41 @@ class User(Base):
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        Index("ix_tickets_client_phone_digits_id", "client_phone_digits", text("id DESC")),
+        Index(
+            "ix_tickets_client_phone_digits_trgm",
+            "client_phone_digits",
+            postgresql_using="gin",
+            postgresql_ops={"client_phone_digits": "gin_trgm_ops"},
+        ),
+        Index("ix_tickets_queue_id", "status", text("id DESC"), postgresql_where=text("assigned_executor_id IS NULL")),
+        Index("ix_tickets_executor_status_id", "assigned_executor_id", "status", text("id DESC")),
+        Index(
+            "ix_tickets_executor_closed_keyset",
+            "assigned_executor_id",
+            "status",
+            text("closed_at DESC NULLS LAST"),
+            text("updated_at DESC"),
+            text("id DESC"),
+        ),
+        Index("ix_tickets_transfer_status_id", "transfer_status", text("id DESC")),
+        Index("ix_tickets_repeat_id", text("id DESC"), postgresql_where=text("is_repeat IS true")),
+        Index("ix_tickets_status_closed_at", "status", "closed_at"),
+        Index("ix_tickets_status_net_profit_id", "status", "net_profit", text("id DESC")),
+        Index("ix_tickets_admin_status_closed_at", "created_by_admin_id", "status", "closed_at"),
+        Index("ix_tickets_updated_at", "updated_at"),
+        Index(
+            "ix_tickets_junior_status_closed_at",
+            "junior_master_id",
+            "status",
+            "closed_at",
+            postgresql_where=text("junior_master_id IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    public_id: Mapped[str] = mapped_column(String(8), nullable=False, unique=True, index=True)
+    public_id: Mapped[str] = mapped_column(String(12), nullable=False, unique=True, index=True)
     status: Mapped[TicketStatus] = mapped_column(Enum(TicketStatus, name="ticket_status"))
     category: Mapped[TicketCategory] = mapped_column(Enum(TicketCategory, name="ticket_category"))
     scheduled_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -44,6 +88,7 @@ class Ticket(Base):
     client_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     client_age_estimate: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     client_phone: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    client_phone_digits: Mapped[str | None] = mapped_column(String(64), nullable=True)
     client_address: Mapped[str | None] = mapped_column(Text, nullable=True)
     address_details: Mapped[str | None] = mapped_column(Text, nullable=True)
     problem_text: Mapped[str] = mapped_column(Text, nullable=False)
@@ -168,20 +213,35 @@ class MasterJuniorLink(Base):
 
 
 class TicketEvent(Base):
+    """Partitioned by month on created_at (app.services.audit_partitions), hence the composite primary key."""
+
     __tablename__ = "ticket_events"
+    __table_args__ = (
+        Index("ix_ticket_events_ticket_id_created_at", "ticket_id", "created_at"),
+        Index("ix_ticket_events_created_at", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     ticket_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("tickets.id"), nullable=False)
     actor_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"), nullable=True)
     action: Mapped[str] = mapped_column(String(100), nullable=False)
     payload: Mapped[dict | None] = mapped_column(JSON, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, default=datetime.utcnow, server_default=text("timezone('utc', now())")
+    )
 
     ticket = relationship("Ticket", back_populates="events")
 
 
 class AuditEvent(Base):
+    """Partitioned by month on created_at like TicketEvent."""
+
     __tablename__ = "audit_events"
+    __table_args__ = (
+        Index("ix_audit_events_created_at", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     actor_id: Mapped[int | None] = mapped_column(BigInteger, ForeignKey("users.id"), nullable=True)
@@ -189,11 +249,17 @@ class AuditEvent(Base):
     entity_type: Mapped[str] = mapped_column(String(100), nullable=False)
     entity_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
     payload: Mapped[dict | None] = mapped_column(JSON, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, default=datetime.utcnow, server_default=text("timezone('utc', now())")
+    )
 
 
 class ProjectTransaction(Base):
     __tablename__ = "project_transactions"
+    __table_args__ = (
+        Index("ix_project_transactions_type_occurred_at", "type", "occurred_at"),
+        Index("ix_project_transactions_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     type: Mapped[ProjectTransactionType] = mapped_column(
@@ -230,6 +296,29 @@ class TicketMoneyOperation(Base):
     ticket = relationship("Ticket", back_populates="money_operations")
 
 
+class FinanceDailyRollup(Base):
+    """Per-day money totals of closed tickets and manual operations, per user and the role they had.
+
+    PROJECT rows (user_id 0) hold project-wide totals. Maintained in the same transaction as the change.
+    """
+
+    __tablename__ = "finance_daily_rollup"
+    __table_args__ = (Index("ix_finance_daily_rollup_day", "day"),)
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    role: Mapped[RollupRole] = mapped_column(Enum(RollupRole, name="finance_rollup_role"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    ticket_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    confirmed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    repeat_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    earned: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    net_profit: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    transfer_confirmed: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    transfer_pending: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    manual_income: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    manual_expense: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+
 class ProjectShare(Base):
     __tablename__ = "project_shares"
 
@@ -254,3 +343,96 @@ class ProjectSettings(Base):
     thresholds: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class OutboxMessage(Base):
+    __tablename__ = "outbox"
+    __table_args__ = (
+        Index(
+            "ix_outbox_pending_available_at",
+            "available_at",
+            "id",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(64), nullable=False)
+    method: Mapped[str] = mapped_column(String(32), nullable=False)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    status: Mapped[OutboxStatus] = mapped_column(
+        Enum(OutboxStatus, name="outbox_status"), nullable=False, default=OutboxStatus.PENDING
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    available_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class ExportJob(Base):
+    """A requested report export, built by the export worker; the progress message is edited as it runs."""
+
+    __tablename__ = "export_jobs"
+    __table_args__ = (
+        Index("ix_export_jobs_open_id", "id", postgresql_where=text("status IN ('QUEUED', 'RUNNING')")),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    report_type: Mapped[str] = mapped_column(String(32), nullable=False)
+    period_start: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    period_end: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    period_label: Mapped[str] = mapped_column(String(64), nullable=False)
+    requested_by: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"), nullable=False)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    progress_chat_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    progress_message_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    status: Mapped[ExportJobStatus] = mapped_column(
+        Enum(ExportJobStatus, name="export_job_status"), nullable=False, default=ExportJobStatus.QUEUED
+    )
+    lease_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    watermark: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    from_cache: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class ExportResult(Base):
+    """Telegram file ids of a built export, reusable while the data watermark stays the same."""
+
+    __tablename__ = "export_results"
+
+    report_type: Mapped[str] = mapped_column(String(32), primary_key=True)
+    period_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    watermark: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    documents: Mapped[list] = mapped_column(JSONB, nullable=False, default=list)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class JobCheckpoint(Base):
+    """Where a resumable background job stopped, as an (updated_at, id) keyset position."""
+
+    __tablename__ = "job_checkpoints"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    position_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    position_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class FsmState(Base):
+    __tablename__ = "fsm_states"
+    __table_args__ = (Index("ix_fsm_states_expires_at", "expires_at"),)
+
+    bot_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    thread_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, default=0)
+    destiny: Mapped[str] = mapped_column(String(64), primary_key=True, default="default")
+    state: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
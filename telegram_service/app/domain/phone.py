@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+
+def normalize_phone_digits(raw: str | None) -> str:
+    """Digits-only form of a phone as stored in tickets.client_phone_digits and used for search."""
+    if not raw:
+        return ""
+    return "".join(char for char in raw if char.isdigit())
@@ -4,15 +4,23 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import uvicorn
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
-from app.bot.handlers import backup, finance, help as help_handler
-from app.bot.handlers import issues, junior_links, junior_tickets, project_settings, request_chat, start, ticket_create, ticket_execution, ticket_list, users
+from app.bot.client import create_bot
+from app.bot.dispatcher import create_dispatcher
+from app.bot.send_scheduler import SendScheduler
 from app.core.config import get_settings
 from app.core.logging import configure_logging
 from app.db.diagnostics import log_database_context
+from app.services.audit_partitions import audit_partitions
+from app.services.audit_writer import audit_writer
+from app.services.export_job_worker import ExportJobWorker
+from app.services.ledger_reconciliation import ledger_reconciliation
+from app.services.outbox_dispatcher import OutboxDispatcher
+from app.services.report_worker import report_pool
+from app.services.ticket_list_cache import ticket_list_cache
 from app.services.backup_service import (
     BackupError,
     BackupNotFound,
@@ -20,6 +28,9 @@ from app.services.backup_service import (
     BackupOperationLock,
     BackupService,
 )
+from app.webhook.app import create_app
+from app.webhook.telegram import register_telegram_webhook
+from app.webhook.updates import UpdateWorkerPool
 
 
 logger = logging.getLogger(__name__)
@@ -111,27 +122,14 @@ async def main() -> None:
     logger.info("SYS_ADMIN_IDS: %s", sorted(settings.sys_admin_id_set()))
     logger.info("SUPER_ADMIN: %s", [settings.super_admin] if settings.super_admin is not None else [])
     await log_database_context(logger)
-    bot = Bot(settings.bot_token)
-    dispatcher = Dispatcher()
+    send_scheduler = SendScheduler(settings)
+    bot = create_bot(settings, send_scheduler=send_scheduler)
+    dispatcher = create_dispatcher(settings)
     backup_service = BackupService(settings)
     backup_dir = Path(settings.backup_dir)
     backup_dir.mkdir(parents=True, exist_ok=True)
     daily_lock = BackupOperationLock(backup_dir / ".daily_backup.lock")
 
-    dispatcher.include_router(start.router)
-    dispatcher.include_router(ticket_create.router)
-    dispatcher.include_router(ticket_execution.router)
-    dispatcher.include_router(ticket_list.router)
-    dispatcher.include_router(request_chat.router)
-    dispatcher.include_router(users.router)
-    dispatcher.include_router(backup.router)
-    dispatcher.include_router(junior_links.router)
-    dispatcher.include_router(junior_tickets.router)
-    dispatcher.include_router(finance.router)
-    dispatcher.include_router(issues.router)
-    dispatcher.include_router(project_settings.router)
-    dispatcher.include_router(help_handler.router)
-
     scheduler = AsyncIOScheduler(timezone="UTC")
     job = scheduler.add_job(
         run_daily_backup,
@@ -146,6 +144,20 @@ async def main() -> None:
         id="daily_backup",
         replace_existing=True,
     )
+    scheduler.add_job(send_scheduler.log_metrics, "interval", minutes=1, id="send_scheduler_metrics")
+    scheduler.add_job(ticket_list_cache.log_metrics, "interval", minutes=1, id="ticket_list_cache_metrics")
+    scheduler.add_job(
+        ledger_reconciliation.run,
+        CronTrigger(hour=2, minute=30, timezone="UTC"),
+        id="ledger_reconciliation",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        audit_partitions.maintain,
+        CronTrigger(hour=2, minute=0, timezone="UTC"),
+        id="audit_partitions",
+        replace_existing=True,
+    )
     scheduler.start()
     logger.info("Daily backup scheduler started, next_run_time=%s", job.next_run_time)
     asyncio.create_task(
@@ -157,8 +169,19 @@ async def main() -> None:
         )
     )
 
+    outbox_dispatcher = OutboxDispatcher(bot, settings=settings)
+    export_worker = ExportJobWorker(bot, settings=settings)
+    update_pool = None
+    if settings.bot_update_mode == "webhook":
+        update_pool = UpdateWorkerPool(
+            dispatcher,
+            bot,
+            workers=settings.update_workers,
+            queue_size=settings.update_queue_size,
+        )
+
     config = uvicorn.Config(
-        "app.webhook.app:app",
+        create_app(bot=bot, outbox_dispatcher=outbox_dispatcher, update_pool=update_pool),
         host="0.0.0.0",
         port=settings.webhook_port,
         log_level="info",
@@ -166,12 +189,23 @@ async def main() -> None:
     )
     server = uvicorn.Server(config)
 
-    polling_task = asyncio.create_task(dispatcher.start_polling(bot))
+    if update_pool is not None:
+        update_pool.start()
+        await dispatcher.emit_startup(bot=bot)
+        await register_telegram_webhook(bot, dispatcher, settings)
+        updates_task = asyncio.create_task(asyncio.Event().wait())
+    else:
+        await bot.delete_webhook()
+        updates_task = asyncio.create_task(dispatcher.start_polling(bot))
     server_task = asyncio.create_task(server.serve())
+    outbox_task = asyncio.create_task(outbox_dispatcher.run())
+    list_cache_task = asyncio.create_task(ticket_list_cache.run_channel())
+    export_task = asyncio.create_task(export_worker.run())
+    audit_task = asyncio.create_task(audit_writer.run())
 
     try:
         done, pending = await asyncio.wait(
-            {polling_task, server_task},
+            {updates_task, server_task, outbox_task},
             return_when=asyncio.FIRST_EXCEPTION,
         )
         for task in done:
@@ -180,8 +214,22 @@ async def main() -> None:
     finally:
         scheduler.shutdown(wait=False)
         server.should_exit = True
-        polling_task.cancel()
-        await asyncio.gather(polling_task, server_task, return_exceptions=True)
+        outbox_dispatcher.stop()
+        ticket_list_cache.channel.stop()
+        updates_task.cancel()
+        list_cache_task.cancel()
+        export_task.cancel()
+        await asyncio.gather(
+            updates_task, server_task, outbox_task, list_cache_task, export_task, return_exceptions=True
+        )
+        # Stopped after everything that logs events, so its final flush writes whatever they queued.
+        audit_writer.stop()
+        await asyncio.gather(audit_task, return_exceptions=True)
+        report_pool.shutdown()
+        if update_pool is not None:
+            await update_pool.stop()
+            await dispatcher.emit_shutdown(bot=bot)
+        await dispatcher.storage.close()
         await bot.session.close()
 
 
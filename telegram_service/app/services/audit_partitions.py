@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Table, column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import Settings, get_settings
+from app.core.logging import configure_logging
+from app.db.models import AuditEvent, TicketEvent
+from app.db.session import async_session_factory, engine
+
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES: dict[str, Table] = {
+    TicketEvent.__tablename__: TicketEvent.__table__,
+    AuditEvent.__tablename__: AuditEvent.__table__,
+}
+ARCHIVE_DIR_NAME = "audit_archive"
+EXPORT_BATCH_SIZE = 5000
+# DDL on a partitioned table waits for every open transaction that touched it, and every new insert queues
+# behind it; give up quickly and try again on the next run instead.
+LOCK_TIMEOUT = "5s"
+_PARTITION_RE = re.compile(r"^(?P<table>[a-z_]+)_(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: date) -> str:
+    return f"{table_name}_{month:%Y_%m}"
+
+
+@dataclass(frozen=True)
+class Partition:
+    table: str
+    name: str
+    month: date
+    attached: bool
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class AuditPartitionService:
+    """Monthly partitions of ticket_events and audit_events.
+
+    ``maintain`` creates the partitions for the next AUDIT_PARTITION_MONTHS_AHEAD months and, when
+    AUDIT_RETENTION_MONTHS is set, detaches older months, writes each one to
+    ``<backup_dir>/audit_archive/<partition>.jsonl.gz`` and drops it. A partition is only dropped after its
+    archive is complete, and a detached one left by an interrupted run is picked up by the next.
+    """
+
+    def __init__(
+        self,
+        *,
+        settings: Settings | None = None,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_factory,
+    ) -> None:
+        self._settings = settings or get_settings()
+        self._session_factory = session_factory
+
+    @property
+    def archive_dir(self) -> Path:
+        return Path(self._settings.backup_dir) / ARCHIVE_DIR_NAME
+
+    async def maintain(self, *, today: date | None = None) -> None:
+        month = (today or datetime.utcnow().date()).replace(day=1)
+        for table_name in PARTITIONED_TABLES:
+            try:
+                await self.ensure_partitions(table_name, month)
+                if self._settings.audit_retention_months > 0:
+                    await self.archive_before(
+                        table_name, add_months(month, -self._settings.audit_retention_months)
+                    )
+            except Exception:  # noqa: BLE001 - the other table still gets its partitions
+                logger.exception("[audit_partitions] maintenance of %s failed", table_name)
+
+    async def ensure_partitions(self, table_name: str, month: date) -> list[str]:
+        existing = {partition.name for partition in await self.list_partitions(table_name)}
+        created = []
+        for offset in range(self._settings.audit_partition_months_ahead + 1):
+            name = partition_name(table_name, add_months(month, offset))
+            if name not in existing:
+                await self._create_partition(table_name, add_months(month, offset))
+                created.append(name)
+        if created:
+            logger.info("[audit_partitions] created %s", ", ".join(created))
+        return created
+
+    async def archive_before(self, table_name: str, cutoff: date) -> list[str]:
+        """Archive and drop every month of ``table_name`` that starts before ``cutoff``."""
+        archived = []
+        for partition in await self.list_partitions(table_name):
+            if partition.month >= cutoff:
+                continue
+            if partition.attached:
+                await self._ddl(f"ALTER TABLE {table_name} DETACH PARTITION {partition.name}")
+            path = await self._export(partition)
+            await self._ddl(f"DROP TABLE {partition.name}")
+            logger.info("[audit_partitions] archived %s to %s", partition.name, path)
+            archived.append(partition.name)
+        return archived
+
+    async def list_partitions(self, table_name: str) -> list[Partition]:
+        """Monthly partitions of ``table_name``, attached or left detached by an interrupted archive."""
+        async with self._session_factory() as session:
+            rows = await session.execute(
+                text(
+                    "SELECT c.relname, c.relispartition FROM pg_class AS c "
+                    "JOIN pg_namespace AS n ON n.oid = c.relnamespace "
+                    "WHERE n.nspname = current_schema() AND c.relkind = 'r' AND c.relname LIKE :prefix"
+                ),
+                {"prefix": f"{table_name}\\_%"},
+            )
+            partitions = []
+            for name, attached in rows:
+                match = _PARTITION_RE.match(name)
+                if match is None or match["table"] != table_name:
+                    continue
+                month = date(int(match["year"]), int(match["month"]), 1)
+                partitions.append(Partition(table=table_name, name=name, month=month, attached=attached))
+        return sorted(partitions, key=lambda item: item.month)
+
+    async def _create_partition(self, table_name: str, month: date) -> None:
+        name = partition_name(table_name, month)
+        bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        in_month = {
+            "start": datetime.combine(month, time.min),
+            "end": datetime.combine(add_months(month, 1), time.min),
+        }
+        async with self._session_factory() as session:
+            await session.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+            stray = await session.scalar(
+                text(
+                    f"SELECT EXISTS (SELECT 1 FROM {table_name}_default "
+                    "WHERE created_at >= :start AND created_at < :end)"
+                ),
+                in_month,
+            )
+            if not stray:
+                await session.execute(text(f"CREATE TABLE {name} PARTITION OF {table_name} {bounds}"))
+            else:
+                # The month was written before its partition existed; those rows move out of the default
+                # partition first, otherwise attaching would fail.
+                await session.execute(text(f"CREATE TABLE {name} (LIKE {table_name} INCLUDING DEFAULTS)"))
+                await session.execute(
+                    text(
+                        f"WITH moved AS (DELETE FROM {table_name}_default "
+                        "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                        f"INSERT INTO {name} SELECT * FROM moved"
+                    ),
+                    in_month,
+                )
+                await session.execute(text(f"ALTER TABLE {table_name} ATTACH PARTITION {name} {bounds}"))
+                logger.warning("[audit_partitions] moved rows of %s out of the default partition", name)
+            await session.commit()
+
+    async def _ddl(self, statement: str) -> None:
+        async with self._session_factory() as session:
+            await session.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+            await session.execute(text(statement))
+            await session.commit()
+
+    async def _export(self, partition: Partition) -> Path:
+        source = PARTITIONED_TABLES[partition.table]
+        detached = table(partition.name, *(column(item.name, item.type) for item in source.columns))
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = self.archive_dir / f"{partition.name}.jsonl.gz"
+        partial = path.with_name(f"{path.name}.part")
+        handle = await asyncio.to_thread(gzip.open, partial, "wt", encoding="utf-8")
+        try:
+            async with self._session_factory() as session:
+                rows = await session.stream(
+                    select(detached).order_by(detached.c.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+                )
+                async for batch in rows.partitions():
+                    lines = "".join(
+                        json.dumps(dict(row._mapping), ensure_ascii=False, default=_json_default) + "\n"
+                        for row in batch
+                    )
+                    # Compression is the slow part; keep it off the event loop.
+                    await asyncio.to_thread(handle.write, lines)
+        finally:
+            await asyncio.to_thread(handle.close)
+        os.replace(partial, path)
+        return path
+
+
+audit_partitions = AuditPartitionService()
+
+
+async def _run(args: argparse.Namespace) -> int:
+    try:
+        await audit_partitions.maintain()
+    finally:
+        await engine.dispose()
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Create upcoming audit partitions and archive the ones past AUDIT_RETENTION_MONTHS."
+    )
+    args = parser.parse_args()
+    configure_logging()
+    raise SystemExit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,26 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any
 
+from sqlalchemy import event, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from app.db.models import AuditEvent, TicketEvent
+from app.services.audit_writer import audit_writer
+
+
+PENDING_AUDIT_KEY = "audit_service.pending_events"
+# Rows per INSERT; keeps the bind parameters of one statement well below the protocol limit of 32767.
+INSERT_CHUNK_SIZE = 1000
 
 
 class AuditService:
+    """Audit rows are buffered on the session and inserted at commit, one multi-row INSERT per table.
+
+    The returned events are never added to the session, so they get no id. Actions listed in AUDIT_ASYNC_ACTIONS
+    skip the transaction and go to the background audit_writer instead.
+    """
+
     def _normalize_entity_id(self, entity_id: str | int | None) -> str | None:
         if entity_id is None:
             return None
@@ -31,23 +45,32 @@ class AuditService:
         enriched.setdefault("timestamp", datetime.utcnow().isoformat())
         return enriched
 
-    async def log_event(
+    def build_event(
         self,
-        session: AsyncSession,
         ticket_id: int,
         action: str,
         actor_id: int | None,
         payload: dict[str, Any] | None = None,
     ) -> TicketEvent:
+        """TicketEvent with the enriched payload, for callers that flush it together with other rows."""
         payload = self._enrich_payload(payload=payload, actor_id=actor_id, ticket_id=ticket_id)
-        event = TicketEvent(
+        return TicketEvent(
             ticket_id=ticket_id,
             action=action,
             actor_id=actor_id,
             payload=payload,
         )
-        session.add(event)
-        await session.flush()
+
+    async def log_event(
+        self,
+        session: AsyncSession,
+        ticket_id: int,
+        action: str,
+        actor_id: int | None,
+        payload: dict[str, Any] | None = None,
+    ) -> TicketEvent:
+        event = self.build_event(ticket_id, action, actor_id, payload)
+        self._record(session, event)
         return event
 
     async def log_audit_event(
@@ -75,6 +98,34 @@ class AuditService:
             entity_id=normalized_entity_id,
             payload=payload,
         )
-        session.add(event)
-        await session.flush()
+        self._record(session, event)
         return event
+
+    def _record(self, session: AsyncSession, audit_event: TicketEvent | AuditEvent) -> None:
+        audit_event.created_at = datetime.utcnow()
+        if audit_writer.submit(audit_event):
+            return
+        session.sync_session.info.setdefault(PENDING_AUDIT_KEY, []).append(audit_event)
+
+
+def _row(audit_event: TicketEvent | AuditEvent) -> dict[str, Any]:
+    table = type(audit_event).__table__
+    return {column.key: getattr(audit_event, column.key) for column in table.columns if column.key != "id"}
+
+
+@event.listens_for(Session, "before_commit")
+def _insert_pending_events(session: Session) -> None:
+    events = session.info.pop(PENDING_AUDIT_KEY, None)
+    if not events:
+        return
+    # Flush first so every row the events reference is written before them.
+    session.flush()
+    for model in (TicketEvent, AuditEvent):
+        rows = [_row(item) for item in events if isinstance(item, model)]
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            session.execute(insert(model.__table__).values(rows[start : start + INSERT_CHUNK_SIZE]))
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_events(session: Session) -> None:
+    session.info.pop(PENDING_AUDIT_KEY, None)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+from asyncpg.exceptions import DataError, IntegrityConstraintViolationError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import Settings, get_settings
+from app.db.models import AuditEvent, TicketEvent
+from app.db.session import engine
+
+
+logger = logging.getLogger(__name__)
+
+TICKET_EVENT_COLUMNS = ("ticket_id", "actor_id", "action", "payload", "created_at")
+AUDIT_EVENT_COLUMNS = ("actor_id", "action", "entity_type", "entity_id", "payload", "created_at")
+# A bad row fails the whole COPY and would fail every retry, so such batches are logged and dropped.
+REJECTED_ERRORS = (DataError, IntegrityConstraintViolationError)
+
+
+class AuditWriter:
+    """Background writer for audit actions that may be lost on a crash (AUDIT_ASYNC_ACTIONS).
+
+    Events are queued in memory and written with COPY every AUDIT_ASYNC_INTERVAL seconds, independent of the
+    caller's transaction. While the writer is not running, or its queue is full, submit() refuses and the
+    caller writes the event in its own transaction.
+    """
+
+    def __init__(self, *, settings: Settings | None = None, bind: AsyncEngine = engine) -> None:
+        self._settings = settings or get_settings()
+        self._engine = bind
+        self._actions = self._settings.audit_async_action_set()
+        self._queue: list[TicketEvent | AuditEvent] = []
+        self._wakeup = asyncio.Event()
+        self._running = False
+        self._stopped = False
+
+    def submit(self, event: TicketEvent | AuditEvent) -> bool:
+        if not self._running or event.action not in self._actions:
+            return False
+        if len(self._queue) >= self._settings.audit_async_max_queue:
+            return False
+        self._queue.append(event)
+        return True
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        if not self._actions:
+            return
+        self._running = True
+        logger.info("[audit] writer started actions=%s", sorted(self._actions))
+        try:
+            while not self._stopped:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._settings.audit_async_interval)
+                except asyncio.TimeoutError:
+                    pass
+                await self.flush()
+        finally:
+            self._running = False
+            await self.flush()
+            logger.info("[audit] writer stopped")
+
+    async def flush(self) -> None:
+        if not self._queue:
+            return
+        events, self._queue = self._queue, []
+        try:
+            await self._copy(events)
+        except REJECTED_ERRORS:
+            logger.exception("[audit] dropped %s events: %s", len(events), [self._describe(item) for item in events])
+        except Exception:  # noqa: BLE001 - retry on the next tick
+            logger.exception("[audit] write failed, %s events re-queued", len(events))
+            self._queue[:0] = events[: max(0, self._settings.audit_async_max_queue - len(self._queue))]
+
+    async def _copy(self, events: list[TicketEvent | AuditEvent]) -> None:
+        ticket_rows = []
+        audit_rows = []
+        for item in events:
+            payload = json.dumps(item.payload) if item.payload is not None else None
+            if isinstance(item, TicketEvent):
+                ticket_rows.append((item.ticket_id, item.actor_id, item.action, payload, item.created_at))
+            else:
+                audit_rows.append(
+                    (item.actor_id, item.action, item.entity_type, item.entity_id, payload, item.created_at)
+                )
+        async with self._engine.begin() as conn:
+            driver = (await conn.get_raw_connection()).driver_connection
+            if ticket_rows:
+                await driver.copy_records_to_table(
+                    TicketEvent.__tablename__, records=ticket_rows, columns=TICKET_EVENT_COLUMNS
+                )
+            if audit_rows:
+                await driver.copy_records_to_table(
+                    AuditEvent.__tablename__, records=audit_rows, columns=AUDIT_EVENT_COLUMNS
+                )
+
+    @staticmethod
+    def _describe(item: TicketEvent | AuditEvent) -> dict[str, Any]:
+        return {"action": item.action, "actor_id": item.actor_id, "payload": item.payload}
+
+
+audit_writer = AuditWriter()
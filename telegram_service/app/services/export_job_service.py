@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Sequence, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.enums import ExportJobStatus
+from app.db.models import ExportJob, ExportResult, ProjectShare, ProjectTransaction, Ticket, TicketMoneyOperation, User
+from app.services.finance_service import DateRange
+
+
+EXPORT_REPORT_FINANCE = "finance"
+OPEN_STATUSES = (ExportJobStatus.QUEUED, ExportJobStatus.RUNNING)
+EMPTY_WATERMARK = datetime(1970, 1, 1)
+JOB_ID_SEQUENCE = Sequence("export_jobs_id_seq")
+
+
+def period_key(date_range: DateRange) -> str:
+    start = date_range.start.isoformat() if date_range.start else ""
+    end = date_range.end.isoformat() if date_range.end else ""
+    return f"{start}..{end}"
+
+
+class ExportJobService:
+    """Queue of report exports and the cache of their Telegram file ids."""
+
+    async def reserve_id(self, session: AsyncSession) -> int:
+        """Id for a job that is enqueued later, so its cancel button can be sent before the job exists."""
+        return await session.scalar(select(JOB_ID_SEQUENCE.next_value()))
+
+    async def enqueue(
+        self,
+        session: AsyncSession,
+        *,
+        job_id: int,
+        report_type: str,
+        date_range: DateRange,
+        period_label: str,
+        requested_by: int,
+        chat_id: int,
+        progress_chat_id: int,
+        progress_message_id: int,
+    ) -> ExportJob:
+        job = ExportJob(
+            id=job_id,
+            report_type=report_type,
+            period_start=date_range.start,
+            period_end=date_range.end,
+            period_label=period_label,
+            requested_by=requested_by,
+            chat_id=chat_id,
+            progress_chat_id=progress_chat_id,
+            progress_message_id=progress_message_id,
+            status=ExportJobStatus.QUEUED,
+            created_at=datetime.utcnow(),
+        )
+        session.add(job)
+        await session.flush()
+        return job
+
+    async def claim(self, session: AsyncSession, *, lease_seconds: float) -> ExportJob | None:
+        """Take the oldest queued job, or a running one whose lease ran out because its worker died."""
+        now = datetime.utcnow()
+        due_id = (
+            select(ExportJob.id)
+            .where(
+                ExportJob.status.in_(OPEN_STATUSES),
+                (ExportJob.status == ExportJobStatus.QUEUED) | (ExportJob.lease_until < now),
+            )
+            .order_by(ExportJob.id.asc())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await session.scalars(
+            update(ExportJob)
+            .where(ExportJob.id == due_id)
+            .values(
+                status=ExportJobStatus.RUNNING,
+                started_at=now,
+                lease_until=now + timedelta(seconds=lease_seconds),
+            )
+            .returning(ExportJob)
+            .execution_options(synchronize_session=False)
+        )
+        return result.one_or_none()
+
+    async def get_status(self, session: AsyncSession, job_id: int) -> ExportJobStatus | None:
+        return await session.scalar(select(ExportJob.status).where(ExportJob.id == job_id))
+
+    async def get_requester(self, session: AsyncSession, job_id: int) -> int | None:
+        return await session.scalar(select(ExportJob.requested_by).where(ExportJob.id == job_id))
+
+    async def cancel(self, session: AsyncSession, job_id: int) -> bool:
+        """Cancel a job that has not finished yet; a running job stops at its next progress check."""
+        result = await session.execute(
+            update(ExportJob)
+            .where(ExportJob.id == job_id, ExportJob.status.in_(OPEN_STATUSES))
+            .values(status=ExportJobStatus.CANCELLED, finished_at=datetime.utcnow(), lease_until=None)
+            .returning(ExportJob.id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def finish(
+        self,
+        session: AsyncSession,
+        job_id: int,
+        *,
+        status: ExportJobStatus,
+        watermark: datetime | None = None,
+        from_cache: bool = False,
+        error: str | None = None,
+    ) -> bool:
+        """Record the outcome of a running job. Returns False when it was cancelled in the meantime."""
+        result = await session.execute(
+            update(ExportJob)
+            .where(ExportJob.id == job_id, ExportJob.status == ExportJobStatus.RUNNING)
+            .values(
+                status=status,
+                watermark=watermark,
+                from_cache=from_cache,
+                error=error,
+                finished_at=datetime.utcnow(),
+                lease_until=None,
+            )
+            .returning(ExportJob.id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def data_watermark(self, session: AsyncSession) -> datetime:
+        """Latest change to anything an export reads. Rows are never deleted, so this only moves forward."""
+        latest = [
+            select(func.max(Ticket.updated_at)).scalar_subquery(),
+            select(func.max(ProjectTransaction.updated_at)).scalar_subquery(),
+            select(func.max(TicketMoneyOperation.created_at)).scalar_subquery(),
+            # Shares and user names are printed in the report as well.
+            select(func.max(ProjectShare.set_at)).scalar_subquery(),
+            select(func.max(User.updated_at)).scalar_subquery(),
+        ]
+        watermark = await session.scalar(select(func.greatest(*latest)))
+        return watermark or EMPTY_WATERMARK
+
+    async def cached_documents(
+        self,
+        session: AsyncSession,
+        *,
+        report_type: str,
+        date_range: DateRange,
+        watermark: datetime,
+    ) -> list[dict[str, Any]] | None:
+        return await session.scalar(
+            select(ExportResult.documents).where(
+                ExportResult.report_type == report_type,
+                ExportResult.period_key == period_key(date_range),
+                ExportResult.watermark == watermark,
+            )
+        )
+
+    async def store_documents(
+        self,
+        session: AsyncSession,
+        *,
+        report_type: str,
+        date_range: DateRange,
+        watermark: datetime,
+        documents: list[dict[str, Any]],
+    ) -> None:
+        """Remember the sent files for this period and drop entries made stale by newer data."""
+        key = period_key(date_range)
+        await session.execute(
+            delete(ExportResult).where(
+                ExportResult.report_type == report_type,
+                ExportResult.period_key == key,
+                ExportResult.watermark < watermark,
+            )
+        )
+        await session.execute(
+            insert(ExportResult)
+            .values(
+                report_type=report_type,
+                period_key=key,
+                watermark=watermark,
+                documents=documents,
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing()
+        )
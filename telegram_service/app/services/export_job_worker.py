@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.bot.keyboards.finance import export_cancel_keyboard
+from app.core.config import Settings, get_settings
+from app.db.enums import ExportJobStatus
+from app.db.models import ExportJob
+from app.db.session import async_session_factory
+from app.services.export_job_service import EXPORT_REPORT_FINANCE, ExportJobService, period_key
+from app.services.finance_export import (
+    ExportFiles,
+    ExportProgress,
+    FinanceExportService,
+    ProgressCallback,
+    finance_export,
+)
+from app.services.finance_service import DateRange
+from app.services.report_worker import SAVE_GRACE_SECONDS, ReportTimeout
+
+
+logger = logging.getLogger(__name__)
+
+# Only cache a result whose newest change is at least this old when the build starts. updated_at is stamped
+# before commit, so a slow transaction can still commit rows older than the watermark just read; once the
+# watermark is older than any open transaction, every later commit moves it forward.
+WATERMARK_SETTLE_SECONDS = 60
+
+
+class ExportCancelled(RuntimeError):
+    pass
+
+
+class ExportJobWorker:
+    """Runs queued exports, edits each job's progress message as it goes and re-sends cached files."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        *,
+        settings: Settings | None = None,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_factory,
+        exporter: FinanceExportService | None = None,
+    ) -> None:
+        self._bot = bot
+        self._settings = settings or get_settings()
+        self._session_factory = session_factory
+        self._exporter = exporter or finance_export
+        self._jobs = ExportJobService()
+        # One job per report process; more would only queue inside the pool.
+        self._slots = asyncio.Semaphore(max(1, self._settings.report_workers))
+        self._lease_seconds = 2 * self._settings.report_timeout_seconds + SAVE_GRACE_SECONDS
+        # Jobs for the same report and period run one after another, so the later ones hit the cache.
+        self._period_locks: dict[tuple[str, str], asyncio.Lock] = {}
+        # Jobs holding or waiting on each period lock; the lock is dropped only when none are left.
+        self._period_jobs: dict[tuple[str, str], int] = {}
+        self._running: set[asyncio.Task[None]] = set()
+        self._wakeup = asyncio.Event()
+        self._stopped = False
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        logger.info("Export worker started")
+        try:
+            while not self._stopped:
+                await self._slots.acquire()
+                try:
+                    job = await self._claim()
+                except asyncio.CancelledError:
+                    self._slots.release()
+                    raise
+                except Exception:  # noqa: BLE001 - keep the loop alive on DB hiccups
+                    logger.exception("Export job claim failed")
+                    job = None
+                if job is not None:
+                    task = asyncio.create_task(self._run_job(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+                    continue
+                self._slots.release()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._settings.export_poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            # Interrupted jobs keep their lease and are picked up again once it expires.
+            for task in self._running:
+                task.cancel()
+            await asyncio.gather(*self._running, return_exceptions=True)
+            logger.info("Export worker stopped")
+
+    async def _claim(self) -> ExportJob | None:
+        async with self._session_factory() as session:
+            job = await self._jobs.claim(session, lease_seconds=self._lease_seconds)
+            await session.commit()
+        return job
+
+    async def _run_job(self, job: ExportJob) -> None:
+        key = (job.report_type, period_key(DateRange(start=job.period_start, end=job.period_end)))
+        lock = self._period_locks.setdefault(key, asyncio.Lock())
+        self._period_jobs[key] = self._period_jobs.get(key, 0) + 1
+        try:
+            async with lock:
+                await self._process(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001 - one broken job must not stop the worker
+            logger.exception("[export] job %s failed", job.id)
+            if await self._finish(job, ExportJobStatus.FAILED, error=str(exc)):
+                await self._edit(job, "Не удалось сформировать отчёт, подробности в логах.")
+        finally:
+            self._period_jobs[key] -= 1
+            if not self._period_jobs[key]:
+                del self._period_jobs[key]
+                del self._period_locks[key]
+            self._slots.release()
+
+    async def _process(self, job: ExportJob) -> None:
+        if job.report_type != EXPORT_REPORT_FINANCE:
+            raise ValueError(f"unknown report type {job.report_type!r}")
+        date_range = DateRange(start=job.period_start, end=job.period_end)
+        started_at = datetime.utcnow()
+        async with self._session_factory() as session:
+            watermark = await self._jobs.data_watermark(session)
+            documents = await self._jobs.cached_documents(
+                session, report_type=job.report_type, date_range=date_range, watermark=watermark
+            )
+        if documents is not None:
+            if await self._cancelled(job):
+                return
+            for document in documents:
+                await self._bot.send_document(chat_id=job.chat_id, document=document["file_id"])
+            if await self._finish(job, ExportJobStatus.DONE, watermark=watermark, from_cache=True):
+                await self._edit(job, "Экспорт отправлен (без изменений с прошлой выгрузки).")
+            logger.info("[export] job %s served from cache watermark=%s", job.id, watermark.isoformat())
+            return
+
+        await self._edit(job, f"Готовлю отчёты… ({job.period_label})", cancellable=True)
+        try:
+            async with self._session_factory() as session:
+                files = await self._exporter.build(session, date_range=date_range, progress=self._reporter(job))
+        except ExportCancelled:
+            logger.info("[export] job %s cancelled", job.id)
+            return
+        except ReportTimeout:
+            logger.warning("[export] job %s timed out period=%s", job.id, job.period_label)
+            if await self._finish(job, ExportJobStatus.FAILED, error="timeout"):
+                await self._edit(job, "Отчёт не успел сформироваться. Попробуйте выбрать период короче.")
+            return
+
+        try:
+            if await self._cancelled(job):
+                return
+            documents = await self._send(job, files)
+        finally:
+            files.remove()
+        async with self._session_factory() as session:
+            if watermark <= started_at - timedelta(seconds=WATERMARK_SETTLE_SECONDS):
+                await self._jobs.store_documents(
+                    session,
+                    report_type=job.report_type,
+                    date_range=date_range,
+                    watermark=watermark,
+                    documents=documents,
+                )
+            finished = await self._jobs.finish(session, job.id, status=ExportJobStatus.DONE, watermark=watermark)
+            await session.commit()
+        if finished:
+            await self._edit(job, "Экспорт отправлен.")
+        logger.info("[export] job %s sent tickets=%s transactions=%s", job.id, files.tickets, files.transactions)
+
+    async def _send(self, job: ExportJob, files: ExportFiles) -> list[dict[str, Any]]:
+        stamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        documents = []
+        for path, filename in (
+            (files.report, f"project_report_{stamp}.xlsx"),
+            (files.operations, f"money_ops_{stamp}.xlsx"),
+        ):
+            sent = await self._bot.send_document(chat_id=job.chat_id, document=FSInputFile(path, filename=filename))
+            documents.append({"file_id": sent.document.file_id, "filename": filename})
+        return documents
+
+    def _reporter(self, job: ExportJob) -> ProgressCallback:
+        interval = self._settings.export_progress_interval
+        last_update = time.monotonic()
+
+        async def report(progress: ExportProgress) -> None:
+            nonlocal last_update
+            now = time.monotonic()
+            if not progress.writing and now - last_update < interval:
+                return
+            last_update = now
+            if await self._cancelled(job):
+                raise ExportCancelled(f"export job {job.id} cancelled")
+            stage = "Формирую файлы" if progress.writing else "Готовлю отчёты"
+            text = (
+                f"{stage}… ({job.period_label})\n"
+                f"Прочитано заказов: {progress.tickets}, операций: {progress.transactions}"
+            )
+            await self._edit(job, text, cancellable=True)
+
+        return report
+
+    async def _cancelled(self, job: ExportJob) -> bool:
+        async with self._session_factory() as session:
+            return await self._jobs.get_status(session, job.id) == ExportJobStatus.CANCELLED
+
+    async def _finish(self, job: ExportJob, status: ExportJobStatus, **values: Any) -> bool:
+        async with self._session_factory() as session:
+            finished = await self._jobs.finish(session, job.id, status=status, **values)
+            await session.commit()
+        return finished
+
+    async def _edit(self, job: ExportJob, text: str, *, cancellable: bool = False) -> None:
+        try:
+            await self._bot.edit_message_text(
+                chat_id=job.progress_chat_id,
+                message_id=job.progress_message_id,
+                text=text,
+                reply_markup=export_cancel_keyboard(job.id) if cancellable else None,
+            )
+        except TelegramBadRequest as exc:
+            # Unchanged text or a deleted message; progress is best effort.
+            logger.debug("[export] progress edit skipped job=%s: %s", job.id, exc)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.services.finance_service import DateRange, FinanceService
+from app.services.report_worker import (
+    SUMMARY_HEADERS,
+    TICKETS_KIND,
+    TRANSACTIONS_KIND,
+    FinanceReportJob,
+    ReportPool,
+    check_deadline,
+    report_pool,
+    spool_rows,
+    write_finance_report,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class ExportFiles:
+    """The two workbooks of one export, on disk until ``remove`` is called."""
+
+    report: Path
+    operations: Path
+    tickets: int = 0
+    transactions: int = 0
+
+    def remove(self) -> None:
+        for path in (self.report, self.operations):
+            path.unlink(missing_ok=True)
+
+
+@dataclass(slots=True)
+class ExportProgress:
+    """Rows read so far; ``writing`` is set once reading is done and the workbooks are being written."""
+
+    tickets: int = 0
+    transactions: int = 0
+    writing: bool = False
+
+
+ProgressCallback = Callable[[ExportProgress], Awaitable[None]]
+
+
+class FinanceExportService:
+    """Builds the project report and money operations workbooks.
+
+    Rows are read in one pass over server-side cursors and spooled to a temp file as plain tuples; a
+    report worker process turns the spool into write-only workbooks. The event loop only ever holds one
+    batch and never runs openpyxl.
+    """
+
+    def __init__(
+        self,
+        finance_service: FinanceService | None = None,
+        *,
+        pool: ReportPool | None = None,
+        batch_size: int | None = None,
+    ) -> None:
+        self._finance = finance_service or FinanceService()
+        self._pool = pool or report_pool
+        self._batch_size = batch_size or get_settings().finance_export_batch_size
+
+    async def build(
+        self,
+        session: AsyncSession,
+        *,
+        date_range: DateRange,
+        progress: ProgressCallback | None = None,
+    ) -> ExportFiles:
+        """Build both workbooks; ``progress`` is awaited after every batch and may raise to abort the export."""
+        deadline = self._pool.deadline()
+        files = ExportFiles(
+            report=_temp_file("project_report_", ".xlsx"),
+            operations=_temp_file("money_ops_", ".xlsx"),
+        )
+        spool = _temp_file("finance_export_", ".spool")
+        try:
+            job = await self._spool(
+                session, date_range=date_range, spool=spool, files=files, deadline=deadline, progress=progress
+            )
+            files.tickets, files.transactions = await self._pool.run(write_finance_report, job, deadline=deadline)
+        except BaseException:
+            files.remove()
+            raise
+        finally:
+            spool.unlink(missing_ok=True)
+        logger.info("[finance_export] %s tickets, %s transactions", files.tickets, files.transactions)
+        return files
+
+    async def _spool(
+        self,
+        session: AsyncSession,
+        *,
+        date_range: DateRange,
+        spool: Path,
+        files: ExportFiles,
+        deadline: float,
+        progress: ProgressCallback | None,
+    ) -> FinanceReportJob:
+        # The summary comes from the daily rollup and the share list is short, so both go into the job itself.
+        summary = await self._finance.project_summary(session, date_range=date_range)
+        shares = await self._finance.list_active_shares(session)
+        state = ExportProgress()
+        with spool.open("wb") as out:
+            async for rows in self._finance.stream_tickets_for_export(
+                session, date_range=date_range, batch_size=self._batch_size
+            ):
+                spool_rows(out, TICKETS_KIND, rows[0]._fields, rows)
+                check_deadline(deadline)
+                state.tickets += len(rows)
+                if progress is not None:
+                    await progress(state)
+            async for rows in self._finance.stream_manual_transactions(
+                session, date_range=date_range, batch_size=self._batch_size
+            ):
+                spool_rows(out, TRANSACTIONS_KIND, rows[0]._fields, rows)
+                check_deadline(deadline)
+                state.transactions += len(rows)
+                if progress is not None:
+                    await progress(state)
+        if progress is not None:
+            state.writing = True
+            await progress(state)
+        return FinanceReportJob(
+            spool=str(spool),
+            report=str(files.report),
+            operations=str(files.operations),
+            summary_row=[
+                date_range.start.date() if date_range.start else None,
+                date_range.end.date() if date_range.end else None,
+                *(summary[name] for name in SUMMARY_HEADERS[2:]),
+            ],
+            share_rows=[
+                [
+                    share.user_id,
+                    share.user.display_name if share.user else None,
+                    share.percent,
+                    summary["project_net_cash_should"],
+                    self._share(summary["project_net_cash_should"], share.percent),
+                    summary["project_net_cash_received"],
+                    self._share(summary["project_net_cash_received"], share.percent),
+                ]
+                for share in shares
+            ],
+            deadline=deadline,
+        )
+
+    def _share(self, amount: Decimal, percent: Decimal) -> Decimal:
+        return self._finance.round_money(amount * percent / Decimal("100"))
+
+
+def _temp_file(prefix: str, suffix: str) -> Path:
+    fd, name = tempfile.mkstemp(prefix=prefix, suffix=suffix)
+    os.close(fd)
+    return Path(name)
+
+
+finance_export = FinanceExportService()
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import Date, and_, case, cast, delete, func, literal, or_, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logging import configure_logging
+from app.db.enums import ProjectTransactionType, RollupRole, TicketStatus, TransferStatus
+from app.db.models import FinanceDailyRollup, ProjectTransaction, Ticket
+from app.db.session import async_session_factory, engine
+
+
+logger = logging.getLogger(__name__)
+
+# Project-wide rows are stored under this user id with role PROJECT.
+PROJECT_USER_ID = 0
+
+KEY_COLUMNS = ("user_id", "role", "day")
+COUNT_COLUMNS = ("ticket_count", "confirmed_count", "repeat_count")
+AMOUNT_COLUMNS = (
+    "earned",
+    "net_profit",
+    "transfer_confirmed",
+    "transfer_pending",
+    "manual_income",
+    "manual_expense",
+)
+VALUE_COLUMNS = COUNT_COLUMNS + AMOUNT_COLUMNS
+
+_ROLE_TYPE = FinanceDailyRollup.__table__.c.role.type
+
+
+@dataclass(frozen=True)
+class TicketFigures:
+    """What a closed ticket contributes to the rollup, captured before or after a change."""
+
+    day: date
+    executor_id: int | None
+    admin_id: int | None
+    junior_id: int | None
+    confirmed: bool
+    is_repeat: bool
+    net_profit: Decimal
+    executor_earned: Decimal
+    admin_earned: Decimal
+    junior_earned: Decimal
+    project_take: Decimal
+
+    @classmethod
+    def of(cls, ticket: Ticket, *, transfer_status: TransferStatus | None = None) -> TicketFigures | None:
+        """Figures of ``ticket`` as stored, or None when it is not a closed ticket (and so not rolled up)."""
+        if ticket.status != TicketStatus.CLOSED or ticket.closed_at is None:
+            return None
+        status = transfer_status or ticket.transfer_status
+        return cls(
+            day=ticket.closed_at.date(),
+            executor_id=ticket.assigned_executor_id,
+            admin_id=ticket.created_by_admin_id,
+            junior_id=ticket.junior_master_id,
+            confirmed=status == TransferStatus.CONFIRMED,
+            is_repeat=bool(ticket.is_repeat),
+            net_profit=Decimal(ticket.net_profit or 0),
+            executor_earned=Decimal(ticket.executor_earned_amount or 0),
+            admin_earned=Decimal(ticket.admin_earned_amount or 0),
+            junior_earned=Decimal(ticket.junior_master_earned_amount or 0),
+            project_take=Decimal(ticket.project_take_amount or 0),
+        )
+
+    def rows(self) -> list[tuple[tuple[int, RollupRole, date], dict[str, Any]]]:
+        common = {
+            "ticket_count": 1,
+            "confirmed_count": int(self.confirmed),
+            "repeat_count": int(self.is_repeat),
+            "net_profit": self.net_profit,
+        }
+        to_transfer = self.net_profit - self.executor_earned
+        transfer = "transfer_confirmed" if self.confirmed else "transfer_pending"
+        rows = [
+            (
+                (PROJECT_USER_ID, RollupRole.PROJECT, self.day),
+                {**common, "earned": self.project_take, transfer: self.net_profit},
+            )
+        ]
+        if self.executor_id is not None:
+            rows.append(
+                (
+                    (self.executor_id, RollupRole.EXECUTOR, self.day),
+                    {**common, "earned": self.executor_earned, transfer: to_transfer},
+                )
+            )
+        if self.admin_id is not None:
+            rows.append(((self.admin_id, RollupRole.ADMIN, self.day), {**common, "earned": self.admin_earned}))
+        if self.junior_id is not None:
+            rows.append(
+                ((self.junior_id, RollupRole.JUNIOR_MASTER, self.day), {**common, "earned": self.junior_earned})
+            )
+        return rows
+
+
+class FinanceRollupService:
+    """Keeps finance_daily_rollup in step with closed tickets and manual project operations.
+
+    Writers call it inside their own transaction, so the rollup commits or rolls back with the change.
+    """
+
+    async def apply_ticket_change(
+        self,
+        session: AsyncSession,
+        *,
+        before: TicketFigures | None,
+        after: TicketFigures | None,
+    ) -> None:
+        deltas: dict[tuple[int, RollupRole, date], dict[str, Any]] = {}
+        for figures, sign in ((before, -1), (after, 1)):
+            if figures is None:
+                continue
+            for key, values in figures.rows():
+                delta = deltas.setdefault(key, dict.fromkeys(VALUE_COLUMNS, 0))
+                for name, value in values.items():
+                    delta[name] += sign * value
+        await self._upsert(session, deltas)
+
+    async def add_transaction(self, session: AsyncSession, transaction: ProjectTransaction) -> None:
+        column = "manual_income" if transaction.type == ProjectTransactionType.INCOME else "manual_expense"
+        key = (PROJECT_USER_ID, RollupRole.PROJECT, transaction.occurred_at.date())
+        await self._upsert(session, {key: {**dict.fromkeys(VALUE_COLUMNS, 0), column: transaction.amount}})
+
+    async def _upsert(self, session: AsyncSession, deltas: dict[tuple[int, RollupRole, date], dict[str, Any]]) -> None:
+        # Keys are written in a fixed order so two transactions touching the same days cannot deadlock.
+        rows = [
+            {**dict(zip(KEY_COLUMNS, key)), **values}
+            for key, values in sorted(deltas.items(), key=lambda item: (item[0][0], item[0][1].value, item[0][2]))
+            if any(values.values())
+        ]
+        if not rows:
+            return
+        table = FinanceDailyRollup.__table__
+        statement = insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[name] for name in KEY_COLUMNS],
+            set_={name: table.c[name] + statement.excluded[name] for name in VALUE_COLUMNS},
+        )
+        await session.execute(statement)
+
+    async def rebuild(self, session: AsyncSession) -> int:
+        """Recompute the whole rollup from tickets and project transactions (after a restore or a fix)."""
+        # Blocks concurrent upserts until commit, so no delta is lost between the delete and the insert.
+        await session.execute(text("LOCK TABLE finance_daily_rollup IN SHARE ROW EXCLUSIVE MODE"))
+        await session.execute(delete(FinanceDailyRollup))
+        source = rollup_source().subquery()
+        result = await session.execute(
+            FinanceDailyRollup.__table__.insert().from_select(
+                list(KEY_COLUMNS + VALUE_COLUMNS), select(*(source.c[name] for name in KEY_COLUMNS + VALUE_COLUMNS))
+            )
+        )
+        return result.rowcount
+
+    async def verify(self, session: AsyncSession, *, limit: int = 50) -> list[dict[str, Any]]:
+        """Rows where the rollup differs from a fresh aggregate; empty when they agree."""
+        source = rollup_source().subquery("source")
+        stored = FinanceDailyRollup.__table__
+        differs = or_(
+            *(func.coalesce(source.c[name], 0) != func.coalesce(stored.c[name], 0) for name in VALUE_COLUMNS)
+        )
+        query = (
+            select(
+                *(func.coalesce(source.c[name], stored.c[name]).label(name) for name in KEY_COLUMNS),
+                *(source.c[name].label(f"expected_{name}") for name in VALUE_COLUMNS),
+                *(stored.c[name].label(f"stored_{name}") for name in VALUE_COLUMNS),
+            )
+            .select_from(
+                source.join(
+                    stored,
+                    and_(*(source.c[name] == stored.c[name] for name in KEY_COLUMNS)),
+                    full=True,
+                )
+            )
+            .where(differs)
+            .limit(limit)
+        )
+        result = await session.execute(query)
+        return [dict(row._mapping) for row in result]
+
+
+def rollup_source():
+    """The rollup as an aggregate over tickets and project transactions (the definition the table caches)."""
+    closed_day = cast(Ticket.closed_at, Date)
+    confirmed = Ticket.transfer_status == TransferStatus.CONFIRMED
+    net = func.coalesce(Ticket.net_profit, 0)
+    to_transfer = net - func.coalesce(Ticket.executor_earned_amount, 0)
+    zero = literal(0)
+
+    def ticket_part(role: RollupRole, user_id: Any, earned: Any, *, transfer: Any = None) -> Any:
+        return select(
+            user_id.label("user_id"),
+            cast(literal(role.value), _ROLE_TYPE).label("role"),
+            closed_day.label("day"),
+            literal(1).label("ticket_count"),
+            case((confirmed, 1), else_=0).label("confirmed_count"),
+            case((Ticket.is_repeat.is_(True), 1), else_=0).label("repeat_count"),
+            func.coalesce(earned, 0).label("earned"),
+            net.label("net_profit"),
+            (case((confirmed, transfer), else_=0) if transfer is not None else zero).label("transfer_confirmed"),
+            (case((confirmed, 0), else_=transfer) if transfer is not None else zero).label("transfer_pending"),
+            zero.label("manual_income"),
+            zero.label("manual_expense"),
+        ).where(
+            Ticket.status == TicketStatus.CLOSED,
+            Ticket.closed_at.is_not(None),
+            *([] if role == RollupRole.PROJECT else [user_id.is_not(None)]),
+        )
+
+    manual = select(
+        literal(PROJECT_USER_ID).label("user_id"),
+        cast(literal(RollupRole.PROJECT.value), _ROLE_TYPE).label("role"),
+        cast(ProjectTransaction.occurred_at, Date).label("day"),
+        *(zero.label(name) for name in COUNT_COLUMNS),
+        *(zero.label(name) for name in ("earned", "net_profit", "transfer_confirmed", "transfer_pending")),
+        case((ProjectTransaction.type == ProjectTransactionType.INCOME, ProjectTransaction.amount), else_=0).label(
+            "manual_income"
+        ),
+        case((ProjectTransaction.type == ProjectTransactionType.EXPENSE, ProjectTransaction.amount), else_=0).label(
+            "manual_expense"
+        ),
+    )
+    parts = union_all(
+        ticket_part(
+            RollupRole.EXECUTOR, Ticket.assigned_executor_id, Ticket.executor_earned_amount, transfer=to_transfer
+        ),
+        ticket_part(RollupRole.ADMIN, Ticket.created_by_admin_id, Ticket.admin_earned_amount),
+        ticket_part(RollupRole.JUNIOR_MASTER, Ticket.junior_master_id, Ticket.junior_master_earned_amount),
+        ticket_part(RollupRole.PROJECT, literal(PROJECT_USER_ID), Ticket.project_take_amount, transfer=net),
+        manual,
+    ).subquery("parts")
+    return select(
+        *(parts.c[name] for name in KEY_COLUMNS),
+        *(func.sum(parts.c[name]).label(name) for name in VALUE_COLUMNS),
+    ).group_by(*(parts.c[name] for name in KEY_COLUMNS))
+
+
+finance_rollup = FinanceRollupService()
+
+
+async def _run(args: argparse.Namespace) -> int:
+    try:
+        async with async_session_factory() as session:
+            if args.rebuild:
+                rows = await finance_rollup.rebuild(session)
+                await session.commit()
+                logger.info("[finance_rollup] rebuilt %s rows", rows)
+            if args.verify:
+                mismatches = await finance_rollup.verify(session)
+                await session.rollback()
+                for mismatch in mismatches:
+                    logger.error("[finance_rollup] mismatch %s", mismatch)
+                if mismatches:
+                    return 1
+                logger.info("[finance_rollup] rollup matches tickets and project transactions")
+    finally:
+        await engine.dispose()
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild or verify the daily finance rollup.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the rollup from scratch.")
+    parser.add_argument("--verify", action="store_true", help="Compare the rollup with a fresh aggregate.")
+    args = parser.parse_args()
+    if not args.rebuild and not args.verify:
+        parser.error("nothing to do: pass --rebuild and/or --verify")
+    configure_logging()
+    raise SystemExit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
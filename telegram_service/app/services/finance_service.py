@@ -1,15 +1,63 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import date, datetime
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, AsyncIterator, Sequence
 
-from sqlalchemy import case, func, select
+from sqlalchemy import BigInteger, Date, DateTime, Integer, Row, and_, column, func, or_, select, values
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
-from app.db.enums import ProjectTransactionType, TicketStatus, TransferStatus
-from app.db.models import ProjectShare, ProjectTransaction, Ticket, TicketMoneyOperation, User
+from app.db.enums import ProjectTransactionType, RollupRole, TicketStatus, TransferStatus, UserRole
+from app.db.models import (
+    FinanceDailyRollup,
+    ProjectShare,
+    ProjectTransaction,
+    Ticket,
+    TicketMoneyOperation,
+    User,
+)
+from app.services.finance_rollup import PROJECT_USER_ID
+
+
+# Stand-ins for an open start/end of a report period (closed tickets always carry closed_at).
+RANGE_MIN = datetime(2000, 1, 1)
+RANGE_MAX = datetime.max
+_MICROSECOND = timedelta(microseconds=1)
+
+# Ticket columns the Excel export reads; user names are joined separately.
+EXPORT_TICKET_COLUMNS = (
+    "id",
+    "status",
+    "category",
+    "client_phone",
+    "scheduled_at",
+    "ad_source",
+    "created_by_admin_id",
+    "assigned_executor_id",
+    "junior_master_id",
+    "revenue",
+    "expense",
+    "net_profit",
+    "transfer_status",
+    "transfer_sent_at",
+    "transfer_confirmed_at",
+    "transfer_confirmed_by",
+    "is_repeat",
+    "repeat_ticket_ids",
+    "executor_percent_at_close",
+    "executor_earned_amount",
+    "admin_percent_at_close",
+    "admin_earned_amount",
+    "junior_master_percent_at_close",
+    "junior_master_earned_amount",
+)
+
+_SALARY_COLUMNS = {
+    RollupRole.ADMIN: (Ticket.admin_earned_amount, Ticket.created_by_admin_id),
+    RollupRole.JUNIOR_MASTER: (Ticket.junior_master_earned_amount, Ticket.junior_master_id),
+}
 
 
 @dataclass(frozen=True)
@@ -18,6 +66,32 @@ class DateRange:
     end: datetime | None
 
 
+@dataclass(frozen=True)
+class RangeSplit:
+    """Whole days of a period, read from finance_daily_rollup, and the partial days around them, read raw."""
+
+    first_day: date
+    last_day: date
+    edges: tuple[DateRange, ...]
+
+
+def split_range(date_range: DateRange) -> RangeSplit:
+    start = date_range.start or RANGE_MIN
+    end = date_range.end or RANGE_MAX
+    first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    last_day = end.date() if end.time() == time.max else end.date() - timedelta(days=1)
+    if first_day > last_day:
+        return RangeSplit(first_day=first_day, last_day=last_day, edges=(DateRange(start=start, end=end),))
+    edges = []
+    whole_start = datetime.combine(first_day, time.min)
+    whole_end = datetime.combine(last_day, time.max)
+    if start < whole_start:
+        edges.append(DateRange(start=start, end=whole_start - _MICROSECOND))
+    if end > whole_end:
+        edges.append(DateRange(start=whole_end + _MICROSECOND, end=end))
+    return RangeSplit(first_day=first_day, last_day=last_day, edges=tuple(edges))
+
+
 class FinanceService:
     def __init__(self) -> None:
         self._money_round = Decimal("0.01")
@@ -34,53 +108,176 @@ class FinanceService:
         *,
         date_range: DateRange,
     ) -> dict[str, Decimal]:
-        to_transfer = func.coalesce(Ticket.net_profit, 0) - func.coalesce(
-            Ticket.executor_earned_amount, 0
+        return (await self.master_money_many(session, [(master_id, date_range)]))[0]
+
+    async def master_money_many(
+        self,
+        session: AsyncSession,
+        requests: Sequence[tuple[int, DateRange]],
+    ) -> list[dict[str, Decimal]]:
+        """master_money for every (user, period) pair; results follow the order of ``requests``.
+
+        Whole days come from the rollup in one statement; only periods that start or end mid-day add a
+        second statement over the raw tickets of those edge days.
+        """
+        if not requests:
+            return []
+        splits = [split_range(date_range) for _user_id, date_range in requests]
+        totals = await self._rollup_master_money(
+            session, [(user_id, split) for (user_id, _date_range), split in zip(requests, splits)]
         )
-        base = select(
-            func.coalesce(func.sum(Ticket.executor_earned_amount), 0),
-            func.coalesce(func.sum(to_transfer), 0),
-            func.coalesce(
-                func.sum(
-                    case(
-                        (Ticket.transfer_status == TransferStatus.CONFIRMED, to_transfer),
-                        else_=0,
-                    )
+        edges = [
+            (index, user_id, edge)
+            for index, ((user_id, _date_range), split) in enumerate(zip(requests, splits))
+            for edge in split.edges
+        ]
+        if edges:
+            raw = await self._raw_master_money(session, [(user_id, edge) for _index, user_id, edge in edges])
+            for (index, _user_id, _edge), figures in zip(edges, raw):
+                share_percent, *amounts = totals[index]
+                totals[index] = (share_percent, *_add(amounts, figures))
+        return [self._master_money_result(*row) for row in totals]
+
+    async def masters_money(
+        self,
+        session: AsyncSession,
+        *,
+        date_range: DateRange,
+    ) -> list[tuple[User, dict[str, Decimal]]]:
+        """Every active master's money for one period, for the project summary."""
+        result = await session.execute(
+            select(User)
+            .where(User.role == UserRole.MASTER, User.is_active.is_(True))
+            .order_by(User.id.asc())
+        )
+        masters = list(result.scalars().all())
+        summaries = await self.master_money_many(session, [(master.id, date_range) for master in masters])
+        return list(zip(masters, summaries))
+
+    async def _rollup_master_money(
+        self, session: AsyncSession, rows: list[tuple[int, RangeSplit]]
+    ) -> list[tuple[Any, ...]]:
+        wanted = self._days_cte([(index, user_id, split) for index, (user_id, split) in enumerate(rows)])
+        rollup = FinanceDailyRollup
+        as_executor = and_(rollup.role == RollupRole.EXECUTOR, rollup.user_id == wanted.c.user_id)
+        as_admin = and_(rollup.role == RollupRole.ADMIN, rollup.user_id == wanted.c.user_id)
+        project = and_(rollup.role == RollupRole.PROJECT, rollup.user_id == PROJECT_USER_ID)
+        totals = (
+            select(
+                wanted.c.idx,
+                func.sum(rollup.earned).filter(as_executor).label("earned_executor"),
+                func.sum(rollup.earned).filter(as_admin).label("earned_admin"),
+                func.sum(rollup.transfer_confirmed + rollup.transfer_pending).filter(as_executor).label("net_profit"),
+                func.sum(rollup.transfer_confirmed).filter(as_executor).label("confirmed"),
+                func.sum(rollup.net_profit).filter(project).label("total_net"),
+            )
+            .select_from(wanted)
+            .join(
+                rollup,
+                and_(
+                    rollup.day >= wanted.c.first_day,
+                    rollup.day <= wanted.c.last_day,
+                    or_(
+                        and_(
+                            rollup.user_id == wanted.c.user_id,
+                            rollup.role.in_([RollupRole.EXECUTOR, RollupRole.ADMIN]),
+                        ),
+                        project,
+                    ),
                 ),
-                0,
-            ),
-        ).where(Ticket.status == TicketStatus.CLOSED, Ticket.assigned_executor_id == master_id)
-        base = self._apply_range(base, Ticket.closed_at, date_range)
-        result = await session.execute(base)
-        earned_executor, net_profit, confirmed = result.one()
-        admin_query = select(func.coalesce(func.sum(Ticket.admin_earned_amount), 0)).where(
-            Ticket.status == TicketStatus.CLOSED,
-            Ticket.created_by_admin_id == master_id,
+            )
+            .group_by(wanted.c.idx)
+            .cte("totals")
         )
-        admin_query = self._apply_range(admin_query, Ticket.closed_at, date_range)
-        admin_result = await session.execute(admin_query)
-        earned_admin = admin_result.scalar() or 0
-        share_percent_query = select(ProjectShare.percent).where(
-            ProjectShare.user_id == master_id,
-            ProjectShare.is_active.is_(True),
+        share_percent = (
+            select(ProjectShare.percent)
+            .where(ProjectShare.user_id == wanted.c.user_id, ProjectShare.is_active.is_(True))
+            .limit(1)
+            .scalar_subquery()
+        )
+        query = (
+            select(
+                wanted.c.idx,
+                share_percent,
+                *(func.coalesce(totals.c[name], 0) for name in _MASTER_AMOUNTS),
+            )
+            .select_from(wanted)
+            .outerjoin(totals, totals.c.idx == wanted.c.idx)
+            .order_by(wanted.c.idx)
         )
-        share_percent_result = await session.execute(share_percent_query)
-        share_percent = share_percent_result.scalar_one_or_none()
+        result = await session.execute(query)
+        return [tuple(row[1:]) for row in result.all()]
 
-        cash_base_query = select(func.coalesce(func.sum(Ticket.net_profit), 0)).where(
-            Ticket.status == TicketStatus.CLOSED
+    async def _raw_master_money(
+        self, session: AsyncSession, rows: list[tuple[int, DateRange]]
+    ) -> list[tuple[Any, ...]]:
+        """The master_money amounts straight from tickets, one CTE query for all (user, period) rows."""
+        wanted = self._requests_cte([(index, user_id, date_range) for index, (user_id, date_range) in enumerate(rows)])
+        # A user's own tickets: executed ones (earned, to transfer, confirmed) and created ones (admin earnings).
+        to_transfer = func.coalesce(Ticket.net_profit, 0) - func.coalesce(Ticket.executor_earned_amount, 0)
+        executed = Ticket.assigned_executor_id == wanted.c.user_id
+        confirmed = and_(executed, Ticket.transfer_status == TransferStatus.CONFIRMED)
+        own = (
+            select(
+                wanted.c.idx,
+                func.sum(Ticket.executor_earned_amount).filter(executed).label("earned_executor"),
+                func.sum(Ticket.admin_earned_amount)
+                .filter(Ticket.created_by_admin_id == wanted.c.user_id)
+                .label("earned_admin"),
+                func.sum(to_transfer).filter(executed).label("net_profit"),
+                func.sum(to_transfer).filter(confirmed).label("confirmed"),
+            )
+            .select_from(wanted)
+            .join(
+                Ticket,
+                and_(
+                    or_(executed, Ticket.created_by_admin_id == wanted.c.user_id),
+                    *self._closed_in(wanted),
+                ),
+            )
+            .group_by(wanted.c.idx)
+            .cte("own")
+        )
+        # The cash base a share percent applies to depends only on the period, so it is summed once per period.
+        periods = select(wanted.c.start_at, wanted.c.end_at).distinct().cte("periods")
+        cash = (
+            select(periods.c.start_at, periods.c.end_at, func.sum(Ticket.net_profit).label("total_net"))
+            .select_from(periods)
+            .join(Ticket, and_(*self._closed_in(periods)))
+            .group_by(periods.c.start_at, periods.c.end_at)
+            .cte("cash")
+        )
+        query = (
+            select(
+                wanted.c.idx,
+                *(func.coalesce(own.c[name], 0) for name in _MASTER_AMOUNTS[:-1]),
+                func.coalesce(cash.c.total_net, 0),
+            )
+            .select_from(wanted)
+            .outerjoin(own, own.c.idx == wanted.c.idx)
+            .outerjoin(cash, and_(cash.c.start_at == wanted.c.start_at, cash.c.end_at == wanted.c.end_at))
+            .order_by(wanted.c.idx)
         )
-        cash_base_query = self._apply_range(cash_base_query, Ticket.closed_at, date_range)
-        cash_base_result = await session.execute(cash_base_query)
-        total_net_cash = Decimal(cash_base_result.scalar() or 0)
+        result = await session.execute(query)
+        return [tuple(row[1:]) for row in result.all()]
+
+    def _master_money_result(
+        self,
+        share_percent: Decimal | None,
+        earned_executor: Decimal,
+        earned_admin: Decimal,
+        net_profit: Decimal,
+        confirmed: Decimal,
+        total_net_cash: Decimal,
+    ) -> dict[str, Decimal]:
         cash_share_amount = Decimal("0.00")
         if share_percent:
             cash_share_amount = self.round_money(
-                total_net_cash * Decimal(share_percent) / Decimal("100")
+                Decimal(total_net_cash or 0) * Decimal(share_percent) / Decimal("100")
             )
 
         earned = Decimal(earned_executor or 0) + Decimal(earned_admin or 0) + cash_share_amount
-        pending = Decimal(net_profit) - Decimal(confirmed)
+        pending = Decimal(net_profit or 0) - Decimal(confirmed or 0)
         return {
             "earned": earned,
             "net_profit": Decimal(net_profit or 0),
@@ -96,13 +293,7 @@ class FinanceService:
         *,
         date_range: DateRange,
     ) -> Decimal:
-        query = select(func.coalesce(func.sum(Ticket.admin_earned_amount), 0)).where(
-            Ticket.status == TicketStatus.CLOSED,
-            Ticket.created_by_admin_id == admin_id,
-        )
-        query = self._apply_range(query, Ticket.closed_at, date_range)
-        result = await session.execute(query)
-        return Decimal(result.scalar() or 0)
+        return await self._salary(session, admin_id, RollupRole.ADMIN, date_range=date_range)
 
     async def junior_salary(
         self,
@@ -111,13 +302,38 @@ class FinanceService:
         *,
         date_range: DateRange,
     ) -> Decimal:
-        query = select(func.coalesce(func.sum(Ticket.junior_master_earned_amount), 0)).where(
-            Ticket.status == TicketStatus.CLOSED,
-            Ticket.junior_master_id == junior_id,
+        return await self._salary(session, junior_id, RollupRole.JUNIOR_MASTER, date_range=date_range)
+
+    async def _salary(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        role: RollupRole,
+        *,
+        date_range: DateRange,
+    ) -> Decimal:
+        split = split_range(date_range)
+        rollup = FinanceDailyRollup
+        total = Decimal(
+            await session.scalar(
+                select(func.coalesce(func.sum(rollup.earned), 0)).where(
+                    rollup.user_id == user_id,
+                    rollup.role == role,
+                    rollup.day >= split.first_day,
+                    rollup.day <= split.last_day,
+                )
+            )
+            or 0
         )
-        query = self._apply_range(query, Ticket.closed_at, date_range)
-        result = await session.execute(query)
-        return Decimal(result.scalar() or 0)
+        earned_column, user_column = _SALARY_COLUMNS[role]
+        for edge in split.edges:
+            query = select(func.coalesce(func.sum(earned_column), 0)).where(
+                Ticket.status == TicketStatus.CLOSED,
+                user_column == user_id,
+            )
+            query = self._apply_range(query, Ticket.closed_at, edge)
+            total += Decimal(await session.scalar(query) or 0)
+        return total
 
     async def project_summary(
         self,
@@ -125,40 +341,139 @@ class FinanceService:
         *,
         date_range: DateRange,
     ) -> dict[str, Decimal | int]:
-        tickets_query = select(
-            func.coalesce(func.sum(Ticket.net_profit), 0),
-            func.coalesce(
-                func.sum(
-                    case(
-                        (Ticket.transfer_status == TransferStatus.CONFIRMED, Ticket.net_profit),
-                        else_=0,
-                    )
+        return (await self.project_summaries(session, [date_range]))[0]
+
+    async def project_summaries(
+        self,
+        session: AsyncSession,
+        date_ranges: Sequence[DateRange],
+    ) -> list[dict[str, Decimal | int]]:
+        """project_summary for several periods, in the order given: rollup for whole days, raw rows for edges."""
+        if not date_ranges:
+            return []
+        splits = [split_range(date_range) for date_range in date_ranges]
+        totals = await self._rollup_project_summaries(session, splits)
+        edges = [(index, edge) for index, split in enumerate(splits) for edge in split.edges]
+        if edges:
+            raw = await self._raw_project_summaries(session, [edge for _index, edge in edges])
+            for (index, _edge), figures in zip(edges, raw):
+                totals[index] = _add(totals[index], figures)
+        return [self._project_summary_result(*row) for row in totals]
+
+    async def _rollup_project_summaries(
+        self, session: AsyncSession, splits: list[RangeSplit]
+    ) -> list[tuple[Any, ...]]:
+        wanted = self._days_cte([(index, None, split) for index, split in enumerate(splits)])
+        rollup = FinanceDailyRollup
+        project = rollup.role == RollupRole.PROJECT
+
+        def project_sum(value):
+            return func.sum(value).filter(project)
+
+        totals = (
+            select(
+                wanted.c.idx,
+                project_sum(rollup.net_profit).label("net_profit"),
+                project_sum(rollup.transfer_confirmed).label("net_profit_received"),
+                func.sum(rollup.earned).filter(rollup.role == RollupRole.EXECUTOR).label("earned_executor"),
+                func.sum(rollup.earned).filter(rollup.role == RollupRole.ADMIN).label("earned_admin"),
+                func.sum(rollup.earned).filter(rollup.role == RollupRole.JUNIOR_MASTER).label("earned_junior"),
+                project_sum(rollup.earned).label("project_take"),
+                project_sum(rollup.ticket_count).label("closed_count"),
+                project_sum(rollup.confirmed_count).label("confirmed_count"),
+                project_sum(rollup.repeat_count).label("repeats_count"),
+                project_sum(rollup.manual_income).label("income"),
+                project_sum(rollup.manual_expense).label("expense"),
+            )
+            .select_from(wanted)
+            .join(rollup, and_(rollup.day >= wanted.c.first_day, rollup.day <= wanted.c.last_day))
+            .group_by(wanted.c.idx)
+            .cte("totals")
+        )
+        query = (
+            select(wanted.c.idx, *(func.coalesce(column, 0) for column in list(totals.c)[1:]))
+            .select_from(wanted)
+            .outerjoin(totals, totals.c.idx == wanted.c.idx)
+            .order_by(wanted.c.idx)
+        )
+        result = await session.execute(query)
+        return [tuple(row[1:]) for row in result.all()]
+
+    async def _raw_project_summaries(
+        self, session: AsyncSession, date_ranges: list[DateRange]
+    ) -> list[tuple[Any, ...]]:
+        wanted = self._requests_cte([(index, None, date_range) for index, date_range in enumerate(date_ranges)])
+        confirmed = Ticket.transfer_status == TransferStatus.CONFIRMED
+        closed = (
+            select(
+                wanted.c.idx,
+                func.sum(Ticket.net_profit).label("net_profit"),
+                func.sum(Ticket.net_profit).filter(confirmed).label("net_profit_received"),
+                func.sum(Ticket.executor_earned_amount).label("earned_executor"),
+                func.sum(Ticket.admin_earned_amount).label("earned_admin"),
+                func.sum(Ticket.junior_master_earned_amount).label("earned_junior"),
+                func.sum(Ticket.project_take_amount).label("project_take"),
+                func.count(Ticket.id).label("closed_count"),
+                func.count(Ticket.id).filter(confirmed).label("confirmed_count"),
+                func.count(Ticket.id).filter(Ticket.is_repeat.is_(True)).label("repeats_count"),
+            )
+            .select_from(wanted)
+            .join(Ticket, and_(*self._closed_in(wanted)))
+            .group_by(wanted.c.idx)
+            .cte("closed")
+        )
+        manual = (
+            select(
+                wanted.c.idx,
+                func.sum(ProjectTransaction.amount)
+                .filter(ProjectTransaction.type == ProjectTransactionType.INCOME)
+                .label("income"),
+                func.sum(ProjectTransaction.amount)
+                .filter(ProjectTransaction.type == ProjectTransactionType.EXPENSE)
+                .label("expense"),
+            )
+            .select_from(wanted)
+            .join(
+                ProjectTransaction,
+                and_(
+                    ProjectTransaction.occurred_at >= wanted.c.start_at,
+                    ProjectTransaction.occurred_at <= wanted.c.end_at,
                 ),
-                0,
-            ),
-            func.coalesce(func.sum(Ticket.executor_earned_amount), 0),
-            func.coalesce(func.sum(Ticket.admin_earned_amount), 0),
-            func.coalesce(func.sum(Ticket.junior_master_earned_amount), 0),
-            func.coalesce(func.sum(Ticket.project_take_amount), 0),
-            func.count(Ticket.id),
-            func.coalesce(
-                func.sum(case((Ticket.transfer_status == TransferStatus.CONFIRMED, 1), else_=0)),
-                0,
-            ),
-            func.coalesce(func.sum(case((Ticket.is_repeat.is_(True), 1), else_=0)), 0),
-        ).where(Ticket.status == TicketStatus.CLOSED)
-        tickets_query = self._apply_range(tickets_query, Ticket.closed_at, date_range)
-        tickets_row = (await session.execute(tickets_query)).one()
-
-        income_sum = await self._transaction_sum(
-            session, ProjectTransactionType.INCOME, date_range=date_range
+            )
+            .group_by(wanted.c.idx)
+            .cte("manual")
         )
-        expense_sum = await self._transaction_sum(
-            session, ProjectTransactionType.EXPENSE, date_range=date_range
+        query = (
+            select(
+                wanted.c.idx,
+                *(func.coalesce(column, 0) for column in list(closed.c)[1:]),
+                func.coalesce(manual.c.income, 0),
+                func.coalesce(manual.c.expense, 0),
+            )
+            .select_from(wanted)
+            .outerjoin(closed, closed.c.idx == wanted.c.idx)
+            .outerjoin(manual, manual.c.idx == wanted.c.idx)
+            .order_by(wanted.c.idx)
         )
+        result = await session.execute(query)
+        return [tuple(row[1:]) for row in result.all()]
 
-        tickets_net_profit_should = Decimal(tickets_row[0] or 0)
-        tickets_net_profit_received = Decimal(tickets_row[1] or 0)
+    @staticmethod
+    def _project_summary_result(
+        net_profit: Decimal,
+        net_profit_received: Decimal,
+        earned_executor: Decimal,
+        earned_admin: Decimal,
+        earned_junior: Decimal,
+        project_take: Decimal,
+        closed_count: int,
+        confirmed_count: int,
+        repeats_count: int,
+        income_sum: Decimal,
+        expense_sum: Decimal,
+    ) -> dict[str, Decimal | int]:
+        tickets_net_profit_should = Decimal(net_profit or 0)
+        tickets_net_profit_received = Decimal(net_profit_received or 0)
         manual_income_sum = Decimal(income_sum or 0)
         manual_expense_sum = Decimal(expense_sum or 0)
 
@@ -172,48 +487,109 @@ class FinanceService:
             "manual_expense_sum": manual_expense_sum,
             "project_net_cash_should": project_net_cash_should,
             "project_net_cash_received": project_net_cash_received,
-            "earned_executor": Decimal(tickets_row[2] or 0),
-            "earned_admin": Decimal(tickets_row[3] or 0),
-            "earned_junior": Decimal(tickets_row[4] or 0),
-            "project_take_sum": Decimal(tickets_row[5] or 0),
-            "closed_count": int(tickets_row[6] or 0),
-            "confirmed_count": int(tickets_row[7] or 0),
-            "repeats_count": int(tickets_row[8] or 0),
+            "earned_executor": Decimal(earned_executor or 0),
+            "earned_admin": Decimal(earned_admin or 0),
+            "earned_junior": Decimal(earned_junior or 0),
+            "project_take_sum": Decimal(project_take or 0),
+            "closed_count": int(closed_count or 0),
+            "confirmed_count": int(confirmed_count or 0),
+            "repeats_count": int(repeats_count or 0),
         }
 
-    async def list_tickets_for_export(
+    async def stream_tickets_for_export(
         self,
         session: AsyncSession,
         *,
         date_range: DateRange,
-    ) -> list[Ticket]:
+        batch_size: int,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Closed tickets of the period as plain rows, fetched from a server-side cursor ``batch_size`` at a time.
+
+        User names are joined in, so nothing is loaded per ticket and memory does not grow with the period.
+        """
+        created_by = aliased(User, name="created_by")
+        executor = aliased(User, name="executor")
+        junior = aliased(User, name="junior")
+        confirmer = aliased(User, name="confirmer")
         query = (
-            select(Ticket)
-            .options(
-                selectinload(Ticket.assigned_executor),
-                selectinload(Ticket.junior_master),
-                selectinload(Ticket.created_by),
+            select(
+                *(getattr(Ticket, name) for name in EXPORT_TICKET_COLUMNS),
+                created_by.display_name.label("created_by_name"),
+                executor.display_name.label("executor_name"),
+                junior.display_name.label("junior_name"),
+                confirmer.display_name.label("confirmed_by_name"),
             )
+            .outerjoin(created_by, created_by.id == Ticket.created_by_admin_id)
+            .outerjoin(executor, executor.id == Ticket.assigned_executor_id)
+            .outerjoin(junior, junior.id == Ticket.junior_master_id)
+            .outerjoin(confirmer, confirmer.id == Ticket.transfer_confirmed_by)
             .where(Ticket.status == TicketStatus.CLOSED)
             .order_by(Ticket.id.asc())
+            .execution_options(yield_per=batch_size)
         )
         query = self._apply_range(query, Ticket.closed_at, date_range)
-        result = await session.execute(query)
-        return list(result.scalars().all())
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            yield rows
 
-    async def list_manual_transactions(
+    async def stream_manual_transactions(
         self,
         session: AsyncSession,
         *,
         date_range: DateRange,
-    ) -> list[ProjectTransaction]:
-        query = select(ProjectTransaction).options(selectinload(ProjectTransaction.creator)).order_by(
-            ProjectTransaction.id.asc()
+        batch_size: int,
+    ) -> AsyncIterator[Sequence[Row]]:
+        query = (
+            select(
+                ProjectTransaction.id,
+                ProjectTransaction.type,
+                ProjectTransaction.amount,
+                ProjectTransaction.category,
+                ProjectTransaction.comment,
+                ProjectTransaction.occurred_at,
+                ProjectTransaction.created_at,
+                ProjectTransaction.created_by,
+                User.display_name.label("creator_name"),
+            )
+            .outerjoin(User, User.id == ProjectTransaction.created_by)
+            .order_by(ProjectTransaction.id.asc())
+            .execution_options(yield_per=batch_size)
         )
         query = self._apply_range(query, ProjectTransaction.occurred_at, date_range)
-        result = await session.execute(query)
-        return list(result.scalars().all())
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            yield rows
 
+    async def stream_payout_groups(
+        self,
+        session: AsyncSession,
+        *,
+        date_range: DateRange,
+        batch_size: int,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Closed tickets reduced to what their payouts depend on, with identical tickets counted once.
+
+        Rows are (net_profit, executor, executor %, admin, admin %, junior, junior %, ticket_count).
+        """
+        payout_columns = (
+            Ticket.net_profit,
+            Ticket.assigned_executor_id,
+            Ticket.executor_percent_at_close,
+            Ticket.created_by_admin_id,
+            Ticket.admin_percent_at_close,
+            Ticket.junior_master_id,
+            Ticket.junior_master_percent_at_close,
+        )
+        query = (
+            select(*payout_columns, func.count().label("ticket_count"))
+            .where(Ticket.status == TicketStatus.CLOSED)
+            .group_by(*payout_columns)
+            .execution_options(yield_per=batch_size)
+        )
+        query = self._apply_range(query, Ticket.closed_at, date_range)
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            yield rows
 
     async def list_ticket_money_operations(
         self,
@@ -242,23 +618,50 @@ class FinanceService:
     def round_money(self, value: Decimal) -> Decimal:
         return value.quantize(self._money_round, rounding=ROUND_HALF_UP)
 
-    async def _transaction_sum(
-        self,
-        session: AsyncSession,
-        transaction_type: ProjectTransactionType,
-        *,
-        date_range: DateRange,
-    ) -> Decimal:
-        query = select(func.coalesce(func.sum(ProjectTransaction.amount), 0)).where(
-            ProjectTransaction.type == transaction_type
-        )
-        query = self._apply_range(query, ProjectTransaction.occurred_at, date_range)
-        result = await session.execute(query)
-        return Decimal(result.scalar() or 0)
-
     def _apply_range(self, query, column, date_range: DateRange):
         if date_range.start:
             query = query.where(column >= date_range.start)
         if date_range.end:
             query = query.where(column <= date_range.end)
         return query
+
+    def _requests_cte(self, rows: list[tuple[int, int | None, DateRange]]):
+        # Open range ends become far-away bounds so every report joins tickets on a plain closed_at range.
+        requests = values(
+            column("idx", Integer),
+            column("user_id", BigInteger),
+            column("start_at", DateTime),
+            column("end_at", DateTime),
+            name="requests",
+        ).data(
+            [
+                (index, user_id, date_range.start or RANGE_MIN, date_range.end or RANGE_MAX)
+                for index, user_id, date_range in rows
+            ]
+        )
+        return select(requests).cte("wanted")
+
+    def _days_cte(self, rows: list[tuple[int, int | None, RangeSplit]]):
+        days = values(
+            column("idx", Integer),
+            column("user_id", BigInteger),
+            column("first_day", Date),
+            column("last_day", Date),
+            name="days",
+        ).data([(index, user_id, split.first_day, split.last_day) for index, user_id, split in rows])
+        return select(days).cte("wanted")
+
+    @staticmethod
+    def _closed_in(period) -> list:
+        return [
+            Ticket.status == TicketStatus.CLOSED,
+            Ticket.closed_at >= period.c.start_at,
+            Ticket.closed_at <= period.c.end_at,
+        ]
+
+
+_MASTER_AMOUNTS = ("earned_executor", "earned_admin", "net_profit", "confirmed", "total_net")
+
+
+def _add(left: Sequence[Any], right: Sequence[Any]) -> tuple[Any, ...]:
+    return tuple(a + b for a, b in zip(left, right))
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.enums import TicketStatus, TransferStatus
 from app.db.models import Ticket, User
+from app.services.ticket_rows import TicketListRow, TransferRow, select_rows, to_rows
 
 
 class IssueService:
@@ -17,10 +18,10 @@ class IssueService:
         *,
         days: int,
         limit: int = 10,
-    ) -> list[Ticket]:
+    ) -> list[TransferRow]:
         cutoff = datetime.utcnow() - timedelta(days=days)
         result = await session.execute(
-            select(Ticket)
+            select_rows(TransferRow)
             .where(
                 Ticket.status == TicketStatus.CLOSED,
                 Ticket.transfer_status != TransferStatus.CONFIRMED,
@@ -30,21 +31,23 @@ class IssueService:
             .order_by(Ticket.closed_at.asc())
             .limit(limit)
         )
-        return list(result.scalars().all())
+        return to_rows(TransferRow, result)
 
-    async def list_zero_profit(self, session: AsyncSession, *, limit: int = 10) -> list[Ticket]:
+    async def list_zero_profit(self, session: AsyncSession, *, limit: int = 10) -> list[TicketListRow]:
         result = await session.execute(
-            select(Ticket)
+            select_rows(TicketListRow)
             .where(Ticket.status == TicketStatus.CLOSED, Ticket.net_profit == 0)
             .order_by(Ticket.id.desc())
             .limit(limit)
         )
-        return list(result.scalars().all())
+        return to_rows(TicketListRow, result)
 
     async def list_repeat_phones(self, session: AsyncSession, *, limit: int = 5) -> list[tuple[str, int]]:
+        # Grouping by the stored digits treats "+7 999..." and "7999..." as one client and walks the digits index.
         result = await session.execute(
-            select(Ticket.client_phone, func.count(Ticket.id))
-            .group_by(Ticket.client_phone)
+            select(func.max(Ticket.client_phone), func.count(Ticket.id))
+            .where(Ticket.client_phone_digits.is_not(None), Ticket.client_phone_digits != "")
+            .group_by(Ticket.client_phone_digits)
             .having(func.count(Ticket.id) > 1)
             .order_by(func.count(Ticket.id).desc())
             .limit(limit)
@@ -4,7 +4,6 @@ from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from aiogram import Bot
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -14,6 +13,7 @@ from app.core.config import get_settings
 from app.db.enums import AdSource, LeadAdSource, LeadStatus
 from app.db.models import Lead
 from app.services.audit_service import AuditService
+from app.services.outbox_service import OutboxService
 from app.services.project_settings_service import ProjectSettingsService
 from app.services.ticket_service import TicketService
 
@@ -21,6 +21,7 @@ from app.services.ticket_service import TicketService
 class LeadService:
     def __init__(self) -> None:
         self._audit = AuditService()
+        self._outbox = OutboxService()
         self._ticket_service = TicketService()
         self._project_settings_service = ProjectSettingsService()
 
@@ -144,19 +145,20 @@ class LeadService:
 
     async def _publish_to_requests_chat(self, session: AsyncSession, lead: Lead) -> None:
         settings = get_settings()
-        async with Bot(settings.bot_token) as bot:
-            requests_chat_id = await self._project_settings_service.get_requests_chat_id(
-                session, settings.requests_chat_id
-            )
-            repeat_count = 0
-            if lead.client_phone:
-                repeats = await self._ticket_service.search_by_phone(session, lead.client_phone)
-                repeat_count = len(repeats)
-            await bot.send_message(
-                requests_chat_id,
-                format_lead_card(lead, repeat_count=repeat_count),
-                reply_markup=lead_request_keyboard(lead.id),
-            )
+        requests_chat_id = await self._project_settings_service.get_requests_chat_id(
+            session, settings.requests_chat_id
+        )
+        repeat_count = 0
+        if lead.client_phone:
+            repeats = await self._ticket_service.search_by_phone(session, lead.client_phone)
+            repeat_count = len(repeats)
+        await self._outbox.enqueue_message(
+            session,
+            kind="lead_card",
+            chat_id=requests_chat_id,
+            text=format_lead_card(lead, repeat_count=repeat_count),
+            reply_markup=lead_request_keyboard(lead.id),
+        )
 
     def _parse_ad_source(self, value: Any) -> LeadAdSource:
         if isinstance(value, LeadAdSource):
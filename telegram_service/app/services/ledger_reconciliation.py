@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Sequence
+
+from sqlalchemy import Row, and_, case, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import Settings, get_settings
+from app.core.logging import configure_logging
+from app.db.enums import ProjectTransactionType, TicketStatus
+from app.db.models import JobCheckpoint, Ticket, TicketMoneyOperation
+from app.db.session import async_session_factory, engine
+from app.services.outbox_dispatcher import TELEGRAM_MESSAGE_LIMIT
+from app.services.outbox_service import OutboxService
+
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "ledger_reconciliation"
+OUTBOX_KIND_LEDGER = "ledger_reconciliation"
+START_POSITION = (datetime(1970, 1, 1), 0)
+# Tickets changed this recently are left for the next run: updated_at is stamped before commit, so an
+# open transaction may still commit a change older than the newest one visible now.
+SETTLE_SECONDS = 300
+# Discrepancies per events chat message, and messages per run; the rest only go to the log.
+REPORT_LINES = 30
+REPORT_MESSAGES = 5
+REPORT_HEADER = "⚠️ Сверка журнала денег: расхождения"
+
+
+def _operation_sum(op_type: ProjectTransactionType):
+    amount = case((TicketMoneyOperation.op_type == op_type, TicketMoneyOperation.amount), else_=0)
+    return func.coalesce(func.sum(amount), 0)
+
+
+def _report_chunks(found: Sequence[LedgerDiscrepancy]) -> list[list[str]]:
+    """Split discrepancy lines into messages of at most REPORT_LINES lines that fit one Telegram message."""
+    chunks: list[list[str]] = []
+    lines: list[str] = []
+    length = len(REPORT_HEADER)
+    for item in found:
+        line = item.describe()
+        if lines and (len(lines) >= REPORT_LINES or length + 1 + len(line) > TELEGRAM_MESSAGE_LIMIT):
+            chunks.append(lines)
+            lines, length = [], len(REPORT_HEADER)
+        lines.append(line)
+        length += 1 + len(line)
+    if lines:
+        chunks.append(lines)
+    return chunks
+
+
+@dataclass(frozen=True)
+class LedgerDiscrepancy:
+    ticket_id: int
+    public_id: str
+    check: str
+    expected: Decimal
+    actual: Decimal
+
+    def describe(self) -> str:
+        labels = {
+            "revenue": ("выручка", "по операциям"),
+            "expense": ("расходы", "по операциям"),
+            "payouts": ("прибыль", "выплаты и остаток"),
+        }
+        expected_label, actual_label = labels[self.check]
+        return (
+            f"#{self.public_id} (id {self.ticket_id}): "
+            f"{expected_label} {self.expected}, {actual_label} {self.actual}"
+        )
+
+
+@dataclass(slots=True)
+class ReconciliationResult:
+    checked: int = 0
+    discrepancies: list[LedgerDiscrepancy] = field(default_factory=list)
+    position: tuple[datetime, int] = START_POSITION
+
+
+class LedgerReconciliationService:
+    """Checks the money ledger of tickets changed since the last run.
+
+    For every ticket the INCOME/EXPENSE operations in ticket_money_operations must add up to its revenue and
+    expense, and a closed ticket's payouts plus project take must add up to its net profit. The operation sums
+    are grouped in the database and tickets are read from a server-side cursor in (updated_at, id) order; the
+    position is saved together with the report of what was found before it, so an interrupted run resumes
+    without losing or repeating reports.
+    """
+
+    def __init__(
+        self,
+        *,
+        settings: Settings | None = None,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_factory,
+    ) -> None:
+        self._settings = settings or get_settings()
+        self._session_factory = session_factory
+        self._outbox = OutboxService()
+
+    async def run(self, *, full: bool = False) -> ReconciliationResult:
+        start = START_POSITION if full else await self._load_position()
+        upper = datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS)
+        result = ReconciliationResult(position=start)
+        pending: list[LedgerDiscrepancy] = []
+        messages = 0
+        reported = 0
+        async with self._session_factory() as session:
+            rows = await session.stream(
+                self._query(start, upper).execution_options(yield_per=self._settings.ledger_reconciliation_batch_size)
+            )
+            async for batch in rows.partitions():
+                found = self._discrepancies(batch)
+                result.checked += len(batch)
+                result.discrepancies.extend(found)
+                result.position = (batch[-1].updated_at, batch[-1].id)
+                pending.extend(found)
+                if len(pending) >= REPORT_LINES or not pending:
+                    queued, lines = await self._save(result.position, pending, room=REPORT_MESSAGES - messages)
+                    messages += queued
+                    reported += lines
+                    pending = []
+        _, lines = await self._save(result.position, pending, room=REPORT_MESSAGES - messages)
+        reported += lines
+        logger.info(
+            "[ledger] checked %s tickets, %s discrepancies (%s not sent to chat), position %s/%s",
+            result.checked,
+            len(result.discrepancies),
+            len(result.discrepancies) - reported,
+            result.position[0].isoformat(),
+            result.position[1],
+        )
+        return result
+
+    def _query(self, start: tuple[datetime, int], upper: datetime):
+        in_scope = and_(
+            tuple_(Ticket.updated_at, Ticket.id) > tuple_(*start),
+            Ticket.updated_at <= upper,
+        )
+        ledger = (
+            select(
+                TicketMoneyOperation.ticket_id,
+                _operation_sum(ProjectTransactionType.INCOME).label("income"),
+                _operation_sum(ProjectTransactionType.EXPENSE).label("expense"),
+            )
+            .where(TicketMoneyOperation.ticket_id.in_(select(Ticket.id).where(in_scope)))
+            .group_by(TicketMoneyOperation.ticket_id)
+            .subquery("ledger")
+        )
+        payouts = (
+            func.coalesce(Ticket.executor_earned_amount, 0)
+            + func.coalesce(Ticket.admin_earned_amount, 0)
+            + func.coalesce(Ticket.junior_master_earned_amount, 0)
+            + Ticket.project_take_amount
+        )
+        closed = and_(Ticket.status == TicketStatus.CLOSED, Ticket.project_take_amount.is_not(None))
+        return (
+            select(
+                Ticket.id,
+                Ticket.public_id,
+                Ticket.updated_at,
+                func.coalesce(Ticket.revenue, 0).label("revenue"),
+                func.coalesce(ledger.c.income, 0).label("ledger_revenue"),
+                func.coalesce(Ticket.expense, 0).label("expense"),
+                func.coalesce(ledger.c.expense, 0).label("ledger_expense"),
+                case((closed, func.coalesce(Ticket.net_profit, 0))).label("net_profit"),
+                case((closed, payouts)).label("payouts"),
+            )
+            .outerjoin(ledger, ledger.c.ticket_id == Ticket.id)
+            .where(in_scope)
+            .order_by(Ticket.updated_at.asc(), Ticket.id.asc())
+        )
+
+    @staticmethod
+    def _discrepancies(rows: Sequence[Row]) -> list[LedgerDiscrepancy]:
+        found = []
+        for row in rows:
+            checks: list[tuple[str, Any, Any]] = [
+                ("revenue", row.revenue, row.ledger_revenue),
+                ("expense", row.expense, row.ledger_expense),
+            ]
+            if row.payouts is not None:
+                checks.append(("payouts", row.net_profit, row.payouts))
+            for check, expected, actual in checks:
+                if Decimal(expected) != Decimal(actual):
+                    discrepancy = LedgerDiscrepancy(row.id, row.public_id, check, Decimal(expected), Decimal(actual))
+                    logger.warning("[ledger] %s: %s", check, discrepancy.describe())
+                    found.append(discrepancy)
+        return found
+
+    async def _load_position(self) -> tuple[datetime, int]:
+        async with self._session_factory() as session:
+            checkpoint = await session.get(JobCheckpoint, CHECKPOINT_NAME)
+        if checkpoint is None:
+            return START_POSITION
+        return checkpoint.position_at, checkpoint.position_id
+
+    async def _save(
+        self, position: tuple[datetime, int], found: list[LedgerDiscrepancy], *, room: int
+    ) -> tuple[int, int]:
+        """Store the position and queue the report for everything found before it in one transaction.
+
+        At most ``room`` messages are queued; returns how many were and how many discrepancies they hold.
+        """
+        now = datetime.utcnow()
+        statement = insert(JobCheckpoint).values(
+            name=CHECKPOINT_NAME, position_at=position[0], position_id=position[1], updated_at=now
+        )
+        chunks = _report_chunks(found)[: max(0, room)]
+        async with self._session_factory() as session:
+            await session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[JobCheckpoint.name],
+                    set_={
+                        "position_at": statement.excluded.position_at,
+                        "position_id": statement.excluded.position_id,
+                        "updated_at": statement.excluded.updated_at,
+                    },
+                )
+            )
+            for lines in chunks:
+                await self._outbox.enqueue_message(
+                    session,
+                    kind=OUTBOX_KIND_LEDGER,
+                    chat_id=self._settings.events_chat_id,
+                    text="\n".join([REPORT_HEADER, *lines]),
+                )
+            await session.commit()
+        return len(chunks), sum(len(lines) for lines in chunks)
+
+ledger_reconciliation = LedgerReconciliationService()
+
+
+async def _run(args: argparse.Namespace) -> int:
+    try:
+        result = await ledger_reconciliation.run(full=args.full)
+    finally:
+        await engine.dispose()
+    return 1 if result.discrepancies else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check ticket money operations and payouts against tickets.")
+    parser.add_argument("--full", action="store_true", help="Recheck every ticket instead of resuming.")
+    args = parser.parse_args()
+    configure_logging()
+    raise SystemExit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
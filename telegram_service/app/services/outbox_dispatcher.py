@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Collection
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramUnauthorizedError,
+)
+from aiogram.types import InlineKeyboardMarkup, InputMediaPhoto
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.bot.handlers.utils import format_ticket_events_digest
+from app.bot.send_scheduler import CHAT_BUCKET_BURST, TokenBucket, chat_rate, is_private_chat
+from app.core.config import Settings, get_settings
+from app.db.models import OutboxMessage
+from app.db.session import async_session_factory
+from app.services.outbox_service import (
+    OUTBOX_KIND_TICKET_EVENT,
+    OUTBOX_METHOD_SEND_MEDIA_GROUP,
+    OUTBOX_METHOD_SEND_MESSAGE,
+    OutboxService,
+)
+
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 2.0
+RETRY_MAX_SECONDS = 15 * 60
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Errors that will not go away on retry: bad payload, blocked bot, deleted chat.
+POISON_ERRORS = (TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramUnauthorizedError)
+
+
+class OutboxPoisonMessage(RuntimeError):
+    pass
+
+
+class OutboxDispatcher:
+    """Background sender that drains the outbox table with retries and dead-lettering."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        *,
+        settings: Settings | None = None,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_factory,
+    ) -> None:
+        self._bot = bot
+        self._settings = settings or get_settings()
+        self._session_factory = session_factory
+        self._outbox = OutboxService()
+        self._wakeup = asyncio.Event()
+        self._send_slots = asyncio.Semaphore(max(1, self._settings.outbox_concurrency))
+        self._stopped = False
+        # One delivery loop per chat; its rows are not leased again while it runs.
+        self._chat_tasks: dict[int, asyncio.Task[None]] = {}
+        self._in_flight = 0
+        # A chat gets no more rows than Telegram lets it receive within one lease (private chat, group).
+        lease_seconds = self._settings.outbox_lease_seconds
+        self._chat_limits = (
+            max(1, int(lease_seconds * chat_rate(self._settings, private=True))),
+            max(1, int(lease_seconds * chat_rate(self._settings, private=False))),
+        )
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        logger.info("Outbox dispatcher started")
+        try:
+            while not self._stopped:
+                try:
+                    processed = await self.dispatch_once()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:  # noqa: BLE001 - keep the loop alive on DB hiccups
+                    logger.exception("Outbox dispatch iteration failed")
+                    processed = 0
+                if processed:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._settings.outbox_poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            # After stop() each chat loop finishes its current send and hands the rest back to the outbox.
+            tasks = list(self._chat_tasks.values())
+            if not self._stopped:
+                for task in tasks:
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info("Outbox dispatcher stopped")
+
+    async def dispatch_once(self) -> int:
+        """Lease due rows of chats that have no delivery loop yet and start one loop per chat."""
+        limit = self._settings.outbox_batch_size - self._in_flight
+        if limit <= 0:
+            return 0
+        busy_chats = list(self._chat_tasks)
+        digest_enabled = self._settings.events_digest_enabled
+        async with self._session_factory() as session:
+            batch = await self._outbox.lease_batch(
+                session,
+                limit=limit,
+                lease_seconds=self._settings.outbox_lease_seconds,
+                exclude_kind=OUTBOX_KIND_TICKET_EVENT if digest_enabled else None,
+                exclude_chat_ids=busy_chats,
+                chat_limits=self._chat_limits,
+            )
+            digest_rows = await self._lease_digest(session, exclude_chat_ids=busy_chats) if digest_enabled else []
+            await session.commit()
+        if not batch and not digest_rows:
+            return 0
+
+        # Different chats are sent concurrently; deliveries to one chat keep their order.
+        by_chat: dict[int, list[list[OutboxMessage]]] = {}
+        for message in batch:
+            by_chat.setdefault(message.chat_id, []).append([message])
+        for rows in self._pack_digest(digest_rows):
+            by_chat.setdefault(rows[0].chat_id, []).append(rows)
+        for chat_id, deliveries in by_chat.items():
+            self._start_chat(chat_id, deliveries)
+        return len(batch) + len(digest_rows)
+
+    def _start_chat(self, chat_id: int, deliveries: list[list[OutboxMessage]]) -> None:
+        rows = sum(len(delivery) for delivery in deliveries)
+        self._in_flight += rows
+        task = asyncio.create_task(self._process_chat(chat_id, deliveries))
+        self._chat_tasks[chat_id] = task
+
+        def finished(_task: asyncio.Task[None]) -> None:
+            self._in_flight -= rows
+            self._chat_tasks.pop(chat_id, None)
+            self._wakeup.set()
+
+        task.add_done_callback(finished)
+
+    async def _lease_digest(self, session: AsyncSession, *, exclude_chat_ids: Collection[int]) -> list[OutboxMessage]:
+        """Claim buffered ticket events once the digest is full or its oldest event waited long enough."""
+        count, oldest_created_at = await self._outbox.pending_stats(session, kind=OUTBOX_KIND_TICKET_EVENT)
+        if not count:
+            return []
+        flush_after = timedelta(seconds=self._settings.events_digest_interval)
+        if count < self._settings.events_digest_max_events and oldest_created_at > datetime.utcnow() - flush_after:
+            return []
+        return await self._outbox.lease_batch(
+            session,
+            limit=self._settings.events_digest_max_events,
+            lease_seconds=self._settings.outbox_lease_seconds,
+            kind=OUTBOX_KIND_TICKET_EVENT,
+            exclude_chat_ids=exclude_chat_ids,
+        )
+
+    def _pack_digest(self, rows: list[OutboxMessage]) -> list[list[OutboxMessage]]:
+        """Split buffered events into per-chat groups whose combined text fits one message."""
+        groups: list[list[OutboxMessage]] = []
+        current: dict[int, list[OutboxMessage]] = {}
+        for row in rows:
+            group = current.get(row.chat_id)
+            if group is not None:
+                lines = [item.payload["text"] for item in [*group, row]]
+                if len(format_ticket_events_digest(lines)) <= TELEGRAM_MESSAGE_LIMIT:
+                    group.append(row)
+                    continue
+            group = [row]
+            current[row.chat_id] = group
+            groups.append(group)
+        return groups
+
+    async def _process_chat(self, chat_id: int, deliveries: list[list[OutboxMessage]]) -> None:
+        # Paced here as well as in the bot's SendScheduler, so a send slot is only taken once the chat may
+        # receive: waiting out a group's 3 s interval must not hold a slot private chats need.
+        pace = TokenBucket(chat_rate(self._settings, private=is_private_chat(chat_id)), CHAT_BUCKET_BURST)
+        waiting = {row.id for rows in deliveries for row in rows}
+        lease_lock = asyncio.Lock()
+        heartbeat = asyncio.create_task(self._keep_leased(waiting, lease_lock))
+        blocked_until: datetime | None = None
+        try:
+            for rows in deliveries:
+                async with lease_lock:
+                    waiting.difference_update(row.id for row in rows)
+                if self._stopped:
+                    await self._record_retry(rows, retry_at=datetime.utcnow(), error=None, refund_attempt=True)
+                    continue
+                if blocked_until is not None:
+                    await self._record_retry(rows, retry_at=blocked_until, error=None, refund_attempt=True)
+                    continue
+                try:
+                    await asyncio.sleep(pace.reserve(time.monotonic()))
+                    async with self._send_slots:
+                        blocked_until = await self._process(rows)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:  # noqa: BLE001 - lease expiry will retry the message
+                    logger.exception("[outbox] failed to record result ids=%s", [row.id for row in rows])
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def _keep_leased(self, waiting: set[int], lease_lock: asyncio.Lock) -> None:
+        """Extend the lease of rows still queued behind their chat's rate limit, so no one else sends them.
+
+        Rows leave ``waiting`` under ``lease_lock`` before they are sent, so an extension never lands after
+        the row's own result was recorded.
+        """
+        lease_seconds = self._settings.outbox_lease_seconds
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            async with lease_lock:
+                if not waiting:
+                    return
+                try:
+                    async with self._session_factory() as session:
+                        await self._outbox.extend_lease(session, sorted(waiting), lease_seconds=lease_seconds)
+                        await session.commit()
+                except Exception:  # noqa: BLE001 - try again on the next beat
+                    logger.exception("[outbox] lease extension failed ids=%s", sorted(waiting))
+
+    async def _process(self, rows: list[OutboxMessage]) -> datetime | None:
+        """Send one delivery and return the time until which its chat must not be sent to."""
+        head = rows[0]
+        ids = [row.id for row in rows]
+        attempts = max(row.attempts for row in rows)
+        try:
+            if len(rows) == 1:
+                await self._deliver(head)
+            else:
+                await self._deliver_digest(rows)
+        except TelegramRetryAfter as exc:
+            retry_at = datetime.utcnow() + timedelta(seconds=exc.retry_after)
+            logger.warning(
+                "[outbox] flood control ids=%s chat_id=%s retry_after=%s", ids, head.chat_id, exc.retry_after
+            )
+            await self._record_retry(rows, retry_at=retry_at, error=str(exc), refund_attempt=True)
+            return retry_at
+        except (OutboxPoisonMessage, *POISON_ERRORS) as exc:
+            logger.error("[outbox] dead-lettered ids=%s kind=%s chat_id=%s: %s", ids, head.kind, head.chat_id, exc)
+            await self._record_dead(rows, error=str(exc))
+            return None
+        except Exception as exc:  # noqa: BLE001 - network errors, 5xx, timeouts
+            if attempts >= self._settings.outbox_max_attempts:
+                logger.error("[outbox] giving up ids=%s kind=%s after %s attempts: %s", ids, head.kind, attempts, exc)
+                await self._record_dead(rows, error=str(exc))
+                return None
+            retry_at = datetime.utcnow() + timedelta(seconds=self._backoff_seconds(attempts))
+            logger.warning(
+                "[outbox] send failed ids=%s kind=%s attempt=%s retry_at=%s: %s",
+                ids,
+                head.kind,
+                attempts,
+                retry_at.isoformat(),
+                exc,
+            )
+            await self._record_retry(rows, retry_at=retry_at, error=str(exc))
+            return retry_at
+
+        async with self._session_factory() as session:
+            await self._outbox.mark_sent(session, ids)
+            await session.commit()
+        logger.info("[outbox] sent ids=%s kind=%s chat_id=%s", ids, head.kind, head.chat_id)
+        return None
+
+    async def _deliver_digest(self, rows: list[OutboxMessage]) -> None:
+        text = format_ticket_events_digest([row.payload["text"] for row in rows])
+        await self._bot.send_message(chat_id=rows[0].chat_id, text=text)
+
+    async def _deliver(self, message: OutboxMessage) -> None:
+        payload = message.payload or {}
+        if message.method == OUTBOX_METHOD_SEND_MESSAGE:
+            reply_markup = payload.get("reply_markup")
+            await self._bot.send_message(
+                chat_id=message.chat_id,
+                text=payload["text"],
+                reply_markup=InlineKeyboardMarkup.model_validate(reply_markup) if reply_markup else None,
+            )
+            return
+        if message.method == OUTBOX_METHOD_SEND_MEDIA_GROUP:
+            media = [InputMediaPhoto(media=file_id) for file_id in payload.get("photo_file_ids") or []]
+            if not media:
+                raise OutboxPoisonMessage("media group without photos")
+            media[0].caption = payload.get("caption")
+            await self._bot.send_media_group(chat_id=message.chat_id, media=media)
+            return
+        raise OutboxPoisonMessage(f"unknown outbox method {message.method!r}")
+
+    async def _record_retry(
+        self,
+        rows: list[OutboxMessage],
+        *,
+        retry_at: datetime,
+        error: str | None,
+        refund_attempt: bool = False,
+    ) -> None:
+        async with self._session_factory() as session:
+            await self._outbox.mark_retry(
+                session,
+                [row.id for row in rows],
+                retry_at=retry_at,
+                error=error,
+                refund_attempt=refund_attempt,
+            )
+            await session.commit()
+
+    async def _record_dead(self, rows: list[OutboxMessage], *, error: str) -> None:
+        async with self._session_factory() as session:
+            await self._outbox.mark_dead(session, [row.id for row in rows], error=error)
+            await session.commit()
+
+    def _backoff_seconds(self, attempts: int) -> float:
+        delay = min(RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)), RETRY_MAX_SECONDS)
+        return delay + random.uniform(0, delay / 4)
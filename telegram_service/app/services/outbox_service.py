@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Collection, Sequence
+
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.enums import OutboxStatus
+from app.db.models import OutboxMessage
+
+
+OUTBOX_METHOD_SEND_MESSAGE = "send_message"
+OUTBOX_METHOD_SEND_MEDIA_GROUP = "send_media_group"
+OUTBOX_KIND_TICKET_EVENT = "ticket_event"
+
+
+class OutboxService:
+    """Stores Telegram side-effects in the same transaction as the business change."""
+
+    async def enqueue_message(
+        self,
+        session: AsyncSession,
+        *,
+        kind: str,
+        chat_id: int,
+        text: str,
+        reply_markup: InlineKeyboardMarkup | None = None,
+    ) -> OutboxMessage:
+        payload: dict[str, Any] = {"text": text}
+        if reply_markup is not None:
+            payload["reply_markup"] = reply_markup.model_dump(mode="json", exclude_none=True)
+        return self._add(session, kind=kind, method=OUTBOX_METHOD_SEND_MESSAGE, chat_id=chat_id, payload=payload)
+
+    async def enqueue_media_group(
+        self,
+        session: AsyncSession,
+        *,
+        kind: str,
+        chat_id: int,
+        photo_file_ids: list[str],
+        caption: str | None = None,
+    ) -> OutboxMessage:
+        payload: dict[str, Any] = {"photo_file_ids": list(photo_file_ids), "caption": caption}
+        return self._add(session, kind=kind, method=OUTBOX_METHOD_SEND_MEDIA_GROUP, chat_id=chat_id, payload=payload)
+
+    async def lease_batch(
+        self,
+        session: AsyncSession,
+        *,
+        limit: int,
+        lease_seconds: int,
+        kind: str | None = None,
+        exclude_kind: str | None = None,
+        exclude_chat_ids: Collection[int] = (),
+        chat_limits: tuple[int, int] | None = None,
+    ) -> list[OutboxMessage]:
+        """Claim due messages and push their visibility forward so a crashed sender is retried later.
+
+        ``chat_limits`` is (private chat, group) and caps the rows claimed per chat, oldest first.
+        """
+        now = datetime.utcnow()
+        conditions = [OutboxMessage.status == OutboxStatus.PENDING, OutboxMessage.available_at <= now]
+        if kind is not None:
+            conditions.append(OutboxMessage.kind == kind)
+        if exclude_kind is not None:
+            conditions.append(OutboxMessage.kind != exclude_kind)
+        if exclude_chat_ids:
+            conditions.append(OutboxMessage.chat_id.not_in(list(exclude_chat_ids)))
+        if chat_limits is not None:
+            # Window functions cannot be combined with FOR UPDATE, so the ranking is a separate subquery.
+            ranked = (
+                select(
+                    OutboxMessage.id,
+                    OutboxMessage.chat_id,
+                    func.row_number()
+                    .over(
+                        partition_by=OutboxMessage.chat_id,
+                        order_by=(OutboxMessage.available_at.asc(), OutboxMessage.id.asc()),
+                    )
+                    .label("chat_rank"),
+                )
+                .where(*conditions)
+                .subquery()
+            )
+            private_limit, group_limit = chat_limits
+            chat_limit = case((ranked.c.chat_id > 0, private_limit), else_=group_limit)
+            conditions.append(OutboxMessage.id.in_(select(ranked.c.id).where(ranked.c.chat_rank <= chat_limit)))
+        due_ids = (
+            select(OutboxMessage.id)
+            .where(*conditions)
+            .order_by(OutboxMessage.available_at.asc(), OutboxMessage.id.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await session.scalars(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(due_ids))
+            .values(
+                attempts=OutboxMessage.attempts + 1,
+                available_at=now + timedelta(seconds=lease_seconds),
+            )
+            .returning(OutboxMessage)
+            .execution_options(synchronize_session=False)
+        )
+        return sorted(result.all(), key=lambda item: item.id)
+
+    async def extend_lease(self, session: AsyncSession, message_ids: Sequence[int], *, lease_seconds: int) -> None:
+        """Keep messages that are still waiting for their turn to send from being leased again."""
+        await session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(message_ids), OutboxMessage.status == OutboxStatus.PENDING)
+            .values(available_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+
+    async def pending_stats(self, session: AsyncSession, *, kind: str) -> tuple[int, datetime | None]:
+        """Return how many messages of a kind are due and when the oldest of them was created."""
+        result = await session.execute(
+            select(func.count(OutboxMessage.id), func.min(OutboxMessage.created_at)).where(
+                OutboxMessage.status == OutboxStatus.PENDING,
+                OutboxMessage.kind == kind,
+                OutboxMessage.available_at <= datetime.utcnow(),
+            )
+        )
+        count, oldest = result.one()
+        return int(count or 0), oldest
+
+    async def mark_sent(self, session: AsyncSession, message_ids: Sequence[int]) -> None:
+        now = datetime.utcnow()
+        await session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(message_ids))
+            .values(status=OutboxStatus.SENT, sent_at=now, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def mark_retry(
+        self,
+        session: AsyncSession,
+        message_ids: Sequence[int],
+        *,
+        retry_at: datetime,
+        error: str | None,
+        refund_attempt: bool = False,
+    ) -> None:
+        values: dict[str, Any] = {"available_at": retry_at, "last_error": error}
+        if refund_attempt:
+            values["attempts"] = OutboxMessage.attempts - 1
+        await session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(message_ids))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def mark_dead(self, session: AsyncSession, message_ids: Sequence[int], *, error: str) -> None:
+        await session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(message_ids))
+            .values(status=OutboxStatus.DEAD, last_error=error)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _add(
+        self,
+        session: AsyncSession,
+        *,
+        kind: str,
+        method: str,
+        chat_id: int,
+        payload: dict[str, Any],
+    ) -> OutboxMessage:
+        now = datetime.utcnow()
+        message = OutboxMessage(
+            kind=kind,
+            method=method,
+            chat_id=chat_id,
+            payload=payload,
+            status=OutboxStatus.PENDING,
+            attempts=0,
+            available_at=now,
+            created_at=now,
+        )
+        session.add(message)
+        return message
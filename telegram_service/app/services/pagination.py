@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Generic, Hashable, Literal, TypeVar
+
+from sqlalchemy import and_, or_, tuple_
+
+
+T = TypeVar("T")
+
+CursorDirection = Literal["after", "before", "from"]
+CURSOR_DIRECTIONS: tuple[CursorDirection, ...] = ("after", "before", "from")
+
+_EPOCH = datetime(1970, 1, 1)
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    """Position in a keyset-ordered list: rows strictly after/before ``key``, or starting at it (``from``)."""
+
+    direction: CursorDirection
+    key: tuple[Any, ...]
+
+
+@dataclass
+class KeysetPage(Generic[T]):
+    items: list[T]
+    has_prev: bool
+    has_next: bool
+    first_key: tuple[Any, ...] | None = None
+    last_key: tuple[Any, ...] | None = None
+    total: int | None = None
+
+
+def encode_cursor_key(key: tuple[Any, ...]) -> str:
+    """Compact, callback-data-safe form of a cursor key: base36 ints/timestamps joined by dots, empty for NULL."""
+    return ".".join(_encode_part(part) for part in key)
+
+
+def decode_cursor_key(raw: str, kinds: tuple[type, ...]) -> tuple[Any, ...] | None:
+    parts = raw.split(".")
+    if len(parts) != len(kinds):
+        return None
+    try:
+        return tuple(_decode_part(part, kind) for part, kind in zip(parts, kinds))
+    except ValueError:
+        return None
+
+
+def cursor_from_params(params: dict[str, str], kinds: tuple[type, ...]) -> PageCursor | None:
+    """Read ``after=``/``before=``/``from=`` out of parsed callback params; a missing or bad cursor means page one."""
+    for direction in CURSOR_DIRECTIONS:
+        raw = params.get(direction)
+        if raw is None:
+            continue
+        key = decode_cursor_key(raw, kinds)
+        return PageCursor(direction=direction, key=key) if key is not None else None
+    return None
+
+
+def keyset_condition(columns: tuple[Any, ...], cursor: PageCursor, *, nullable_first: bool = False) -> Any:
+    """WHERE clause for a DESC keyset over ``columns``; the first column may be NULL (sorted last) if nullable_first."""
+    if not nullable_first:
+        return _compare(columns, cursor.key, cursor.direction)
+    head, *rest = columns
+    head_value, *rest_values = cursor.key
+    if head_value is None:
+        # Cursor sits in the NULL tail: everything non-null comes before it.
+        tail = _compare(tuple(rest), tuple(rest_values), cursor.direction)
+        if cursor.direction == "before":
+            return or_(head.is_not(None), and_(head.is_(None), tail))
+        return and_(head.is_(None), tail)
+    non_null = _compare(columns, cursor.key, cursor.direction)
+    if cursor.direction == "before":
+        return and_(head.is_not(None), non_null)
+    return or_(non_null, head.is_(None))
+
+
+def _compare(columns: tuple[Any, ...], values: tuple[Any, ...], direction: CursorDirection) -> Any:
+    left = tuple_(*columns) if len(columns) > 1 else columns[0]
+    right = tuple_(*values) if len(values) > 1 else values[0]
+    if direction == "after":
+        return left < right
+    if direction == "from":
+        return left <= right
+    return left > right
+
+
+class ApproximateCounter:
+    """Small TTL cache for list totals: shown as "~N", refreshed at most once per ttl per key."""
+
+    def __init__(self, *, ttl: float, max_size: int = 1000) -> None:
+        self._ttl = ttl
+        self._max_size = max_size
+        self._items: dict[Hashable, tuple[float, int]] = {}
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[int]]) -> int:
+        now = time.monotonic()
+        item = self._items.get(key)
+        if item is not None and item[0] > now:
+            return item[1]
+        value = await load()
+        if self._ttl > 0:
+            if len(self._items) >= self._max_size:
+                self._items = {k: v for k, v in self._items.items() if v[0] > now}
+                if len(self._items) >= self._max_size:
+                    self._items.clear()
+            self._items[key] = (now + self._ttl, value)
+        return value
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+def _encode_part(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        delta = value - _EPOCH
+        value = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    if not isinstance(value, int):
+        raise TypeError(f"Unsupported cursor value: {value!r}")
+    if value < 0:
+        return "-" + _encode_part(-value)
+    digits = []
+    while True:
+        value, rem = divmod(value, 36)
+        digits.append(_DIGITS[rem])
+        if not value:
+            break
+    return "".join(reversed(digits))
+
+
+def _decode_part(raw: str, kind: type) -> Any:
+    if raw == "":
+        return None
+    number = int(raw, 36)
+    if kind is datetime:
+        return _EPOCH + timedelta(microseconds=number)
+    return number
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import logging
+from array import array
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Iterable, Mapping, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.services.finance_service import DateRange, FinanceService
+
+
+# What-if payouts for a period. Money is held as integer kopecks and percents as integer hundredths of a
+# percent (both columns are Numeric with two decimals, so the conversion is exact). A payout is then
+# (net * percent + 5000) // 10000 kopecks, which is exactly TicketService._round_money(net * percent / 100):
+# ROUND_HALF_UP to 0.01 of a non-negative amount.
+
+logger = logging.getLogger(__name__)
+
+_PERCENT_DIVISOR = 100 * 100
+_HALF = _PERCENT_DIVISOR // 2
+
+
+def to_kopecks(amount: Decimal | None) -> int:
+    return int((amount or 0) * 100)
+
+
+def from_kopecks(kopecks: int) -> Decimal:
+    return Decimal(kopecks).scaleb(-2)
+
+
+def percent_of(kopecks: int, hundredths: int) -> int:
+    """``kopecks * hundredths / 10000`` rounded half up (away from zero), like ``_round_money``."""
+    rounded = (abs(kopecks) * hundredths + _HALF) // _PERCENT_DIVISOR
+    return rounded if kopecks >= 0 else -rounded
+
+
+def _hundredths(percent: Decimal | None) -> int:
+    return int((percent or 0) * 100)
+
+
+def _scenario_hundredths(percents: Mapping[int, Decimal]) -> dict[int, int]:
+    # Same limits as TicketService._validate_percent, so a scenario can only use percents a user could have.
+    result = {}
+    for user_id, percent in percents.items():
+        if percent < 0 or percent > 100:
+            raise ValueError("Процент должен быть от 0 до 100")
+        if percent.as_tuple().exponent < -2:
+            raise ValueError("Процент должен иметь максимум 2 знака после запятой")
+        result[user_id] = _hundredths(percent)
+    return result
+
+
+@dataclass(slots=True)
+class PayoutColumns:
+    """Closed tickets of a period as parallel integer columns; user id 0 stands for "nobody"."""
+
+    net: array = field(default_factory=lambda: array("q"))
+    executor_id: array = field(default_factory=lambda: array("q"))
+    executor_percent: array = field(default_factory=lambda: array("i"))
+    admin_id: array = field(default_factory=lambda: array("q"))
+    admin_percent: array = field(default_factory=lambda: array("i"))
+    junior_id: array = field(default_factory=lambda: array("q"))
+    junior_percent: array = field(default_factory=lambda: array("i"))
+    count: array = field(default_factory=lambda: array("q"))
+
+    def extend(self, rows: Iterable[Sequence[Any]]) -> None:
+        """Append rows shaped like ``FinanceService.stream_payout_groups`` output."""
+        for net, executor_id, executor_pct, admin_id, admin_pct, junior_id, junior_pct, count in rows:
+            self.net.append(to_kopecks(net))
+            self.executor_id.append(executor_id or 0)
+            self.executor_percent.append(_hundredths(executor_pct))
+            self.admin_id.append(admin_id or 0)
+            self.admin_percent.append(_hundredths(admin_pct))
+            self.junior_id.append(junior_id or 0)
+            self.junior_percent.append(_hundredths(junior_pct))
+            self.count.append(count)
+
+    def tickets(self) -> int:
+        return sum(self.count)
+
+
+@dataclass(frozen=True)
+class PayoutScenario:
+    """Percents to try instead of the ones frozen at close; users that are not mentioned keep theirs.
+
+    ``shares`` replaces the whole active ProjectShare split; None keeps it.
+    """
+
+    name: str
+    master_percents: Mapping[int, Decimal] = field(default_factory=dict)
+    admin_percents: Mapping[int, Decimal] = field(default_factory=dict)
+    junior_percents: Mapping[int, Decimal] = field(default_factory=dict)
+    shares: Mapping[int, Decimal] | None = None
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    """Payouts of one scenario. Deltas are against the close-time percents and only list changed users.
+
+    Tickets whose payouts would exceed their net profit are rejected by close_ticket; they are counted in
+    ``invalid_tickets`` and left out of every sum.
+    """
+
+    name: str
+    payouts: dict[int, Decimal]
+    deltas: dict[int, Decimal]
+    project_take: Decimal
+    project_take_delta: Decimal
+    shares: dict[int, Decimal]
+    share_deltas: dict[int, Decimal]
+    invalid_tickets: int
+
+
+# (executor, executor %, admin, admin %, junior, junior %) -> ((net kopecks, tickets), ...)
+_Groups = dict[tuple[int, int, int, int, int, int], list[tuple[int, int]]]
+# (payouts by user, project take, invalid tickets), all in kopecks
+_Totals = tuple[dict[int, int], int, int]
+
+
+class PayoutSimulation:
+    """Evaluates many scenarios over the same columns.
+
+    Tickets are grouped once by payees and close-time percents; a scenario only recomputes the groups whose
+    percents it changes, the rest come from a memo shared by all scenarios.
+    """
+
+    def __init__(self, columns: PayoutColumns) -> None:
+        self._groups = self._group(columns)
+        self._memo: dict[tuple[Any, ...], tuple[int, int, int, int, int]] = {}
+        self._baseline = self._evaluate({}, {}, {})
+
+    def run(
+        self,
+        scenario: PayoutScenario,
+        *,
+        net_cash: int,
+        active_shares: Mapping[int, int],
+    ) -> ScenarioResult:
+        """``net_cash`` is the project cash of the period in kopecks; shares are hundredths of a percent."""
+        payouts, take, invalid = self._evaluate(
+            _scenario_hundredths(scenario.master_percents),
+            _scenario_hundredths(scenario.admin_percents),
+            _scenario_hundredths(scenario.junior_percents),
+        )
+        base_payouts, base_take, _ = self._baseline
+        shares = active_shares if scenario.shares is None else _scenario_hundredths(scenario.shares)
+        share_amounts = {user_id: percent_of(net_cash, percent) for user_id, percent in shares.items()}
+        base_shares = {user_id: percent_of(net_cash, percent) for user_id, percent in active_shares.items()}
+        return ScenarioResult(
+            name=scenario.name,
+            payouts={user_id: from_kopecks(amount) for user_id, amount in payouts.items()},
+            deltas=_deltas(payouts, base_payouts),
+            project_take=from_kopecks(take),
+            project_take_delta=from_kopecks(take - base_take),
+            shares={user_id: from_kopecks(amount) for user_id, amount in share_amounts.items()},
+            share_deltas=_deltas(share_amounts, base_shares),
+            invalid_tickets=invalid,
+        )
+
+    @staticmethod
+    def _group(columns: PayoutColumns) -> _Groups:
+        groups: dict[tuple[int, int, int, int, int, int], dict[int, int]] = {}
+        for net, executor, executor_pct, admin, admin_pct, junior, junior_pct, count in zip(
+            columns.net,
+            columns.executor_id,
+            columns.executor_percent,
+            columns.admin_id,
+            columns.admin_percent,
+            columns.junior_id,
+            columns.junior_percent,
+            columns.count,
+        ):
+            nets = groups.setdefault((executor, executor_pct, admin, admin_pct, junior, junior_pct), {})
+            nets[net] = nets.get(net, 0) + count
+        return {key: list(nets.items()) for key, nets in groups.items()}
+
+    def _evaluate(
+        self,
+        masters: Mapping[int, int],
+        admins: Mapping[int, int],
+        juniors: Mapping[int, int],
+    ) -> _Totals:
+        payouts: dict[int, int] = {}
+        take_total = 0
+        invalid_total = 0
+        for key, nets in self._groups.items():
+            executor, executor_pct, admin, admin_pct, junior, junior_pct = key
+            percents = (
+                masters.get(executor, executor_pct),
+                admins.get(admin, admin_pct),
+                juniors.get(junior, junior_pct) if junior else junior_pct,
+            )
+            memo_key = (key, percents)
+            totals = self._memo.get(memo_key)
+            if totals is None:
+                totals = self._memo[memo_key] = self._evaluate_group(nets, *percents)
+            executor_sum, admin_sum, junior_sum, take, invalid = totals
+            for user_id, amount in ((executor, executor_sum), (admin, admin_sum), (junior, junior_sum)):
+                if user_id and amount:
+                    payouts[user_id] = payouts.get(user_id, 0) + amount
+            take_total += take
+            invalid_total += invalid
+        return payouts, take_total, invalid_total
+
+    @staticmethod
+    def _evaluate_group(
+        nets: list[tuple[int, int]],
+        executor_pct: int,
+        admin_pct: int,
+        junior_pct: int,
+    ) -> tuple[int, int, int, int, int]:
+        executor_sum = admin_sum = junior_sum = take_sum = invalid = 0
+        for net, count in nets:
+            executor = (net * executor_pct + _HALF) // _PERCENT_DIVISOR
+            admin = (net * admin_pct + _HALF) // _PERCENT_DIVISOR
+            junior = (net * junior_pct + _HALF) // _PERCENT_DIVISOR
+            take = net - executor - admin - junior
+            if take < 0:
+                invalid += count
+                continue
+            executor_sum += executor * count
+            admin_sum += admin * count
+            junior_sum += junior * count
+            take_sum += take * count
+        return executor_sum, admin_sum, junior_sum, take_sum, invalid
+
+
+def _deltas(values: Mapping[int, int], baseline: Mapping[int, int]) -> dict[int, Decimal]:
+    deltas = {}
+    for user_id in sorted(values.keys() | baseline.keys()):
+        delta = values.get(user_id, 0) - baseline.get(user_id, 0)
+        if delta:
+            deltas[user_id] = from_kopecks(delta)
+    return deltas
+
+
+class PayoutSimulatorService:
+    """Answers "what would this period have cost with other percents" without touching any ticket."""
+
+    def __init__(self, finance_service: FinanceService | None = None, *, batch_size: int | None = None) -> None:
+        self._finance = finance_service or FinanceService()
+        self._batch_size = batch_size or get_settings().finance_export_batch_size
+
+    async def load(self, session: AsyncSession, *, date_range: DateRange) -> PayoutColumns:
+        columns = PayoutColumns()
+        async for rows in self._finance.stream_payout_groups(
+            session, date_range=date_range, batch_size=self._batch_size
+        ):
+            columns.extend(rows)
+        return columns
+
+    async def simulate(
+        self,
+        session: AsyncSession,
+        *,
+        date_range: DateRange,
+        scenarios: Sequence[PayoutScenario],
+    ) -> list[ScenarioResult]:
+        columns = await self.load(session, date_range=date_range)
+        summary = await self._finance.project_summary(session, date_range=date_range)
+        shares = await self._finance.list_active_shares(session)
+        net_cash = to_kopecks(summary["project_net_cash_should"])
+        active_shares = {share.user_id: _hundredths(share.percent) for share in shares}
+        simulation = PayoutSimulation(columns)
+        results = [simulation.run(scenario, net_cash=net_cash, active_shares=active_shares) for scenario in scenarios]
+        logger.info(
+            "[payout_simulator] %s tickets in %s rows, %s scenarios",
+            columns.tickets(),
+            len(columns.net),
+            len(scenarios),
+        )
+        return results
+
+
+payout_simulator = PayoutSimulatorService()
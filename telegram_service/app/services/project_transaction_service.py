@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.enums import ProjectTransactionType, UserRole
 from app.db.models import ProjectTransaction, User
 from app.services.audit_service import AuditService
+from app.services.finance_rollup import finance_rollup
 
 
 class ProjectTransactionService:
@@ -46,6 +47,7 @@ class ProjectTransactionService:
         )
         session.add(transaction)
         await session.flush()
+        await finance_rollup.add_transaction(session, transaction)
         await self._audit.log_audit_event(
             session,
             actor_id=created_by,
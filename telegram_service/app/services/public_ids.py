@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, datetime
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.models import DailyCounter
+from app.db.session import async_session_factory
+
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_ID_DATE_FORMAT = "%d%m%y"
+# DDMMYY plus the daily sequence: two digits up to 99 (the original 8-char ids), then as many as needed.
+PUBLIC_ID_MAX_LENGTH = 12
+MAX_DAILY_SEQUENCE = 10 ** (PUBLIC_ID_MAX_LENGTH - 6) - 1
+
+
+def format_public_id(day: date, sequence: int) -> str:
+    if not 1 <= sequence <= MAX_DAILY_SEQUENCE:
+        raise ValueError(
+            f"Превышен лимит заявок на дату {day.isoformat()} (максимум {MAX_DAILY_SEQUENCE})"
+        )
+    return f"{day.strftime(PUBLIC_ID_DATE_FORMAT)}{sequence:02d}"
+
+
+def looks_like_public_id(value: str) -> bool:
+    """True for DDMMYY followed by a 2+ digit sequence, i.e. anything format_public_id can produce."""
+    if not value.isdigit() or not 8 <= len(value) <= PUBLIC_ID_MAX_LENGTH:
+        return False
+    if len(value) > 8 and value[6] == "0":
+        return False
+    try:
+        datetime.strptime(value[:6], PUBLIC_ID_DATE_FORMAT)
+    except ValueError:
+        return False
+    return True
+
+
+class PublicIdAllocator:
+    """Hands out daily public_id sequence numbers from blocks reserved in daily_counters.
+
+    A block is reserved in its own short transaction, so ticket-creating transactions never hold the
+    counter row lock. Numbers left in a block when the process stops (or when the creating transaction
+    rolls back) are skipped, so ids stay unique and increasing per process but may have gaps.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_factory,
+        *,
+        block_size: int,
+    ) -> None:
+        self._session_factory = session_factory
+        self._block_size = max(1, block_size)
+        self._blocks: dict[date, tuple[int, int]] = {}
+        self._lock = asyncio.Lock()
+
+    async def next_public_id(self, day: date) -> str:
+        return format_public_id(day, await self.next_sequence(day))
+
+    async def next_sequence(self, day: date) -> int:
+        async with self._lock:
+            next_value, last_value = self._blocks.get(day, (1, 0))
+            if next_value > last_value:
+                next_value, last_value = await self._reserve_block(day)
+                # Only today's (and at most yesterday's, around midnight) blocks are ever used again.
+                for stale_day in [known for known in self._blocks if known < day]:
+                    del self._blocks[stale_day]
+            self._blocks[day] = (next_value + 1, last_value)
+            return next_value
+
+    async def _reserve_block(self, day: date) -> tuple[int, int]:
+        statement = (
+            insert(DailyCounter)
+            .values(counter_date=day, counter=self._block_size)
+            .on_conflict_do_update(
+                index_elements=[DailyCounter.counter_date],
+                set_={"counter": DailyCounter.counter + self._block_size},
+            )
+            .returning(DailyCounter.counter)
+        )
+        async with self._session_factory() as session:
+            last_value = int((await session.execute(statement)).scalar_one())
+            await session.commit()
+        logger.debug("[public_id] reserved %s..%s for %s", last_value - self._block_size + 1, last_value, day)
+        return last_value - self._block_size + 1, last_value
+
+
+public_ids = PublicIdAllocator(block_size=get_settings().public_id_block_size)
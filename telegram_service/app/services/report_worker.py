@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import pickle
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable, Iterator
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+from app.core.config import get_settings
+from app.db.enums import ticket_category_label
+from app.domain.enums_mapping import ad_source_label
+
+
+# Report files are written in worker processes. They only get plain rows spooled to a file by the bot
+# process, never ORM objects or sessions, and this module stays free of database imports so a spawned
+# worker starts quickly.
+
+logger = logging.getLogger(__name__)
+
+# How long to keep waiting past the job deadline: a worker checks the deadline between batches, but
+# zipping the finished workbook cannot be interrupted.
+SAVE_GRACE_SECONDS = 30.0
+
+TICKETS_KIND = "tickets"
+TRANSACTIONS_KIND = "transactions"
+
+TICKETS_HEADERS = [
+    "ticket_id",
+    "status",
+    "category",
+    "client_phone",
+    "scheduled_at",
+    "ad_source",
+    "created_by_admin",
+    "executor",
+    "junior_master",
+    "revenue",
+    "expense",
+    "net_profit",
+    "transfer_status",
+    "transfer_sent_at",
+    "transfer_confirmed_at",
+    "confirmed_by",
+    "is_repeat",
+    "repeat_ticket_ids",
+]
+ORDER_REPORT_HEADERS = [
+    "Номер заказа",
+    "Кто выполнил",
+    "Тип рекламы",
+    "Скок отдал клиент",
+    "Расходы",
+    "Чистый профит",
+]
+EARNINGS_HEADERS = ["ticket_id", "role", "user_id", "user_name", "percent_at_close", "earned_amount"]
+TRANSACTIONS_HEADERS = ["id", "type", "amount", "category", "comment", "occurred_at", "created_by"]
+SUMMARY_HEADERS = [
+    "period_from",
+    "period_to",
+    "tickets_net_profit_should",
+    "tickets_net_profit_received",
+    "manual_income_sum",
+    "manual_expense_sum",
+    "project_net_cash_should",
+    "project_net_cash_received",
+    "earned_executor",
+    "earned_admin",
+    "earned_junior",
+    "project_take_sum",
+    "closed_count",
+    "confirmed_count",
+    "repeats_count",
+]
+SHARES_HEADERS = [
+    "user_id",
+    "user_name",
+    "percent",
+    "project_net_cash_should",
+    "share_amount_should",
+    "project_net_cash_received",
+    "share_amount_received",
+]
+OPERATIONS_HEADERS = ["Дата добавления", "Категория", "Комментарий", "Сумма", "Тип"]
+
+# (role, user id column, percent column, earned column, name column) for the EarningsByTicket sheet.
+_EARNINGS = (
+    ("EXECUTOR", "assigned_executor_id", "executor_percent_at_close", "executor_earned_amount", "executor_name"),
+    ("ADMIN", "created_by_admin_id", "admin_percent_at_close", "admin_earned_amount", "created_by_name"),
+    (
+        "JUNIOR_MASTER",
+        "junior_master_id",
+        "junior_master_percent_at_close",
+        "junior_master_earned_amount",
+        "junior_name",
+    ),
+)
+
+
+class ReportTimeout(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class FinanceReportJob:
+    """Everything a worker needs to write the two export workbooks; all fields pickle cheaply."""
+
+    spool: str
+    report: str
+    operations: str
+    summary_row: list[Any]
+    share_rows: list[list[Any]]
+    deadline: float
+
+
+def spool_rows(out: BinaryIO, kind: str, fields: Iterable[str], rows: Iterable[Iterable[Any]]) -> None:
+    """Append one batch of plain row tuples to a spool file read by ``write_finance_report``."""
+    pickle.dump((kind, tuple(fields), [tuple(row) for row in rows]), out, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def check_deadline(deadline: float) -> None:
+    if time.time() > deadline:
+        raise ReportTimeout("report generation timed out")
+
+
+def write_finance_report(job: FinanceReportJob) -> tuple[int, int]:
+    """Worker entry point: write the project report and money operations workbooks from the spool.
+
+    Returns the number of tickets and manual transactions written.
+    """
+    report = Workbook(write_only=True)
+    tickets_ws = report.create_sheet("Tickets")
+    order_ws = report.create_sheet("OrderReport")
+    earnings_ws = report.create_sheet("EarningsByTicket")
+    transactions_ws = report.create_sheet("ManualTransactions")
+    summary_ws = report.create_sheet("ProjectSummary")
+    shares_ws = report.create_sheet("ProjectShares")
+    operations = Workbook(write_only=True)
+    operations_ws = operations.create_sheet("Операции")
+
+    tickets_ws.append(TICKETS_HEADERS)
+    order_ws.append(ORDER_REPORT_HEADERS)
+    earnings_ws.append(EARNINGS_HEADERS)
+    transactions_ws.append(TRANSACTIONS_HEADERS)
+    operations_ws.append(OPERATIONS_HEADERS)
+
+    counts = {TICKETS_KIND: 0, TRANSACTIONS_KIND: 0}
+    for kind, rows in _read_spool(Path(job.spool)):
+        check_deadline(job.deadline)
+        counts[kind] += len(rows)
+        if kind == TICKETS_KIND:
+            for ticket in rows:
+                tickets_ws.append(_ticket_row(ticket))
+                order_ws.append(
+                    [
+                        ticket.id,
+                        ticket.executor_name or ticket.assigned_executor_id,
+                        ad_source_label(ticket.ad_source) if ticket.ad_source else None,
+                        ticket.revenue,
+                        ticket.expense,
+                        ticket.net_profit,
+                    ]
+                )
+                for role, user_column, percent_column, earned_column, name_column in _EARNINGS:
+                    user_id = getattr(ticket, user_column)
+                    earned = getattr(ticket, earned_column)
+                    if user_id and earned is not None:
+                        name = getattr(ticket, name_column)
+                        percent = getattr(ticket, percent_column)
+                        earnings_ws.append([ticket.id, role, user_id, name, percent, earned])
+        else:
+            for tx in rows:
+                transactions_ws.append(
+                    [
+                        tx.id,
+                        tx.type.value,
+                        tx.amount,
+                        tx.category,
+                        tx.comment,
+                        tx.occurred_at,
+                        tx.creator_name or tx.created_by,
+                    ]
+                )
+                operations_ws.append(
+                    [
+                        _cell(operations_ws, tx.created_at, "dd.mm.yyyy hh:mm"),
+                        tx.category,
+                        tx.comment if tx.comment else "-",
+                        _cell(operations_ws, tx.amount, "0.00"),
+                        tx.type.value,
+                    ]
+                )
+
+    summary_ws.append(SUMMARY_HEADERS)
+    summary_ws.append(job.summary_row)
+    shares_ws.append(SHARES_HEADERS)
+    for row in job.share_rows:
+        shares_ws.append(row)
+    check_deadline(job.deadline)
+    report.save(job.report)
+    operations.save(job.operations)
+    return counts[TICKETS_KIND], counts[TRANSACTIONS_KIND]
+
+
+def _read_spool(path: Path) -> Iterator[tuple[str, list[Any]]]:
+    row_types: dict[tuple[str, ...], Any] = {}
+    with path.open("rb") as spool:
+        while True:
+            try:
+                kind, fields, rows = pickle.load(spool)
+            except EOFError:
+                return
+            row_type = row_types.get(fields)
+            if row_type is None:
+                row_type = row_types[fields] = namedtuple(f"{kind}_row", fields)
+            yield kind, [row_type(*row) for row in rows]
+
+
+def _ticket_row(ticket: Any) -> list[Any]:
+    return [
+        ticket.id,
+        ticket.status.value if ticket.status else None,
+        ticket_category_label(ticket.category) if ticket.category else None,
+        ticket.client_phone,
+        ticket.scheduled_at,
+        ad_source_label(ticket.ad_source) if ticket.ad_source else None,
+        ticket.created_by_name or ticket.created_by_admin_id,
+        ticket.executor_name or ticket.assigned_executor_id,
+        ticket.junior_name or ticket.junior_master_id,
+        ticket.revenue,
+        ticket.expense,
+        ticket.net_profit,
+        ticket.transfer_status.value if ticket.transfer_status else None,
+        ticket.transfer_sent_at,
+        ticket.transfer_confirmed_at,
+        ticket.confirmed_by_name or ticket.transfer_confirmed_by,
+        ticket.is_repeat,
+        ",".join(map(str, ticket.repeat_ticket_ids or [])),
+    ]
+
+
+def _cell(worksheet: Any, value: Any, number_format: str) -> WriteOnlyCell:
+    cell = WriteOnlyCell(worksheet, value=value)
+    cell.number_format = number_format
+    return cell
+
+
+class ReportPool:
+    """A process pool for CPU-bound report jobs, so building a big file never stalls the event loop.
+
+    Workers are spawned (not forked from the bot with its open sockets) on first use.
+    """
+
+    def __init__(self, *, workers: int, timeout: float) -> None:
+        self._workers = max(1, workers)
+        self.timeout = timeout
+        self._executor: ProcessPoolExecutor | None = None
+
+    def deadline(self) -> float:
+        """Wall-clock deadline for a job starting now; checked by the job itself, in any process."""
+        return time.time() + self.timeout
+
+    async def run(self, job: Callable[[Any], Any], argument: Any, *, deadline: float) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), job, argument)
+        wait = max(0.0, deadline - time.time()) + SAVE_GRACE_SECONDS
+        try:
+            return await asyncio.wait_for(future, timeout=wait)
+        except asyncio.TimeoutError as exc:
+            # The worker gives up on its own at the next deadline check; nothing here can kill it.
+            raise ReportTimeout("report generation timed out") from exc
+        except BrokenProcessPool:
+            logger.exception("[report_pool] worker process died, starting a new pool")
+            self.shutdown()
+            raise
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+
+_settings = get_settings()
+report_pool = ReportPool(workers=_settings.report_workers, timeout=_settings.report_timeout_seconds)
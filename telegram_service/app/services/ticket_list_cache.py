@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import engine
+
+
+logger = logging.getLogger(__name__)
+
+PENDING_SCOPES_KEY = "ticket_list_cache_invalidate"
+NOTIFY_CHANNEL = "ticket_list_changes"
+RECONNECT_DELAY_SECONDS = 5.0
+
+# Invalidation scopes. A list page is cached under the one scope whose changes can alter it.
+ALL_SCOPE = "all"
+QUEUE_SCOPE = "queue"
+
+
+def executor_scope(executor_id: int) -> str:
+    return f"executor:{executor_id}"
+
+
+def ticket_change_scopes(*executor_ids: int | None, queue: bool = False) -> set[str]:
+    """Scopes touched by a ticket change: unscoped (admin) lists, the executors' lists and maybe the queue."""
+    scopes = {ALL_SCOPE}
+    if queue:
+        scopes.add(QUEUE_SCOPE)
+    scopes.update(executor_scope(executor_id) for executor_id in executor_ids if executor_id is not None)
+    return scopes
+
+
+class InvalidationChannel:
+    """Carries invalidated scopes to other bot processes. The base channel is process-local and does nothing."""
+
+    def stage(self, session: Session, scopes: set[str]) -> None:
+        """Queue ``scopes`` for delivery when the session's transaction commits."""
+
+    async def run(self, on_scopes: Callable[[Iterable[str]], None], on_reset: Callable[[], None]) -> None:
+        """Deliver scopes published by other processes until stopped; on_reset when some may have been missed."""
+
+    def stop(self) -> None:
+        pass
+
+
+class PostgresNotifyChannel(InvalidationChannel):
+    """LISTEN/NOTIFY over the bot database. NOTIFY is sent inside the writing transaction, so other processes
+    only hear about committed changes and a rolled back change is never announced."""
+
+    def __init__(self, bind: AsyncEngine, *, channel: str = NOTIFY_CHANNEL) -> None:
+        self._engine = bind
+        self._channel = channel
+        self._origin = uuid.uuid4().hex
+        self._stopped = asyncio.Event()
+
+    def stage(self, session: Session, scopes: set[str]) -> None:
+        payload = json.dumps({"origin": self._origin, "scopes": sorted(scopes)})
+        session.execute(select(func.pg_notify(self._channel, payload)))
+
+    async def run(self, on_scopes: Callable[[Iterable[str]], None], on_reset: Callable[[], None]) -> None:
+        def notified(_connection: Any, _pid: int, _channel: str, payload: str) -> None:
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                logger.warning("[ticket_list_cache] bad notification payload: %r", payload)
+                return
+            if message.get("origin") != self._origin:
+                on_scopes(message.get("scopes") or ())
+
+        while not self._stopped.is_set():
+            lost = asyncio.Event()
+            try:
+                async with self._engine.connect() as conn:
+                    driver = (await conn.get_raw_connection()).driver_connection
+                    driver.add_termination_listener(lambda _connection: lost.set())
+                    await driver.add_listener(self._channel, notified)
+                    # Anything committed while we were not listening was missed.
+                    on_reset()
+                    logger.info("[ticket_list_cache] listening on %s", self._channel)
+                    waiters = {asyncio.create_task(lost.wait()), asyncio.create_task(self._stopped.wait())}
+                    try:
+                        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        for waiter in waiters:
+                            waiter.cancel()
+                    if not driver.is_closed():
+                        await driver.remove_listener(self._channel, notified)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001 - keep listening across DB restarts
+                logger.exception("[ticket_list_cache] listener connection failed")
+            if not self._stopped.is_set():
+                on_reset()
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), timeout=RECONNECT_DELAY_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+class TicketListCache:
+    """Process-wide LRU of rendered-list query results, keyed by (scope, list, arguments).
+
+    Entries remember the generation of their scope when the load started; invalidating a scope bumps its
+    generation, so a page loaded concurrently with a change is never served afterwards.
+    """
+
+    def __init__(self, *, ttl: float, max_size: int, channel: InvalidationChannel | None = None) -> None:
+        self._ttl = ttl
+        self._max_size = max_size
+        self.channel = channel or InvalidationChannel()
+        self._items: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._remote_invalidations = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0 and self._max_size > 0
+
+    async def get_or_load(self, scope: str, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await load()
+        cache_key = (scope, key)
+        generation = self._generations.get(scope, 0)
+        item = self._items.get(cache_key)
+        if item is not None:
+            expires_at, item_generation, value = item
+            if item_generation == generation and expires_at > time.monotonic():
+                self._items.move_to_end(cache_key)
+                self._hits += 1
+                return value
+            del self._items[cache_key]
+        self._misses += 1
+        value = await load()
+        if self._generations.get(scope, 0) == generation:
+            self._items[cache_key] = (time.monotonic() + self._ttl, generation, value)
+            self._items.move_to_end(cache_key)
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+                self._evictions += 1
+        return value
+
+    def invalidate(self, scopes: Iterable[str]) -> None:
+        for scope in scopes:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            self._invalidations += 1
+
+    def invalidate_on_commit(self, session: AsyncSession, scopes: set[str]) -> None:
+        # Same pattern as the user cache: drop now, drop again once the change is visible to other
+        # transactions, and tell other processes at commit.
+        self.invalidate(scopes)
+        session.sync_session.info.setdefault(PENDING_SCOPES_KEY, set()).update(scopes)
+
+    def invalidate_remote(self, scopes: Iterable[str]) -> None:
+        scopes = list(scopes)
+        self._remote_invalidations += len(scopes)
+        self.invalidate(scopes)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    async def run_channel(self) -> None:
+        await self.channel.run(self.invalidate_remote, self.clear)
+
+    def snapshot(self) -> dict[str, float]:
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._items),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self._invalidations,
+            "remote_invalidations": self._remote_invalidations,
+            "evictions": self._evictions,
+        }
+
+    def log_metrics(self) -> None:
+        logger.info("[ticket_list_cache] %s", self.snapshot())
+
+
+def build_channel(name: str) -> InvalidationChannel:
+    if name == "postgres":
+        return PostgresNotifyChannel(engine)
+    return InvalidationChannel()
+
+
+_settings = get_settings()
+ticket_list_cache = TicketListCache(
+    ttl=_settings.ticket_list_cache_ttl,
+    max_size=_settings.ticket_list_cache_size,
+    channel=build_channel(_settings.ticket_list_cache_channel),
+)
+
+
+@event.listens_for(Session, "before_commit")
+def _announce_pending_scopes(session: Session) -> None:
+    scopes = session.info.get(PENDING_SCOPES_KEY)
+    if scopes:
+        ticket_list_cache.channel.stage(session, scopes)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_pending_scopes(session: Session) -> None:
+    scopes = session.info.pop(PENDING_SCOPES_KEY, None)
+    if scopes:
+        ticket_list_cache.invalidate(scopes)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Iterable, TypeVar
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import aliased
+
+from app.db.enums import TicketCategory, TicketStatus, TransferStatus
+from app.db.models import Ticket, User
+
+
+# List views read plain column tuples into these slotted rows instead of loading Ticket entities: no
+# identity map, no relationship loads and no big Text columns a list never shows.
+
+RowT = TypeVar("RowT")
+
+# Cards cut the problem to 60 characters; only a bounded prefix of the Text column is fetched.
+PROBLEM_PREVIEW_LENGTH = 200
+
+_executor = aliased(User, name="executor")
+
+# Row fields that are not plain tickets columns, and the joins they need.
+_EXPRESSIONS: dict[str, Any] = {
+    "executor_name": _executor.display_name,
+    "problem_text": func.left(Ticket.problem_text, PROBLEM_PREVIEW_LENGTH),
+}
+_JOINS: dict[str, tuple[Any, Any]] = {
+    "executor_name": (_executor, _executor.id == Ticket.assigned_executor_id),
+}
+
+
+@dataclass(slots=True, frozen=True)
+class TicketListRow:
+    """One line of the admin/junior ticket lists and the zero-profit issue list."""
+
+    id: int
+    public_id: str | None
+    status: TicketStatus
+    category: TicketCategory
+    client_phone: str
+    client_address: str | None
+    is_repeat: bool
+    created_at: datetime
+
+
+@dataclass(slots=True, frozen=True)
+class TicketCardRow:
+    """Queue and active-ticket cards; problem_text is a PROBLEM_PREVIEW_LENGTH prefix."""
+
+    id: int
+    public_id: str | None
+    status: TicketStatus
+    category: TicketCategory
+    client_phone: str
+    client_address: str | None
+    is_repeat: bool
+    preferred_date_dm: str | None
+    scheduled_at: datetime | None
+    problem_text: str
+
+
+@dataclass(slots=True, frozen=True)
+class ClosedTicketRow:
+    """Worker's closed list; carries the CLOSED_LIST_KEY columns for keyset cursors."""
+
+    id: int
+    public_id: str | None
+    category: TicketCategory
+    client_name: str | None
+    closed_at: datetime | None
+    updated_at: datetime
+
+
+@dataclass(slots=True, frozen=True)
+class TransferRow:
+    """Transfer confirmation and overdue-transfer lists, with the executor's display name joined in."""
+
+    id: int
+    public_id: str | None
+    assigned_executor_id: int | None
+    executor_name: str | None
+    net_profit: Decimal | None
+    transfer_status: TransferStatus | None
+    transfer_sent_at: datetime | None
+    closed_at: datetime | None
+
+
+def select_rows(row_type: type) -> Select:
+    names = [field.name for field in fields(row_type)]
+    columns = [(_EXPRESSIONS[name] if name in _EXPRESSIONS else getattr(Ticket, name)).label(name) for name in names]
+    query = select(*columns).select_from(Ticket)
+    for name in names:
+        if name in _JOINS:
+            target, onclause = _JOINS[name]
+            query = query.outerjoin(target, onclause)
+    return query
+
+
+def to_rows(row_type: type[RowT], rows: Iterable[Any]) -> list[RowT]:
+    return [row_type(*row) for row in rows]
@@ -1,18 +1,130 @@
 from __future__ import annotations
 
-from datetime import date, datetime
+from dataclasses import dataclass
+from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Any
+from typing import Any, Literal
 
-from sqlalchemy import func, select, update
-from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import func, insert, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, joinedload, selectinload
 
+from app.core.config import get_settings
 from app.db.enums import AdSource, ProjectTransactionType, TicketCategory, TicketStatus, TransferStatus, UserRole
-from app.db.models import DailyCounter, Ticket, TicketClosePhoto, TicketMoneyOperation, User
+from app.db.models import Ticket, TicketClosePhoto, TicketEvent, TicketMoneyOperation, User
 from app.services.audit_service import AuditService
+from app.services.finance_rollup import TicketFigures, finance_rollup
+from app.services.pagination import ApproximateCounter, KeysetPage, PageCursor, keyset_condition
+from app.services.public_ids import public_ids
+from app.services.ticket_list_cache import (
+    ALL_SCOPE,
+    QUEUE_SCOPE,
+    executor_scope,
+    ticket_change_scopes,
+    ticket_list_cache,
+)
+from app.services.ticket_rows import (
+    ClosedTicketRow,
+    RowT,
+    TicketCardRow,
+    TicketListRow,
+    TransferRow,
+    select_rows,
+    to_rows,
+)
 from app.domain.enums_mapping import parse_ad_source, parse_ticket_category
+from app.domain.phone import normalize_phone_digits
+
+
+# Keyset orderings (all DESC). Cursors in callback data are encoded against these column tuples.
+TICKET_LIST_KEY = (Ticket.id,)
+TICKET_LIST_CURSOR = (int,)
+CLOSED_LIST_KEY = (Ticket.closed_at, Ticket.updated_at, Ticket.id)
+CLOSED_LIST_CURSOR = (datetime, datetime, int)
+
+# List totals are only a hint ("~N"), so they are shared across handlers and refreshed at most once per TTL.
+ticket_counts = ApproximateCounter(ttl=get_settings().ticket_count_cache_ttl)
+
+
+@dataclass(frozen=True)
+class TicketTransition:
+    """An allowed ticket state change: who may run it, which rows qualify and what goes into its TicketEvent."""
+
+    action: str
+    reason: str
+    tracked: tuple[str, ...]
+    roles: frozenset[UserRole] | None = None
+    statuses: tuple[TicketStatus, ...] | None = None
+    transfer_statuses: tuple[TransferStatus, ...] | None = None
+    executor: Literal["unassigned", "actor"] | None = None
+    not_executor_reason: str | None = None
+
+    def conditions(self, actor: User) -> list[Any]:
+        tickets = Ticket.__table__
+        clauses = []
+        if self.statuses is not None:
+            clauses.append(tickets.c.status.in_(self.statuses))
+        if self.transfer_statuses is not None:
+            clauses.append(tickets.c.transfer_status.in_(self.transfer_statuses))
+        if self.executor == "unassigned":
+            clauses.append(tickets.c.assigned_executor_id.is_(None))
+        elif self.executor == "actor":
+            clauses.append(tickets.c.assigned_executor_id == actor.id)
+        return clauses
+
+
+_EXECUTION_ROLES = frozenset({UserRole.MASTER, UserRole.JUNIOR_MASTER, UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN})
+_TRANSFER_CONFIRM_ROLES = frozenset({UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN})
+
+TICKET_TRANSITIONS: dict[str, TicketTransition] = {
+    "take": TicketTransition(
+        action="TICKET_TAKEN",
+        reason="TAKE_TICKET",
+        tracked=("status", "assigned_executor_id"),
+        roles=_EXECUTION_ROLES,
+        statuses=(TicketStatus.READY_FOR_WORK,),
+        executor="unassigned",
+    ),
+    "in_progress": TicketTransition(
+        action="TICKET_STATUS_UPDATED",
+        reason="SET_IN_PROGRESS",
+        tracked=("status",),
+        roles=_EXECUTION_ROLES,
+        statuses=(TicketStatus.IN_WORK, TicketStatus.TAKEN, TicketStatus.WAITING),
+        executor="actor",
+    ),
+    "transfer_sent": TicketTransition(
+        action="TRANSFER_SENT",
+        reason="TRANSFER_SENT",
+        tracked=("transfer_status",),
+        statuses=(TicketStatus.CLOSED,),
+        transfer_statuses=(TransferStatus.NOT_SENT,),
+        executor="actor",
+        not_executor_reason="TRANSFER_SENT_NOT_EXECUTOR",
+    ),
+    "transfer_confirm": TicketTransition(
+        action="TRANSFER_CONFIRMED",
+        reason="TRANSFER_CONFIRM",
+        tracked=("transfer_status",),
+        roles=_TRANSFER_CONFIRM_ROLES,
+        transfer_statuses=(TransferStatus.SENT,),
+    ),
+    "transfer_reject": TicketTransition(
+        action="TRANSFER_REJECTED",
+        reason="TRANSFER_CONFIRM",
+        tracked=("transfer_status",),
+        roles=_TRANSFER_CONFIRM_ROLES,
+        transfer_statuses=(TransferStatus.SENT,),
+    ),
+}
+
+
+def _json_object(fields: dict[str, Any]) -> Any:
+    args = []
+    for name, column in fields.items():
+        args.extend((literal(name), column))
+    return func.json_build_object(*args)
+
 
 
 class TicketService:
@@ -29,8 +141,11 @@ class TicketService:
         self._money_round = Decimal("0.01")
 
     async def search_by_phone(self, session: AsyncSession, phone: str, limit: int = 5) -> list[Ticket]:
+        digits = normalize_phone_digits(phone)
+        if not digits:
+            return []
         result = await session.execute(
-            select(Ticket).where(Ticket.client_phone == phone).order_by(Ticket.id.desc()).limit(limit)
+            select(Ticket).where(Ticket.client_phone_digits == digits).order_by(Ticket.id.desc()).limit(limit)
         )
         return list(result.scalars().all())
 
@@ -71,7 +186,7 @@ class TicketService:
         normalized_ad_source = parse_ad_source(ad_source)
         now = datetime.utcnow()
         try:
-            public_id = await self._generate_ticket_public_id(session, now)
+            public_id = await self._generate_ticket_public_id(now)
         except ValueError:
             return None
         ticket = Ticket(
@@ -83,6 +198,7 @@ class TicketService:
             client_name=client_name,
             client_age_estimate=client_age_estimate,
             client_phone=client_phone,
+            client_phone_digits=normalize_phone_digits(client_phone),
             client_address=client_address,
             address_details=address_details,
             problem_text=problem_text,
@@ -96,6 +212,7 @@ class TicketService:
         )
         session.add(ticket)
         await session.flush()
+        ticket_list_cache.invalidate_on_commit(session, ticket_change_scopes(queue=True))
         return ticket
 
     async def list_tickets(self, session: AsyncSession, limit: int = 20) -> list[Ticket]:
@@ -111,24 +228,31 @@ class TicketService:
         )
         return list(result.scalars().all())
 
-    async def list_queue(self, session: AsyncSession, limit: int = 20) -> list[Ticket]:
-        result = await session.execute(
-            select(Ticket)
-            .where(Ticket.status == TicketStatus.READY_FOR_WORK, Ticket.assigned_executor_id.is_(None))
-            .order_by(Ticket.id.desc())
-            .limit(limit)
-        )
-        return list(result.scalars().all())
+    async def list_queue(self, session: AsyncSession, limit: int = 20) -> list[TicketCardRow]:
+        async def load() -> list[TicketCardRow]:
+            result = await session.execute(
+                select_rows(TicketCardRow)
+                .where(Ticket.status == TicketStatus.READY_FOR_WORK, Ticket.assigned_executor_id.is_(None))
+                .order_by(Ticket.id.desc())
+                .limit(limit)
+            )
+            return to_rows(TicketCardRow, result)
+
+        return await ticket_list_cache.get_or_load(QUEUE_SCOPE, ("queue", limit), load)
 
-    async def list_my_active(self, session: AsyncSession, executor_id: int, limit: int = 20) -> list[Ticket]:
+    async def list_my_active(self, session: AsyncSession, executor_id: int, limit: int = 20) -> list[TicketCardRow]:
         statuses = [TicketStatus.IN_WORK, TicketStatus.TAKEN, TicketStatus.IN_PROGRESS, TicketStatus.WAITING]
-        result = await session.execute(
-            select(Ticket)
-            .where(Ticket.assigned_executor_id == executor_id, Ticket.status.in_(statuses))
-            .order_by(Ticket.id.desc())
-            .limit(limit)
-        )
-        return list(result.scalars().all())
+
+        async def load() -> list[TicketCardRow]:
+            result = await session.execute(
+                select_rows(TicketCardRow)
+                .where(Ticket.assigned_executor_id == executor_id, Ticket.status.in_(statuses))
+                .order_by(Ticket.id.desc())
+                .limit(limit)
+            )
+            return to_rows(TicketCardRow, result)
+
+        return await ticket_list_cache.get_or_load(executor_scope(executor_id), ("active", limit), load)
 
     async def list_my_closed(self, session: AsyncSession, executor_id: int, limit: int = 20) -> list[Ticket]:
         result = await session.execute(
@@ -144,33 +268,43 @@ class TicketService:
         session: AsyncSession,
         executor_id: int,
         *,
-        page: int,
+        cursor: PageCursor | None = None,
         page_size: int,
-    ) -> tuple[list[Ticket], int]:
+        with_total: bool = False,
+    ) -> KeysetPage[ClosedTicketRow]:
         filters = [
             Ticket.assigned_executor_id == executor_id,
             Ticket.status == TicketStatus.CLOSED,
         ]
-        total_result = await session.execute(select(func.count()).select_from(Ticket).where(*filters))
-        total = int(total_result.scalar_one())
-        result = await session.execute(
-            select(Ticket)
-            .where(*filters)
-            .order_by(Ticket.closed_at.desc().nullslast(), Ticket.updated_at.desc())
-            .offset(page * page_size)
-            .limit(page_size)
-        )
-        return list(result.scalars().all()), total
 
-    async def list_transfer_pending(self, session: AsyncSession, limit: int = 20) -> list[Ticket]:
-        result = await session.execute(
-            select(Ticket)
-            .options(selectinload(Ticket.assigned_executor))
-            .where(Ticket.transfer_status == TransferStatus.SENT)
-            .order_by(Ticket.id.desc())
-            .limit(limit)
-        )
-        return list(result.scalars().all())
+        async def load() -> KeysetPage[ClosedTicketRow]:
+            page = await self._keyset_page(
+                session,
+                select_rows(ClosedTicketRow).where(*filters),
+                row_type=ClosedTicketRow,
+                columns=CLOSED_LIST_KEY,
+                cursor=cursor,
+                page_size=page_size,
+                nullable_first=True,
+            )
+            if with_total:
+                page.total = await self._approximate_count(session, ("closed", executor_id), filters)
+            return page
+
+        key = ("closed", cursor, page_size, with_total)
+        return await ticket_list_cache.get_or_load(executor_scope(executor_id), key, load)
+
+    async def list_transfer_pending(self, session: AsyncSession, limit: int = 20) -> list[TransferRow]:
+        async def load() -> list[TransferRow]:
+            result = await session.execute(
+                select_rows(TransferRow)
+                .where(Ticket.transfer_status == TransferStatus.SENT)
+                .order_by(Ticket.id.desc())
+                .limit(limit)
+            )
+            return to_rows(TransferRow, result)
+
+        return await ticket_list_cache.get_or_load(ALL_SCOPE, ("transfer_pending", limit), load)
 
     async def list_repeats(self, session: AsyncSession, limit: int = 20) -> list[Ticket]:
         result = await session.execute(
@@ -195,112 +329,49 @@ class TicketService:
         return None
 
     async def cancel_ticket(self, session: AsyncSession, ticket: Ticket) -> Ticket:
+        # Callers load the ticket without a lock; reload it locked so a close or transfer confirmation committed
+        # since then is what gets taken back out of the rollup. Only columns, so loaded relationships stay usable.
+        await session.refresh(
+            ticket, attribute_names=[attr.key for attr in Ticket.__mapper__.column_attrs], with_for_update=True
+        )
+        closed = TicketFigures.of(ticket)
         ticket.status = TicketStatus.CANCELLED
         await session.flush()
+        if closed is not None:
+            await finance_rollup.apply_ticket_change(session, before=closed, after=None)
+        ticket_list_cache.invalidate_on_commit(session, ticket_change_scopes(ticket.assigned_executor_id, queue=True))
         return ticket
 
-    async def take_ticket(self, session: AsyncSession, ticket_id: int, actor_id: int) -> Ticket | None:
+    async def take_ticket(self, session: AsyncSession, ticket_id: int, actor: User) -> Ticket | None:
         """Assign a master to a ticket to prevent double-taking in a shared queue."""
-        if not await self._ensure_actor_role(
-            session,
-            actor_id,
-            {UserRole.MASTER, UserRole.JUNIOR_MASTER, UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN},
-        ):
-            await self._log_permission_denied(
-                session,
-                actor_id=actor_id,
-                ticket_id=ticket_id,
-                reason="TAKE_TICKET",
-            )
-            return None
-        before_ticket = await self.get_ticket(session, ticket_id)
         now = datetime.utcnow()
-        result = await session.execute(
-            update(Ticket)
-            .where(
-                Ticket.id == ticket_id,
-                Ticket.status == TicketStatus.READY_FOR_WORK,
-                Ticket.assigned_executor_id.is_(None),
-            )
-            .values(
-                assigned_executor_id=actor_id,
-                status=TicketStatus.IN_WORK,
-                taken_at=now,
-                updated_at=now,
-            )
+        return await self._apply_transition(
+            session,
+            TICKET_TRANSITIONS["take"],
+            ticket_id=ticket_id,
+            actor=actor,
+            values={
+                "assigned_executor_id": actor.id,
+                "status": TicketStatus.IN_WORK,
+                "taken_at": now,
+                "updated_at": now,
+            },
         )
-        if result.rowcount == 0:
-            await self._log_invalid_transition(session, ticket_id=ticket_id, actor_id=actor_id, reason="TAKE_TICKET")
-            return None
-        ticket = await self.get_ticket_with_executor(session, ticket_id)
-        if ticket:
-            await self._audit.log_event(
-                session,
-                ticket_id=ticket.id,
-                action="TICKET_TAKEN",
-                actor_id=actor_id,
-                payload={
-                    "before": {
-                        "status": before_ticket.status.value if before_ticket else None,
-                        "assigned_executor_id": before_ticket.assigned_executor_id if before_ticket else None,
-                    },
-                    "after": {
-                        "status": ticket.status.value,
-                        "assigned_executor_id": ticket.assigned_executor_id,
-                    },
-                },
-            )
-        return ticket
 
-    async def set_in_progress(self, session: AsyncSession, ticket_id: int, actor_id: int) -> Ticket | None:
-        if not await self._ensure_actor_role(
+    async def set_in_progress(self, session: AsyncSession, ticket_id: int, actor: User) -> Ticket | None:
+        return await self._apply_transition(
             session,
-            actor_id,
-            {UserRole.MASTER, UserRole.JUNIOR_MASTER, UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN},
-        ):
-            await self._log_permission_denied(
-                session,
-                actor_id=actor_id,
-                ticket_id=ticket_id,
-                reason="SET_IN_PROGRESS",
-            )
-            return None
-        before_ticket = await self.get_ticket(session, ticket_id)
-        now = datetime.utcnow()
-        allowed = [TicketStatus.IN_WORK, TicketStatus.TAKEN, TicketStatus.WAITING]
-        result = await session.execute(
-            update(Ticket)
-            .where(
-                Ticket.id == ticket_id,
-                Ticket.assigned_executor_id == actor_id,
-                Ticket.status.in_(allowed),
-            )
-            .values(status=TicketStatus.IN_PROGRESS, updated_at=now)
+            TICKET_TRANSITIONS["in_progress"],
+            ticket_id=ticket_id,
+            actor=actor,
+            values={"status": TicketStatus.IN_PROGRESS, "updated_at": datetime.utcnow()},
         )
-        if result.rowcount == 0:
-            await self._log_invalid_transition(
-                session, ticket_id=ticket_id, actor_id=actor_id, reason="SET_IN_PROGRESS"
-            )
-            return None
-        ticket = await self.get_ticket_with_executor(session, ticket_id)
-        if ticket:
-            await self._audit.log_event(
-                session,
-                ticket_id=ticket.id,
-                action="TICKET_STATUS_UPDATED",
-                actor_id=actor_id,
-                payload={
-                    "before": {"status": before_ticket.status.value if before_ticket else None},
-                    "after": {"status": TicketStatus.IN_PROGRESS.value},
-                },
-            )
-        return ticket
 
     async def close_ticket(
         self,
         session: AsyncSession,
         ticket_id: int,
-        actor_id: int,
+        actor: User,
         *,
         revenue: Decimal,
         expense: Decimal,
@@ -312,14 +383,29 @@ class TicketService:
     ) -> Ticket | None:
         """Freeze financial totals and payouts to ensure later disputes have a stable ledger."""
         now = datetime.utcnow()
-        ticket = await self.get_ticket_with_executor(session, ticket_id)
-        if not ticket:
+        actor_id = actor.id
+        executor = aliased(User)
+        admin = aliased(User)
+        current = (
+            await session.execute(
+                select(
+                    Ticket.status,
+                    Ticket.assigned_executor_id,
+                    Ticket.created_by_admin_id,
+                    Ticket.revenue,
+                    Ticket.expense,
+                    executor.master_percent,
+                    admin.admin_percent,
+                )
+                .outerjoin(executor, executor.id == Ticket.assigned_executor_id)
+                .outerjoin(admin, admin.id == Ticket.created_by_admin_id)
+                .where(Ticket.id == ticket_id)
+                .with_for_update(of=Ticket)
+            )
+        ).one_or_none()
+        if current is None:
             return None
-        if not await self._ensure_actor_role(
-            session,
-            actor_id,
-            {UserRole.MASTER, UserRole.JUNIOR_MASTER, UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN},
-        ):
+        if actor.role not in _EXECUTION_ROLES:
             await self._log_permission_denied(
                 session,
                 actor_id=actor_id,
@@ -327,8 +413,8 @@ class TicketService:
                 reason="CLOSE_TICKET",
             )
             return None
-        executor_id = ticket.assigned_executor_id
-        admin_id = ticket.created_by_admin_id
+        executor_id = current.assigned_executor_id
+        admin_id = current.created_by_admin_id
         if executor_id is None or admin_id is None:
             return None
         if not allow_override and executor_id != actor_id:
@@ -339,22 +425,22 @@ class TicketService:
                 reason="CLOSE_TICKET_NOT_EXECUTOR",
             )
             return None
-        before_status = ticket.status
-        if ticket.status != TicketStatus.IN_PROGRESS:
+        before_status = current.status
+        if current.status != TicketStatus.IN_PROGRESS:
             await self._log_invalid_transition(
                 session,
                 ticket_id=ticket_id,
                 actor_id=actor_id,
                 reason="CLOSE_TICKET_NOT_IN_PROGRESS",
-                before={"status": ticket.status.value},
+                before={"status": current.status.value},
             )
             return None
 
-        previous_revenue = Decimal(ticket.revenue or 0)
-        previous_expense = Decimal(ticket.expense or 0)
+        previous_revenue = Decimal(current.revenue or 0)
+        previous_expense = Decimal(current.expense or 0)
 
-        executor_percent = await self._get_user_percent(session, executor_id, field="master_percent")
-        admin_percent = await self._get_user_percent(session, admin_id, field="admin_percent")
+        executor_percent = current.master_percent if current.master_percent is not None else Decimal("0")
+        admin_percent = current.admin_percent if current.admin_percent is not None else Decimal("0")
         junior_percent = junior_master_percent or Decimal("0")
 
         try:
@@ -377,15 +463,18 @@ class TicketService:
                 ticket_id=ticket_id,
                 actor_id=actor_id,
                 reason="CLOSE_TICKET_PAYOUTS_INVALID",
+                before={"status": current.status.value},
             )
             return None
 
-        allowed = [TicketStatus.IN_PROGRESS]
-        query = update(Ticket).where(Ticket.id == ticket_id, Ticket.status.in_(allowed))
+        tickets = Ticket.__table__
+        conditions = [tickets.c.id == ticket_id, tickets.c.status == TicketStatus.IN_PROGRESS]
         if not allow_override:
-            query = query.where(Ticket.assigned_executor_id == actor_id)
-        result = await session.execute(
-            query.values(
+            conditions.append(tickets.c.assigned_executor_id == actor_id)
+        updated = (
+            update(tickets)
+            .where(*conditions)
+            .values(
                 status=TicketStatus.CLOSED,
                 closed_at=now,
                 closed_by_user_id=actor_id,
@@ -407,43 +496,43 @@ class TicketService:
                 project_take_amount=payouts["project_take"],
                 updated_at=now,
             )
+            .returning(*tickets.c)
+            .cte("updated")
         )
-        if result.rowcount == 0:
+        ticket = (await session.execute(self._select_updated_ticket(updated))).scalar_one_or_none()
+        if ticket is None:
             await self._log_invalid_transition(
                 session, ticket_id=ticket_id, actor_id=actor_id, reason="CLOSE_TICKET"
             )
             return None
-        ticket = await self.get_ticket_with_executor(session, ticket_id)
-        if ticket and close_photos:
-            session.add_all(
-                [
-                    TicketClosePhoto(
-                        ticket_id=ticket.id,
-                        file_id=item["file_id"],
-                        file_unique_id=item.get("file_unique_id"),
-                        created_at=now,
-                    )
-                    for item in close_photos
-                    if item.get("file_id")
-                ]
-            )
 
-        await self._append_money_operations(
-            session,
-            ticket=ticket,
-            revenue=revenue,
-            expense=expense,
-            old_revenue=previous_revenue,
-            old_expense=previous_expense,
-            comment=closed_comment,
-        )
-        if ticket:
-            await self._audit.log_event(
-                session,
+        # Everything below is written by one flush: a multi-row INSERT per table.
+        pending: list[Any] = [
+            TicketClosePhoto(
                 ticket_id=ticket.id,
-                action="TICKET_CLOSED",
-                actor_id=actor_id,
-                payload={
+                file_id=item["file_id"],
+                file_unique_id=item.get("file_unique_id"),
+                created_at=now,
+            )
+            for item in close_photos or []
+            if item.get("file_id")
+        ]
+        pending.extend(
+            self._money_operations(
+                ticket=ticket,
+                revenue=revenue,
+                expense=expense,
+                old_revenue=previous_revenue,
+                old_expense=previous_expense,
+                comment=closed_comment,
+            )
+        )
+        pending.append(
+            self._audit.build_event(
+                ticket.id,
+                "TICKET_CLOSED",
+                actor_id,
+                {
                     "before": {"status": before_status.value if before_status else None},
                     "after": {"status": ticket.status.value},
                     "revenue": float(revenue),
@@ -457,12 +546,13 @@ class TicketService:
                     "close_photo_count": len(close_photos or []),
                 },
             )
-            await self._audit.log_event(
-                session,
-                ticket_id=ticket.id,
-                action="TICKET_PAYOUTS_FIXED",
-                actor_id=actor_id,
-                payload={
+        )
+        pending.append(
+            self._audit.build_event(
+                ticket.id,
+                "TICKET_PAYOUTS_FIXED",
+                actor_id,
+                {
                     "before": None,
                     "after": {
                         "executor_percent": float(executor_percent),
@@ -478,6 +568,11 @@ class TicketService:
                     "project_take": float(payouts["project_take"]),
                 },
             )
+        )
+        session.add_all(pending)
+        await session.flush()
+        await finance_rollup.apply_ticket_change(session, before=None, after=TicketFigures.of(ticket))
+        ticket_list_cache.invalidate_on_commit(session, ticket_change_scopes(ticket.assigned_executor_id))
         return ticket
 
 
@@ -489,96 +584,147 @@ class TicketService:
         )
         return list(result.scalars().all())
 
-    async def mark_transfer_sent(self, session: AsyncSession, ticket_id: int, actor_id: int) -> Ticket | None:
+    async def mark_transfer_sent(self, session: AsyncSession, ticket_id: int, actor: User) -> Ticket | None:
         now = datetime.utcnow()
-        ticket = await self.get_ticket_with_executor(session, ticket_id)
-        if not ticket:
-            return None
-        if ticket.assigned_executor_id != actor_id:
-            await self._log_permission_denied(
-                session,
-                actor_id=actor_id,
-                ticket_id=ticket_id,
-                reason="TRANSFER_SENT_NOT_EXECUTOR",
-            )
-            return None
-        result = await session.execute(
-            update(Ticket)
-            .where(
-                Ticket.id == ticket_id,
-                Ticket.assigned_executor_id == actor_id,
-                Ticket.status == TicketStatus.CLOSED,
-                Ticket.transfer_status == TransferStatus.NOT_SENT,
-            )
-            .values(transfer_status=TransferStatus.SENT, transfer_sent_at=now, updated_at=now)
+        return await self._apply_transition(
+            session,
+            TICKET_TRANSITIONS["transfer_sent"],
+            ticket_id=ticket_id,
+            actor=actor,
+            values={"transfer_status": TransferStatus.SENT, "transfer_sent_at": now, "updated_at": now},
         )
-        if result.rowcount == 0:
-            await self._log_invalid_transition(
-                session, ticket_id=ticket_id, actor_id=actor_id, reason="TRANSFER_SENT"
-            )
-            return None
-        if ticket:
-            await self._audit.log_event(
-                session,
-                ticket_id=ticket.id,
-                action="TRANSFER_SENT",
-                actor_id=actor_id,
-                payload={
-                    "before": {"transfer_status": ticket.transfer_status.value if ticket.transfer_status else None},
-                    "after": {"transfer_status": TransferStatus.SENT.value},
-                },
-            )
-        return ticket
 
     async def confirm_transfer(
         self,
         session: AsyncSession,
         ticket_id: int,
-        actor_id: int,
+        actor: User,
         *,
         approved: bool,
     ) -> Ticket | None:
         """Confirm transfers centrally to stop accidental confirmations from executors."""
         now = datetime.utcnow()
-        if not await self._ensure_actor_role(session, actor_id, {UserRole.SUPER_ADMIN, UserRole.SYS_ADMIN}):
-            await self._log_permission_denied(
+        ticket = await self._apply_transition(
+            session,
+            TICKET_TRANSITIONS["transfer_confirm" if approved else "transfer_reject"],
+            ticket_id=ticket_id,
+            actor=actor,
+            values={
+                "transfer_status": TransferStatus.CONFIRMED if approved else TransferStatus.REJECTED,
+                "transfer_confirmed_by": actor.id,
+                "transfer_confirmed_at": now,
+                "updated_at": now,
+            },
+        )
+        if ticket is not None and approved:
+            # Only SENT transfers can be confirmed; the money moves from pending to confirmed.
+            await finance_rollup.apply_ticket_change(
                 session,
-                actor_id=actor_id,
-                ticket_id=ticket_id,
-                reason="TRANSFER_CONFIRM",
+                before=TicketFigures.of(ticket, transfer_status=TransferStatus.SENT),
+                after=TicketFigures.of(ticket),
             )
+        return ticket
+
+    async def _apply_transition(
+        self,
+        session: AsyncSession,
+        transition: TicketTransition,
+        *,
+        ticket_id: int,
+        actor: User,
+        values: dict[str, Any],
+    ) -> Ticket | None:
+        """Run a transition as one statement: lock and read the old row, update it, write the TicketEvent.
+
+        Returns the updated ticket with its users loaded, or None when the actor's role
+        is not allowed or the ticket is not in a source state (both are audited).
+        """
+        if transition.roles is not None and actor.role not in transition.roles:
+            await self._log_permission_denied(session, actor_id=actor.id, ticket_id=ticket_id, reason=transition.reason)
             return None
-        status = TransferStatus.CONFIRMED if approved else TransferStatus.REJECTED
-        action = "TRANSFER_CONFIRMED" if approved else "TRANSFER_REJECTED"
-        result = await session.execute(
-            update(Ticket)
-            .where(Ticket.id == ticket_id, Ticket.transfer_status == TransferStatus.SENT)
-            .values(
-                transfer_status=status,
-                transfer_confirmed_by=actor_id,
-                transfer_confirmed_at=now,
-                updated_at=now,
-            )
+        tickets = Ticket.__table__
+        before = (
+            select(tickets.c.id, *(tickets.c[name] for name in transition.tracked))
+            .where(tickets.c.id == ticket_id)
+            .with_for_update()
+            .cte("before")
         )
-        if result.rowcount == 0:
-            await self._log_invalid_transition(
-                session, ticket_id=ticket_id, actor_id=actor_id, reason="TRANSFER_CONFIRM"
-            )
+        updated = (
+            update(tickets)
+            .where(tickets.c.id == before.c.id, *transition.conditions(actor))
+            .values(**values)
+            .returning(*tickets.c, *(before.c[name].label(f"before_{name}") for name in transition.tracked))
+            .cte("updated")
+        )
+        now = datetime.utcnow()
+        payload = func.json_build_object(
+            literal("before"),
+            _json_object({name: updated.c[f"before_{name}"] for name in transition.tracked}),
+            literal("after"),
+            _json_object({name: updated.c[name] for name in transition.tracked}),
+            literal("actor_id"),
+            literal(actor.id),
+            literal("ticket_id"),
+            updated.c.id,
+            literal("timestamp"),
+            literal(now.isoformat()),
+        )
+        event = insert(TicketEvent.__table__).from_select(
+            ["ticket_id", "actor_id", "action", "payload", "created_at"],
+            select(updated.c.id, literal(actor.id), literal(transition.action), payload, literal(now)),
+        ).cte("event")
+        result = await session.execute(self._select_updated_ticket(updated).add_cte(event))
+        ticket = result.scalar_one_or_none()
+        if ticket is None:
+            await self._log_failed_transition(session, transition, ticket_id=ticket_id, actor=actor)
             return None
-        ticket = await self.get_ticket_with_executor(session, ticket_id)
-        if ticket:
-            await self._audit.log_event(
-                session,
-                ticket_id=ticket.id,
-                action=action,
-                actor_id=actor_id,
-                payload={
-                    "before": {"transfer_status": TransferStatus.SENT.value},
-                    "after": {"transfer_status": status.value},
-                },
-            )
+        # Only "take" moves a ticket out of the queue; the executor itself never changes here otherwise.
+        queue = transition.executor == "unassigned"
+        ticket_list_cache.invalidate_on_commit(session, ticket_change_scopes(ticket.assigned_executor_id, queue=queue))
         return ticket
 
+    @staticmethod
+    def _select_updated_ticket(updated: Any) -> Any:
+        """Map the rows RETURNING-ed by an ``updated`` CTE onto Ticket, with the users cards render joined in."""
+        ticket_row = aliased(Ticket, updated)
+        return (
+            select(ticket_row)
+            .options(
+                joinedload(ticket_row.assigned_executor),
+                joinedload(ticket_row.junior_master),
+                joinedload(ticket_row.closed_by_user),
+            )
+            .execution_options(populate_existing=True)
+        )
+
+    async def _log_failed_transition(
+        self,
+        session: AsyncSession,
+        transition: TicketTransition,
+        *,
+        ticket_id: int,
+        actor: User,
+    ) -> None:
+        # Only the failure path pays for a read: it tells "not your ticket" apart from "wrong state".
+        current = await session.execute(
+            select(Ticket.status, Ticket.assigned_executor_id).where(Ticket.id == ticket_id)
+        )
+        row = current.one_or_none()
+        if row is None:
+            return
+        if transition.executor == "actor" and row.assigned_executor_id != actor.id and transition.not_executor_reason:
+            await self._log_permission_denied(
+                session, actor_id=actor.id, ticket_id=ticket_id, reason=transition.not_executor_reason
+            )
+            return
+        await self._log_invalid_transition(
+            session,
+            ticket_id=ticket_id,
+            actor_id=actor.id,
+            reason=transition.reason,
+            before={"status": row.status.value},
+        )
+
     async def get_ticket_with_executor(self, session: AsyncSession, ticket_id: int) -> Ticket | None:
         result = await session.execute(
             select(Ticket)
@@ -594,15 +740,18 @@ class TicketService:
         *,
         statuses: list[TicketStatus],
         limit: int = 20,
-    ) -> list[Ticket]:
-        result = await session.execute(
-            select(Ticket)
-            .options(selectinload(Ticket.assigned_executor), selectinload(Ticket.junior_master), selectinload(Ticket.closed_by_user))
-            .where(Ticket.assigned_executor_id == master_id, Ticket.status.in_(statuses))
-            .order_by(Ticket.id.desc())
-            .limit(limit)
-        )
-        return list(result.scalars().all())
+    ) -> list[TicketListRow]:
+        async def load() -> list[TicketListRow]:
+            result = await session.execute(
+                select_rows(TicketListRow)
+                .where(Ticket.assigned_executor_id == master_id, Ticket.status.in_(statuses))
+                .order_by(Ticket.id.desc())
+                .limit(limit)
+            )
+            return to_rows(TicketListRow, result)
+
+        key = ("master", tuple(statuses), limit)
+        return await ticket_list_cache.get_or_load(executor_scope(master_id), key, load)
 
     async def list_for_actor(
         self,
@@ -633,24 +782,35 @@ class TicketService:
         actor: User,
         *,
         filter_key: str,
-        page: int,
+        cursor: PageCursor | None = None,
         page_size: int,
-    ) -> tuple[list[Ticket], int]:
-        base_query = select(Ticket).order_by(Ticket.id.desc())
-        base_query = self._apply_filter_key(base_query, filter_key)
+        with_total: bool = False,
+    ) -> KeysetPage[TicketListRow]:
         access_filter = self._build_access_filter(actor)
         if access_filter is False:
-            return [], 0
+            return KeysetPage(items=[], has_prev=False, has_next=False, total=0 if with_total else None)
+        filters = self._filter_key_clauses(filter_key)
         if access_filter is not None:
-            base_query = base_query.where(access_filter)
-        total_query = select(func.count()).select_from(Ticket)
-        total_query = self._apply_filter_key(total_query, filter_key)
-        if access_filter is not None:
-            total_query = total_query.where(access_filter)
-        total_result = await session.execute(total_query)
-        total = int(total_result.scalar_one())
-        result = await session.execute(base_query.offset(page * page_size).limit(page_size))
-        return list(result.scalars().all()), total
+            filters.append(access_filter)
+
+        async def load() -> KeysetPage[TicketListRow]:
+            page = await self._keyset_page(
+                session,
+                select_rows(TicketListRow).where(*filters),
+                row_type=TicketListRow,
+                columns=TICKET_LIST_KEY,
+                cursor=cursor,
+                page_size=page_size,
+            )
+            if with_total:
+                scope = actor.id if access_filter is not None else None
+                page.total = await self._approximate_count(session, ("list", filter_key, scope), filters)
+            return page
+
+        # Masters only see their own tickets, so their pages follow their executor scope.
+        cache_scope = executor_scope(actor.id) if access_filter is not None else ALL_SCOPE
+        key = ("list", filter_key, cursor, page_size, with_total)
+        return await ticket_list_cache.get_or_load(cache_scope, key, load)
 
     async def search_for_actor_page(
         self,
@@ -660,67 +820,90 @@ class TicketService:
         ticket_id: int | None = None,
         public_id: str | None = None,
         phone_digits: str | None = None,
-        page: int,
+        cursor: PageCursor | None = None,
         page_size: int,
-    ) -> tuple[list[Ticket], int]:
+    ) -> KeysetPage[TicketListRow]:
+        empty: KeysetPage[TicketListRow] = KeysetPage(items=[], has_prev=False, has_next=False)
         access_filter = self._build_access_filter(actor)
         if access_filter is False:
-            return [], 0
-        base_query = select(Ticket).order_by(Ticket.id.desc())
+            return empty
         filters = []
         if ticket_id is not None:
             filters.append(Ticket.id == ticket_id)
         elif public_id:
             filters.append(Ticket.public_id == public_id)
         elif phone_digits:
-            phone_expr = func.regexp_replace(Ticket.client_phone, r"\D", "", "g")
-            filters.append(phone_expr.ilike(f"%{phone_digits}%"))
+            # Plain LIKE over the stored digits so the pg_trgm index serves substring and suffix lookups.
+            filters.append(Ticket.client_phone_digits.like(f"%{normalize_phone_digits(phone_digits)}%"))
         else:
-            return [], 0
+            return empty
         if access_filter is not None:
             filters.append(access_filter)
-        total_query = select(func.count()).select_from(Ticket).where(*filters)
-        total_result = await session.execute(total_query)
-        total = int(total_result.scalar_one())
-        result = await session.execute(
-            base_query.where(*filters).offset(page * page_size).limit(page_size)
-        )
-        return list(result.scalars().all()), total
-
-    async def _generate_ticket_public_id(self, session: AsyncSession, created_at: datetime) -> str:
-        counter_day = created_at.date()
-        seq_value = await self._next_daily_counter(session, counter_day)
-        if seq_value > 99:
-            raise ValueError(f"Превышен лимит заявок на дату {counter_day.isoformat()} (максимум 99)")
-        return f"{counter_day.strftime('%d%m%y')}{seq_value:02d}"
-
-    async def _next_daily_counter(self, session: AsyncSession, counter_day: date) -> int:
-        statement = (
-            pg_insert(DailyCounter)
-            .values(counter_date=counter_day, counter=1)
-            .on_conflict_do_update(
-                index_elements=[DailyCounter.counter_date],
-                set_={"counter": DailyCounter.counter + 1},
-            )
-            .returning(DailyCounter.counter)
+        return await self._keyset_page(
+            session,
+            select_rows(TicketListRow).where(*filters),
+            row_type=TicketListRow,
+            columns=TICKET_LIST_KEY,
+            cursor=cursor,
+            page_size=page_size,
         )
-        result = await session.execute(statement)
-        return int(result.scalar_one())
 
-    async def _append_money_operations(
+    async def _keyset_page(
         self,
         session: AsyncSession,
+        query,
+        *,
+        row_type: type[RowT],
+        columns: tuple[Any, ...],
+        cursor: PageCursor | None,
+        page_size: int,
+        nullable_first: bool = False,
+    ) -> KeysetPage[RowT]:
+        # Seek from the cursor instead of OFFSET so a page costs the same at any depth. Pages going back
+        # are read in ascending order and flipped.
+        backwards = cursor is not None and cursor.direction == "before"
+        if cursor is not None:
+            query = query.where(keyset_condition(columns, cursor, nullable_first=nullable_first))
+        order_by = [column.asc() if backwards else column.desc() for column in columns]
+        if nullable_first:
+            order_by[0] = order_by[0].nullsfirst() if backwards else order_by[0].nullslast()
+        result = await session.execute(query.order_by(*order_by).limit(page_size + 1))
+        tickets = to_rows(row_type, result)
+        has_more = len(tickets) > page_size
+        tickets = tickets[:page_size]
+        if backwards:
+            tickets.reverse()
+        names = [column.key for column in columns]
+        return KeysetPage(
+            items=tickets,
+            has_prev=has_more if backwards else cursor is not None,
+            has_next=True if backwards else has_more,
+            first_key=tuple(getattr(tickets[0], name) for name in names) if tickets else None,
+            last_key=tuple(getattr(tickets[-1], name) for name in names) if tickets else None,
+        )
+
+    async def _approximate_count(self, session: AsyncSession, key: tuple[Any, ...], filters: list[Any]) -> int:
+        async def load() -> int:
+            result = await session.execute(select(func.count()).select_from(Ticket).where(*filters))
+            return int(result.scalar_one())
+
+        return await ticket_counts.get(key, load)
+
+    async def _generate_ticket_public_id(self, created_at: datetime) -> str:
+        # Numbers come from a per-process block reserved in its own short transaction, so the creating
+        # transaction never holds the daily_counters row lock.
+        return await public_ids.next_public_id(created_at.date())
+
+    def _money_operations(
+        self,
         *,
-        ticket: Ticket | None,
+        ticket: Ticket,
         revenue: Decimal,
         expense: Decimal,
         old_revenue: Decimal,
         old_expense: Decimal,
         comment: str | None,
-    ) -> None:
-        if ticket is None:
-            return
-
+    ) -> list[TicketMoneyOperation]:
         category_snapshot = ticket.category.value if ticket.category else "UNKNOWN"
         income_delta = self._round_money(revenue - old_revenue)
         expense_delta = self._round_money(expense - old_expense)
@@ -746,17 +929,7 @@ class TicketService:
                     comment=comment,
                 )
             )
-
-        if operations:
-            session.add_all(operations)
-
-    async def _get_user_percent(self, session: AsyncSession, user_id: int, *, field: str) -> Decimal:
-        result = await session.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-        if not user:
-            return Decimal("0")
-        value = getattr(user, field, None)
-        return value if value is not None else Decimal("0")
+        return operations
 
     def calculate_payouts(
         self,
@@ -801,12 +974,6 @@ class TicketService:
     def _round_money(self, value: Decimal) -> Decimal:
         return value.quantize(self._money_round, rounding=ROUND_HALF_UP)
 
-    async def _ensure_actor_role(self, session: AsyncSession, actor_id: int, allowed_roles: set[UserRole]) -> bool:
-        actor = await session.get(User, actor_id)
-        if not actor or actor.role not in allowed_roles:
-            return False
-        return True
-
     def _build_access_filter(self, actor: User) -> bool | Any:
         if actor.role in {UserRole.MASTER, UserRole.JUNIOR_MASTER}:
             return Ticket.assigned_executor_id == actor.id
@@ -820,12 +987,12 @@ class TicketService:
         return False
 
     @staticmethod
-    def _apply_filter_key(query, filter_key: str):
+    def _filter_key_clauses(filter_key: str) -> list[Any]:
         if filter_key == "active":
-            return query.where(Ticket.status.in_(TicketService.ACTIVE_LIST_STATUSES))
+            return [Ticket.status.in_(TicketService.ACTIVE_LIST_STATUSES)]
         if filter_key == "repeat":
-            return query.where(Ticket.is_repeat.is_(True))
-        return query
+            return [Ticket.is_repeat.is_(True)]
+        return []
 
     def _can_view_ticket(self, actor: User, ticket: Ticket) -> bool:
         if actor.role in {
@@ -849,10 +1016,12 @@ class TicketService:
         before: dict[str, Any] | None = None,
         after: dict[str, Any] | None = None,
     ) -> None:
-        ticket = await self.get_ticket(session, ticket_id)
+        if before is None:
+            ticket = await self.get_ticket(session, ticket_id)
+            before = {"status": ticket.status.value} if ticket else None
         payload = {
             "reason": reason,
-            "before": before or ({"status": ticket.status.value} if ticket else None),
+            "before": before,
             "after": after,
         }
         await self._audit.log_audit_event(
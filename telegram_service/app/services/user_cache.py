@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.models import User
+
+
+PENDING_INVALIDATIONS_KEY = "user_cache_invalidate"
+
+
+class UserCache:
+    """Process-wide TTL/LRU cache of resolved actors, keyed by Telegram user id."""
+
+    def __init__(self, *, ttl: float, max_size: int) -> None:
+        self._ttl = ttl
+        self._max_size = max_size
+        self._items: OrderedDict[int, tuple[float, User]] = OrderedDict()
+
+    def get(self, user_id: int) -> User | None:
+        item = self._items.get(user_id)
+        if item is None:
+            return None
+        expires_at, user = item
+        if expires_at < time.monotonic():
+            del self._items[user_id]
+            return None
+        self._items.move_to_end(user_id)
+        return user
+
+    def put(self, user: User) -> None:
+        if self._ttl <= 0:
+            return
+        self._items[user.id] = (time.monotonic() + self._ttl, user)
+        self._items.move_to_end(user.id)
+        while len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._items.pop(user_id, None)
+
+    def invalidate_on_commit(self, session: AsyncSession, user_id: int) -> None:
+        # Drop now so this process stops serving the old row, and again after commit so a
+        # concurrent resolve that re-read the pre-commit row cannot keep it alive.
+        self.invalidate(user_id)
+        session.sync_session.info.setdefault(PENDING_INVALIDATIONS_KEY, set()).add(user_id)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+_settings = get_settings()
+user_cache = UserCache(ttl=_settings.user_cache_ttl, max_size=_settings.user_cache_size)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_pending_users(session: Session) -> None:
+    for user_id in session.info.pop(PENDING_INVALIDATIONS_KEY, ()):
+        user_cache.invalidate(user_id)
@@ -9,6 +9,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import get_settings
 from app.db.enums import UserRole
 from app.db.models import User
+from app.services.ticket_list_cache import ticket_change_scopes, ticket_list_cache
+from app.services.user_cache import user_cache
 
 logger = logging.getLogger(__name__)
 
@@ -37,20 +39,21 @@ class UserService:
     ) -> User:
         result = await session.execute(select(User).where(User.id == tg_user_id))
         user = result.scalar_one_or_none()
-        required_role: UserRole | None = None
-        reason: str | None = None
-        if self.settings.super_admin is not None and tg_user_id == self.settings.super_admin:
-            required_role = UserRole.SUPER_ADMIN
-            reason = "super_admin_env"
-        elif tg_user_id in self.settings.sys_admin_id_set():
-            required_role = UserRole.SYS_ADMIN
-            reason = "sys_admin_env"
+        required_role, reason = self._required_role(tg_user_id)
         if user:
-            user.display_name = display_name
-            user.username = username
-            if required_role and ROLE_PRIORITY[required_role] > ROLE_PRIORITY[user.role]:
+            changed = False
+            if user.display_name != display_name:
+                user.display_name = display_name
+                # Cached ticket lists carry the executor's display name.
+                ticket_list_cache.invalidate_on_commit(session, ticket_change_scopes(user.id, queue=True))
+                changed = True
+            if user.username != username:
+                user.username = username
+                changed = True
+            if self._needs_promotion(user, required_role):
                 old_role = user.role
                 user.role = required_role
+                ticket_list_cache.invalidate_on_commit(session, ticket_change_scopes(user.id, queue=True))
                 logger.info(
                     "User role promoted via env: tg_user_id=%s db_user_id=%s old_role=%s new_role=%s reason=%s",
                     tg_user_id,
@@ -59,7 +62,9 @@ class UserService:
                     user.role.value,
                     reason,
                 )
-            await session.flush()
+                changed = True
+            if changed:
+                await session.flush()
             if log_diagnostics:
                 logger.info(
                     "Ensure user diagnostics: tg_user_id=%s db_user_id=%s role=%s display_name=%s",
@@ -85,6 +90,30 @@ class UserService:
             )
         return user
 
+    async def resolve_user(
+        self,
+        session: AsyncSession,
+        tg_user_id: int,
+        display_name: str | None,
+        username: str | None = None,
+    ) -> User:
+        """Return the actor for an update, touching the database only on a cache miss or a real change."""
+        cached = user_cache.get(tg_user_id)
+        if (
+            cached is not None
+            and cached.display_name == display_name
+            and cached.username == username
+            and not self._needs_promotion(cached, self._required_role(tg_user_id)[0])
+        ):
+            return cached
+        user = await self.ensure_user(session, tg_user_id, display_name, username)
+        # Commit before caching so a handler failure cannot roll back a user row the cache already serves,
+        # and detach so a later rollback of this update's session cannot expire the shared instance.
+        await session.commit()
+        session.expunge(user)
+        user_cache.put(user)
+        return user
+
     async def list_users(self, session: AsyncSession, limit: int = 20) -> list[User]:
         result = await session.execute(select(User).order_by(User.id.desc()).limit(limit))
         return list(result.scalars().all())
@@ -100,11 +129,14 @@ class UserService:
     async def set_role(self, session: AsyncSession, user: User, role: UserRole) -> User:
         user.role = role
         await session.flush()
+        user_cache.invalidate_on_commit(session, user.id)
+        ticket_list_cache.invalidate_on_commit(session, ticket_change_scopes(user.id, queue=True))
         return user
 
     async def set_active(self, session: AsyncSession, user: User, is_active: bool) -> User:
         user.is_active = is_active
         await session.flush()
+        user_cache.invalidate_on_commit(session, user.id)
         return user
 
     async def set_master_percent(self, session: AsyncSession, user: User, percent: Decimal | None) -> User:
@@ -112,6 +144,7 @@ class UserService:
             percent = self._validate_percent(percent)
         user.master_percent = percent
         await session.flush()
+        user_cache.invalidate_on_commit(session, user.id)
         return user
 
     async def set_admin_percent(self, session: AsyncSession, user: User, percent: Decimal | None) -> User:
@@ -119,8 +152,19 @@ class UserService:
             percent = self._validate_percent(percent)
         user.admin_percent = percent
         await session.flush()
+        user_cache.invalidate_on_commit(session, user.id)
         return user
 
+    def _required_role(self, tg_user_id: int) -> tuple[UserRole | None, str | None]:
+        if self.settings.super_admin is not None and tg_user_id == self.settings.super_admin:
+            return UserRole.SUPER_ADMIN, "super_admin_env"
+        if tg_user_id in self.settings.sys_admin_id_set():
+            return UserRole.SYS_ADMIN, "sys_admin_env"
+        return None, None
+
+    def _needs_promotion(self, user: User, required_role: UserRole | None) -> bool:
+        return required_role is not None and ROLE_PRIORITY[required_role] > ROLE_PRIORITY[user.role]
+
     def _validate_percent(self, percent: Decimal) -> Decimal:
         if percent < 0 or percent > 100:
             raise ValueError("Процент должен быть от 0 до 100")
@@ -1,13 +1,70 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from aiogram import Bot
 from fastapi import FastAPI
 
+from app.bot.client import create_bot
+from app.bot.dispatcher import create_dispatcher
+from app.core.config import get_settings
+from app.services.outbox_dispatcher import OutboxDispatcher
 from app.webhook.router import router as lead_router
+from app.webhook.telegram import create_telegram_router, register_telegram_webhook
+from app.webhook.updates import UpdateWorkerPool
+
+
+def create_app(
+    *,
+    bot: Bot | None = None,
+    outbox_dispatcher: OutboxDispatcher | None = None,
+    update_pool: UpdateWorkerPool | None = None,
+) -> FastAPI:
+    settings = get_settings()
+    webhook_mode = settings.bot_update_mode == "webhook"
 
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        # app.main passes its shared Bot/dispatcher/pool; standalone uvicorn workers build and own their own.
+        owns_bot = bot is None
+        app.state.bot = bot or create_bot(settings)
+        app.state.outbox_dispatcher = outbox_dispatcher
+        app.state.update_pool = update_pool
+        owned_tasks: list[asyncio.Task] = []
+        dispatcher = None
+        if webhook_mode and update_pool is None:
+            dispatcher = create_dispatcher(settings)
+            app.state.update_pool = UpdateWorkerPool(
+                dispatcher,
+                app.state.bot,
+                workers=settings.update_workers,
+                queue_size=settings.update_queue_size,
+            )
+            app.state.update_pool.start()
+            await dispatcher.emit_startup(bot=app.state.bot)
+            await register_telegram_webhook(app.state.bot, dispatcher, settings)
+            if outbox_dispatcher is None:
+                app.state.outbox_dispatcher = OutboxDispatcher(app.state.bot, settings=settings)
+                owned_tasks.append(asyncio.create_task(app.state.outbox_dispatcher.run()))
+        try:
+            yield
+        finally:
+            if dispatcher is not None:
+                await app.state.update_pool.stop()
+                await dispatcher.emit_shutdown(bot=app.state.bot)
+                await dispatcher.storage.close()
+            if owned_tasks:
+                app.state.outbox_dispatcher.stop()
+                await asyncio.gather(*owned_tasks, return_exceptions=True)
+            if owns_bot:
+                await app.state.bot.session.close()
 
-def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
     app.include_router(lead_router)
+    if webhook_mode:
+        app.include_router(create_telegram_router(settings.telegram_webhook_path))
     return app
 
 
@@ -4,7 +4,6 @@ import logging
 from datetime import datetime
 from uuid import UUID
 
-from aiogram import Bot
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy import select
@@ -15,10 +14,12 @@ from app.core.config import get_settings
 from app.db.enums import LeadStatus
 from app.db.models import Lead, User
 from app.db.session import async_session_factory
+from app.services.outbox_service import OutboxService
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
+outbox_service = OutboxService()
 
 MESSAGE_LIMIT = 3500
 
@@ -119,24 +120,20 @@ async def lead_webhook(payload: LeadWebhookPayload, request: Request) -> dict[st
             updated_at=datetime.utcnow(),
         )
         session.add(lead)
-        await session.commit()
-
-        logger.info("[webhook:lead] accepted external_id=%s", payload.external_id)
 
         recipients = await _get_ticket_managers(session)
-        if not recipients:
-            logger.info("[notify] no recipients for external_id=%s", payload.external_id)
-            return {"ok": True, "duplicate": False}
-
         message = _build_message(payload, normalized_phone)
-        async with Bot(settings.bot_token) as bot:
-            for user in recipients:
-                try:
-                    await bot.send_message(chat_id=user.id, text=message)
-                    logger.info("[notify] sent user_id=%s external_id=%s", user.id, payload.external_id)
-                except Exception:  # noqa: BLE001 - log and continue
-                    logger.exception(
-                        "[notify] failed user_id=%s external_id=%s", user.id, payload.external_id
-                    )
+        for user in recipients:
+            await outbox_service.enqueue_message(session, kind="lead_notify", chat_id=user.id, text=message)
+        await session.commit()
+
+    logger.info("[webhook:lead] accepted external_id=%s", payload.external_id)
+    if not recipients:
+        logger.info("[notify] no recipients for external_id=%s", payload.external_id)
+    else:
+        logger.info("[notify] queued recipients=%s external_id=%s", len(recipients), payload.external_id)
+        outbox_dispatcher = getattr(request.app.state, "outbox_dispatcher", None)
+        if outbox_dispatcher is not None:
+            outbox_dispatcher.wake()
 
     return {"ok": True, "duplicate": False}
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import hmac
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from fastapi import APIRouter, HTTPException, Request
+
+from app.core.config import Settings, get_settings
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+
+def create_telegram_router(path: str) -> APIRouter:
+    router = APIRouter()
+
+    @router.post(path)
+    async def telegram_webhook(request: Request) -> dict[str, bool]:
+        settings = get_settings()
+        if not settings.telegram_webhook_secret:
+            logger.warning("[webhook:telegram] rejected: secret missing")
+            raise HTTPException(status_code=503, detail="Webhook not configured")
+
+        header_secret = request.headers.get(SECRET_HEADER) or ""
+        if not hmac.compare_digest(header_secret, settings.telegram_webhook_secret):
+            logger.warning("[webhook:telegram] rejected: invalid secret")
+            raise HTTPException(status_code=401, detail="Unauthorized")
+
+        bot = request.app.state.bot
+        update = Update.model_validate(await request.json(), context={"bot": bot})
+        await request.app.state.update_pool.submit(update)
+        return {"ok": True}
+
+    return router
+
+
+async def register_telegram_webhook(bot: Bot, dispatcher: Dispatcher, settings: Settings) -> None:
+    if not settings.public_base_url or not settings.telegram_webhook_secret:
+        raise RuntimeError("BOT_UPDATE_MODE=webhook requires PUBLIC_BASE_URL and TELEGRAM_WEBHOOK_SECRET")
+    url = f"{settings.public_base_url.rstrip('/')}{settings.telegram_webhook_path}"
+    await bot.set_webhook(
+        url=url,
+        secret_token=settings.telegram_webhook_secret,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+        max_connections=min(100, max(1, settings.update_workers * 5)),
+    )
+    logger.info("[webhook:telegram] registered url=%s", url)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+
+logger = logging.getLogger(__name__)
+
+
+def update_chat_key(update: Update) -> int:
+    """Key that keeps all updates of one chat on the same worker."""
+    event = update.event
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        message = getattr(event, "message", None)
+        chat = getattr(message, "chat", None)
+    if chat is not None:
+        return chat.id
+    from_user = getattr(event, "from_user", None)
+    if from_user is not None:
+        return from_user.id
+    return update.update_id
+
+
+class UpdateWorkerPool:
+    """Feeds webhook updates to the Dispatcher with bounded concurrency and per-chat ordering."""
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, *, workers: int, queue_size: int) -> None:
+        self._dispatcher = dispatcher
+        self._bot = bot
+        self._queues: list[asyncio.Queue[Update | None]] = [
+            asyncio.Queue(maxsize=queue_size) for _ in range(max(1, workers))
+        ]
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(index, queue), name=f"update-worker-{index}")
+            for index, queue in enumerate(self._queues)
+        ]
+        logger.info("Update worker pool started, workers=%s", len(self._tasks))
+
+    async def submit(self, update: Update) -> None:
+        # A full queue makes the webhook wait, so Telegram slows down instead of us buffering without limit.
+        queue = self._queues[update_chat_key(update) % len(self._queues)]
+        await queue.put(update)
+
+    def queue_depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def stop(self) -> None:
+        if not self._tasks:
+            return
+        for queue in self._queues:
+            await queue.put(None)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Update worker pool stopped")
+
+    async def _worker(self, index: int, queue: asyncio.Queue[Update | None]) -> None:
+        while True:
+            update = await queue.get()
+            try:
+                if update is None:
+                    return
+                await self._dispatcher.feed_update(self._bot, update)
+            except Exception:  # noqa: BLE001 - one bad update must not stop the worker
+                logger.exception("Failed to process update worker=%s update_id=%s", index, update.update_id)
+            finally:
+                queue.task_done()
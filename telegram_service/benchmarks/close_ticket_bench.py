@@ -0,0 +1,196 @@
+"""Round trips and latency of closing a ticket with 20 photos: the old step-by-step path vs close_ticket.
+
+Run from telegram_service/ against a migrated database:
+    python -m benchmarks.close_ticket_bench --closes 200 --photos 20
+
+Every statement sent to Postgres counts as one round trip. The "legacy" variant reproduces the
+statement sequence close used before it was batched: reload the ticket, read each percent on its
+own, update, reload, one flush per audit event, then read the photos back for the report.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import selectinload
+
+from app.db.enums import AdSource, ProjectTransactionType, TicketCategory, TicketStatus, TransferStatus, UserRole
+from app.db.models import Ticket, TicketClosePhoto, TicketEvent, TicketMoneyOperation, User
+from app.db.session import async_session_factory, engine
+from app.services.ticket_service import TicketService
+
+BENCH_MASTER_ID = -424242001
+BENCH_ADMIN_ID = -424242002
+
+ticket_service = TicketService()
+
+
+class StatementCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+async def _seed(count: int, prefix: str) -> list[int]:
+    now = datetime.utcnow()
+    async with async_session_factory() as session:
+        for user_id, role in ((BENCH_MASTER_ID, UserRole.MASTER), (BENCH_ADMIN_ID, UserRole.ADMIN)):
+            if await session.get(User, user_id) is None:
+                session.add(
+                    User(
+                        id=user_id,
+                        role=role,
+                        display_name=f"bench {role.value.lower()}",
+                        master_percent=Decimal("50.00"),
+                        admin_percent=Decimal("10.00"),
+                    )
+                )
+        tickets = [
+            Ticket(
+                public_id=f"{prefix}{index:07d}",
+                status=TicketStatus.IN_PROGRESS,
+                category=TicketCategory.PC,
+                client_phone="+70000000000",
+                client_phone_digits="70000000000",
+                problem_text="bench",
+                ad_source=AdSource.UNKNOWN,
+                created_by_admin_id=BENCH_ADMIN_ID,
+                assigned_executor_id=BENCH_MASTER_ID,
+                created_at=now,
+                updated_at=now,
+            )
+            for index in range(count)
+        ]
+        session.add_all(tickets)
+        await session.commit()
+        return [ticket.id for ticket in tickets]
+
+
+def _photos(count: int) -> list[dict[str, str | None]]:
+    return [{"file_id": f"bench-file-{index}", "file_unique_id": f"bench-u-{index}"} for index in range(count)]
+
+
+async def _legacy_close(session, ticket_id: int, actor: User, photos: list[dict[str, str | None]]) -> None:
+    def with_users():
+        return select(Ticket).options(
+            selectinload(Ticket.assigned_executor),
+            selectinload(Ticket.junior_master),
+            selectinload(Ticket.closed_by_user),
+        )
+
+    now = datetime.utcnow()
+    await session.execute(with_users().where(Ticket.id == ticket_id))
+    await session.get(User, actor.id)
+    await session.execute(select(User).where(User.id == BENCH_MASTER_ID))
+    await session.execute(select(User).where(User.id == BENCH_ADMIN_ID))
+    await session.execute(
+        update(Ticket)
+        .where(Ticket.id == ticket_id, Ticket.status == TicketStatus.IN_PROGRESS)
+        .values(
+            status=TicketStatus.CLOSED,
+            closed_at=now,
+            revenue=Decimal("1000"),
+            expense=Decimal("100"),
+            net_profit=Decimal("900"),
+            transfer_status=TransferStatus.NOT_SENT,
+            updated_at=now,
+        )
+    )
+    await session.execute(with_users().where(Ticket.id == ticket_id).execution_options(populate_existing=True))
+    session.add_all(
+        [TicketClosePhoto(ticket_id=ticket_id, file_id=item["file_id"], created_at=now) for item in photos]
+    )
+    for op_type, amount in ((ProjectTransactionType.INCOME, "1000"), (ProjectTransactionType.EXPENSE, "100")):
+        session.add(
+            TicketMoneyOperation(ticket_id=ticket_id, op_type=op_type, amount=Decimal(amount), category_snapshot="PC")
+        )
+    session.add(TicketEvent(ticket_id=ticket_id, action="TICKET_CLOSED", actor_id=actor.id, payload={}))
+    await session.flush()
+    session.add(TicketEvent(ticket_id=ticket_id, action="TICKET_PAYOUTS_FIXED", actor_id=actor.id, payload={}))
+    await session.flush()
+    await session.execute(select(TicketClosePhoto).where(TicketClosePhoto.ticket_id == ticket_id))
+
+
+async def _batched_close(session, ticket_id: int, actor: User, photos: list[dict[str, str | None]]) -> None:
+    ticket = await ticket_service.close_ticket(
+        session,
+        ticket_id,
+        actor,
+        revenue=Decimal("1000"),
+        expense=Decimal("100"),
+        junior_master_id=None,
+        junior_master_percent=None,
+        closed_comment="bench",
+        close_photos=photos,
+    )
+    if ticket is None:
+        raise RuntimeError(f"close_ticket refused ticket {ticket_id}")
+
+
+async def _run(close, ticket_ids: list[int], photos: list[dict[str, str | None]]) -> tuple[list[float], list[int]]:
+    actor = User(id=BENCH_MASTER_ID, role=UserRole.MASTER, is_active=True)
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    timings: list[float] = []
+    round_trips: list[int] = []
+    try:
+        for ticket_id in ticket_ids:
+            async with async_session_factory() as session:
+                # Warm the connection outside the measurement, as the per-update session would have it.
+                await session.connection()
+                counter.count = 0
+                started = time.perf_counter()
+                await close(session, ticket_id, actor, photos)
+                await session.commit()
+                timings.append((time.perf_counter() - started) * 1000)
+                round_trips.append(counter.count + 1)  # + COMMIT
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+    return timings, round_trips
+
+
+def _report(label: str, timings: list[float], round_trips: list[int]) -> None:
+    ordered = sorted(timings)
+    p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)]
+    print(
+        f"{label:<10} n={len(timings):<5} round_trips={statistics.median(round_trips):4.0f} "
+        f"mean={statistics.fmean(timings):7.3f}ms p50={statistics.median(timings):7.3f}ms p99={p99:7.3f}ms"
+    )
+
+
+async def _cleanup() -> None:
+    async with async_session_factory() as session:
+        ticket_ids = select(Ticket.id).where(Ticket.created_by_admin_id == BENCH_ADMIN_ID)
+        for model in (TicketClosePhoto, TicketMoneyOperation, TicketEvent):
+            await session.execute(delete(model).where(model.ticket_id.in_(ticket_ids)))
+        await session.execute(delete(Ticket).where(Ticket.created_by_admin_id == BENCH_ADMIN_ID))
+        await session.execute(delete(User).where(User.id.in_([BENCH_MASTER_ID, BENCH_ADMIN_ID])))
+        await session.commit()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--closes", type=int, default=200)
+    parser.add_argument("--photos", type=int, default=20)
+    args = parser.parse_args()
+
+    photos = _photos(args.photos)
+    try:
+        for label, prefix, close in (("legacy", "L", _legacy_close), ("batched", "B", _batched_close)):
+            ticket_ids = await _seed(args.closes, prefix)
+            timings, round_trips = await _run(close, ticket_ids, photos)
+            _report(label, timings, round_trips)
+    finally:
+        await _cleanup()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
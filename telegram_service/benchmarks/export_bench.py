@@ -0,0 +1,53 @@
+"""Excel export: time, peak process memory and file size for growing periods.
+
+Run from telegram_service/ against a migrated (scratch) database:
+    python -m benchmarks.export_bench --tickets 300000 --days 30 365 1095
+
+Seeds the same synthetic dataset as benchmarks.query_plans (skipped when it already exists), then builds
+both export workbooks for the last N days of each --days value, shortest first. max_rss is the process
+high-water mark, so with the streaming export it should barely move between periods while the number of
+rows grows; the old in-memory export grew linearly with the period.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import resource
+import time
+from datetime import date, timedelta
+
+from app.db.session import async_session_factory, engine
+from app.services.finance_export import FinanceExportService
+from app.services.finance_service import FinanceService
+from benchmarks.query_plans import seed_tickets
+
+finance_service = FinanceService()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=300_000)
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365, 1095])
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    await seed_tickets(args.tickets)
+    exporter = FinanceExportService(finance_service, batch_size=args.batch_size)
+    try:
+        for days in sorted(args.days):
+            date_range = finance_service.build_range(date.today() - timedelta(days=days), date.today())
+            started = time.perf_counter()
+            async with async_session_factory() as session:
+                files = await exporter.build(session, date_range=date_range)
+                await session.rollback()
+            elapsed = time.perf_counter() - started
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            size = files.report.stat().st_size + files.operations.stat().st_size
+            files.remove()
+            print(f"last {days:>5} days  time={elapsed:8.2f}s max_rss={max_rss:8.1f}MiB files={size / 2**20:8.1f}MiB")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
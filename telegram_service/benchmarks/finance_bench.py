@@ -0,0 +1,171 @@
+"""Finance reports: the old query-per-figure code vs the single CTE query, and one master at a time vs a batch.
+
+Run from telegram_service/ against a migrated (scratch) database:
+    python -m benchmarks.finance_bench --tickets 300000 --repeat 50
+
+Seeds the same synthetic dataset as benchmarks.query_plans (skipped when it already exists). "legacy"
+reproduces the statements master_money (4) and project_summary (3) sent before they were merged.
+"all masters" computes every bench master's money for the last month, first with one master_money
+call per master, then with a single master_money_many call. Whole days are read from
+finance_daily_rollup; the "partial days" cases start and end mid-day, so their edges hit tickets too.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import case, event, func, select
+
+from app.db.enums import ProjectTransactionType, TicketStatus, TransferStatus
+from app.db.models import ProjectShare, ProjectTransaction, Ticket
+from app.db.session import async_session_factory, engine
+from app.services.finance_service import DateRange, FinanceService
+from benchmarks.close_ticket_bench import StatementCounter
+from benchmarks.query_plans import MASTERS, bench_master_id, seed_tickets
+
+finance_service = FinanceService()
+
+
+def _closed(date_range: DateRange) -> tuple[Any, ...]:
+    return (
+        Ticket.status == TicketStatus.CLOSED,
+        Ticket.closed_at >= date_range.start,
+        Ticket.closed_at <= date_range.end,
+    )
+
+
+async def _legacy_master_money(session, master_id: int, date_range: DateRange) -> None:
+    to_transfer = func.coalesce(Ticket.net_profit, 0) - func.coalesce(Ticket.executor_earned_amount, 0)
+    confirmed = case((Ticket.transfer_status == TransferStatus.CONFIRMED, to_transfer), else_=0)
+    closed = _closed(date_range)
+    await session.execute(
+        select(
+            func.coalesce(func.sum(Ticket.executor_earned_amount), 0),
+            func.coalesce(func.sum(to_transfer), 0),
+            func.coalesce(func.sum(confirmed), 0),
+        ).where(Ticket.assigned_executor_id == master_id, *closed)
+    )
+    await session.execute(
+        select(func.coalesce(func.sum(Ticket.admin_earned_amount), 0)).where(
+            Ticket.created_by_admin_id == master_id, *closed
+        )
+    )
+    await session.execute(
+        select(ProjectShare.percent).where(ProjectShare.user_id == master_id, ProjectShare.is_active.is_(True))
+    )
+    await session.execute(select(func.coalesce(func.sum(Ticket.net_profit), 0)).where(*closed))
+
+
+async def _legacy_project_summary(session, date_range: DateRange) -> None:
+    closed = _closed(date_range)
+    confirmed = Ticket.transfer_status == TransferStatus.CONFIRMED
+    await session.execute(
+        select(
+            func.coalesce(func.sum(Ticket.net_profit), 0),
+            func.coalesce(func.sum(case((confirmed, Ticket.net_profit), else_=0)), 0),
+            func.coalesce(func.sum(Ticket.executor_earned_amount), 0),
+            func.coalesce(func.sum(Ticket.admin_earned_amount), 0),
+            func.coalesce(func.sum(Ticket.junior_master_earned_amount), 0),
+            func.coalesce(func.sum(Ticket.project_take_amount), 0),
+            func.count(Ticket.id),
+            func.coalesce(func.sum(case((confirmed, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Ticket.is_repeat.is_(True), 1), else_=0)), 0),
+        ).where(*closed)
+    )
+    for transaction_type in (ProjectTransactionType.INCOME, ProjectTransactionType.EXPENSE):
+        await session.execute(
+            select(func.coalesce(func.sum(ProjectTransaction.amount), 0)).where(
+                ProjectTransaction.type == transaction_type,
+                ProjectTransaction.occurred_at >= date_range.start,
+                ProjectTransaction.occurred_at <= date_range.end,
+            )
+        )
+
+
+async def _each_master(session, date_range: DateRange) -> None:
+    for index in range(MASTERS):
+        await finance_service.master_money(session, bench_master_id(index), date_range=date_range)
+
+
+async def _batched_masters(session, date_range: DateRange) -> None:
+    requests = [(bench_master_id(index), date_range) for index in range(MASTERS)]
+    await finance_service.master_money_many(session, requests)
+
+
+async def _measure(
+    call: Callable[[Any], Awaitable[Any]], *, repeat: int, counter: StatementCounter
+) -> tuple[list[float], int]:
+    timings: list[float] = []
+    async with async_session_factory() as session:
+        await call(session)  # warm the connection and the plan cache
+        for _ in range(repeat):
+            counter.count = 0
+            started = time.perf_counter()
+            await call(session)
+            timings.append((time.perf_counter() - started) * 1000)
+        await session.rollback()
+    return timings, counter.count
+
+
+def _report(label: str, timings: list[float], round_trips: int) -> None:
+    ordered = sorted(timings)
+    p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)]
+    print(
+        f"{label:<30} n={len(timings):<4} round_trips={round_trips:<4} "
+        f"mean={statistics.fmean(timings):8.3f}ms p50={statistics.median(timings):8.3f}ms p99={p99:8.3f}ms"
+    )
+
+
+async def _check_same(date_range: DateRange) -> None:
+    # The batch must agree with per-master calls, or the timings compare different work.
+    async with async_session_factory() as session:
+        single = [
+            await finance_service.master_money(session, bench_master_id(index), date_range=date_range)
+            for index in range(MASTERS)
+        ]
+        batch = await finance_service.master_money_many(
+            session, [(bench_master_id(index), date_range) for index in range(MASTERS)]
+        )
+    if single != batch:
+        raise SystemExit("master_money_many disagrees with master_money")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    await seed_tickets(args.tickets)
+    month = finance_service.build_range(date.today() - timedelta(days=30), date.today())
+    master_id = bench_master_id(3)
+    now = datetime.utcnow()
+    partial = DateRange(start=now - timedelta(days=30, hours=5), end=now)
+    cases: list[tuple[str, Callable[[Any], Awaitable[Any]]]] = [
+        ("master_money legacy", lambda s: _legacy_master_money(s, master_id, month)),
+        ("master_money", lambda s: finance_service.master_money(s, master_id, date_range=month)),
+        ("project_summary legacy", lambda s: _legacy_project_summary(s, month)),
+        ("project_summary", lambda s: finance_service.project_summary(s, date_range=month)),
+        ("master_money partial days", lambda s: finance_service.master_money(s, master_id, date_range=partial)),
+        ("project_summary partial days", lambda s: finance_service.project_summary(s, date_range=partial)),
+        (f"all masters x{MASTERS} one by one", lambda s: _each_master(s, month)),
+        (f"all masters x{MASTERS} batched", lambda s: _batched_masters(s, month)),
+    ]
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        await _check_same(month)
+        for label, call in cases:
+            timings, round_trips = await _measure(call, repeat=args.repeat, counter=counter)
+            _report(label, timings, round_trips)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""Per-update FSM overhead: MemoryStorage vs PostgresStorage (cold cache and warm cache).
+
+Run from telegram_service/ against a migrated database:
+    python -m benchmarks.fsm_storage_bench --updates 2000 --chats 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import delete
+
+from app.bot.fsm_storage import PostgresStorage
+from app.db.models import FsmState
+from app.db.session import async_session_factory
+
+BENCH_BOT_ID = -424242
+
+
+async def _one_update(storage: BaseStorage, key: StorageKey, step: int) -> None:
+    # Mirrors a wizard step: read state, read data, merge new fields, move to the next state.
+    await storage.get_state(key)
+    data = await storage.get_data(key)
+    photos = list(data.get("close_photos", []))
+    photos.append({"file_id": f"file-{step}", "file_unique_id": f"u-{step}"})
+    await storage.update_data(key, {"revenue": Decimal("1500.00"), "close_photos": photos[-20:]})
+    await storage.set_state(key, f"TicketCloseStates:step_{step % 5}")
+
+
+async def _run(storage: BaseStorage, *, updates: int, chats: int) -> list[float]:
+    timings = []
+    for step in range(updates):
+        chat_id = step % chats + 1
+        key = StorageKey(bot_id=BENCH_BOT_ID, chat_id=chat_id, user_id=chat_id)
+        started = time.perf_counter()
+        await _one_update(storage, key, step)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)]
+    print(
+        f"{label:<28} n={len(timings):<6} mean={statistics.fmean(timings):7.3f}ms "
+        f"p50={statistics.median(timings):7.3f}ms p99={p99:7.3f}ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--chats", type=int, default=200)
+    args = parser.parse_args()
+
+    _report("memory", await _run(MemoryStorage(), updates=args.updates, chats=args.chats))
+
+    for label, cache_ttl in (("postgres (no cache)", 0.0), ("postgres (cached)", 300.0)):
+        storage = PostgresStorage(
+            state_ttl=timedelta(hours=1),
+            cache_ttl=cache_ttl,
+            cache_size=10_000,
+            flush_interval=0.2,
+        )
+        timings = await _run(storage, updates=args.updates, chats=args.chats)
+        flush_started = time.perf_counter()
+        await storage.close()
+        _report(label, timings)
+        print(f"{'':<28} final flush {(time.perf_counter() - flush_started) * 1000:.1f}ms")
+
+    async with async_session_factory() as session:
+        await session.execute(delete(FsmState).where(FsmState.bot_id == BENCH_BOT_ID))
+        await session.commit()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+"""What-if payout simulation: many percent scenarios over one period of closed tickets.
+
+Run from telegram_service/ (no database needed, the tickets are synthetic):
+    python -m benchmarks.payout_sim_bench --tickets 100000 --scenarios 50
+
+Times PayoutSimulation over all scenarios and, for the first --check scenarios, the same payouts computed
+ticket by ticket with TicketService.calculate_payouts in Decimal. Per-user totals of both must match to the
+kopeck; the Decimal time is also extrapolated to all scenarios.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from decimal import Decimal
+
+from app.services.payout_simulator import PayoutColumns, PayoutScenario, PayoutSimulation, to_kopecks
+from app.services.ticket_service import TicketService
+
+MASTERS = range(1, 41)
+ADMINS = range(101, 106)
+JUNIORS = range(201, 211)
+SHAREHOLDERS = (101, 102, 103)
+
+
+def _percent(rng: random.Random, low: int, high: int) -> Decimal:
+    return Decimal(rng.randrange(low * 100, high * 100 + 1, 25)) / 100
+
+
+def make_tickets(count: int, seed: int) -> list[tuple]:
+    """Rows shaped like FinanceService.stream_payout_groups, one ticket each (the worst case, no grouping)."""
+    rng = random.Random(seed)
+    master_percent = {user_id: _percent(rng, 35, 60) for user_id in MASTERS}
+    admin_percent = {user_id: _percent(rng, 5, 15) for user_id in ADMINS}
+    rows = []
+    for _ in range(count):
+        revenue = Decimal(rng.randrange(500, 30_000, 50))
+        expense = Decimal(rng.randrange(0, int(revenue) // 3 + 1)) + Decimal(rng.randrange(100)) / 100
+        net = max(revenue - expense, Decimal("0"))
+        executor = rng.choice(MASTERS)
+        admin = rng.choice(ADMINS)
+        junior = rng.choice(JUNIORS) if rng.random() < 0.2 else None
+        junior_pct = _percent(rng, 0, 10) if junior else None
+        rows.append((net, executor, master_percent[executor], admin, admin_percent[admin], junior, junior_pct, 1))
+    return rows
+
+
+def make_scenarios(count: int, seed: int) -> list[PayoutScenario]:
+    rng = random.Random(seed)
+    scenarios = []
+    for index in range(count):
+        masters = rng.sample(list(MASTERS), rng.randint(1, 10))
+        scenarios.append(
+            PayoutScenario(
+                name=f"scenario_{index}",
+                master_percents={user_id: _percent(rng, 30, 65) for user_id in masters},
+                admin_percents={rng.choice(ADMINS): _percent(rng, 3, 20)} if index % 2 else {},
+                junior_percents={rng.choice(JUNIORS): _percent(rng, 0, 15)} if index % 3 == 0 else {},
+                shares={user_id: _percent(rng, 5, 30) for user_id in SHAREHOLDERS} if index % 5 == 0 else None,
+            )
+        )
+    return scenarios
+
+
+def decimal_payouts(rows: list[tuple], scenario: PayoutScenario, service: TicketService) -> tuple[dict, Decimal, int]:
+    payouts: dict[int, Decimal] = {}
+    take = Decimal("0")
+    invalid = 0
+    for net, executor, executor_pct, admin, admin_pct, junior, junior_pct, _count in rows:
+        result = service.calculate_payouts(
+            revenue=net,
+            expense=Decimal("0"),
+            executor_percent=scenario.master_percents.get(executor, executor_pct),
+            admin_percent=scenario.admin_percents.get(admin, admin_pct),
+            junior_percent=scenario.junior_percents.get(junior, junior_pct) if junior else Decimal("0"),
+        )
+        if result is None:
+            invalid += 1
+            continue
+        for user_id, amount in (
+            (executor, result["executor_earned"]),
+            (admin, result["admin_earned"]),
+            (junior, result["junior_earned"]),
+        ):
+            if user_id and amount:
+                payouts[user_id] = payouts.get(user_id, Decimal("0")) + amount
+        take += result["project_take"]
+    return payouts, take, invalid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--scenarios", type=int, default=50)
+    parser.add_argument("--check", type=int, default=3, help="scenarios to recompute in Decimal and compare")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rows = make_tickets(args.tickets, args.seed)
+    scenarios = make_scenarios(args.scenarios, args.seed)
+    net_cash = sum(to_kopecks(row[0]) for row in rows)
+    active_shares = {user_id: 1000 for user_id in SHAREHOLDERS}
+
+    started = time.perf_counter()
+    columns = PayoutColumns()
+    columns.extend(rows)
+    simulation = PayoutSimulation(columns)
+    prepared = time.perf_counter()
+    results = [simulation.run(scenario, net_cash=net_cash, active_shares=active_shares) for scenario in scenarios]
+    finished = time.perf_counter()
+    print(
+        f"columnar  tickets={args.tickets} scenarios={len(scenarios)} load+group={prepared - started:6.2f}s "
+        f"scenarios={finished - prepared:6.2f}s ({(finished - prepared) / len(scenarios) * 1000:7.1f}ms each)"
+    )
+
+    service = TicketService()
+    checked = scenarios[: args.check]
+    started = time.perf_counter()
+    for scenario, result in zip(checked, results):
+        payouts, take, invalid = decimal_payouts(rows, scenario, service)
+        if payouts != result.payouts or take != result.project_take or invalid != result.invalid_tickets:
+            raise SystemExit(f"{scenario.name}: columnar payouts differ from calculate_payouts")
+    if checked:
+        per_scenario = (time.perf_counter() - started) / len(checked)
+        print(
+            f"decimal   checked={len(checked)} identical, {per_scenario * 1000:7.1f}ms each, "
+            f"~{per_scenario * len(scenarios):6.2f}s for all scenarios"
+        )
+    biggest = max(results, key=lambda item: abs(item.project_take_delta))
+    print(
+        f"largest project take change: {biggest.name} {biggest.project_take_delta:+} "
+        f"({len(biggest.deltas)} users, payouts {sum(biggest.deltas.values(), Decimal('0')):+})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Parallel ticket creation: public_id from the in-transaction counter row vs per-process reserved blocks.
+
+Run from telegram_service/ against a migrated database:
+    python -m benchmarks.public_id_bench --tickets 5000 --concurrency 50 --processes 4 --block-size 10
+
+Each task opens a session, takes a public_id, inserts a ticket and commits, like create_ticket does.
+"in-transaction" bumps daily_counters inside that transaction (the old allocator, without its 99
+limit), so creators queue on the counter row until commit. "blocks" uses PublicIdAllocator; the
+--processes option simulates several bot processes, each with its own allocator.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, datetime
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.enums import AdSource, TicketCategory, TicketStatus, UserRole
+from app.db.models import DailyCounter, Ticket, User
+from app.db.session import async_session_factory, engine
+from app.services.public_ids import PublicIdAllocator, format_public_id
+
+BENCH_ADMIN_ID = -424242003
+# A day no real ticket can have; every run starts from an empty counter for it.
+BENCH_DAY = date(2099, 1, 1)
+
+
+async def _in_transaction_id(session) -> str:
+    result = await session.execute(
+        insert(DailyCounter)
+        .values(counter_date=BENCH_DAY, counter=1)
+        .on_conflict_do_update(index_elements=[DailyCounter.counter_date], set_={"counter": DailyCounter.counter + 1})
+        .returning(DailyCounter.counter)
+    )
+    return format_public_id(BENCH_DAY, int(result.scalar_one()))
+
+
+async def _create(allocator: PublicIdAllocator | None) -> float:
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    async with async_session_factory() as session:
+        if allocator is None:
+            public_id = await _in_transaction_id(session)
+        else:
+            public_id = await allocator.next_public_id(BENCH_DAY)
+        session.add(
+            Ticket(
+                public_id=public_id,
+                status=TicketStatus.READY_FOR_WORK,
+                category=TicketCategory.PC,
+                client_phone="+70000000000",
+                client_phone_digits="70000000000",
+                problem_text="bench",
+                ad_source=AdSource.UNKNOWN,
+                created_by_admin_id=BENCH_ADMIN_ID,
+                created_at=now,
+                updated_at=now,
+            )
+        )
+        await session.commit()
+    return (time.perf_counter() - started) * 1000
+
+
+async def _run(
+    allocators: list[PublicIdAllocator | None], *, tickets: int, concurrency: int
+) -> tuple[float, list[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> float:
+        async with semaphore:
+            return await _create(allocators[index % len(allocators)])
+
+    started = time.perf_counter()
+    timings = await asyncio.gather(*(one(index) for index in range(tickets)))
+    return time.perf_counter() - started, list(timings)
+
+
+def _report(label: str, elapsed: float, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)]
+    print(
+        f"{label:<16} n={len(timings):<6} {len(timings) / elapsed:8.1f} tickets/s "
+        f"p50={statistics.median(timings):7.2f}ms p99={p99:7.2f}ms"
+    )
+
+
+async def _reset() -> None:
+    async with async_session_factory() as session:
+        await session.execute(delete(Ticket).where(Ticket.created_by_admin_id == BENCH_ADMIN_ID))
+        await session.execute(delete(DailyCounter).where(DailyCounter.counter_date == BENCH_DAY))
+        await session.commit()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--block-size", type=int, default=10)
+    args = parser.parse_args()
+
+    async with async_session_factory() as session:
+        if await session.get(User, BENCH_ADMIN_ID) is None:
+            session.add(User(id=BENCH_ADMIN_ID, role=UserRole.ADMIN, display_name="bench admin"))
+            await session.commit()
+    variants: list[tuple[str, list[PublicIdAllocator | None]]] = [
+        ("in-transaction", [None]),
+        ("blocks", [PublicIdAllocator(block_size=args.block_size) for _ in range(args.processes)]),
+    ]
+    try:
+        for label, allocators in variants:
+            await _reset()
+            elapsed, timings = await _run(allocators, tickets=args.tickets, concurrency=args.concurrency)
+            _report(label, elapsed, timings)
+    finally:
+        await _reset()
+        async with async_session_factory() as session:
+            await session.execute(delete(User).where(User.id == BENCH_ADMIN_ID))
+            await session.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,260 @@
+"""Query-plan check for the hot ticket lists and finance sums: fails when any of them seq-scans a big table.
+
+Run from telegram_service/ against a migrated (scratch) database:
+    python -m benchmarks.query_plans --tickets 300000
+
+Seeds a synthetic dataset (skipped when enough bench rows already exist), runs ANALYZE, calls each
+service method while recording the SELECTs it sends, then replays every recorded SELECT under
+EXPLAIN (ANALYZE, BUFFERS). Prints time and buffers per query and exits with status 1 if a
+Seq Scan on one of CHECKED_TABLES shows up. Use --cleanup to remove the bench rows afterwards.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import delete, event, func, select, text
+
+from app.db.enums import UserRole
+from app.db.models import Ticket, User
+from app.db.session import async_session_factory, engine
+from app.services.finance_rollup import finance_rollup
+from app.services.finance_service import FinanceService
+from app.services.issue_service import IssueService
+from app.services.pagination import PageCursor
+from app.services.ticket_service import TicketService
+
+CHECKED_TABLES = {"tickets", "project_transactions", "ticket_money_operations"}
+BENCH_USER_BASE = -424243000
+MASTERS = 50
+ADMINS = 10
+DAYS = 3 * 365
+
+ticket_service = TicketService()
+issue_service = IssueService()
+finance_service = FinanceService()
+
+
+@dataclass
+class Recorder:
+    active: bool = False
+    statements: list[tuple[str, Any]] = field(default_factory=list)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if self.active and statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+
+def bench_master_id(index: int) -> int:
+    return BENCH_USER_BASE - index
+
+
+def bench_admin_id(index: int) -> int:
+    return BENCH_USER_BASE - MASTERS - index
+
+
+SEED_SQL = """
+INSERT INTO tickets (
+    public_id, status, category, client_phone, client_phone_digits, problem_text, ad_source, is_repeat,
+    created_by_admin_id, assigned_executor_id, junior_master_id, created_at, updated_at, closed_at,
+    revenue, expense, net_profit, transfer_status, executor_earned_amount, admin_earned_amount,
+    project_take_amount
+)
+SELECT
+    'Q' || lpad(g::text, 9, '0'),
+    s.status::ticket_status,
+    'PC'::ticket_category,
+    '+7' || s.phone,
+    '7' || s.phone,
+    'bench',
+    'UNKNOWN'::ad_source,
+    random() < 0.1,
+    CAST(:admin_base AS bigint) - (g % CAST(:admins AS bigint)),
+    CASE
+        WHEN s.status = 'READY_FOR_WORK' THEN NULL
+        ELSE CAST(:master_base AS bigint) - (g % CAST(:masters AS bigint))
+    END,
+    CASE WHEN g % 20 = 0 THEN CAST(:master_base AS bigint) - ((g + 1) % CAST(:masters AS bigint)) END,
+    s.created_at,
+    s.created_at,
+    CASE WHEN s.status = 'CLOSED' THEN s.created_at + interval '1 day' END,
+    CASE WHEN s.status = 'CLOSED' THEN 3000 END,
+    CASE WHEN s.status = 'CLOSED' THEN 500 END,
+    CASE WHEN s.status = 'CLOSED' THEN CASE WHEN g % 50 = 0 THEN 0 ELSE 2500 END END,
+    CASE WHEN s.status = 'CLOSED' THEN
+        (CASE WHEN g % 10 = 0 THEN 'SENT' WHEN g % 10 = 1 THEN 'NOT_SENT' ELSE 'CONFIRMED' END)::transfer_status
+    END,
+    CASE WHEN s.status = 'CLOSED' THEN 1250 END,
+    CASE WHEN s.status = 'CLOSED' THEN 250 END,
+    CASE WHEN s.status = 'CLOSED' THEN 1000 END
+FROM generate_series(CAST(:first AS bigint), CAST(:last AS bigint)) AS g
+CROSS JOIN LATERAL (
+    SELECT
+        CASE
+            WHEN g % 100 < 90 THEN 'CLOSED'
+            WHEN g % 100 < 93 THEN 'CANCELLED'
+            WHEN g % 100 < 96 THEN 'READY_FOR_WORK'
+            WHEN g % 100 < 98 THEN 'IN_PROGRESS'
+            ELSE 'IN_WORK'
+        END AS status,
+        lpad((g * 7919 % 10000000000)::text, 10, '0') AS phone,
+        now()::timestamp - CAST(:days AS int) * (1 - g / CAST(:last AS float)) * interval '1 day' AS created_at
+) AS s
+"""
+
+
+async def seed_tickets(count: int) -> None:
+    async with async_session_factory() as session:
+        for index in range(MASTERS):
+            await session.merge(User(id=bench_master_id(index), role=UserRole.MASTER, display_name="bench master"))
+        for index in range(ADMINS):
+            await session.merge(User(id=bench_admin_id(index), role=UserRole.ADMIN, display_name="bench admin"))
+        existing = await session.scalar(
+            select(func.count()).select_from(Ticket).where(Ticket.public_id.like("Q%"))
+        )
+        if existing < count:
+            print(f"seeding {count - existing} tickets...")
+            batch = 50_000
+            for first in range(existing + 1, count + 1, batch):
+                await session.execute(
+                    text(SEED_SQL),
+                    {
+                        "first": first,
+                        "last": min(first + batch - 1, count),
+                        "admin_base": bench_admin_id(0),
+                        "admins": ADMINS,
+                        "master_base": bench_master_id(0),
+                        "masters": MASTERS,
+                        "days": DAYS,
+                    },
+                )
+                await session.commit()
+            # The seed bypasses the services, so the daily rollup is recomputed from the new rows.
+            await finance_rollup.rebuild(session)
+        await session.commit()
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE tickets"))
+        await conn.execute(text("ANALYZE project_transactions"))
+        await conn.execute(text("ANALYZE finance_daily_rollup"))
+        await conn.commit()
+
+
+def _cases() -> list[tuple[str, Callable[[Any], Awaitable[Any]]]]:
+    master = User(id=bench_master_id(3), role=UserRole.MASTER, is_active=True)
+    admin = User(id=bench_admin_id(0), role=UserRole.SUPER_ADMIN, is_active=True)
+    month = finance_service.build_range(date.today() - timedelta(days=30), date.today())
+    year_ago = datetime.utcnow() - timedelta(days=365)
+    closed_cursor = PageCursor(direction="after", key=(year_ago, year_ago, 0))
+    return [
+        ("list_queue", lambda s: ticket_service.list_queue(s)),
+        ("list_active", lambda s: ticket_service.list_active(s)),
+        ("list_my_active", lambda s: ticket_service.list_my_active(s, master.id)),
+        ("list_my_closed", lambda s: ticket_service.list_my_closed(s, master.id)),
+        (
+            "list_my_closed_page",
+            lambda s: ticket_service.list_my_closed_page(s, master.id, page_size=10, with_total=True),
+        ),
+        (
+            "list_my_closed_page:deep",
+            lambda s: ticket_service.list_my_closed_page(s, master.id, cursor=closed_cursor, page_size=10),
+        ),
+        ("list_transfer_pending", lambda s: ticket_service.list_transfer_pending(s)),
+        ("list_repeats", lambda s: ticket_service.list_repeats(s)),
+        (
+            "list_for_actor_page:admin",
+            lambda s: ticket_service.list_for_actor_page(s, admin, filter_key="all", page_size=10),
+        ),
+        (
+            "list_for_actor_page:master",
+            lambda s: ticket_service.list_for_actor_page(s, master, filter_key="active", page_size=10),
+        ),
+        (
+            "search_for_actor_page:phone",
+            lambda s: ticket_service.search_for_actor_page(s, admin, phone_digits="4567", page_size=10),
+        ),
+        ("search_by_phone", lambda s: ticket_service.search_by_phone(s, "+70000079190")),
+        ("list_transfer_overdue", lambda s: issue_service.list_transfer_overdue(s, days=3)),
+        ("list_zero_profit", lambda s: issue_service.list_zero_profit(s)),
+        ("master_money", lambda s: finance_service.master_money(s, master.id, date_range=month)),
+        ("admin_salary", lambda s: finance_service.admin_salary(s, admin.id, date_range=month)),
+        ("junior_salary", lambda s: finance_service.junior_salary(s, master.id, date_range=month)),
+        ("project_summary", lambda s: finance_service.project_summary(s, date_range=month)),
+        ("masters_money", lambda s: finance_service.masters_money(s, date_range=month)),
+    ]
+
+
+def _walk(plan: dict[str, Any]):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+async def _explain(statement: str, parameters: Any) -> dict[str, Any]:
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(
+            "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters
+        )
+        raw = result.scalar_one()
+        await conn.rollback()
+    document = json.loads(raw) if isinstance(raw, str) else raw
+    return document[0]
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=300_000)
+    parser.add_argument("--cleanup", action="store_true", help="delete the bench rows when done")
+    args = parser.parse_args()
+
+    await seed_tickets(args.tickets)
+    recorder = Recorder()
+    event.listen(engine.sync_engine, "before_cursor_execute", recorder)
+    failures: list[str] = []
+    try:
+        for name, call in _cases():
+            recorder.statements.clear()
+            async with async_session_factory() as session:
+                recorder.active = True
+                try:
+                    await call(session)
+                finally:
+                    recorder.active = False
+                await session.rollback()
+            for position, (statement, parameters) in enumerate(list(recorder.statements), start=1):
+                explained = await _explain(statement, parameters)
+                plan = explained["Plan"]
+                scanned = {node["Relation Name"] for node in _walk(plan) if node["Node Type"] == "Seq Scan"}
+                seq_scans = sorted(scanned & CHECKED_TABLES)
+                label = f"{name}#{position}"
+                status = "FAIL seq scan on " + ", ".join(seq_scans) if seq_scans else "ok"
+                print(
+                    f"{label:<34} {explained['Execution Time']:9.3f}ms "
+                    f"hit={plan.get('Shared Hit Blocks', 0):<7} read={plan.get('Shared Read Blocks', 0):<7} {status}"
+                )
+                if seq_scans:
+                    failures.append(label)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", recorder)
+        if args.cleanup:
+            async with async_session_factory() as session:
+                await session.execute(delete(Ticket).where(Ticket.public_id.like("Q%")))
+                await session.execute(
+                    delete(User).where(User.id <= BENCH_USER_BASE, User.id > BENCH_USER_BASE - MASTERS - ADMINS)
+                )
+                await finance_rollup.rebuild(session)
+                await session.commit()
+        await engine.dispose()
+    if failures:
+        print(f"{len(failures)} queries seq-scan a checked table: {', '.join(failures)}")
+        return 1
+    print("no seq scans on checked tables")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,157 @@
+"""Event-loop lag while an export workbook is written: inline on the loop vs in the report process pool.
+
+Run from telegram_service/ (no database needed, the rows are synthetic):
+    python -m benchmarks.report_pool_bench --tickets 100000 --workers 1
+
+A probe task sleeps PROBE_INTERVAL in a loop and records how late it wakes up; that lateness is what
+every other update and the lead webhook would wait. "inline" calls write_finance_report on the event
+loop thread, as the handler used to; "pool" runs the same job through ReportPool.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+from app.db.enums import AdSource, ProjectTransactionType, TicketCategory, TicketStatus, TransferStatus
+from app.services.finance_service import EXPORT_TICKET_COLUMNS
+from app.services.report_worker import (
+    SUMMARY_HEADERS,
+    TICKETS_KIND,
+    TRANSACTIONS_KIND,
+    FinanceReportJob,
+    ReportPool,
+    spool_rows,
+    write_finance_report,
+)
+
+PROBE_INTERVAL = 0.005
+BATCH = 2000
+TICKET_FIELDS = EXPORT_TICKET_COLUMNS + ("created_by_name", "executor_name", "junior_name", "confirmed_by_name")
+TRANSACTION_FIELDS = (
+    "id",
+    "type",
+    "amount",
+    "category",
+    "comment",
+    "occurred_at",
+    "created_at",
+    "created_by",
+    "creator_name",
+)
+
+
+def _ticket(index: int, now: datetime) -> tuple:
+    values = {
+        "id": index,
+        "status": TicketStatus.CLOSED,
+        "category": TicketCategory.PC,
+        "client_phone": f"+7{index:010d}",
+        "scheduled_at": now,
+        "ad_source": AdSource.UNKNOWN,
+        "created_by_admin_id": 1,
+        "assigned_executor_id": 2,
+        "junior_master_id": 3 if index % 20 == 0 else None,
+        "revenue": Decimal("3000.00"),
+        "expense": Decimal("500.00"),
+        "net_profit": Decimal("2500.00"),
+        "transfer_status": TransferStatus.CONFIRMED,
+        "transfer_sent_at": now,
+        "transfer_confirmed_at": now,
+        "transfer_confirmed_by": 1,
+        "is_repeat": index % 10 == 0,
+        "repeat_ticket_ids": [index - 1] if index % 10 == 0 else None,
+        "executor_percent_at_close": Decimal("50.00"),
+        "executor_earned_amount": Decimal("1250.00"),
+        "admin_percent_at_close": Decimal("10.00"),
+        "admin_earned_amount": Decimal("250.00"),
+        "junior_master_percent_at_close": Decimal("5.00") if index % 20 == 0 else None,
+        "junior_master_earned_amount": Decimal("125.00") if index % 20 == 0 else None,
+        "created_by_name": "bench admin",
+        "executor_name": "bench master",
+        "junior_name": "bench junior" if index % 20 == 0 else None,
+        "confirmed_by_name": "bench admin",
+    }
+    return tuple(values[name] for name in TICKET_FIELDS)
+
+
+def _write_spool(path: Path, tickets: int) -> None:
+    now = datetime.utcnow()
+    with path.open("wb") as out:
+        for first in range(1, tickets + 1, BATCH):
+            rows = [_ticket(index, now) for index in range(first, min(first + BATCH, tickets + 1))]
+            spool_rows(out, TICKETS_KIND, TICKET_FIELDS, rows)
+        transactions = [
+            (index, ProjectTransactionType.INCOME, Decimal("100.00"), "bench", None, now, now, 1, "bench admin")
+            for index in range(1, tickets // 100 + 1)
+        ]
+        spool_rows(out, TRANSACTIONS_KIND, TRANSACTION_FIELDS, transactions)
+
+
+async def _probe(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((time.perf_counter() - started - PROBE_INTERVAL) * 1000)
+
+
+async def _measure(label: str, run) -> None:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+    await asyncio.sleep(0.2)  # a few idle samples, so an export that blocks from the start still shows up
+    started = time.perf_counter()
+    await run()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    ordered = sorted(lags)
+    p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)]
+    print(
+        f"{label:<8} build={elapsed:7.2f}s samples={len(lags):<6} lag p50={statistics.median(lags):8.2f}ms "
+        f"p99={p99:8.2f}ms max={ordered[-1]:8.2f}ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    pool = ReportPool(workers=args.workers, timeout=3600)
+    with tempfile.TemporaryDirectory() as directory:
+        spool = Path(directory) / "bench.spool"
+        _write_spool(spool, args.tickets)
+        deadline = pool.deadline()
+        job = FinanceReportJob(
+            spool=str(spool),
+            report=str(Path(directory) / "report.xlsx"),
+            operations=str(Path(directory) / "operations.xlsx"),
+            summary_row=[None, None, *(0 for _ in SUMMARY_HEADERS[2:])],
+            share_rows=[],
+            deadline=deadline,
+        )
+        # Start the worker processes before measuring; the bot pays this once per process lifetime.
+        await pool.run(write_finance_report, job, deadline=deadline)
+
+        async def inline() -> None:
+            write_finance_report(job)
+
+        async def pooled() -> None:
+            await pool.run(write_finance_report, job, deadline=deadline)
+
+        try:
+            await _measure("inline", inline)
+            await _measure("pool", pooled)
+        finally:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""Minimal local Bot API stand-in for offline runs: TELEGRAM_API_BASE_URL=http://127.0.0.1:8081."""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import logging
+import time
+
+from aiohttp import web
+
+
+logger = logging.getLogger("fake_bot_api")
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+_message_ids = itertools.count(1)
+
+
+def _message(chat_id: int | str, text: str | None = None) -> dict:
+    chat_type = "private" if isinstance(chat_id, int) and chat_id > 0 else "supergroup"
+    return {
+        "message_id": next(_message_ids),
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": chat_type},
+        "from": BOT_USER,
+        "text": text or "",
+    }
+
+
+def _result(method: str, params: dict) -> object:
+    if method == "getme":
+        return BOT_USER
+    if method in {"sendmessage", "sendphoto", "senddocument", "editmessagetext", "editmessagereplymarkup"}:
+        return _message(_chat_id(params), params.get("text"))
+    if method == "sendmediagroup":
+        media = params.get("media") or []
+        if isinstance(media, str):
+            media = json.loads(media)
+        return [_message(_chat_id(params)) for _ in media]
+    if method == "getupdates":
+        return []
+    if method == "getwebhookinfo":
+        return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+    return True
+
+
+def _chat_id(params: dict) -> int | str:
+    value = params.get("chat_id", 0)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+async def handle(request: web.Request) -> web.Response:
+    method = request.match_info["method"].lower()
+    if request.content_type == "application/json":
+        params = await request.json()
+    else:
+        params = dict(await request.post())
+    logger.info("%s %s", method, {key: value for key, value in params.items() if key != "media"})
+    return web.json_response({"ok": True, "result": _result(method, params)})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()